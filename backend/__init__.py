@@ -6,7 +6,7 @@ including the Flask application factory, database models, API routes, and other
 """
 
 import os
-from flask import Flask
+from flask import Flask, make_response
 from flask_cors import CORS
 from flask_migrate import Migrate
 from flask_limiter import Limiter
@@ -36,6 +36,17 @@ socketio = SocketIO()
 api = Api(version='1.0', title='Lucky Kangaroo API',
           description='API for Lucky Kangaroo - The Ultimate Exchange Platform')
 
+# MessagePack representation for mobile clients (Accept: application/msgpack);
+# flask-restx keeps answering in JSON when msgpack is not installed
+from .services.serialization import dump_msgpack, msgpack
+
+if msgpack is not None:
+    @api.representation('application/msgpack')
+    def output_msgpack(data, code, headers=None):
+        response = make_response(dump_msgpack(data, default=str), code)
+        response.headers.extend(headers or {})
+        return response
+
 # Initialize Celery without config
 celery = Celery()
 
@@ -117,6 +128,31 @@ def create_app(config_name=None):
     from .api.v1 import api_blueprint
     app.register_blueprint(api_blueprint)
     
+    # Trigram indexes for substring search (pg_trgm on PostgreSQL, FTS5 on SQLite)
+    from .services.trigram_index import install_trigram_indexes
+    with app.app_context():
+        install_trigram_indexes(db.engine)
+    
+    # Geohash spatial index: add the column to tables created before it and fill in
+    # rows that have coordinates but no cell (they are invisible to nearby searches)
+    from sqlalchemy.exc import SQLAlchemyError
+    from .services.spatial_index import ensure_geohash_index
+    with app.app_context():
+        try:
+            backfilled = ensure_geohash_index(db.session, (User, Listing))
+            if any(backfilled.values()):
+                app.logger.info('Geohash backfilled: %s', backfilled)
+        except SQLAlchemyError as e:
+            # Tables not created yet (first start): run `flask backfill-geohash` afterwards
+            db.session.rollback()
+            app.logger.warning('Geohash backfill skipped: %s', e)
+    
+    @app.cli.command('backfill-geohash')
+    def backfill_geohash_command():
+        """Add the geohash column if needed and index every located user and listing."""
+        for table_name, count in ensure_geohash_index(db.session, (User, Listing)).items():
+            print(f'{table_name}: {count} rows backfilled')
+    
     # Register error handlers
     register_error_handlers(app)
     
@@ -19,6 +19,9 @@ from ...extensions import db, limiter, s3_client
 from ...utils.decorators import validate_json, upload_file, admin_required
 from ...utils.rate_limits import get_limiter_key
 from ...utils.geo import get_coordinates, calculate_distance
+from ...services.category_closure import category_descendants
+from ...services.pagination import InvalidPagination, SortKey, coalesced, paginate, sort_keys
+from ...services.trigram_index import substring_filter
 from . import ns
 
 # Request parsers
@@ -67,6 +70,11 @@ search_parser.add_argument('sort_by', type=str, required=False, default='recent'
 search_parser.add_argument('page', type=int, required=False, default=1, help='Page number')
 search_parser.add_argument('per_page', type=int, required=False, default=20, 
                           help='Items per page (max 100)')
+search_parser.add_argument('cursor', type=str, required=False,
+                          help='Opaque cursor from X-Next-Cursor (keyset pagination, no total count)')
+search_parser.add_argument('count', type=str, required=False,
+                          choices=('exact', 'estimate', 'none'),
+                          help='Total count mode (default: exact for pages, none for cursors)')
 
 # File upload parser
 image_upload_parser = reqparse.RequestParser()
@@ -137,16 +145,16 @@ class ListingList(Resource):
             search = f"%{args['query']}%"
             query = query.filter(
                 or_(
-                    Listing.title.ilike(search),
-                    Listing.description.ilike(search),
+                    substring_filter(db.engine, [Listing.title, Listing.description], args['query']),
                     Listing.tags.any(search)
                 )
             )
             
         if args.get('category_id'):
-            # Include subcategories
-            category = Category.query.get_or_404(args['category_id'])
-            category_ids = [c.id for c in category.get_all_children()] + [category.id]
+            # Include subcategories (cached closure, rebuilt when categories change)
+            category_ids = category_descendants(Category, args['category_id'])
+            if category_ids is None:
+                ns.abort(404, 'Category not found')
             query = query.filter(Listing.category_id.in_(category_ids))
             
         if args.get('min_value') is not None:
@@ -189,20 +197,33 @@ class ListingList(Resource):
             
             return paginated_listings, 200
         
-        # Apply sorting
-        if args.get('sort_by') == 'recent':
-            query = query.order_by(Listing.created_at.desc())
-        elif args.get('sort_by') == 'value_asc':
-            query = query.order_by(Listing.value.asc())
-        elif args.get('sort_by') == 'value_desc':
-            query = query.order_by(Listing.value.desc())
+        # Apply sorting (tie-broken by id so pages can be walked with a cursor)
+        sort_by = args.get('sort_by') or 'recent'
+        if sort_by == 'value_asc':
+            keys = [coalesced(Listing.value, 0), SortKey(Listing.id)]
+        elif sort_by == 'value_desc':
+            keys = [coalesced(Listing.value, 0, descending=True), SortKey(Listing.id, True)]
+        else:
+            keys = sort_keys([Listing.created_at], Listing.id, descending=True)
         
-        # Pagination
-        page = args['page']
+        # Pagination (keyset when a cursor is given, the next one is sent in X-Next-Cursor)
         per_page = min(args['per_page'], 100)  # Max 100 per page
-        paginated_listings = query.paginate(page=page, per_page=per_page, error_out=False)
-        
-        return paginated_listings.items, 200
+        try:
+            listings, pagination = paginate(
+                query, keys, page=args['page'], per_page=per_page,
+                cursor=args.get('cursor'), sort=sort_by, count=args.get('count')
+            )
+        except InvalidPagination as e:
+            ns.abort(400, str(e))
+        
+        headers = {}
+        if pagination['next_cursor']:
+            headers['X-Next-Cursor'] = pagination['next_cursor']
+        if pagination.get('total') is not None:
+            headers['X-Total-Count'] = str(pagination['total'])
+            if pagination['total_is_estimate']:
+                headers['X-Total-Count-Estimated'] = 'true'
+        return listings, 200, headers
     
     @jwt_required()
     @ns.expect(create_listing_parser)
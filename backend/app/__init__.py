@@ -45,6 +45,18 @@ def create_app(config_name=None):
     from config import config as app_config
     app.config.from_object(app_config[config_name])
     
+    # Encodage JSON (orjson s'il est installé)
+    from services.serialization import FastJSONProvider
+    app.json = FastJSONProvider(app)
+    
+    # Compression des réponses (gzip, brotli s'il est installé)
+    from services.compression import init_compression
+    init_compression(app)
+    
+    # Requêtes groupées (/api/v1/batch)
+    from services.batch import init_batch
+    init_batch(app)
+    
     # Créer le dossier d'upload s'il n'existe pas
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     
@@ -63,6 +75,30 @@ def create_app(config_name=None):
     from app.api import api_bp
     app.register_blueprint(api_bp, url_prefix='/api/v1')
     
+    # Index de recherche en mémoire (repli et chemin rapide de /search)
+    from app.search import init_autocomplete, init_listing_index
+    from app.search.percolator import init_saved_search_alerts
+    from app.search.result_cache import init_result_cache
+    from app.search.spelling import init_spelling
+    from app.search.trending import init_trending
+    init_listing_index(app)
+    init_autocomplete(app)
+    init_spelling(app)
+    init_result_cache(app, cache)
+    init_trending(app)
+    init_saved_search_alerts(app)
+    
+    # Indexation incrémentale dans OpenSearch (si SEARCH_URL est configuré)
+    from app.search.indexer import init_search_indexer
+    from app.search.reindex import register_search_commands
+    init_search_indexer(app)
+    register_search_commands(app)
+    
+    # Index trigrammes des recherches de sous-chaînes (pg_trgm ou FTS5 selon la base)
+    from services.trigram_index import install_trigram_indexes
+    with app.app_context():
+        install_trigram_indexes(db.engine)
+    
     # Routes de base
     @app.route('/')
     def index():
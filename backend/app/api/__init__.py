@@ -16,6 +16,7 @@ from .chat import chat_bp
 from .search import search_bp
 from .admin import admin_bp
 from .ai import ai_bp
+from .batch import batch_bp
 
 # Enregistrer les blueprints
 api_bp.register_blueprint(auth_bp, url_prefix='/auth')
@@ -25,4 +26,5 @@ api_bp.register_blueprint(exchanges_bp, url_prefix='/exchanges')
 api_bp.register_blueprint(chat_bp, url_prefix='/chat')
 api_bp.register_blueprint(search_bp, url_prefix='/search')
 api_bp.register_blueprint(admin_bp, url_prefix='/admin')
-api_bp.register_blueprint(ai_bp, url_prefix='/ai')
\ No newline at end of file
+api_bp.register_blueprint(ai_bp, url_prefix='/ai')
+api_bp.register_blueprint(batch_bp, url_prefix='/batch')
\ No newline at end of file
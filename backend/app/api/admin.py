@@ -11,13 +11,18 @@ from marshmallow import Schema, fields, validate, ValidationError
 from datetime import datetime, timedelta
 from sqlalchemy import func, desc
 
-from app import db
+from app import db, cache
 from app.models.user import User, UserStatus, UserRole
 from app.models.listing import Listing, ListingStatus, ListingCategory
 from app.models.exchange import Exchange, ExchangeStatus
 from app.models.chat import Chat
 from app.models.notification import Notification, NotificationType
 from app.models.review import Review
+from app.search import search_metrics
+from app.search.list_view import with_list_relations
+from app.search.result_cache import CATEGORIES_TAG, invalidate
+from services.category_closure import invalidate_category_closure
+from services.pagination import InvalidPagination, paginate, sort_keys
 
 # Créer le blueprint
 admin_bp = Blueprint('admin', __name__)
@@ -331,7 +336,7 @@ def get_listings():
         sort_order = request.args.get('sort_order', 'desc')
         
         # Construire la requête
-        query = Listing.query
+        query = with_list_relations(Listing.query, Listing)
         
         # Appliquer les filtres
         if status:
@@ -346,40 +351,29 @@ def get_listings():
                 )
             )
         
-        # Tri
+        # Tri (départagé par l'identifiant pour la pagination par curseur)
+        descending = sort_order != 'asc'
         if sort_by == 'title':
-            if sort_order == 'asc':
-                query = query.order_by(Listing.title.asc())
-            else:
-                query = query.order_by(Listing.title.desc())
+            keys = sort_keys([Listing.title], Listing.id, descending)
         elif sort_by == 'views':
-            if sort_order == 'asc':
-                query = query.order_by(Listing.views_count.asc())
-            else:
-                query = query.order_by(Listing.views_count.desc())
+            keys = sort_keys([Listing.views_count], Listing.id, descending)
         else:  # created_at
-            if sort_order == 'asc':
-                query = query.order_by(Listing.created_at.asc())
-            else:
-                query = query.order_by(Listing.created_at.desc())
+            keys = sort_keys([Listing.created_at], Listing.id, descending)
         
-        # Pagination
-        pagination = query.paginate(
-            page=page, per_page=per_page, error_out=False
+        # Pagination (par curseur si `cursor` est fourni)
+        listings, pagination = paginate(
+            query, keys, page=page, per_page=per_page,
+            cursor=request.args.get('cursor'), sort=f'{sort_by}:{sort_order}',
+            count=request.args.get('count')
         )
         
         return jsonify({
-            'listings': [listing.to_dict(include_private=True) for listing in pagination.items],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': pagination.total,
-                'pages': pagination.pages,
-                'has_next': pagination.has_next,
-                'has_prev': pagination.has_prev
-            }
+            'listings': [listing.to_dict(include_private=True) for listing in listings],
+            'pagination': pagination
         }), 200
         
+    except InvalidPagination as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         current_app.logger.error(f"Erreur lors de la récupération des annonces: {str(e)}")
         return jsonify({'error': 'Erreur interne du serveur'}), 500
@@ -421,6 +415,8 @@ def create_category():
         
         db.session.add(category)
         db.session.commit()
+        invalidate_category_closure(ListingCategory)
+        invalidate(cache, [CATEGORIES_TAG])
         
         return jsonify({
             'message': 'Catégorie créée avec succès',
@@ -455,6 +451,8 @@ def update_category(category_id):
                 setattr(category, field, value)
         
         db.session.commit()
+        invalidate_category_closure(ListingCategory)
+        invalidate(cache, [CATEGORIES_TAG])
         
         return jsonify({
             'message': 'Catégorie mise à jour avec succès',
@@ -578,6 +576,7 @@ def get_system_health():
                 'redis': redis_status
             },
             'performance': performance_stats,
+            'search': search_metrics(),
             'timestamp': datetime.utcnow().isoformat()
         }), 200
         
@@ -50,13 +50,18 @@ class ResetPasswordSchema(Schema):
     token = fields.Str(required=True)
     password = fields.Str(required=True, validate=validate.Length(min=8))
 
+# Instancier les schémas (une fois : load() ne modifie pas l'instance)
+register_schema = RegisterSchema()
+login_schema = LoginSchema()
+forgot_password_schema = ForgotPasswordSchema()
+reset_password_schema = ResetPasswordSchema()
+
 @auth_bp.route('/register', methods=['POST'])
 @limiter.limit("5 per minute")
 def register():
     """Inscription d'un nouvel utilisateur"""
     try:
-        schema = RegisterSchema()
-        data = schema.load(request.json)
+        data = register_schema.load(request.json)
         
         # Vérifier si l'utilisateur existe déjà
         if User.query.filter_by(email=data['email']).first():
@@ -121,8 +126,7 @@ def register():
 def login():
     """Connexion d'un utilisateur"""
     try:
-        schema = LoginSchema()
-        data = schema.load(request.json)
+        data = login_schema.load(request.json)
         
         # Trouver l'utilisateur
         user = User.query.filter_by(email=data['email']).first()
@@ -281,8 +285,7 @@ def verify_email(token):
 def forgot_password():
     """Demander une réinitialisation de mot de passe"""
     try:
-        schema = ForgotPasswordSchema()
-        data = schema.load(request.json)
+        data = forgot_password_schema.load(request.json)
         
         user = User.query.filter_by(email=data['email']).first()
         
@@ -319,8 +322,7 @@ def forgot_password():
 def reset_password():
     """Réinitialiser le mot de passe"""
     try:
-        schema = ResetPasswordSchema()
-        data = schema.load(request.json)
+        data = reset_password_schema.load(request.json)
         
         user = User.query.filter_by(reset_token=data['token']).first()
         
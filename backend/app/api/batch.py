@@ -0,0 +1,28 @@
+"""
+Blueprint des requêtes groupées pour Lucky Kangaroo
+Plusieurs GET internes (profil, conversations, catégories…) en un aller-retour
+"""
+
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from app.models.user import User
+from services.batch import InvalidBatch
+
+# Créer le blueprint
+batch_bp = Blueprint('batch', __name__)
+
+@batch_bp.route('', methods=['POST'])
+@jwt_required(optional=True)
+def run_batch():
+    """Exécuter plusieurs sous-requêtes GET"""
+    current_user_id = get_jwt_identity()
+    if current_user_id:
+        # Chargé une fois dans la session partagée : les sous-requêtes le
+        # retrouvent dans l'identity map sans requête SQL
+        User.query.get(current_user_id)
+
+    try:
+        return jsonify(current_app.extensions['batch'].run(request.get_json(silent=True)))
+    except InvalidBatch as e:
+        return jsonify({'error': str(e)}), 400
@@ -13,8 +13,9 @@ from datetime import datetime, timedelta
 from app import db
 from app.models.user import User
 from app.models.listing import Listing, ListingStatus
-from app.models.exchange import Exchange, ExchangeStatus, ExchangeType, ExchangeParticipantRole
+from app.models.exchange import EXCHANGE_FIELDS, Exchange, ExchangeStatus, ExchangeType, ExchangeParticipantRole
 from app.models.notification import Notification, NotificationType
+from services.fieldsets import InvalidFields
 
 # Créer le blueprint
 exchanges_bp = Blueprint('exchanges', __name__)
@@ -78,9 +79,10 @@ def get_exchanges():
         exchange_type = request.args.get('exchange_type')
         sort_by = request.args.get('sort_by', 'created_at')
         sort_order = request.args.get('sort_order', 'desc')
+        requested_fields = EXCHANGE_FIELDS.parse(request.args.get('fields'))
         
-        # Construire la requête
-        query = Exchange.query.filter(
+        # Construire la requête (colonnes et relations des champs demandés, par lots)
+        query = Exchange.query.options(*EXCHANGE_FIELDS.load_options(Exchange, requested_fields)).filter(
             db.or_(
                 Exchange.owner_id == current_user_id,
                 Exchange.participants.any(user_id=current_user_id)
@@ -111,7 +113,9 @@ def get_exchanges():
         )
         
         return jsonify({
-            'exchanges': [exchange.to_dict(include_private=True) for exchange in pagination.items],
+            'exchanges': [
+                exchange.to_dict(include_private=True, fields=requested_fields) for exchange in pagination.items
+            ],
             'pagination': {
                 'page': page,
                 'per_page': per_page,
@@ -122,6 +126,8 @@ def get_exchanges():
             }
         }), 200
         
+    except InvalidFields as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         current_app.logger.error(f"Erreur lors de la récupération des échanges: {str(e)}")
         return jsonify({'error': 'Erreur interne du serveur'}), 500
@@ -132,6 +138,7 @@ def get_exchange(exchange_id):
     """Obtenir un échange spécifique"""
     try:
         current_user_id = get_jwt_identity()
+        requested_fields = EXCHANGE_FIELDS.parse(request.args.get('fields'))
         exchange = Exchange.query.get(exchange_id)
         
         if not exchange:
@@ -141,10 +148,13 @@ def get_exchange(exchange_id):
         if exchange.owner_id != current_user_id and not any(p.user_id == current_user_id for p in exchange.participants):
             return jsonify({'error': 'Non autorisé'}), 403
         
+        # Relations chargées à l'accès : seules celles des champs demandés
         return jsonify({
-            'exchange': exchange.to_dict(include_private=True)
+            'exchange': exchange.to_dict(include_private=True, fields=requested_fields)
         }), 200
         
+    except InvalidFields as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         current_app.logger.error(f"Erreur lors de la récupération de l'échange: {str(e)}")
         return jsonify({'error': 'Erreur interne du serveur'}), 500
@@ -9,14 +9,23 @@ from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from marshmallow import Schema, fields, validate, ValidationError
 from werkzeug.utils import secure_filename
+from datetime import date
+from sqlalchemy import func
 import os
 import uuid
 
-from app import db
+from app import db, cache
 from app.models.user import User
 from app.models.listing import Listing, ListingStatus, ListingType, ExchangeType, Condition
-from app.models.listing import ListingCategory, ListingImage
+from app.models.listing import LISTING_FIELDS, ListingCategory, ListingImage
 from app.models.notification import Notification, NotificationType
+from app.search.result_cache import CATEGORIES_TAG, tag_versions
+from app.search.spelling import did_you_mean
+from services.category_closure import category_descendants
+from services.conditional import conditional, etag_matches, make_etag, not_modified, with_validators
+from services.fieldsets import InvalidFields, fields_key
+from services.pagination import InvalidPagination, SortKey, coalesced, paginate, sort_keys
+from services.trigram_index import substring_filter
 
 # Créer le blueprint
 listings_bp = Blueprint('listings', __name__)
@@ -97,13 +106,18 @@ def get_listings():
         search = request.args.get('search')
         sort_by = request.args.get('sort_by', 'created_at')
         sort_order = request.args.get('sort_order', 'desc')
+        requested_fields = LISTING_FIELDS.parse(request.args.get('fields'))
         
-        # Construire la requête
-        query = Listing.query.filter_by(status=ListingStatus.ACTIVE.value)
+        # Construire la requête (colonnes et relations des champs demandés, par lots)
+        query = Listing.query.options(*LISTING_FIELDS.load_options(Listing, requested_fields)).filter_by(
+            status=ListingStatus.ACTIVE.value
+        )
         
         # Appliquer les filtres
         if category_id:
-            query = query.filter_by(category_id=category_id)
+            # La catégorie et toutes ses sous-catégories (fermeture en cache)
+            category_ids = category_descendants(ListingCategory, category_id) or {category_id}
+            query = query.filter(Listing.category_id.in_(category_ids))
         if listing_type:
             query = query.filter_by(listing_type=listing_type)
         if condition:
@@ -119,49 +133,43 @@ def get_listings():
         if exchange_type:
             query = query.filter(Listing.exchange_type.in_(['both', exchange_type]))
         if search:
-            query = query.filter(
-                db.or_(
-                    Listing.title.ilike(f'%{search}%'),
-                    Listing.description.ilike(f'%{search}%'),
-                    Listing.brand.ilike(f'%{search}%'),
-                    Listing.model.ilike(f'%{search}%')
-                )
-            )
-        
-        # Tri
+            query = query.filter(substring_filter(
+                db.engine,
+                [Listing.title, Listing.description, Listing.brand, Listing.model],
+                search
+            ))
+        
+        # Tri (départagé par l'identifiant pour la pagination par curseur)
+        descending = sort_order != 'asc'
         if sort_by == 'price':
-            if sort_order == 'asc':
-                query = query.order_by(Listing.estimated_value.asc())
-            else:
-                query = query.order_by(Listing.estimated_value.desc())
+            keys = [coalesced(Listing.estimated_value, 0, descending), SortKey(Listing.id, descending)]
         elif sort_by == 'views':
-            if sort_order == 'asc':
-                query = query.order_by(Listing.views_count.asc())
-            else:
-                query = query.order_by(Listing.views_count.desc())
+            keys = sort_keys([Listing.views_count], Listing.id, descending)
         else:  # created_at
-            if sort_order == 'asc':
-                query = query.order_by(Listing.created_at.asc())
-            else:
-                query = query.order_by(Listing.created_at.desc())
-        
-        # Pagination
-        pagination = query.paginate(
-            page=page, per_page=per_page, error_out=False
+            keys = sort_keys([Listing.created_at], Listing.id, descending)
+        
+        # Pagination (par curseur si `cursor` est fourni)
+        listings, pagination = paginate(
+            query, keys, page=page, per_page=per_page,
+            cursor=request.args.get('cursor'), sort=f'{sort_by}:{sort_order}',
+            count=request.args.get('count')
         )
         
-        return jsonify({
-            'listings': [listing.to_dict() for listing in pagination.items],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': pagination.total,
-                'pages': pagination.pages,
-                'has_next': pagination.has_next,
-                'has_prev': pagination.has_prev
-            }
-        }), 200
+        response = {
+            'listings': [listing.to_dict(fields=requested_fields) for listing in listings],
+            'pagination': pagination
+        }
+        
+        # Aucun résultat : suggestion de correction des mots inconnus
+        if search and not listings and pagination.get('page', 1) == 1:
+            spelling = did_you_mean(search)
+            if spelling:
+                response['did_you_mean'] = spelling['query']
         
+        return jsonify(response), 200
+        
+    except (InvalidPagination, InvalidFields) as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         current_app.logger.error(f"Erreur lors de la récupération des annonces: {str(e)}")
         return jsonify({'error': 'Erreur interne du serveur'}), 500
@@ -170,6 +178,7 @@ def get_listings():
 def get_listing(listing_id):
     """Obtenir une annonce spécifique"""
     try:
+        requested_fields = LISTING_FIELDS.parse(request.args.get('fields'))
         listing = Listing.query.get(listing_id)
         
         if not listing:
@@ -178,13 +187,20 @@ def get_listing(listing_id):
         if listing.status != ListingStatus.ACTIVE.value:
             return jsonify({'error': 'Annonce non disponible'}), 404
         
-        # Incrémenter le compteur de vues
+        etag = listing_etag(listing, requested_fields)
+        if etag_matches(etag):
+            return not_modified(etag, 'listing')
+        
+        # Incrémenter le compteur de vues (pas pour une revalidation)
         listing.increment_views()
         
-        return jsonify({
-            'listing': listing.to_dict()
-        }), 200
+        # Relations chargées à l'accès : seules celles des champs demandés
+        return with_validators(jsonify({
+            'listing': listing.to_dict(fields=requested_fields)
+        }), etag, 'listing')
         
+    except InvalidFields as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         current_app.logger.error(f"Erreur lors de la récupération de l'annonce: {str(e)}")
         return jsonify({'error': 'Erreur interne du serveur'}), 500
@@ -522,6 +538,7 @@ def upload_listing_image(listing_id):
         return jsonify({'error': 'Erreur interne du serveur'}), 500
 
 @listings_bp.route('/categories', methods=['GET'])
+@conditional('catalog', etag=lambda: make_etag('categories', tag_versions(cache, [CATEGORIES_TAG])))
 def get_categories():
     """Obtenir la liste des catégories"""
     try:
@@ -536,6 +553,22 @@ def get_categories():
         return jsonify({'error': 'Erreur interne du serveur'}), 500
 
 # Fonctions utilitaires
+def listing_etag(listing, fields=None):
+    """
+    Version de l'annonce sérialisée, lue sans charger ses relations : l'annonce,
+    son auteur, ses images (nombre et dernier ajout), les catégories, le jour
+    (days_until_expiry) et les champs demandés. Le compteur de vues n'en fait pas partie.
+    """
+    user_updated_at, image_count, last_image_at = db.session.query(
+        User.updated_at, func.count(ListingImage.id), func.max(ListingImage.created_at)
+    ).select_from(User).outerjoin(
+        ListingImage, ListingImage.listing_id == listing.id
+    ).filter(User.id == listing.user_id).group_by(User.updated_at).first() or (None, 0, None)
+    return make_etag(
+        'listing', listing.id, listing.updated_at, user_updated_at, image_count, last_image_at,
+        tag_versions(cache, [CATEGORIES_TAG]), date.today(), fields_key(fields)
+    )
+
 def allowed_file(filename):
     """Vérifier si le type de fichier est autorisé"""
     return '.' in filename and \
@@ -7,16 +7,29 @@ from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-from marshmallow import Schema, fields, validate, ValidationError
-from sqlalchemy import and_, or_, func, text
-from sqlalchemy.orm import joinedload
+from marshmallow import Schema, fields, validate, validates_schema, ValidationError
+from sqlalchemy import and_, or_, text, case, false
 import math
 import re
+import time
 
-from app import db
+from app import db, cache
 from app.models.user import User
-from app.models.listing import Listing
+from app.models.listing import Listing, Condition
 from app.models.listing import ListingCategory, ListingImage
+from app.models.saved_search import SavedSearch
+from app.search import rank_listing_ids, search_listing_ids, suggest
+from app.search.facets import cached_facets, compute_facets, filter_signature
+from app.search.listing_index import MAX_TEXT_CANDIDATES
+from app.search.list_view import LIST_FIELDS, list_columns, list_item, load_list_relations
+from app.search.percolator import MAX_SAVED_SEARCHES, forget_saved_search, sync_saved_search
+from app.search.result_cache import CATEGORIES_TAG, GLOBAL_TAG, cached_page, page_key, store_page, tag_versions
+from app.search.spelling import did_you_mean
+from app.search.trending import get_trending, record_search
+from services.conditional import etag_matches, make_etag, not_modified, with_validators
+from services.fieldsets import InvalidFields, fields_key
+from services.pagination import InvalidPagination, SortKey, coalesced, paginate, sort_keys
+from services.trigram_index import substring_filter
 
 # Créer le blueprint
 search_bp = Blueprint('search', __name__)
@@ -50,6 +63,10 @@ class SearchSchema(Schema):
     sort_by = fields.Str(validate=validate.OneOf(['relevance', 'date', 'price_asc', 'price_desc', 'distance']))
     page = fields.Int(validate=validate.Range(min=1, max=100))
     per_page = fields.Int(validate=validate.Range(min=1, max=50))
+    cursor = fields.Str(validate=validate.Length(max=500))
+    count = fields.Str(validate=validate.OneOf(['exact', 'estimate', 'none']))
+    # ?fields= (Schema.fields est réservé)
+    fieldset = fields.Str(data_key='fields', validate=validate.Length(max=500))
 
 class SearchFiltersSchema(Schema):
     """Schéma pour les filtres de recherche"""
@@ -60,6 +77,27 @@ class SearchFiltersSchema(Schema):
     brands = fields.List(fields.Str())
     years = fields.List(fields.Int())
 
+class SavedSearchSchema(Schema):
+    """Recherche sauvegardée : sous-ensemble des critères de /search"""
+    name = fields.Str(required=True, validate=validate.Length(min=1, max=100))
+    query = fields.Str(validate=validate.Length(max=200))
+    category_id = fields.UUID()
+    min_price = fields.Float(validate=validate.Range(min=0))
+    max_price = fields.Float(validate=validate.Range(min=0))
+    latitude = fields.Float(validate=validate.Range(min=-90, max=90))
+    longitude = fields.Float(validate=validate.Range(min=-180, max=180))
+    radius_km = fields.Float(validate=validate.Range(min=0.1, max=1000))
+    alerts_enabled = fields.Bool()
+
+    @validates_schema
+    def validate_criteria(self, data, **kwargs):
+        if 'radius_km' in data and ('latitude' not in data or 'longitude' not in data):
+            raise ValidationError('Le rayon nécessite latitude et longitude', 'radius_km')
+
+# Instancier les schémas (une fois : load() ne modifie pas l'instance)
+search_schema = SearchSchema()
+saved_search_schema = SavedSearchSchema()
+
 def calculate_distance(lat1, lon1, lat2, lon2):
     """Calculer la distance entre deux points en kilomètres (formule de Haversine)"""
     if not all([lat1, lon1, lat2, lon2]):
@@ -84,30 +122,31 @@ def calculate_distance(lat1, lon1, lat2, lon2):
     
     return R * c
 
-def build_search_query(filters):
-    """Construire la requête de recherche avec filtres"""
-    query = db.session.query(Listing).options(
-        joinedload(Listing.category),
-        joinedload(Listing.user),
-        joinedload(Listing.images)
-    )
+def build_search_query(filters, text_hits=None, columns=None):
+    """
+    Construire la requête de recherche avec filtres.
+    text_hits : résultats [(id, score)] d'OpenSearch ; sans eux, la recherche
+    textuelle se fait en base (index trigrammes, ILIKE sinon).
+    columns : colonnes à lire (vue en liste) ; entités Listing sinon.
+    """
+    query = db.session.query(*columns) if columns else db.session.query(Listing)
     
     # Filtrer uniquement les annonces actives
     query = query.filter(Listing.status == 'active')
     
     # Recherche textuelle
-    if filters.get('query'):
+    if text_hits is not None:
+        if not text_hits:
+            return query.filter(false())
+        query = query.filter(Listing.id.in_([listing_id for listing_id, _ in text_hits]))
+    elif filters.get('query'):
         search_term = filters['query'].strip()
         if search_term:
-            # Recherche dans le titre, description et tags
-            search_filter = or_(
-                Listing.title.ilike(f'%{search_term}%'),
-                Listing.description.ilike(f'%{search_term}%'),
-                Listing.brand.ilike(f'%{search_term}%'),
-                Listing.model.ilike(f'%{search_term}%'),
-                func.json_extract(Listing.tags, '$').ilike(f'%{search_term}%')
-            )
-            query = query.filter(search_filter)
+            # Recherche dans le titre, description, marque, modèle et tags (texte JSON)
+            query = query.filter(substring_filter(
+                db.engine, [Listing.title, Listing.description, Listing.brand,
+                            Listing.model, Listing.tags], search_term
+            ))
     
     # Filtre par catégorie
     if filters.get('category_id'):
@@ -133,7 +172,7 @@ def build_search_query(filters):
     
     # Filtre par localisation
     if filters.get('city'):
-        query = query.filter(Listing.city.ilike(f'%{filters["city"]}%'))
+        query = query.filter(substring_filter(db.engine, [Listing.city], filters['city']))
     if filters.get('postal_code'):
         query = query.filter(Listing.postal_code == filters['postal_code'])
     if filters.get('country'):
@@ -170,11 +209,11 @@ def build_search_query(filters):
     
     # Filtre par marque
     if filters.get('brand'):
-        query = query.filter(Listing.brand.ilike(f'%{filters["brand"]}%'))
+        query = query.filter(substring_filter(db.engine, [Listing.brand], filters['brand']))
     
     # Filtre par modèle
     if filters.get('model'):
-        query = query.filter(Listing.model.ilike(f'%{filters["model"]}%'))
+        query = query.filter(substring_filter(db.engine, [Listing.model], filters['model']))
     
     # Filtre par année
     if filters.get('year_min'):
@@ -184,25 +223,128 @@ def build_search_query(filters):
     
     return query
 
-def apply_sorting(query, sort_by, user_lat=None, user_lon=None):
-    """Appliquer le tri à la requête"""
-    if sort_by == 'date':
-        query = query.order_by(Listing.created_at.desc())
-    elif sort_by == 'price_asc':
-        query = query.order_by(Listing.estimated_value.asc())
-    elif sort_by == 'price_desc':
-        query = query.order_by(Listing.estimated_value.desc())
-    elif sort_by == 'distance' and user_lat and user_lon:
-        # Tri par distance (nécessite un calcul post-requête)
-        query = query.order_by(Listing.created_at.desc())  # Tri par défaut
-    else:  # relevance par défaut
-        query = query.order_by(
-            Listing.is_featured.desc(),
-            Listing.views_count.desc(),
-            Listing.created_at.desc()
-        )
+def search_sort_keys(sort_by, user_lat=None, user_lon=None, text_hits=None):
+    """Clés de tri de la recherche, départagées par l'identifiant (pagination par curseur)"""
+    if sort_by == 'relevance' and text_hits:
+        # Ordre de pertinence de l'index plein texte
+        ranks = {listing_id: rank for rank, (listing_id, _) in enumerate(text_hits)}
+        return [
+            SortKey(case(ranks, value=Listing.id, else_=len(ranks)), False,
+                    lambda listing: ranks.get(listing.id, len(ranks))),
+            SortKey(Listing.created_at, True),
+            SortKey(Listing.id, True)
+        ]
+    if sort_by == 'price_asc':
+        return [coalesced(Listing.estimated_value, 0), SortKey(Listing.id)]
+    if sort_by == 'price_desc':
+        return [coalesced(Listing.estimated_value, 0, True), SortKey(Listing.id, True)]
+    if sort_by == 'date' or (sort_by == 'distance' and user_lat and user_lon):
+        # Distance : tri par date, puis tri de la page après calcul des distances
+        return sort_keys([Listing.created_at], Listing.id, descending=True)
+    # relevance par défaut
+    return sort_keys(
+        [Listing.is_featured, Listing.views_count, Listing.created_at], Listing.id, descending=True
+    )
+
+def has_matches(filters, text_hits=None):
+    """Au moins une annonce correspond (recherche texte en base ou résultats OpenSearch)"""
+    if text_hits is not None:
+        return bool(text_hits)
+    return db.session.query(build_search_query(filters, columns=[Listing.id]).exists()).scalar()
+
+def execute_search(app, filters, page, per_page, sort_by, cursor=None, count=None, requested_fields=None):
+    """
+    Exécuter la recherche et sérialiser une page de résultats
+    (requested_fields : champs des cartes, colonnes et relations lues en conséquence)
+    """
+    # Recherche plein texte : OpenSearch (filtres compris) si disponible, en base sinon
+    text, ranking = None, None
+    spelling, corrected_query = None, None
+    query_filters = filters
+    search_term = (filters.get('query') or '').strip()
+    if search_term:
+        text = search_listing_ids(app, search_term, filters)
+        
+        # Mots inconnus du vocabulaire : correction si aucun résultat, suggestion sinon
+        spelling = did_you_mean(search_term)
+        if spelling and not has_matches(filters, text.hits):
+            corrected_filters = {**filters, 'query': spelling['query']}
+            corrected = search_listing_ids(app, spelling['query'], corrected_filters)
+            if has_matches(corrected_filters, corrected.hits):
+                text, query_filters = corrected, corrected_filters
+                corrected_query = spelling['query']
+        
+        # Pertinence : ordre d'OpenSearch, ou classement BM25 en mémoire des annonces
+        # trouvées en base (celles hors des premiers candidats suivent par date)
+        ranking = text.hits
+        if ranking is None and sort_by == 'relevance':
+            ranking = rank_listing_ids(query_filters['query'].strip())
+    text_hits = text.hits if text else None
     
-    return query
+    # Récupérer les coordonnées de l'utilisateur si disponibles
+    user_lat = filters.get('latitude')
+    user_lon = filters.get('longitude')
+    
+    # Distance calculée si elle est demandée ou sert au tri
+    with_distance = bool(user_lat and user_lon) and (
+        requested_fields is None or 'distance_km' in requested_fields or sort_by == 'distance'
+    )
+    read_fields = requested_fields
+    if requested_fields is not None and with_distance:
+        read_fields = requested_fields | {'distance_km'}
+    
+    # Construire la requête de base (colonnes des champs demandés de la vue en liste)
+    query = build_search_query(query_filters, text_hits, columns=list_columns(Listing, read_fields))
+    
+    # Trier et paginer (par curseur si `cursor` est fourni)
+    items, pagination = paginate(
+        query, search_sort_keys(sort_by, user_lat, user_lon, ranking),
+        page=page, per_page=per_page, cursor=cursor, sort=sort_by, count=count
+    )
+    
+    # Relations de la page chargées par lots (une requête chacune)
+    relations = load_list_relations(items, requested_fields)
+    
+    # Traiter les résultats
+    listings = []
+    for listing in items:
+        listing_data = list_item(listing, relations, requested_fields)
+        
+        # Calculer la distance si les coordonnées sont disponibles
+        if with_distance and listing.latitude and listing.longitude:
+            distance = calculate_distance(
+                user_lat, user_lon,
+                listing.latitude, listing.longitude
+            )
+            if distance is not None:
+                listing_data['distance_km'] = round(distance, 1)
+        
+        listings.append(listing_data)
+    
+    # Trier par distance si demandé
+    if sort_by == 'distance' and user_lat and user_lon:
+        listings.sort(key=lambda x: x.get('distance_km', float('inf')))
+        if requested_fields is not None and 'distance_km' not in requested_fields:
+            for listing_data in listings:
+                listing_data.pop('distance_km', None)
+    
+    # Candidats OpenSearch plafonnés : le total vient du moteur, seuls les premiers sont paginables
+    total_found = pagination.get('total')
+    if text_hits is not None and len(text_hits) >= MAX_TEXT_CANDIDATES and text.total:
+        total_found = max(total_found or 0, text.total)
+    
+    return {
+        'listings': listings,
+        'pagination': pagination,
+        'filters_applied': filters,
+        'search_stats': {
+            'total_found': total_found,
+            'total_is_estimate': pagination.get('total_is_estimate', False),
+            'text_engine': text.engine if text else None,
+            'corrected_query': corrected_query,
+            'did_you_mean': spelling['query'] if spelling and not corrected_query else None
+        }
+    }
 
 @search_bp.route('/search', methods=['GET'])
 @limiter.limit("30 per minute")
@@ -212,111 +354,42 @@ def search_listings():
     """
     try:
         # Valider les paramètres
-        schema = SearchSchema()
-        filters = schema.load(request.args)
-        
-        # Construire la requête de base
-        query = build_search_query(filters)
-        
-        # Récupérer les coordonnées de l'utilisateur si disponibles
-        user_lat = filters.get('latitude')
-        user_lon = filters.get('longitude')
+        filters = search_schema.load(request.args)
         
-        # Appliquer le tri
+        # Pagination et tri
         sort_by = filters.get('sort_by', 'relevance')
-        query = apply_sorting(query, sort_by, user_lat, user_lon)
-        
-        # Pagination
         page = filters.get('page', 1)
         per_page = min(filters.get('per_page', 20), 50)
+        cursor = filters.pop('cursor', None)
+        count = filters.pop('count', None)
+        requested_fields = LIST_FIELDS.parse(filters.pop('fieldset', None))
+        app = current_app._get_current_object()
         
-        # Exécuter la requête
-        paginated_results = query.paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False
-        )
+        # Tendances : seule la première page d'une recherche est comptée
+        if page == 1 and not cursor:
+            record_search(filters.get('query'))
         
-        # Traiter les résultats
-        listings = []
-        for listing in paginated_results.items:
-            listing_data = {
-                'id': listing.id,
-                'title': listing.title,
-                'description': listing.description[:200] + '...' if len(listing.description) > 200 else listing.description,
-                'category': {
-                    'id': listing.category.id,
-                    'name': listing.category.name,
-                    'slug': listing.category.slug,
-                    'icon': listing.category.icon
-                } if listing.category else None,
-                'user': {
-                    'id': listing.user.id,
-                    'username': listing.user.username,
-                    'trust_score': listing.user.trust_score,
-                    'city': listing.user.city
-                } if listing.user else None,
-                'listing_type': listing.listing_type,
-                'condition': listing.condition,
-                'brand': listing.brand,
-                'model': listing.model,
-                'year': listing.year,
-                'estimated_value': listing.estimated_value,
-                'currency': listing.currency,
-                'city': listing.city,
-                'postal_code': listing.postal_code,
-                'country': listing.country,
-                'exchange_type': listing.exchange_type,
-                'views_count': listing.views_count,
-                'likes_count': listing.likes_count,
-                'created_at': listing.created_at.isoformat(),
-                'images': [
-                    {
-                        'id': img.id,
-                        'url': img.url,
-                        'alt': img.alt_text,
-                        'is_primary': img.is_primary
-                    } for img in listing.images[:3]  # Limiter à 3 images
-                ],
-                'tags': listing.tags or []
-            }
-            
-            # Calculer la distance si les coordonnées sont disponibles
-            if user_lat and user_lon and listing.latitude and listing.longitude:
-                distance = calculate_distance(
-                    user_lat, user_lon,
-                    listing.latitude, listing.longitude
-                )
-                if distance is not None:
-                    listing_data['distance_km'] = round(distance, 1)
-            
-            listings.append(listing_data)
-        
-        # Trier par distance si demandé
-        if sort_by == 'distance' and user_lat and user_lon:
-            listings.sort(key=lambda x: x.get('distance_km', float('inf')))
-        
-        # Statistiques de recherche
-        total_results = paginated_results.total
-        total_pages = paginated_results.pages
+        # Page en cache tant qu'aucune annonce concernée n'a été modifiée
+        position = page if cursor is None else f'c{cursor}'
+        cache_key = page_key(
+            cache, filters, f'{position}:{count or ""}:{fields_key(requested_fields)}', per_page, sort_by
+        )
+        data = cached_page(cache, cache_key)
+        cache_status = 'hit'
+        if data is None:
+            cache_status = 'miss'
+            started = time.perf_counter()
+            data = execute_search(app, filters, page, per_page, sort_by, cursor, count, requested_fields)
+            elapsed = time.perf_counter() - started
+            data['search_stats']['query_time_ms'] = round(elapsed * 1000, 1)
+            store_page(cache, cache_key, data, elapsed,
+                       app.config.get('SEARCH_RESULTS_CACHE_TTL', 600))
         
         return jsonify({
             'success': True,
             'data': {
-                'listings': listings,
-                'pagination': {
-                    'page': page,
-                    'per_page': per_page,
-                    'total': total_results,
-                    'pages': total_pages,
-                    'has_next': paginated_results.has_next,
-                    'has_prev': paginated_results.has_prev
-                },
-                'filters_applied': filters,
-                'search_stats': {
-                    'total_found': total_results,
-                    'query_time': '< 100ms'  # Placeholder
-                }
+                **data,
+                'search_stats': {**data['search_stats'], 'cache': cache_status}
             }
         }), 200
         
@@ -327,6 +400,12 @@ def search_listings():
             'details': e.messages
         }), 400
         
+    except (InvalidPagination, InvalidFields) as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+        
     except Exception as e:
         current_app.logger.error(f"Erreur lors de la recherche: {e}")
         return jsonify({
@@ -335,7 +414,7 @@ def search_listings():
         }), 500
 
 @search_bp.route('/search/suggestions', methods=['GET'])
-@limiter.limit("50 per minute")
+@limiter.limit("300 per minute")
 def search_suggestions():
     """
     Suggestions de recherche basées sur les annonces existantes
@@ -350,60 +429,13 @@ def search_suggestions():
                 }
             }), 200
         
-        # Suggestions basées sur les titres d'annonces
-        title_suggestions = db.session.query(Listing.title).filter(
-            and_(
-                Listing.status == 'active',
-                Listing.title.ilike(f'%{query}%')
-            )
-        ).distinct().limit(5).all()
-        
-        # Suggestions basées sur les marques
-        brand_suggestions = db.session.query(Listing.brand).filter(
-            and_(
-                Listing.status == 'active',
-                Listing.brand.isnot(None),
-                Listing.brand.ilike(f'%{query}%')
-            )
-        ).distinct().limit(3).all()
-        
-        # Suggestions basées sur les modèles
-        model_suggestions = db.session.query(Listing.model).filter(
-            and_(
-                Listing.status == 'active',
-                Listing.model.isnot(None),
-                Listing.model.ilike(f'%{query}%')
-            )
-        ).distinct().limit(3).all()
-        
-        # Combiner et formater les suggestions
-        suggestions = []
-        
-        for title, in title_suggestions:
-            suggestions.append({
-                'type': 'title',
-                'text': title,
-                'category': 'Titres d\'annonces'
-            })
-        
-        for brand, in brand_suggestions:
-            suggestions.append({
-                'type': 'brand',
-                'text': brand,
-                'category': 'Marques'
-            })
-        
-        for model, in model_suggestions:
-            suggestions.append({
-                'type': 'model',
-                'text': model,
-                'category': 'Modèles'
-            })
+        # Trie de complétion en mémoire (titres, marques, modèles, catégories)
+        suggestions = suggest(query)
         
         return jsonify({
             'success': True,
             'data': {
-                'suggestions': suggestions[:10]  # Limiter à 10 suggestions
+                'suggestions': suggestions
             }
         }), 200
         
@@ -417,9 +449,32 @@ def search_suggestions():
 @search_bp.route('/search/filters', methods=['GET'])
 def get_search_filters():
     """
-    Récupérer les filtres disponibles pour la recherche
+    Récupérer les filtres disponibles et leurs comptages pour les filtres courants
+    (mêmes paramètres que /search)
     """
     try:
+        filters = search_schema.load(request.args)
+        app = current_app._get_current_object()
+        
+        # Version des données (annonces hors compteurs, catégories) : 304 sans rien recalculer
+        signature = filter_signature(filters)
+        versions = tag_versions(cache, [GLOBAL_TAG, CATEGORIES_TAG])
+        etag = make_etag('filters', signature, versions)
+        if etag_matches(etag):
+            return not_modified(etag, 'catalog')
+        
+        def compute():
+            # Comptages exacts : la recherche texte se fait en base, sans plafond de candidats
+            return compute_facets(build_search_query(filters), Listing)
+        
+        # Une seule requête groupée par jeu de filtres, mise en cache quelques secondes
+        facets = cached_facets(
+            cache,
+            f'{signature}:{versions}',
+            compute,
+            app.config.get('SEARCH_FACETS_CACHE_TTL', 30)
+        )
+        
         # Catégories actives
         categories = db.session.query(ListingCategory).filter(
             ListingCategory.is_active == True
@@ -428,33 +483,7 @@ def get_search_filters():
         # Conditions disponibles
         conditions = [condition.value for condition in Condition]
         
-        # Plages de prix populaires
-        price_ranges = [
-            {'label': 'Moins de 50 CHF', 'min': 0, 'max': 50},
-            {'label': '50 - 100 CHF', 'min': 50, 'max': 100},
-            {'label': '100 - 200 CHF', 'min': 100, 'max': 200},
-            {'label': '200 - 500 CHF', 'min': 200, 'max': 500},
-            {'label': '500 - 1000 CHF', 'min': 500, 'max': 1000},
-            {'label': 'Plus de 1000 CHF', 'min': 1000, 'max': None}
-        ]
-        
-        # Villes populaires
-        cities = db.session.query(Listing.city).filter(
-            and_(
-                Listing.status == 'active',
-                Listing.city.isnot(None)
-            )
-        ).distinct().limit(20).all()
-        
-        # Marques populaires
-        brands = db.session.query(Listing.brand).filter(
-            and_(
-                Listing.status == 'active',
-                Listing.brand.isnot(None)
-            )
-        ).distinct().limit(20).all()
-        
-        return jsonify({
+        return with_validators(jsonify({
             'success': True,
             'data': {
                 'categories': [
@@ -463,17 +492,26 @@ def get_search_filters():
                         'name': cat.name,
                         'slug': cat.slug,
                         'icon': cat.icon,
-                        'description': cat.description
+                        'description': cat.description,
+                        'count': facets['category'].get(str(cat.id), 0)
                     } for cat in categories
                 ],
                 'conditions': conditions,
-                'price_ranges': price_ranges,
-                'cities': [city[0] for city in cities if city[0]],
-                'brands': [brand[0] for brand in brands if brand[0]],
+                'price_ranges': facets['price'],
+                'cities': [city['value'] for city in facets['city']],
+                'brands': [brand['value'] for brand in facets['brand']],
                 'currencies': ['CHF', 'EUR', 'USD'],
-                'exchange_types': ['direct', 'chain', 'both']
+                'exchange_types': ['direct', 'chain', 'both'],
+                'facets': facets
             }
-        }), 200
+        }), etag, 'catalog')
+        
+    except ValidationError as e:
+        return jsonify({
+            'success': False,
+            'error': 'Paramètres de recherche invalides',
+            'details': e.messages
+        }), 400
         
     except Exception as e:
         current_app.logger.error(f"Erreur lors de la récupération des filtres: {e}")
@@ -485,26 +523,22 @@ def get_search_filters():
 @search_bp.route('/search/trending', methods=['GET'])
 def get_trending_searches():
     """
-    Récupérer les recherches tendances
+    Récupérer les recherches tendances (dernière heure ou dernier jour)
     """
     try:
-        # Pour l'instant, retourner des recherches populaires statiques
-        # Dans une version future, cela pourrait être basé sur les logs de recherche
-        trending = [
-            {'query': 'iPhone', 'count': 45},
-            {'query': 'vélo', 'count': 38},
-            {'query': 'meubles', 'count': 32},
-            {'query': 'voiture', 'count': 28},
-            {'query': 'livres', 'count': 25},
-            {'query': 'vêtements', 'count': 22},
-            {'query': 'électronique', 'count': 20},
-            {'query': 'sport', 'count': 18}
-        ]
+        window = request.args.get('window', 'day')
+        if window not in ('hour', 'day'):
+            return jsonify({
+                'success': False,
+                'error': 'Fenêtre invalide (hour ou day)'
+            }), 400
+        limit = max(1, min(request.args.get('limit', 10, type=int), 50))
         
         return jsonify({
             'success': True,
             'data': {
-                'trending': trending
+                'window': window,
+                'trending': get_trending(window, limit)
             }
         }), 200
         
@@ -513,4 +547,178 @@ def get_trending_searches():
         return jsonify({
             'success': False,
             'error': 'Erreur interne du serveur'
-        }), 500
\ No newline at end of file
+        }), 500
+
+# Recherches sauvegardées et alertes
+
+def _apply_saved_search(search, data):
+    if 'name' in data:
+        search.name = data['name']
+    if 'alerts_enabled' in data:
+        search.alerts_enabled = data['alerts_enabled']
+    for field in ('category_id', 'min_price', 'max_price', 'latitude', 'longitude', 'radius_km'):
+        if field in data:
+            value = data[field]
+            setattr(search, field, str(value) if field == 'category_id' else value)
+    if 'query' in data:
+        search.search_text = data['query'].strip() or None
+
+@search_bp.route('/search/saved', methods=['GET'])
+@jwt_required()
+def get_saved_searches():
+    """
+    Récupérer les recherches sauvegardées de l'utilisateur
+    """
+    try:
+        searches = SavedSearch.query.filter_by(user_id=get_jwt_identity()).order_by(
+            SavedSearch.created_at.desc()
+        ).all()
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'saved_searches': [search.to_dict() for search in searches]
+            }
+        }), 200
+        
+    except Exception as e:
+        current_app.logger.error(f"Erreur lors de la récupération des recherches sauvegardées: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Erreur interne du serveur'
+        }), 500
+
+@search_bp.route('/search/saved', methods=['POST'])
+@jwt_required()
+def create_saved_search():
+    """
+    Sauvegarder une recherche ; les nouvelles annonces correspondantes sont notifiées
+    """
+    try:
+        data = saved_search_schema.load(request.get_json() or {})
+        user_id = get_jwt_identity()
+        
+        if SavedSearch.query.filter_by(user_id=user_id).count() >= MAX_SAVED_SEARCHES:
+            return jsonify({
+                'success': False,
+                'error': f'Maximum {MAX_SAVED_SEARCHES} recherches sauvegardées'
+            }), 400
+        
+        search = SavedSearch(user_id=user_id)
+        _apply_saved_search(search, data)
+        if not search.criteria():
+            return jsonify({
+                'success': False,
+                'error': 'Au moins un critère est requis'
+            }), 400
+        
+        db.session.add(search)
+        db.session.commit()
+        sync_saved_search(search)
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'saved_search': search.to_dict()
+            }
+        }), 201
+        
+    except ValidationError as e:
+        return jsonify({
+            'success': False,
+            'error': 'Données invalides',
+            'details': e.messages
+        }), 400
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Erreur lors de la sauvegarde de la recherche: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Erreur interne du serveur'
+        }), 500
+
+@search_bp.route('/search/saved/<search_id>', methods=['PATCH'])
+@jwt_required()
+def update_saved_search(search_id):
+    """
+    Modifier une recherche sauvegardée (critères, nom, alertes)
+    """
+    try:
+        search = SavedSearch.query.filter_by(id=search_id, user_id=get_jwt_identity()).first()
+        if not search:
+            return jsonify({
+                'success': False,
+                'error': 'Recherche sauvegardée non trouvée'
+            }), 404
+        
+        data = saved_search_schema.load(request.get_json() or {}, partial=True)
+        _apply_saved_search(search, data)
+        if search.radius_km is not None and (search.latitude is None or search.longitude is None):
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'error': 'Le rayon nécessite latitude et longitude'
+            }), 400
+        if not search.criteria():
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'error': 'Au moins un critère est requis'
+            }), 400
+        
+        db.session.commit()
+        sync_saved_search(search)
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'saved_search': search.to_dict()
+            }
+        }), 200
+        
+    except ValidationError as e:
+        return jsonify({
+            'success': False,
+            'error': 'Données invalides',
+            'details': e.messages
+        }), 400
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Erreur lors de la modification de la recherche: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Erreur interne du serveur'
+        }), 500
+
+@search_bp.route('/search/saved/<search_id>', methods=['DELETE'])
+@jwt_required()
+def delete_saved_search(search_id):
+    """
+    Supprimer une recherche sauvegardée et ses alertes
+    """
+    try:
+        search = SavedSearch.query.filter_by(id=search_id, user_id=get_jwt_identity()).first()
+        if not search:
+            return jsonify({
+                'success': False,
+                'error': 'Recherche sauvegardée non trouvée'
+            }), 404
+        
+        db.session.delete(search)
+        db.session.commit()
+        forget_saved_search(search_id)
+        
+        return jsonify({
+            'success': True,
+            'message': 'Recherche sauvegardée supprimée'
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Erreur lors de la suppression de la recherche: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'Erreur interne du serveur'
+        }), 500
@@ -12,8 +12,11 @@ from werkzeug.utils import secure_filename
 import os
 
 from app import db
-from app.models.user import User, UserStatus, UserRole
+from app.models.user import USER_FIELDS, User, UserStatus, UserRole
+from app.models.listing import LISTING_FIELDS, Listing
 from app.models.notification import Notification, NotificationType
+from services.fieldsets import InvalidFields
+from services.pagination import InvalidPagination, paginate, sort_keys
 
 # Créer le blueprint
 users_bp = Blueprint('users', __name__)
@@ -55,15 +58,18 @@ def get_profile():
     """Obtenir le profil de l'utilisateur connecté"""
     try:
         current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        requested_fields = USER_FIELDS.parse(request.args.get('fields'))
+        user = User.query.options(*USER_FIELDS.load_options(User, requested_fields)).get(current_user_id)
         
         if not user:
             return jsonify({'error': 'Utilisateur non trouvé'}), 404
         
         return jsonify({
-            'user': user.to_dict(include_private=True)
+            'user': user.to_dict(include_private=True, fields=requested_fields)
         }), 200
         
+    except InvalidFields as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         current_app.logger.error(f"Erreur lors de la récupération du profil: {str(e)}")
         return jsonify({'error': 'Erreur interne du serveur'}), 500
@@ -240,7 +246,8 @@ def upload_cover():
 def get_user_profile(user_id):
     """Obtenir le profil public d'un utilisateur"""
     try:
-        user = User.query.get(user_id)
+        requested_fields = USER_FIELDS.parse(request.args.get('fields'))
+        user = User.query.options(*USER_FIELDS.load_options(User, requested_fields)).get(user_id)
         
         if not user:
             return jsonify({'error': 'Utilisateur non trouvé'}), 404
@@ -249,9 +256,11 @@ def get_user_profile(user_id):
             return jsonify({'error': 'Profil non disponible'}), 404
         
         return jsonify({
-            'user': user.to_dict(include_private=False)
+            'user': user.to_dict(include_private=False, fields=requested_fields)
         }), 200
         
+    except InvalidFields as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         current_app.logger.error(f"Erreur lors de la récupération du profil: {str(e)}")
         return jsonify({'error': 'Erreur interne du serveur'}), 500
@@ -268,13 +277,26 @@ def get_user_listings(user_id):
         if user.status != UserStatus.ACTIVE.value:
             return jsonify({'error': 'Profil non disponible'}), 404
         
-        # Récupérer les annonces actives
-        listings = user.listings.filter_by(status='active').all()
+        # Récupérer les annonces actives, les plus récentes d'abord
+        per_page = min(request.args.get('per_page', 20, type=int), 100)
+        requested_fields = LISTING_FIELDS.parse(request.args.get('fields'))
+        query = Listing.query.options(*LISTING_FIELDS.load_options(Listing, requested_fields)).filter_by(
+            user_id=user.id, status='active'
+        )
+        listings, pagination = paginate(
+            query, sort_keys([Listing.created_at], Listing.id, descending=True),
+            page=request.args.get('page', 1, type=int), per_page=per_page,
+            cursor=request.args.get('cursor'), sort='created_at:desc',
+            count=request.args.get('count')
+        )
         
         return jsonify({
-            'listings': [listing.to_dict() for listing in listings]
+            'listings': [listing.to_dict(fields=requested_fields) for listing in listings],
+            'pagination': pagination
         }), 200
         
+    except (InvalidPagination, InvalidFields) as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         current_app.logger.error(f"Erreur lors de la récupération des annonces: {str(e)}")
         return jsonify({'error': 'Erreur interne du serveur'}), 500
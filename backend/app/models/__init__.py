@@ -12,6 +12,8 @@ from .review import Review
 from .payment import Payment, PaymentMethod
 from .location import Location, MeetingPoint
 from .ai_analysis import AIAnalysis, ObjectDetection, ValueEstimation
+from .search_trend import TrendingSearch
+from .saved_search import SavedSearch
 
 __all__ = [
     'User',
@@ -34,5 +36,7 @@ __all__ = [
     'MeetingPoint',
     'AIAnalysis',
     'ObjectDetection',
-    'ValueEstimation'
+    'ValueEstimation',
+    'TrendingSearch',
+    'SavedSearch'
 ]
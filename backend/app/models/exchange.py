@@ -13,6 +13,8 @@ from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 
 from app import db
+from services.fieldsets import FieldSet
+from services.serialization import compile_serializer, iso_datetime
 
 
 class ExchangeStatus(Enum):
@@ -265,62 +267,14 @@ class Exchange(db.Model):
                 self.owner_review = review
             db.session.commit()
     
-    def to_dict(self, include_private=False):
-        """Convertir l'échange en dictionnaire"""
-        data = {
-            'id': str(self.id),
-            'exchange_type': self.exchange_type,
-            'status': self.status,
-            'title': self.title,
-            'description': self.description,
-            'proposed_items': self.proposed_items,
-            'proposed_value': self.proposed_value,
-            'currency': self.currency,
-            'meeting_location': self.meeting_location,
-            'meeting_address': self.meeting_address,
-            'meeting_instructions': self.meeting_instructions,
-            'proposed_meeting_date': self.proposed_meeting_date.isoformat() if self.proposed_meeting_date else None,
-            'confirmed_meeting_date': self.confirmed_meeting_date.isoformat() if self.confirmed_meeting_date else None,
-            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
-            'days_until_expiry': self.days_until_expiry,
-            'created_at': self.created_at.isoformat(),
-            'listing': {
-                'id': str(self.listing.id),
-                'title': self.listing.title,
-                'images': [img.to_dict() for img in self.listing.images[:3]]  # Limiter à 3 images
-            },
-            'owner': {
-                'id': str(self.owner.id),
-                'username': self.owner.username,
-                'display_name': self.owner.display_name,
-                'trust_score': self.owner.trust_score,
-                'profile_picture': self.owner.profile_picture
-            },
-            'participants': [
-                {
-                    'id': str(p.user.id),
-                    'username': p.user.username,
-                    'display_name': p.user.display_name,
-                    'role': p.role,
-                    'proposed_items': p.proposed_items
-                }
-                for p in self.participants
-            ]
-        }
-        
+    def to_dict(self, include_private=False, fields=None):
+        """Convertir l'échange en dictionnaire (fields : champs demandés, tous si None)"""
+        public, private = EXCHANGE_SERIALIZER, EXCHANGE_PRIVATE_SERIALIZER
+        if fields is not None:
+            public, private = public.only(fields), private.only(fields)
+        data = public(self)
         if include_private:
-            data.update({
-                'metadata': self.exchange_metadata,
-                'dispute_reason': self.dispute_reason,
-                'dispute_resolution': self.dispute_resolution,
-                'owner_rating': self.owner_rating,
-                'owner_review': self.owner_review,
-                'participant_rating': self.participant_rating,
-                'participant_review': self.participant_review,
-                'completed_at': self.completed_at.isoformat() if self.completed_at else None,
-                'updated_at': self.updated_at.isoformat()
-            })
-        
+            data.update(private(self))
         return data
     
     @validates('owner_rating', 'participant_rating')
@@ -341,6 +295,66 @@ class Exchange(db.Model):
         return f'<Exchange {self.title}>'
 
 
+# Sérialiseurs compilés une fois depuis les listes de champs
+EXCHANGE_SERIALIZER = compile_serializer(
+    (
+        ('id', str), 'exchange_type', 'status', 'title', 'description', 'proposed_items',
+        'proposed_value', 'currency', 'meeting_location', 'meeting_address', 'meeting_instructions',
+        ('proposed_meeting_date', iso_datetime), ('confirmed_meeting_date', iso_datetime),
+        ('expires_at', iso_datetime), 'days_until_expiry', ('created_at', iso_datetime)
+    ),
+    listing=lambda exchange: {
+        'id': str(exchange.listing.id),
+        'title': exchange.listing.title,
+        'images': [img.to_dict() for img in exchange.listing.images[:3]]  # Limiter à 3 images
+    },
+    owner=lambda exchange: {
+        'id': str(exchange.owner.id),
+        'username': exchange.owner.username,
+        'display_name': exchange.owner.display_name,
+        'trust_score': exchange.owner.trust_score,
+        'profile_picture': exchange.owner.profile_picture
+    },
+    participants=lambda exchange: [
+        {
+            'id': str(p.user.id),
+            'username': p.user.username,
+            'display_name': p.user.display_name,
+            'role': p.role,
+            'proposed_items': p.proposed_items
+        }
+        for p in exchange.participants
+    ]
+)
+
+EXCHANGE_PRIVATE_SERIALIZER = compile_serializer(
+    (
+        'dispute_reason', 'dispute_resolution', 'owner_rating', 'owner_review',
+        'participant_rating', 'participant_review', ('completed_at', iso_datetime),
+        ('updated_at', iso_datetime)
+    ),
+    metadata=lambda exchange: exchange.exchange_metadata
+)
+
+# Champs sélectionnables (?fields=) : colonnes et relations dont ils dépendent
+EXCHANGE_FIELDS = FieldSet(
+    EXCHANGE_SERIALIZER.fields + EXCHANGE_PRIVATE_SERIALIZER.fields,
+    columns={
+        'days_until_expiry': ('expires_at',),
+        'metadata': ('exchange_metadata',),
+        'listing': ('listing_id',),
+        'owner': ('owner_id',),
+        'participants': ()
+    },
+    relations={
+        'listing': ('listing.images',),
+        'owner': ('owner',),
+        'participants': ('participants.user',)
+    },
+    always=('id', 'created_at', 'updated_at')
+)
+
+
 class ExchangeParticipant(db.Model):
     """Participants aux échanges"""
     __tablename__ = 'exchange_participants'
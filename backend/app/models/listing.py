@@ -8,12 +8,14 @@ from datetime import datetime, timedelta
 from enum import Enum
 from typing import Optional, List
 from sqlalchemy import Column, String, Integer, Boolean, DateTime, Text, Float, JSON, ForeignKey, Index, CheckConstraint
-from sqlalchemy import String
+from sqlalchemy import String, update
 from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from sqlalchemy import event
 
 from app import db
+from services.fieldsets import FieldSet
+from services.serialization import compile_serializer, iso_datetime
 
 
 class ListingStatus(Enum):
@@ -258,8 +260,12 @@ class Listing(db.Model):
         db.session.commit()
     
     def increment_views(self):
-        """Incrémenter le compteur de vues"""
-        self.views_count += 1
+        """Incrémenter le compteur de vues (sans changer updated_at, qui date le contenu)"""
+        db.session.execute(
+            update(Listing).where(Listing.id == self.id).values(
+                views_count=Listing.views_count + 1, updated_at=Listing.updated_at
+            )
+        )
         db.session.commit()
     
     def increment_likes(self):
@@ -278,63 +284,14 @@ class Listing(db.Model):
         self.search_vector = func.to_tsvector('french', search_text)
         db.session.flush()
     
-    def to_dict(self, include_private=False):
-        """Convertir l'annonce en dictionnaire"""
-        data = {
-            'id': str(self.id),
-            'title': self.title,
-            'description': self.description,
-            'listing_type': self.listing_type,
-            'condition': self.condition,
-            'brand': self.brand,
-            'model': self.model,
-            'year': self.year,
-            'estimated_value': self.estimated_value,
-            'price_display': self.price_display,
-            'location': {
-                'name': self.location_name,
-                'city': self.city,
-                'postal_code': self.postal_code,
-                'country': self.country
-            },
-            'exchange_type': self.exchange_type,
-            'desired_items': self.desired_items,
-            'excluded_items': self.excluded_items,
-            'status': self.status,
-            'is_featured': self.is_featured,
-            'is_boosted': self.is_boosted_active,
-            'views_count': self.views_count,
-            'likes_count': self.likes_count,
-            'shares_count': self.shares_count,
-            'tags': self.tags,
-            'created_at': self.created_at.isoformat(),
-            'published_at': self.published_at.isoformat() if self.published_at else None,
-            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
-            'days_until_expiry': self.days_until_expiry,
-            'images': [img.to_dict() for img in self.images],
-            'main_image': self.main_image.to_dict() if self.main_image else None,
-            'user': {
-                'id': str(self.user.id),
-                'username': self.user.username,
-                'display_name': self.user.display_name,
-                'trust_score': self.user.trust_score,
-                'profile_picture': self.user.profile_picture
-            },
-            'category': {
-                'id': str(self.category.id),
-                'name': self.category.name,
-                'slug': self.category.slug
-            }
-        }
-        
+    def to_dict(self, include_private=False, fields=None):
+        """Convertir l'annonce en dictionnaire (fields : champs demandés, tous si None)"""
+        public, private = LISTING_SERIALIZER, LISTING_PRIVATE_SERIALIZER
+        if fields is not None:
+            public, private = public.only(fields), private.only(fields)
+        data = public(self)
         if include_private:
-            data.update({
-                'metadata': self.listing_metadata,
-                'ai_analysis': self.ai_analysis,
-                'updated_at': self.updated_at.isoformat(),
-                'sold_at': self.sold_at.isoformat() if self.sold_at else None
-            })
-        
+            data.update(private(self))
         return data
     
     @validates('estimated_value', 'price_range_min', 'price_range_max')
@@ -396,27 +353,79 @@ class ListingImage(db.Model):
     
     def to_dict(self):
         """Convertir l'image en dictionnaire"""
-        return {
-            'id': str(self.id),
-            'filename': self.filename,
-            'original_filename': self.original_filename,
-            'file_path': self.file_path,
-            'file_size': self.file_size,
-            'mime_type': self.mime_type,
-            'width': self.width,
-            'height': self.height,
-            'alt_text': self.alt_text,
-            'is_main': self.is_main,
-            'sort_order': self.sort_order,
-            'ai_tags': self.ai_tags,
-            'ai_confidence': self.ai_confidence,
-            'created_at': self.created_at.isoformat()
-        }
+        return LISTING_IMAGE_SERIALIZER(self)
     
     def __repr__(self):
         return f'<ListingImage {self.filename}>'
 
 
+# Sérialiseurs compilés une fois depuis les listes de champs
+LISTING_IMAGE_SERIALIZER = compile_serializer((
+    ('id', str), 'filename', 'original_filename', 'file_path', 'file_size', 'mime_type',
+    'width', 'height', 'alt_text', 'is_main', 'sort_order', 'ai_tags', 'ai_confidence',
+    ('created_at', iso_datetime)
+))
+
+LISTING_SERIALIZER = compile_serializer(
+    (
+        ('id', str), 'title', 'description', 'listing_type', 'condition', 'brand', 'model',
+        'year', 'estimated_value', 'price_display', 'exchange_type', 'desired_items',
+        'excluded_items', 'status', 'is_featured', 'views_count', 'likes_count',
+        'shares_count', 'tags', ('created_at', iso_datetime), ('published_at', iso_datetime),
+        ('expires_at', iso_datetime), 'days_until_expiry'
+    ),
+    location=lambda listing: {
+        'name': listing.location_name,
+        'city': listing.city,
+        'postal_code': listing.postal_code,
+        'country': listing.country
+    },
+    is_boosted=lambda listing: listing.is_boosted_active,
+    images=lambda listing: [LISTING_IMAGE_SERIALIZER(image) for image in listing.images],
+    main_image=lambda listing: LISTING_IMAGE_SERIALIZER(listing.main_image) if listing.main_image else None,
+    user=lambda listing: {
+        'id': str(listing.user.id),
+        'username': listing.user.username,
+        'display_name': listing.user.display_name,
+        'trust_score': listing.user.trust_score,
+        'profile_picture': listing.user.profile_picture
+    },
+    category=lambda listing: {
+        'id': str(listing.category.id),
+        'name': listing.category.name,
+        'slug': listing.category.slug
+    }
+)
+
+# Champs publics sélectionnables (?fields=) : colonnes et relations dont ils dépendent
+LISTING_FIELDS = FieldSet(
+    LISTING_SERIALIZER.fields,
+    columns={
+        'price_display': ('estimated_value', 'price_range_min', 'price_range_max', 'currency'),
+        'days_until_expiry': ('expires_at',),
+        'location': ('location_name', 'city', 'postal_code', 'country'),
+        'is_boosted': ('is_boosted', 'boost_expires_at'),
+        'images': (),
+        'main_image': (),
+        'user': ('user_id',),
+        'category': ('category_id',)
+    },
+    relations={
+        'images': ('images',),
+        'main_image': ('images',),
+        'user': ('user',),
+        'category': ('category',)
+    },
+    # Clés de tri des listes (curseurs)
+    always=('id', 'created_at', 'views_count', 'estimated_value')
+)
+
+LISTING_PRIVATE_SERIALIZER = compile_serializer(
+    ('ai_analysis', ('updated_at', iso_datetime), ('sold_at', iso_datetime)),
+    metadata=lambda listing: listing.listing_metadata
+)
+
+
 # Événements pour mettre à jour automatiquement le vecteur de recherche
 # Temporairement désactivé pour éviter les conflits de session
 # @event.listens_for(Listing, 'after_insert')
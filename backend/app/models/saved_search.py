@@ -0,0 +1,69 @@
+"""
+Modèle des recherches sauvegardées de Lucky Kangaroo
+Requêtes enregistrées par les utilisateurs, avec alerte sur les nouvelles annonces
+"""
+
+import uuid
+from datetime import datetime
+from sqlalchemy import Column, String, Boolean, DateTime, Float, ForeignKey, Index
+
+from app import db
+
+
+class SavedSearch(db.Model):
+    """
+    Recherche sauvegardée (texte, catégorie, prix, rayon)
+    """
+    __tablename__ = 'saved_searches'
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String(36), ForeignKey('users.id'), nullable=False, index=True)
+    name = Column(String(100), nullable=False)
+
+    # Critères
+    search_text = Column(String(200), nullable=True)  # 'query' masquerait Model.query
+    category_id = Column(String(36), ForeignKey('listing_categories.id'), nullable=True)
+    min_price = Column(Float, nullable=True)
+    max_price = Column(Float, nullable=True)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    radius_km = Column(Float, nullable=True)
+
+    # Alertes
+    alerts_enabled = Column(Boolean, default=True, nullable=False)
+    last_notified_at = Column(DateTime, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index('idx_saved_search_alerts', 'alerts_enabled', 'updated_at'),
+    )
+
+    def criteria(self):
+        """Critères au format des filtres de /search"""
+        return {
+            key: value for key, value in (
+                ('query', self.search_text),
+                ('category_id', self.category_id),
+                ('min_price', self.min_price),
+                ('max_price', self.max_price),
+                ('latitude', self.latitude),
+                ('longitude', self.longitude),
+                ('radius_km', self.radius_km),
+            ) if value is not None
+        }
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'criteria': self.criteria(),
+            'alerts_enabled': self.alerts_enabled,
+            'last_notified_at': self.last_notified_at.isoformat() if self.last_notified_at else None,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        }
+
+    def __repr__(self):
+        return f'<SavedSearch {self.name} ({self.user_id})>'
@@ -0,0 +1,41 @@
+"""
+Modèle des recherches tendances de Lucky Kangaroo
+Instantané périodique des requêtes les plus fréquentes par fenêtre et par processus
+"""
+
+import uuid
+from datetime import datetime
+from sqlalchemy import Column, String, Integer, DateTime, Index
+
+from app import db
+
+
+class TrendingSearch(db.Model):
+    """
+    Requête fréquente d'une fenêtre glissante (heure ou jour)
+    """
+    __tablename__ = 'trending_searches'
+
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    window = Column(String(10), nullable=False)  # hour, day
+    source = Column(String(100), nullable=False, default='')  # Processus (hôte:pid)
+    term = Column(String(200), nullable=False)  # Requête telle qu'affichée
+    count = Column(Integer, default=0, nullable=False)
+    rank = Column(Integer, nullable=False)
+    computed_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index('idx_trending_window_rank', 'window', 'rank'),
+        Index('idx_trending_window_source', 'window', 'source'),
+    )
+
+    def to_dict(self):
+        return {
+            'query': self.term,
+            'count': self.count,
+            'window': self.window,
+            'computed_at': self.computed_at.isoformat()
+        }
+
+    def __repr__(self):
+        return f'<TrendingSearch {self.window} {self.term} ({self.count})>'
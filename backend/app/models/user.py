@@ -18,6 +18,8 @@ import secrets
 import string
 
 from app import db, bcrypt
+from services.fieldsets import FieldSet
+from services.serialization import compile_serializer, iso_datetime
 
 
 class UserStatus(Enum):
@@ -291,43 +293,14 @@ class User(UserMixin, db.Model):
             parts.append(self.country)
         return ', '.join(parts) if parts else 'Localisation non spécifiée'
     
-    def to_dict(self, include_private=False):
-        """Convertir l'utilisateur en dictionnaire"""
-        data = {
-            'id': str(self.id),
-            'email': self.email if include_private else None,
-            'username': self.username,
-            'full_name': self.full_name,
-            'display_name': self.display_name,
-            'profile_picture': self.profile_picture,
-            'bio': self.bio,
-            'location': self.get_location_string(),
-            'trust_score': self.trust_score,
-            'ecological_score': self.ecological_score,
-            'total_exchanges': self.total_exchanges,
-            'success_rate': self.success_rate,
-            'is_kyc_verified': self.is_kyc_verified,
-            'created_at': self.created_at.isoformat(),
-            'last_activity': self.last_activity.isoformat() if self.last_activity else None
-        }
-        
+    def to_dict(self, include_private=False, fields=None):
+        """Convertir l'utilisateur en dictionnaire (fields : champs demandés, tous si None)"""
+        public, private = USER_SERIALIZER, USER_PRIVATE_SERIALIZER
+        if fields is not None:
+            public, private = public.only(fields), private.only(fields)
+        data = public(self)
         if include_private:
-            data.update({
-                'phone': self.phone,
-                'date_of_birth': self.date_of_birth.isoformat() if self.date_of_birth else None,
-                'gender': self.gender,
-                'preferences': self.preferences,
-                'notification_settings': self.notification_settings,
-                'privacy_settings': self.privacy_settings,
-                'status': self.status,
-                'role': self.role,
-                'email_verified': self.email_verified,
-                'phone_verified': self.phone_verified,
-                'two_factor_enabled': self.two_factor_enabled,
-                'updated_at': self.updated_at.isoformat(),
-                'last_login': self.last_login.isoformat() if self.last_login else None
-            })
-        
+            data.update(private(self))
         return data
     
     @validates('email')
@@ -348,6 +321,36 @@ class User(UserMixin, db.Model):
         return f'<User {self.email}>'
 
 
+# Sérialiseurs compilés une fois depuis les listes de champs
+USER_SERIALIZER = compile_serializer(
+    (
+        ('id', str), 'username', 'full_name', 'display_name', 'profile_picture', 'bio',
+        'trust_score', 'ecological_score', 'total_exchanges', 'success_rate', 'is_kyc_verified',
+        ('created_at', iso_datetime), ('last_activity', iso_datetime)
+    ),
+    email=lambda user: None,
+    location=lambda user: user.get_location_string()
+)
+
+USER_PRIVATE_SERIALIZER = compile_serializer((
+    'email', 'phone', ('date_of_birth', iso_datetime), 'gender', 'preferences',
+    'notification_settings', 'privacy_settings', 'status', 'role', 'email_verified',
+    'phone_verified', 'two_factor_enabled', ('updated_at', iso_datetime), ('last_login', iso_datetime)
+))
+
+# Champs sélectionnables (?fields=) : colonnes dont dépendent les champs calculés
+USER_FIELDS = FieldSet(
+    USER_SERIALIZER.fields + USER_PRIVATE_SERIALIZER.fields,
+    columns={
+        'full_name': ('first_name', 'last_name'),
+        'display_name': ('username', 'first_name', 'last_name'),
+        'success_rate': ('total_exchanges', 'successful_exchanges'),
+        'location': ('city', 'postal_code', 'country')
+    },
+    always=('id', 'status')
+)
+
+
 # Import UserMixin pour Flask-Login
 try:
     from flask_login import UserMixin
@@ -0,0 +1,33 @@
+"""
+Index de recherche en mémoire pour Lucky Kangaroo
+"""
+
+from .autocomplete import build_autocomplete_index, init_autocomplete, suggest
+from .bm25 import BM25Index
+from .events import ListingChange, install_listing_events, on_listing_change
+from .listing_index import (
+    build_listing_index,
+    init_listing_index,
+    TextHits,
+    listing_index,
+    rank_listing_ids,
+    search_listing_ids
+)
+from .metrics import search_metrics
+
+__all__ = [
+    'BM25Index',
+    'ListingChange',
+    'install_listing_events',
+    'on_listing_change',
+    'build_listing_index',
+    'init_listing_index',
+    'TextHits',
+    'listing_index',
+    'rank_listing_ids',
+    'search_listing_ids',
+    'build_autocomplete_index',
+    'init_autocomplete',
+    'suggest',
+    'search_metrics'
+]
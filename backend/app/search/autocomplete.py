@@ -0,0 +1,322 @@
+"""
+Autocomplétion des recherches par trie de préfixes
+
+Titres, marques, modèles et catégories des annonces actives sont indexés par
+début de mot et pondérés par popularité (annonces et vues). Chaque nœud du
+trie garde ses meilleurs termes, recalculés paresseusement après une mise à
+jour incrémentale : une suggestion ne parcourt que le préfixe saisi.
+Les noms de catégories sont rechargés quand l'administration change la version
+de l'étiquette des catégories (cache partagé entre processus).
+"""
+
+import heapq
+import logging
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .events import ListingChange, install_listing_events, on_listing_change
+from .metrics import LatencyRecorder, register_metrics
+from .result_cache import CATEGORIES_TAG, tag_versions
+from .text import normalize
+
+logger = logging.getLogger(__name__)
+
+# Nombre de termes gardés par nœud (>= plus grande limite demandée)
+TOP_K = 10
+
+# Profondeur maximale du trie ; au-delà les termes du nœud sont filtrés
+MAX_PREFIX_LENGTH = 20
+
+# Nombre de suggestions par type et au total
+SUGGESTION_LIMITS = (('title', 5), ('brand', 3), ('model', 3), ('category', 2))
+MAX_SUGGESTIONS = 10
+
+# Vérification de la version des catégories au plus toutes les N secondes
+CATEGORY_CHECK_INTERVAL = 30
+
+SUGGESTION_LABELS = {
+    'title': "Titres d'annonces",
+    'brand': 'Marques',
+    'model': 'Modèles',
+    'category': 'Catégories',
+}
+
+
+def completion_key(text: str) -> str:
+    """Clé normalisée d'un terme : minuscules, sans accents ni espaces multiples"""
+    return ' '.join(normalize(text).split())
+
+
+def _word_starts(key: str) -> List[int]:
+    return [i for i, char in enumerate(key) if char != ' ' and (i == 0 or key[i - 1] == ' ')]
+
+
+class _Node:
+    __slots__ = ('children', 'terms', 'top', 'dirty')
+
+    def __init__(self):
+        self.children: Dict[str, '_Node'] = {}
+        self.terms = set()
+        self.top: List[str] = []
+        self.dirty = False
+
+
+class CompletionTrie:
+    """
+    Trie de complétion pondéré : chaque terme est accessible depuis le début
+    de chacun de ses mots.
+    """
+
+    def __init__(self, top_k: int = TOP_K):
+        self.top_k = top_k
+        self._root = _Node()
+        self._weights: Dict[str, float] = {}
+        self._display: Dict[str, str] = {}
+
+    def __len__(self):
+        return len(self._weights)
+
+    def _paths(self, key: str):
+        for start in _word_starts(key):
+            yield key[start:start + MAX_PREFIX_LENGTH]
+
+    def _mark(self, key: str, add: bool) -> None:
+        for path in self._paths(key):
+            node = self._root
+            node.dirty = True
+            for char in path:
+                child = node.children.get(char)
+                if child is None:
+                    if not add:
+                        break
+                    child = node.children[char] = _Node()
+                node = child
+                node.dirty = True
+            else:
+                if add:
+                    node.terms.add(key)
+                else:
+                    node.terms.discard(key)
+
+    def update(self, text: str, delta: float) -> None:
+        """Ajoute delta au poids du terme (le retire quand son poids s'annule)"""
+        key = completion_key(text)
+        if not key:
+            return
+        weight = self._weights.get(key, 0.0) + delta
+        if weight <= 1e-9:
+            if key in self._weights:
+                del self._weights[key]
+                del self._display[key]
+                self._mark(key, add=False)
+            return
+        if key not in self._weights:
+            self._display[key] = text.strip()
+            self._mark(key, add=True)
+        else:
+            self._dirty_paths(key)
+        self._weights[key] = weight
+
+    def _dirty_paths(self, key: str) -> None:
+        for path in self._paths(key):
+            node = self._root
+            node.dirty = True
+            for char in path:
+                node = node.children.get(char)
+                if node is None:
+                    break
+                node.dirty = True
+
+    def _refresh(self, node: _Node) -> List[str]:
+        if node.dirty:
+            candidates = set(node.terms)
+            for child in node.children.values():
+                candidates.update(self._refresh(child))
+            node.top = heapq.nlargest(self.top_k, candidates, key=self._weights.__getitem__)
+            node.dirty = False
+        return node.top
+
+    def refresh(self) -> None:
+        """Recalcule tous les nœuds modifiés (après un chargement complet)"""
+        self._refresh(self._root)
+
+    def _subtree_terms(self, node: _Node, terms: set) -> set:
+        terms.update(node.terms)
+        for child in node.children.values():
+            self._subtree_terms(child, terms)
+        return terms
+
+    def complete(self, prefix: str, limit: int = TOP_K) -> List[Tuple[str, float]]:
+        """Meilleurs termes dont un mot commence par prefix : [(texte, poids)]"""
+        key = completion_key(prefix)
+        if not key:
+            return []
+        node = self._root
+        for char in key[:MAX_PREFIX_LENGTH]:
+            node = node.children.get(char)
+            if node is None:
+                return []
+
+        if len(key) <= MAX_PREFIX_LENGTH:
+            terms = self._refresh(node)[:limit]
+        else:
+            matching = [
+                term for term in self._subtree_terms(node, set())
+                if any(term[start:].startswith(key) for start in _word_starts(term))
+            ]
+            terms = heapq.nlargest(limit, matching, key=self._weights.__getitem__)
+        return [(self._display[term], self._weights[term]) for term in terms]
+
+
+def _popularity(data: Dict) -> float:
+    return 1.0 + math.log1p(data.get('views_count') or 0)
+
+
+class AutocompleteIndex:
+    """Tries de complétion par type de suggestion, tenus à jour par annonce"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tries = {kind: CompletionTrie() for kind, _ in SUGGESTION_LIMITS}
+        self._contributions: Dict[str, List[Tuple[str, str, float]]] = {}
+        self._category_names: Dict[str, str] = {}
+        self.latency = LatencyRecorder()
+
+    def _terms(self, data: Dict) -> List[Tuple[str, str, float]]:
+        weight = _popularity(data)
+        terms = []
+        for kind in ('title', 'brand', 'model'):
+            if data.get(kind):
+                terms.append((kind, data[kind], weight))
+        category = self._category_names.get(str(data.get('category_id')))
+        if category:
+            terms.append(('category', category, weight))
+        return terms
+
+    def _apply_locked(self, listing_id: str, data: Optional[Dict]) -> None:
+        for kind, text, weight in self._contributions.pop(listing_id, ()):
+            self._tries[kind].update(text, -weight)
+        if data is None:
+            return
+        terms = self._terms(data)
+        for kind, text, weight in terms:
+            self._tries[kind].update(text, weight)
+        if terms:
+            self._contributions[listing_id] = terms
+
+    def apply(self, listing_id: str, data: Optional[Dict]) -> None:
+        """Remplace la contribution d'une annonce (data=None pour la retirer)"""
+        with self._lock:
+            self._apply_locked(listing_id, data)
+
+    def load(self, rows, category_names: Dict[str, str]) -> int:
+        """Reconstruit les tries à partir d'instantanés d'annonces actives"""
+        fresh = AutocompleteIndex()
+        fresh._category_names = dict(category_names)
+        for data in rows:
+            fresh._apply_locked(str(data['id']), data)
+        for trie in fresh._tries.values():
+            trie.refresh()
+        with self._lock:
+            self._tries = fresh._tries
+            self._contributions = fresh._contributions
+            self._category_names = fresh._category_names
+        return len(fresh._contributions)
+
+    def suggest(self, prefix: str) -> List[Dict]:
+        started = time.perf_counter()
+        suggestions = []
+        with self._lock:
+            for kind, limit in SUGGESTION_LIMITS:
+                for text, _ in self._tries[kind].complete(prefix, limit):
+                    suggestions.append({
+                        'type': kind,
+                        'text': text,
+                        'category': SUGGESTION_LABELS[kind]
+                    })
+        self.latency.record(time.perf_counter() - started)
+        return suggestions[:MAX_SUGGESTIONS]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            terms = {kind: len(trie) for kind, trie in self._tries.items()}
+        return {'terms': terms, 'latency': self.latency.snapshot()}
+
+
+autocomplete_index = AutocompleteIndex()
+_ready = threading.Event()
+_categories = {'version': None, 'checked_at': 0.0}
+
+
+def _categories_version() -> Optional[str]:
+    from app import cache
+
+    try:
+        return tag_versions(cache, [CATEGORIES_TAG])
+    except Exception as e:
+        logger.warning('Category version unavailable: %s', e)
+        return None
+
+
+def build_autocomplete_index() -> int:
+    """Construit les tries depuis la base"""
+    from app.models.listing import Listing, ListingCategory
+
+    started = time.perf_counter()
+    # Version lue avant les noms : un changement pendant la construction sera revu
+    _categories['version'] = _categories_version()
+    _categories['checked_at'] = time.monotonic()
+    category_names = {
+        str(category_id): name
+        for category_id, name in ListingCategory.query.filter(
+            ListingCategory.is_active == True
+        ).with_entities(ListingCategory.id, ListingCategory.name)
+    }
+    rows = Listing.query.filter(Listing.status == 'active').with_entities(
+        Listing.id, Listing.title, Listing.brand, Listing.model,
+        Listing.category_id, Listing.views_count
+    ).yield_per(1000)
+    count = autocomplete_index.load((row._asdict() for row in rows), category_names)
+    _ready.set()
+    logger.info('Autocomplete index built: %d listings in %.0f ms',
+                count, (time.perf_counter() - started) * 1000)
+    return count
+
+
+def apply_autocomplete_changes(changes: List[ListingChange]) -> None:
+    for change in changes:
+        autocomplete_index.apply(str(change.listing_id), change.data if change.is_active else None)
+
+
+def categories_changed(check_interval: float = CATEGORY_CHECK_INTERVAL) -> bool:
+    """Catégories modifiées depuis la construction (au plus une lecture du cache par intervalle)"""
+    now = time.monotonic()
+    if now - _categories['checked_at'] < check_interval:
+        return False
+    _categories['checked_at'] = now
+    version = _categories_version()
+    return version is not None and version != _categories['version']
+
+
+def suggest(prefix: str) -> List[Dict]:
+    """Suggestions de recherche pour un préfixe saisi"""
+    if not _ready.is_set() or categories_changed():
+        build_autocomplete_index()
+    return autocomplete_index.suggest(prefix)
+
+
+def init_autocomplete(app) -> None:
+    """Branche l'autocomplétion sur les écritures et la construit au démarrage"""
+    install_listing_events()
+    on_listing_change(apply_autocomplete_changes)
+    register_metrics('autocomplete', autocomplete_index.stats)
+
+    if not app.config.get('SEARCH_INDEX_WARMUP', True):
+        return
+    with app.app_context():
+        try:
+            build_autocomplete_index()
+        except Exception as e:
+            logger.warning('Autocomplete index not built at startup: %s', e)
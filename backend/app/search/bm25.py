@@ -0,0 +1,130 @@
+"""
+Index inversé en mémoire avec classement BM25 (pondération par champ façon BM25F)
+"""
+
+import heapq
+import math
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .text import tokenize
+
+DEFAULT_FIELD_WEIGHTS = {
+    'title': 3.0,
+    'brand': 2.0,
+    'model': 2.0,
+    'tags': 1.5,
+    'description': 1.0,
+}
+
+
+class BM25Index:
+    """
+    Index inversé thread-safe : terme -> {document: fréquence pondérée}.
+    Les documents peuvent être ajoutés, remplacés ou supprimés à chaud.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75,
+                 field_weights: Optional[Dict[str, float]] = None):
+        self.k1 = k1
+        self.b = b
+        self.field_weights = dict(field_weights or DEFAULT_FIELD_WEIGHTS)
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self._doc_terms: Dict[str, Dict[str, float]] = {}
+        self._doc_length: Dict[str, float] = {}
+        self._total_length = 0.0
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._doc_terms
+
+    def _analyze(self, fields: Dict[str, str]) -> Tuple[Dict[str, float], float]:
+        terms: Dict[str, float] = defaultdict(float)
+        length = 0.0
+        for field, weight in self.field_weights.items():
+            tokens = tokenize(fields.get(field) or '')
+            for token in tokens:
+                terms[token] += weight
+            length += weight * len(tokens)
+        return terms, length
+
+    def add(self, doc_id: str, fields: Dict[str, str]) -> None:
+        """Ajoute ou remplace un document"""
+        terms, length = self._analyze(fields)
+        with self._lock:
+            self._remove_locked(doc_id)
+            if not terms:
+                return
+            for term, tf in terms.items():
+                self._postings[term][doc_id] = tf
+            self._doc_terms[doc_id] = terms
+            self._doc_length[doc_id] = length
+            self._total_length += length
+
+    def remove(self, doc_id: str) -> None:
+        """Supprime un document (sans effet s'il est absent)"""
+        with self._lock:
+            self._remove_locked(doc_id)
+
+    def _remove_locked(self, doc_id: str) -> None:
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._doc_length.pop(doc_id, 0.0)
+
+    def rebuild(self, documents: Iterable[Tuple[str, Dict[str, str]]]) -> int:
+        """Reconstruit l'index complet à partir d'un itérable (id, champs)"""
+        fresh = BM25Index(self.k1, self.b, self.field_weights)
+        for doc_id, fields in documents:
+            fresh.add(doc_id, fields)
+        with self._lock:
+            self._postings = fresh._postings
+            self._doc_terms = fresh._doc_terms
+            self._doc_length = fresh._doc_length
+            self._total_length = fresh._total_length
+        return len(fresh)
+
+    def search(self, query: str, limit: int = 100) -> List[Tuple[str, float]]:
+        """
+        Retourne les limit documents les mieux classés pour la requête : [(id, score)]
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        with self._lock:
+            doc_count = len(self._doc_terms)
+            if not doc_count:
+                return []
+            average_length = self._total_length / doc_count or 1.0
+            scores: Dict[str, float] = defaultdict(float)
+
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_length[doc_id] / average_length)
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'documents': len(self._doc_terms),
+                'terms': len(self._postings),
+                'average_length': round(self._total_length / len(self._doc_terms), 2) if self._doc_terms else 0
+            }
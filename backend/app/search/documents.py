@@ -0,0 +1,68 @@
+"""
+Documents OpenSearch des annonces (indexation incrémentale et réindexation)
+"""
+
+from datetime import datetime
+from typing import Dict, Optional
+
+from .text import parse_tags
+
+# Colonnes chargées pour construire un document (pas d'objets ORM complets)
+DOCUMENT_COLUMNS = (
+    'id', 'title', 'description', 'brand', 'model', 'tags', 'status', 'category_id',
+    'condition', 'listing_type', 'exchange_type', 'estimated_value', 'currency',
+    'city', 'postal_code', 'country', 'latitude', 'longitude',
+    'views_count', 'created_at', 'updated_at'
+)
+
+LISTING_INDEX_MAPPING = {
+    'mappings': {
+        'properties': {
+            'title': {'type': 'text', 'analyzer': 'french'},
+            'description': {'type': 'text', 'analyzer': 'french'},
+            'brand': {'type': 'text', 'fields': {'raw': {'type': 'keyword'}}},
+            'model': {'type': 'text', 'fields': {'raw': {'type': 'keyword'}}},
+            'tags': {'type': 'keyword'},
+            'status': {'type': 'keyword'},
+            'category_id': {'type': 'keyword'},
+            'condition': {'type': 'keyword'},
+            'listing_type': {'type': 'keyword'},
+            'exchange_type': {'type': 'keyword'},
+            'estimated_value': {'type': 'float'},
+            'currency': {'type': 'keyword'},
+            'city': {'type': 'keyword'},
+            'postal_code': {'type': 'keyword'},
+            'country': {'type': 'keyword'},
+            'location': {'type': 'geo_point'},
+            'views_count': {'type': 'integer'},
+            'created_at': {'type': 'date'},
+            'updated_at': {'type': 'date'}
+        }
+    },
+    'settings': {
+        'number_of_shards': 1,
+        'number_of_replicas': 0
+    }
+}
+
+
+def listing_columns(listing_model):
+    return [getattr(listing_model, name) for name in DOCUMENT_COLUMNS]
+
+
+def search_document(data: Dict) -> Optional[Dict]:
+    """Document indexé d'une annonce (None si elle ne doit pas être trouvable)"""
+    if data.get('status') != 'active':
+        return None
+    document = {
+        name: data.get(name)
+        for name in DOCUMENT_COLUMNS
+        if name not in ('id', 'tags', 'latitude', 'longitude')
+    }
+    document['tags'] = parse_tags(data.get('tags'))
+    for name in ('created_at', 'updated_at'):
+        if isinstance(document.get(name), datetime):
+            document[name] = document[name].isoformat()
+    if data.get('latitude') is not None and data.get('longitude') is not None:
+        document['location'] = {'lat': data['latitude'], 'lon': data['longitude']}
+    return document
@@ -0,0 +1,137 @@
+"""
+Événements d'écriture sur les annonces, diffusés après commit
+
+Les annonces créées, modifiées ou supprimées sont relevées à chaque flush
+(avec un instantané de leurs colonnes) puis transmises aux abonnés une fois
+la transaction validée ; un rollback les abandonne (celui d'un savepoint
+n'abandonne que les changements relevés depuis le savepoint).
+"""
+
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+_SESSION_KEY = 'listing_changes'
+_SAVEPOINTS_KEY = 'listing_changes_savepoints'
+_listeners: List[Callable[[List['ListingChange']], None]] = []
+_install_lock = threading.Lock()
+_installed = False
+
+
+@dataclass
+class ListingChange:
+    """Changement validé d'une annonce"""
+    listing_id: str
+    action: str  # 'upsert' ou 'delete'
+    data: Dict = field(default_factory=dict)
+    previous: Dict = field(default_factory=dict)
+    created: bool = False
+
+    @property
+    def is_active(self) -> bool:
+        return self.action == 'upsert' and self.data.get('status') == 'active'
+
+    @property
+    def is_published(self) -> bool:
+        """Annonce qui vient d'apparaître : créée active ou passée de brouillon à active"""
+        return self.is_active and (self.created or self.previous.get('status') == 'draft')
+
+
+def on_listing_change(callback: Callable[[List[ListingChange]], None]) -> Callable:
+    """Abonne une fonction aux changements d'annonces validés (utilisable en décorateur)"""
+    if callback not in _listeners:
+        _listeners.append(callback)
+    return callback
+
+
+def _snapshot(target) -> Dict:
+    state = inspect(target)
+    data = {}
+    for attr in state.mapper.column_attrs:
+        if attr.key in state.unloaded:
+            continue
+        data[attr.key] = getattr(target, attr.key)
+    return data
+
+
+def _previous_values(target) -> Dict:
+    """Valeurs avant modification des colonnes modifiées (pour invalider les anciennes clés)"""
+    state = inspect(target)
+    previous = {}
+    for attr in state.mapper.column_attrs:
+        history = state.attrs[attr.key].history
+        if history.deleted:
+            previous[attr.key] = history.deleted[0]
+    return previous
+
+
+def _record(session: Session, flush_context) -> None:
+    # after_flush : les identifiants sont attribués et l'historique des attributs est encore disponible
+    from app.models.listing import Listing
+
+    changes = session.info.setdefault(_SESSION_KEY, {})
+    for target in session.new:
+        if isinstance(target, Listing):
+            changes[target.id] = ListingChange(target.id, 'upsert', _snapshot(target), created=True)
+    for target in session.dirty:
+        if isinstance(target, Listing):
+            previous = changes.get(target.id)
+            change = ListingChange(target.id, 'upsert', _snapshot(target), _previous_values(target))
+            if previous is not None:
+                change.previous = {**change.previous, **previous.previous}
+                change.created = previous.created
+            changes[target.id] = change
+    for target in session.deleted:
+        if isinstance(target, Listing):
+            changes[target.id] = ListingChange(target.id, 'delete', _snapshot(target))
+
+
+def _dispatch(session: Session) -> None:
+    session.info.pop(_SAVEPOINTS_KEY, None)
+    changes = session.info.pop(_SESSION_KEY, None)
+    if not changes:
+        return
+    batch = list(changes.values())
+    for listener in list(_listeners):
+        try:
+            listener(batch)
+        except Exception:
+            logger.exception('Listing change listener %r failed', listener)
+
+
+def _mark_savepoint(session: Session, transaction) -> None:
+    # Changements déjà relevés à l'ouverture d'un savepoint, restaurés s'il est annulé
+    if transaction.nested:
+        changes = session.info.get(_SESSION_KEY, {})
+        session.info.setdefault(_SAVEPOINTS_KEY, {})[transaction] = dict(changes)
+
+
+def _discard(session: Session, previous_transaction) -> None:
+    if previous_transaction.nested:
+        saved = session.info.get(_SAVEPOINTS_KEY, {}).pop(previous_transaction, None)
+        if saved is not None:
+            session.info[_SESSION_KEY] = saved
+    elif previous_transaction.parent is None:
+        # Transaction englobante annulée : rien ne sera validé
+        session.info.pop(_SAVEPOINTS_KEY, None)
+        session.info.pop(_SESSION_KEY, None)
+
+
+def install_listing_events() -> None:
+    """Installe les écouteurs de session (idempotent)"""
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        event.listen(Session, 'after_flush', _record)
+        event.listen(Session, 'after_commit', _dispatch)
+        event.listen(Session, 'after_transaction_create', _mark_savepoint)
+        event.listen(Session, 'after_soft_rollback', _discard)
+        _installed = True
+
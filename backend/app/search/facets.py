@@ -0,0 +1,171 @@
+"""
+Comptages par facette des résultats de recherche
+
+Catégorie, état, ville, marque et tranche de prix sont comptés en une seule
+requête sur l'ensemble filtré (GROUPING SETS sous PostgreSQL, un GROUP BY par
+dimension réunis par UNION ALL ailleurs), puis mis en cache par signature de
+filtres pour une courte durée.
+"""
+
+import hashlib
+import json
+import threading
+from collections import Counter
+from typing import Dict, Optional
+
+from sqlalchemy import String, case, cast, func, literal, literal_column, select, tuple_, union_all
+
+from .metrics import register_metrics
+
+# Bornes des tranches de prix (CHF) ; la dernière tranche est ouverte
+PRICE_BOUNDS = (50, 100, 200, 500, 1000, 2000, 5000)
+
+# Nombre de villes et de marques retournées
+TOP_FACET_VALUES = 20
+
+# Paramètres sans effet sur l'ensemble filtré
+NON_FILTER_KEYS = frozenset({'page', 'per_page', 'sort_by', 'cursor', 'count', 'fieldset'})
+
+# Filtres appliqués sans tenir compte de la casse (recherche texte, ILIKE)
+CASE_INSENSITIVE_KEYS = frozenset({'query', 'city', 'brand', 'model'})
+
+# Dimensions comptées, dans l'ordre des colonnes groupées
+FACET_DIMENSIONS = ('category', 'condition', 'city', 'brand', 'price')
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def filter_signature(filters: Dict, prefix: str = '') -> str:
+    """Clé canonique d'un jeu de filtres (ordre des paramètres et des listes indifférent)"""
+    canonical = {}
+    for key, value in filters.items():
+        if key in NON_FILTER_KEYS or value is None or value == '' or value == []:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            value = sorted(str(v) for v in value)
+        elif isinstance(value, str):
+            value = value.strip()
+            if key in CASE_INSENSITIVE_KEYS:
+                value = value.lower()
+        canonical[key] = value
+    payload = json.dumps(canonical, sort_keys=True, default=str, separators=(',', ':'))
+    return prefix + hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def price_bucket_expression(column):
+    """Numéro de tranche de prix (NULL sans prix) ; constantes en littéral pour le GROUP BY"""
+    whens = [(column.is_(None), None)]
+    whens.extend(
+        (column < literal_column(str(bound)), literal_column(str(i)))
+        for i, bound in enumerate(PRICE_BOUNDS)
+    )
+    return case(*whens, else_=literal_column(str(len(PRICE_BOUNDS))))
+
+
+def price_bucket(index: int, currency: str = 'CHF') -> Dict:
+    low = PRICE_BOUNDS[index - 1] if index > 0 else 0
+    high = PRICE_BOUNDS[index] if index < len(PRICE_BOUNDS) else None
+    if index == 0:
+        label = f'Moins de {high} {currency}'
+    elif high is None:
+        label = f'Plus de {low} {currency}'
+    else:
+        label = f'{low} - {high} {currency}'
+    return {'label': label, 'min': low, 'max': high}
+
+
+def _facet_expressions(listing_model) -> Dict:
+    return {
+        'category': listing_model.category_id,
+        'condition': listing_model.condition,
+        'city': listing_model.city,
+        'brand': listing_model.brand,
+        'price': price_bucket_expression(listing_model.estimated_value)
+    }
+
+
+def _grouping_sets_rows(query, expressions: Dict):
+    """PostgreSQL : un seul parcours, une ligne par valeur de chaque dimension"""
+    columns = list(expressions.values())
+    rows = query.order_by(None).with_entities(
+        func.grouping(*columns), *columns, func.count()
+    ).group_by(func.grouping_sets(*(tuple_(column) for column in columns))).all()
+
+    # GROUPING(...) : un bit par colonne (la première en poids fort), 0 pour la colonne groupée
+    width = len(columns)
+    for row in rows:
+        grouped = next(i for i in range(width) if not (row[0] >> (width - 1 - i)) & 1)
+        yield FACET_DIMENSIONS[grouped], row[1 + grouped], row[-1]
+
+
+def _union_rows(query, expressions: Dict):
+    """Autres moteurs : un GROUP BY par dimension sur l'ensemble filtré (CTE), en UNION ALL"""
+    base = query.order_by(None).with_entities(
+        *(expression.label(name) for name, expression in expressions.items())
+    ).cte('facet_base')
+    arms = [
+        select(literal(name).label('dimension'), cast(base.c[name], String).label('value'),
+               func.count().label('count')).group_by(base.c[name])
+        for name in expressions
+    ]
+    for dimension, value, count in query.session.execute(union_all(*arms)):
+        yield dimension, value, count
+
+
+def compute_facets(query, listing_model) -> Dict:
+    """
+    Comptages par facette de la requête filtrée (sans tri ni chargement de relations) :
+    une ligne par valeur de chaque dimension, et non par combinaison de valeurs
+    """
+    expressions = _facet_expressions(listing_model)
+    if query.session.get_bind().dialect.name == 'postgresql':
+        rows = _grouping_sets_rows(query, expressions)
+    else:
+        rows = _union_rows(query, expressions)
+
+    counts = {name: Counter() for name in FACET_DIMENSIONS}
+    total = 0
+    for dimension, value, count in rows:
+        if dimension == 'category':
+            # Chaque annonce a exactement une catégorie (NULL comprise) : total de l'ensemble
+            total += count
+        if value is not None and value != '':
+            counts[dimension][int(value) if dimension == 'price' else value] += count
+
+    return {
+        'total': total,
+        'category': {str(key): count for key, count in counts['category'].items()},
+        'condition': dict(counts['condition']),
+        'city': [{'value': v, 'count': c} for v, c in counts['city'].most_common(TOP_FACET_VALUES)],
+        'brand': [{'value': v, 'count': c} for v, c in counts['brand'].most_common(TOP_FACET_VALUES)],
+        'price': [
+            {**price_bucket(index), 'count': counts['price'][index]}
+            for index in sorted(counts['price'])
+        ]
+    }
+
+
+def cached_facets(cache, signature: str, compute, timeout: int) -> Dict:
+    """Facettes depuis le cache applicatif, calculées au premier accès"""
+    key = f'search:facets:{signature}'
+    facets: Optional[Dict] = cache.get(key)
+    with _stats_lock:
+        _stats['hits' if facets is not None else 'misses'] += 1
+    if facets is None:
+        facets = compute()
+        cache.set(key, facets, timeout=timeout)
+    return facets
+
+
+def facet_stats() -> Dict:
+    with _stats_lock:
+        hits, misses = _stats['hits'], _stats['misses']
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / (hits + misses), 3) if hits + misses else 0.0
+    }
+
+
+register_metrics('facets', facet_stats)
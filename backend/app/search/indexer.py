@@ -0,0 +1,253 @@
+"""
+Indexation incrémentale des annonces dans OpenSearch
+
+Les identifiants des annonces modifiées sont mis en file après commit. Un
+thread de fond les dédoublonne, relit leur état courant en base et les envoie
+par lots à l'API bulk, avec nouvelles tentatives et attente exponentielle.
+Le délai entre le commit et l'accusé de réception d'OpenSearch est mesuré.
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .documents import listing_columns, search_document
+from .events import ListingChange, install_listing_events, on_listing_change
+from .metrics import LatencyRecorder, register_metrics
+
+logger = logging.getLogger(__name__)
+
+# Statuts bulk qui justifient une nouvelle tentative
+RETRYABLE_STATUSES = frozenset({429, 502, 503, 504})
+
+
+class ListingIndexer:
+    """
+    File dédoublonnée d'annonces à réindexer et thread d'envoi par lots.
+
+    client : objet exposant bulk(body) (SearchClient, client OpenSearch ou substitut local)
+    loader : fonction ids -> {id: document ou None} ; None supprime le document
+    """
+
+    def __init__(self, client, index_name: str, loader: Callable[[List[str]], Dict[str, Optional[Dict]]],
+                 batch_size: int = 500, flush_interval: float = 1.0,
+                 max_retries: int = 5, backoff: float = 0.5, max_backoff: float = 30.0):
+        self.client = client
+        self.index_name = index_name
+        self.loader = loader
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self._pending: 'OrderedDict[str, float]' = OrderedDict()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._busy = False
+        self._thread: Optional[threading.Thread] = None
+        self._stats = Counter()
+        self.lag = LatencyRecorder()
+
+    # File d'attente
+
+    def enqueue(self, listing_ids: Iterable[str]) -> None:
+        """Met des annonces en file (une annonce déjà en attente garde sa date d'entrée)"""
+        now = time.monotonic()
+        with self._cond:
+            for listing_id in listing_ids:
+                if listing_id not in self._pending:
+                    self._pending[listing_id] = now
+                    self._stats['enqueued'] += 1
+                else:
+                    self._stats['deduplicated'] += 1
+            self._cond.notify()
+
+    def _take_batch(self) -> Dict[str, float]:
+        batch = {}
+        while self._pending and len(batch) < self.batch_size:
+            listing_id, enqueued_at = self._pending.popitem(last=False)
+            batch[listing_id] = enqueued_at
+        return batch
+
+    def _requeue(self, batch: Dict[str, float]) -> None:
+        with self._cond:
+            for listing_id, enqueued_at in batch.items():
+                current = self._pending.get(listing_id)
+                self._pending[listing_id] = min(enqueued_at, current) if current else enqueued_at
+
+    # Envoi
+
+    def _actions(self, documents: Dict[str, Optional[Dict]]) -> List[Dict]:
+        body = []
+        for listing_id, document in documents.items():
+            if document is None:
+                body.append({'delete': {'_index': self.index_name, '_id': listing_id}})
+            else:
+                body.append({'index': {'_index': self.index_name, '_id': listing_id}})
+                body.append(document)
+        return body
+
+    def _sleep(self, attempt: int) -> None:
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+        time.sleep(delay * random.uniform(0.5, 1.0))
+
+    def _send(self, documents: Dict[str, Optional[Dict]]) -> Dict[str, Optional[Dict]]:
+        """Envoie un lot ; retourne les documents encore à réessayer"""
+        response = self.client.bulk(body=self._actions(documents))
+        if not response.get('errors'):
+            return {}
+
+        retry = {}
+        for item in response.get('items', []):
+            operation, result = next(iter(item.items()))
+            status = result.get('status', 500)
+            listing_id = result.get('_id')
+            if status < 300 or (operation == 'delete' and status == 404):
+                continue
+            if status in RETRYABLE_STATUSES:
+                retry[listing_id] = documents.get(listing_id)
+            else:
+                self._stats['rejected'] += 1
+                logger.error('Listing %s rejected by search index: %s', listing_id, result.get('error'))
+        return retry
+
+    def process_batch(self, batch: Dict[str, float]) -> bool:
+        """Charge et envoie un lot ; remet le lot en file si OpenSearch reste indisponible"""
+        documents = self.loader(list(batch))
+        for listing_id in batch:
+            documents.setdefault(listing_id, None)
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                documents = self._send(documents)
+            except Exception as e:
+                self._stats['bulk_errors'] += 1
+                logger.warning('Bulk indexing failed (attempt %d): %s', attempt + 1, e)
+            else:
+                if not documents:
+                    break
+                self._stats['retried_items'] += len(documents)
+            if attempt < self.max_retries:
+                self._sleep(attempt)
+        else:
+            self._stats['requeued'] += len(documents)
+            self._requeue({listing_id: batch[listing_id] for listing_id in documents})
+            return False
+
+        now = time.monotonic()
+        for enqueued_at in batch.values():
+            self.lag.record(now - enqueued_at)
+        self._stats['indexed'] += len(batch)
+        return True
+
+    # Thread de fond
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if self._stopping and not self._pending:
+                    return
+                # Laisser les écritures proches se regrouper dans le même lot
+                deadline = next(iter(self._pending.values())) + self.flush_interval
+                while (len(self._pending) < self.batch_size and not self._stopping
+                       and time.monotonic() < deadline):
+                    self._cond.wait(deadline - time.monotonic())
+                batch = self._take_batch()
+                self._busy = True
+            try:
+                if not self.process_batch(batch):
+                    self._sleep(self.max_retries)
+            except Exception:
+                logger.exception('Search indexer batch failed')
+                self._requeue(batch)
+                self._sleep(self.max_retries)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='search-indexer', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Vide la file puis arrête le thread"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def flush(self) -> None:
+        """Traite la file de façon synchrone (tests, commandes)"""
+        while True:
+            with self._cond:
+                while self._busy:
+                    self._cond.wait()
+                batch = self._take_batch()
+            if not batch or not self.process_batch(batch):
+                return
+
+    def stats(self) -> Dict:
+        with self._cond:
+            pending = len(self._pending)
+            oldest = next(iter(self._pending.values()), None)
+            stats = dict(self._stats)
+        return {
+            **stats,
+            'pending': pending,
+            'current_lag_s': round(time.monotonic() - oldest, 3) if oldest is not None else 0.0,
+            'lag': self.lag.snapshot()
+        }
+
+
+search_indexer: Optional[ListingIndexer] = None
+
+
+def load_listing_documents(listing_ids: List[str]) -> Dict[str, Optional[Dict]]:
+    """État courant des annonces en base, sous forme de documents"""
+    from app.models.listing import Listing
+
+    rows = Listing.query.filter(Listing.id.in_(listing_ids)).with_entities(
+        *listing_columns(Listing)
+    ).all()
+    return {str(row.id): search_document(row._asdict()) for row in rows}
+
+
+def init_search_indexer(app):
+    """Démarre l'indexation incrémentale quand OpenSearch est configuré"""
+    global search_indexer
+    url = app.config.get('SEARCH_URL')
+    if not url or not app.config.get('SEARCH_INDEXER_ENABLED', True):
+        return None
+
+    from search import SearchClient
+
+    def loader(listing_ids):
+        with app.app_context():
+            return load_listing_documents(listing_ids)
+
+    search_indexer = ListingIndexer(
+        SearchClient(url),
+        f"{app.config.get('SEARCH_INDEX_PREFIX', 'lucky_kangaroo')}_listings",
+        loader,
+        batch_size=app.config.get('SEARCH_INDEXER_BATCH_SIZE', 500),
+        flush_interval=app.config.get('SEARCH_INDEXER_FLUSH_INTERVAL', 1.0)
+    )
+
+    def enqueue_changes(changes: List[ListingChange]) -> None:
+        search_indexer.enqueue(str(change.listing_id) for change in changes)
+
+    install_listing_events()
+    on_listing_change(enqueue_changes)
+    register_metrics('indexer', search_indexer.stats)
+    search_indexer.start()
+    return search_indexer
@@ -0,0 +1,170 @@
+"""
+Requêtes des vues en liste
+
+Les pages de résultats ne lisent que les colonnes affichées (pas d'entités
+Listing complètes), réduites aux champs demandés par ?fields=. Catégories, vendeurs et premières images sont ensuite
+chargés par lots, une requête IN par relation pour toute la page, les images
+étant limitées aux N premières par annonce directement en SQL. Les listes qui
+sérialisent encore des entités complètes chargent leurs relations par
+selectinload plutôt qu'une requête par annonce.
+"""
+
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import selectinload
+
+from services.fieldsets import FieldSet
+
+from .text import parse_tags
+
+# Longueur de la description dans une carte
+DESCRIPTION_PREVIEW = 200
+
+
+def _preview(text: str) -> str:
+    return text[:DESCRIPTION_PREVIEW] + '...' if len(text) > DESCRIPTION_PREVIEW else text
+
+
+# Champs d'une carte d'annonce : valeur depuis la ligne et les relations de la page
+LIST_ITEM = (
+    ('id', lambda row, relations: row.id),
+    ('title', lambda row, relations: row.title),
+    ('description', lambda row, relations: _preview(row.description)),
+    ('category', lambda row, relations: relations['categories'].get(row.category_id)),
+    ('user', lambda row, relations: relations['users'].get(row.user_id)),
+    ('listing_type', lambda row, relations: row.listing_type),
+    ('condition', lambda row, relations: row.condition),
+    ('brand', lambda row, relations: row.brand),
+    ('model', lambda row, relations: row.model),
+    ('year', lambda row, relations: row.year),
+    ('estimated_value', lambda row, relations: row.estimated_value),
+    ('currency', lambda row, relations: row.currency),
+    ('city', lambda row, relations: row.city),
+    ('postal_code', lambda row, relations: row.postal_code),
+    ('country', lambda row, relations: row.country),
+    ('exchange_type', lambda row, relations: row.exchange_type),
+    ('views_count', lambda row, relations: row.views_count),
+    ('likes_count', lambda row, relations: row.likes_count),
+    ('created_at', lambda row, relations: row.created_at.isoformat()),
+    ('images', lambda row, relations: relations['images'].get(row.id, [])),
+    ('tags', lambda row, relations: parse_tags(row.tags))
+)
+
+# Champs sélectionnables (?fields=) ; distance_km est calculée par la recherche
+LIST_FIELDS = FieldSet(
+    [name for name, _ in LIST_ITEM] + ['distance_km'],
+    columns={
+        'category': ('category_id',),
+        'user': ('user_id',),
+        'images': (),
+        'distance_km': ('latitude', 'longitude')
+    },
+    relations={'category': ('categories',), 'user': ('users',), 'images': ('images',)},
+    # Clés de tri de la recherche (curseurs)
+    always=('id', 'created_at', 'estimated_value', 'is_featured', 'views_count')
+)
+
+# Colonnes lues pour une carte d'annonce complète
+LIST_COLUMNS = LIST_FIELDS.column_names(None)
+
+# Images par annonce dans une liste
+MAX_LIST_IMAGES = 3
+
+
+def list_columns(listing_model, fields: Optional[FrozenSet[str]] = None) -> List:
+    return [getattr(listing_model, name) for name in LIST_FIELDS.column_names(fields)]
+
+
+def list_item(row, relations: Dict[str, Dict], fields: Optional[FrozenSet[str]] = None) -> Dict:
+    """Carte d'annonce limitée aux champs demandés"""
+    return {name: build(row, relations) for name, build in LIST_ITEM if fields is None or name in fields}
+
+
+def with_list_relations(query, listing_model):
+    """Images, vendeur et catégorie de toute la page en trois requêtes IN"""
+    return query.options(
+        selectinload(listing_model.images),
+        selectinload(listing_model.user),
+        selectinload(listing_model.category)
+    )
+
+
+def _list_models() -> Dict:
+    from app.models.listing import ListingCategory, ListingImage
+    from app.models.user import User
+
+    return {'categories': ListingCategory, 'users': User, 'images': ListingImage}
+
+
+def load_categories(session, category_model, category_ids: Iterable[str]) -> Dict[str, Dict]:
+    ids = {category_id for category_id in category_ids if category_id}
+    if not ids:
+        return {}
+    rows = session.query(
+        category_model.id, category_model.name, category_model.slug, category_model.icon
+    ).filter(category_model.id.in_(ids))
+    return {row.id: {'id': row.id, 'name': row.name, 'slug': row.slug, 'icon': row.icon} for row in rows}
+
+
+def load_users(session, user_model, user_ids: Iterable[str]) -> Dict[str, Dict]:
+    ids = {user_id for user_id in user_ids if user_id}
+    if not ids:
+        return {}
+    rows = session.query(
+        user_model.id, user_model.username, user_model.trust_score, user_model.city
+    ).filter(user_model.id.in_(ids))
+    return {
+        row.id: {'id': row.id, 'username': row.username, 'trust_score': row.trust_score, 'city': row.city}
+        for row in rows
+    }
+
+
+def load_images(session, image_model, listing_ids: Iterable[str],
+                limit: int = MAX_LIST_IMAGES) -> Dict[str, List[Dict]]:
+    """N premières images de chaque annonce (principale d'abord), en une requête"""
+    ids = set(listing_ids)
+    if not ids:
+        return {}
+    position = func.row_number().over(
+        partition_by=image_model.listing_id,
+        order_by=(image_model.is_main.desc(), image_model.sort_order, image_model.id)
+    ).label('position')
+    ranked = session.query(
+        image_model.id, image_model.listing_id, image_model.file_path,
+        image_model.alt_text, image_model.is_main, position
+    ).filter(image_model.listing_id.in_(ids)).subquery()
+
+    images: Dict[str, List[Dict]] = {}
+    rows = session.query(ranked).filter(ranked.c.position <= limit).order_by(
+        ranked.c.listing_id, ranked.c.position
+    )
+    for row in rows:
+        images.setdefault(row.listing_id, []).append({
+            'id': row.id,
+            'url': row.file_path,
+            'alt': row.alt_text,
+            'is_primary': row.is_main
+        })
+    return images
+
+
+def load_list_relations(rows, fields: Optional[FrozenSet[str]] = None,
+                        session=None, models: Optional[Dict] = None) -> Dict[str, Dict]:
+    """
+    Catégories, vendeurs et images d'une page de lignes, une requête par relation
+    (seulement celles des champs demandés). session et models (catégorie,
+    utilisateur, image) valent par défaut ceux de l'application.
+    """
+    if session is None:
+        from app import db
+        session = db.session
+    models = models or _list_models()
+    wanted = LIST_FIELDS.relation_paths(fields)
+    categories, users, images = models['categories'], models['users'], models['images']
+    return {
+        'categories': load_categories(session, categories, (row.category_id for row in rows))
+        if 'categories' in wanted else {},
+        'users': load_users(session, users, (row.user_id for row in rows)) if 'users' in wanted else {},
+        'images': load_images(session, images, (row.id for row in rows)) if 'images' in wanted else {}
+    }
@@ -0,0 +1,225 @@
+"""
+Index plein texte des annonces actives
+
+OpenSearch reste prioritaire lorsqu'il est configuré et joignable : les filtres
+structurés lui sont transmis, le plafond de candidats s'applique donc après filtrage.
+Sinon /search filtre en base (trigrammes / ILIKE, sans plafond, sous-chaînes comprises)
+et l'index BM25 en mémoire ne sert qu'au classement par pertinence. Il est construit
+depuis la base au démarrage puis tenu à jour par les événements d'écriture des annonces.
+"""
+
+import logging
+import math
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .bm25 import BM25Index
+from .events import ListingChange, install_listing_events, on_listing_change
+from .text import join_text, parse_tags
+
+logger = logging.getLogger(__name__)
+
+# Nombre maximal d'identifiants candidats remontés par la recherche texte
+MAX_TEXT_CANDIDATES = 1000
+
+# Durée pendant laquelle l'état d'OpenSearch est réutilisé sans nouveau ping
+HEALTH_CHECK_TTL = 10.0
+
+listing_index = BM25Index()
+_ready = threading.Event()
+_build_lock = threading.Lock()
+_search_client = None
+_search_health = {'checked_at': 0.0, 'healthy': False}
+
+
+def listing_document(data: Dict) -> Dict[str, str]:
+    """Champs indexés d'une annonce (objet ou instantané de colonnes)"""
+    get = data.get if isinstance(data, dict) else (lambda key: getattr(data, key, None))
+    return {
+        'title': get('title') or '',
+        'description': get('description') or '',
+        'brand': get('brand') or '',
+        'model': get('model') or '',
+        'tags': join_text(parse_tags(get('tags'))),
+    }
+
+
+def build_listing_index() -> int:
+    """Construit l'index depuis la base (annonces actives, colonnes indexées uniquement)"""
+    from app.models.listing import Listing
+
+    with _build_lock:
+        started = time.perf_counter()
+        rows = Listing.query.filter(Listing.status == 'active').with_entities(
+            Listing.id, Listing.title, Listing.description,
+            Listing.brand, Listing.model, Listing.tags
+        ).yield_per(1000)
+        count = listing_index.rebuild(
+            (str(row.id), listing_document(row._asdict())) for row in rows
+        )
+        _ready.set()
+        logger.info('Listing text index built: %d documents in %.0f ms',
+                    count, (time.perf_counter() - started) * 1000)
+        return count
+
+
+def apply_listing_changes(changes: List[ListingChange]) -> None:
+    """Répercute les changements validés sur l'index"""
+    for change in changes:
+        if change.is_active:
+            listing_index.add(str(change.listing_id), listing_document(change.data))
+        else:
+            listing_index.remove(str(change.listing_id))
+
+
+def ensure_listing_index() -> None:
+    """Construit l'index à la première utilisation s'il ne l'a pas été au démarrage"""
+    if not _ready.is_set():
+        build_listing_index()
+
+
+def _opensearch_client(app):
+    global _search_client
+    url = app.config.get('SEARCH_URL')
+    if not url:
+        return None
+    if _search_client is None or _search_client.url != url:
+        from search import SearchClient
+        _search_client = SearchClient(url)
+    now = time.monotonic()
+    if now - _search_health['checked_at'] > HEALTH_CHECK_TTL:
+        _search_health['healthy'] = _search_client.healthy()
+        _search_health['checked_at'] = now
+    return _search_client if _search_health['healthy'] else None
+
+
+class TextHits(NamedTuple):
+    """
+    Résultat de la recherche texte.
+    hits : [(id, score)] triés par pertinence, None si la base doit filtrer elle-même ;
+    total : nombre de documents correspondants (avant plafond) quand le moteur le connaît.
+    """
+    hits: Optional[List[Tuple[str, float]]]
+    engine: str
+    total: Optional[int] = None
+
+
+def _contains(field: str, value: str) -> Dict:
+    # Équivalent OpenSearch de ILIKE '%value%' (jokers de la saisie échappés)
+    escaped = value.replace('\\', '\\\\').replace('*', '\\*').replace('?', '\\?')
+    return {'wildcard': {field: {'value': f'*{escaped}*', 'case_insensitive': True}}}
+
+
+def opensearch_filters(filters: Dict) -> List[Dict]:
+    """
+    Filtres structurés de /search traduits en clauses OpenSearch (mêmes règles que
+    build_search_query). L'année n'est pas indexée : elle reste filtrée en base.
+    """
+    clauses = [{'term': {'status': 'active'}}]
+    if filters.get('category_id'):
+        clauses.append({'term': {'category_id': filters['category_id']}})
+    if filters.get('listing_type') and filters['listing_type'] != 'both':
+        clauses.append({'term': {'listing_type': filters['listing_type']}})
+    if filters.get('condition'):
+        clauses.append({'terms': {'condition': list(filters['condition'])}})
+    price = {}
+    if filters.get('min_price') is not None:
+        price['gte'] = filters['min_price']
+    if filters.get('max_price') is not None:
+        price['lte'] = filters['max_price']
+    if price:
+        clauses.append({'range': {'estimated_value': price}})
+    for name in ('currency', 'postal_code', 'country'):
+        if filters.get(name):
+            clauses.append({'term': {name: filters[name]}})
+    if filters.get('city'):
+        clauses.append(_contains('city', filters['city']))
+    if filters.get('brand'):
+        clauses.append(_contains('brand.raw', filters['brand']))
+    if filters.get('model'):
+        clauses.append(_contains('model.raw', filters['model']))
+    if all([filters.get('latitude'), filters.get('longitude'), filters.get('radius_km')]):
+        lat, lon, radius = filters['latitude'], filters['longitude'], filters['radius_km']
+        lat_delta = radius / 111.0
+        lon_delta = radius / (111.0 * math.cos(math.radians(lat)))
+        clauses.append({'geo_bounding_box': {'location': {
+            'top_left': {'lat': lat + lat_delta, 'lon': lon - lon_delta},
+            'bottom_right': {'lat': lat - lat_delta, 'lon': lon + lon_delta}
+        }}})
+    if filters.get('exchange_type'):
+        if filters['exchange_type'] == 'both':
+            allowed = ['direct', 'chain', 'both']
+        else:
+            allowed = [filters['exchange_type'], 'both']
+        clauses.append({'terms': {'exchange_type': allowed}})
+    return clauses
+
+
+def _opensearch_ids(app, client, query: str, limit: int, filters: Dict) -> Optional[TextHits]:
+    index_name = f"{app.config.get('SEARCH_INDEX_PREFIX', 'lucky_kangaroo')}_listings"
+    body = {
+        'size': limit,
+        '_source': False,
+        'track_total_hits': True,
+        'query': {
+            'bool': {
+                'must': {
+                    'multi_match': {
+                        'query': query,
+                        'fields': ['title^3', 'brand^2', 'model^2', 'tags^1.5', 'description'],
+                        # Tous les mots, comme les alertes des recherches sauvegardées
+                        'operator': 'and'
+                    }
+                },
+                'filter': opensearch_filters(filters)
+            }
+        }
+    }
+    try:
+        response = client.search(index_name, body)
+    except Exception as e:
+        logger.warning('OpenSearch query failed, searching the database: %s', e)
+        _search_health['healthy'] = False
+        return None
+    hits = [(hit['_id'], hit.get('_score') or 0.0) for hit in response['hits']['hits']]
+    total = response['hits'].get('total')
+    if isinstance(total, dict):
+        total = total.get('value')
+    return TextHits(hits, 'opensearch', total)
+
+
+def search_listing_ids(app, query: str, filters: Optional[Dict] = None,
+                       limit: int = MAX_TEXT_CANDIDATES) -> TextHits:
+    """
+    Recherche texte des annonces via OpenSearch (filtres structurés compris).
+    OpenSearch absent ou en échec : hits vaut None et la recherche se fait en base
+    ('database'), rank_listing_ids fournissant l'ordre de pertinence.
+    """
+    client = _opensearch_client(app)
+    if client is not None:
+        result = _opensearch_ids(app, client, query, limit, filters or {})
+        if result is not None:
+            return result
+    return TextHits(None, 'database')
+
+
+def rank_listing_ids(query: str, limit: int = MAX_TEXT_CANDIDATES) -> List[Tuple[str, float]]:
+    """Classement BM25 en mémoire : [(id, score)] des limit annonces les plus pertinentes"""
+    ensure_listing_index()
+    return listing_index.search(query, limit)
+
+
+def init_listing_index(app) -> None:
+    """Branche l'index sur les écritures et le construit au démarrage"""
+    install_listing_events()
+    on_listing_change(apply_listing_changes)
+
+    if not app.config.get('SEARCH_INDEX_WARMUP', True):
+        return
+    with app.app_context():
+        try:
+            build_listing_index()
+        except Exception as e:
+            # La base peut ne pas encore exister (premier démarrage, migrations)
+            logger.warning('Listing text index not built at startup: %s', e)
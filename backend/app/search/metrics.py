@@ -0,0 +1,57 @@
+"""
+Métriques des services de recherche en mémoire (latences, compteurs)
+"""
+
+import math
+import threading
+from collections import deque
+from typing import Callable, Dict
+
+# Nombre de mesures conservées par série
+LATENCY_WINDOW = 2048
+
+
+class LatencyRecorder:
+    """Fenêtre glissante de durées avec percentiles"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+            self._count += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            samples = sorted(self._samples)
+            count = self._count
+        if not samples:
+            return {'count': count, 'p50_us': 0, 'p95_us': 0, 'p99_us': 0, 'max_us': 0}
+
+        def percentile(p):
+            index = min(len(samples) - 1, max(0, math.ceil(p * len(samples)) - 1))
+            return round(samples[index] * 1e6, 1)
+
+        return {
+            'count': count,
+            'p50_us': percentile(0.50),
+            'p95_us': percentile(0.95),
+            'p99_us': percentile(0.99),
+            'max_us': round(samples[-1] * 1e6, 1)
+        }
+
+
+_providers: Dict[str, Callable[[], Dict]] = {}
+
+
+def register_metrics(name: str, provider: Callable[[], Dict]) -> None:
+    """Enregistre une source de métriques exposée par search_metrics()"""
+    _providers[name] = provider
+
+
+def search_metrics() -> Dict:
+    """Métriques de tous les services de recherche enregistrés"""
+    return {name: provider() for name, provider in _providers.items()}
@@ -0,0 +1,398 @@
+"""
+Alertes des recherches sauvegardées (percolation inversée)
+
+Chaque recherche sauvegardée est rangée sous une seule clé qu'une annonce doit
+forcément porter pour lui correspondre : l'un de ses mots obligatoires (le plus
+long), sinon les cellules géographiques couvertes par son rayon, sinon sa
+catégorie. À la publication d'une annonce, seules les recherches rangées sous
+ses mots, sa cellule et sa catégorie sont évaluées ; le coût dépend du nombre
+de recherches candidates, pas du nombre total de recherches sauvegardées.
+Les correspondances sont transformées en notifications par un thread de fond.
+
+Une recherche avec texte exige tous ses mots significatifs dans l'annonce (sans
+tenir compte des accents ni de la casse), comme /search via OpenSearch
+(opérateur and) ; /search en base cherche l'expression entière, plus stricte.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from sqlalchemy import func
+
+from .events import ListingChange, install_listing_events, on_listing_change
+from .listing_index import listing_document
+from .metrics import LatencyRecorder, register_metrics
+from .text import join_text, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Taille d'une cellule géographique (degrés, ≈ 55 km en latitude)
+GEO_CELL_DEGREES = 0.5
+
+# Au-delà, un rayon couvre trop de cellules : la recherche est rangée sous sa catégorie
+MAX_GEO_CELLS = 64
+
+# Recherches sauvegardées par utilisateur
+MAX_SAVED_SEARCHES = 20
+
+# Annonces publiées en attente au plus, intervalle de traitement (secondes)
+MAX_PENDING = 10_000
+DRAIN_INTERVAL = 2.0
+
+# File pleine : un avertissement à la première annonce écartée puis toutes les N
+DROP_LOG_EVERY = 1000
+
+_MATCH_ALL = ('*',)
+
+
+def geo_cell(latitude: float, longitude: float) -> Tuple[int, int]:
+    return int(math.floor(latitude / GEO_CELL_DEGREES)), int(math.floor(longitude / GEO_CELL_DEGREES))
+
+
+def distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Distance de Haversine"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 6371 * 2 * math.asin(math.sqrt(a))
+
+
+@dataclass(frozen=True)
+class SavedQuery:
+    """Critères compilés d'une recherche sauvegardée"""
+    id: str
+    user_id: str
+    name: str
+    tokens: FrozenSet[str] = frozenset()
+    category_id: Optional[str] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    radius_km: Optional[float] = None
+
+    @classmethod
+    def from_criteria(cls, search_id: str, user_id: str, name: str, criteria: Dict) -> 'SavedQuery':
+        has_area = all(criteria.get(key) is not None for key in ('latitude', 'longitude', 'radius_km'))
+        return cls(
+            id=str(search_id),
+            user_id=str(user_id),
+            name=name,
+            tokens=frozenset(tokenize(criteria.get('query') or '')),
+            category_id=str(criteria['category_id']) if criteria.get('category_id') else None,
+            min_price=criteria.get('min_price'),
+            max_price=criteria.get('max_price'),
+            latitude=criteria['latitude'] if has_area else None,
+            longitude=criteria['longitude'] if has_area else None,
+            radius_km=criteria['radius_km'] if has_area else None
+        )
+
+    @property
+    def has_area(self) -> bool:
+        return self.radius_km is not None
+
+    def geo_cells(self) -> List[Tuple[int, int]]:
+        """Cellules intersectant le rectangle englobant du rayon"""
+        lat_delta = self.radius_km / 111.0
+        lon_delta = self.radius_km / (111.0 * max(math.cos(math.radians(self.latitude)), 0.01))
+        south, west = geo_cell(self.latitude - lat_delta, self.longitude - lon_delta)
+        north, east = geo_cell(self.latitude + lat_delta, self.longitude + lon_delta)
+        if (north - south + 1) * (east - west + 1) > MAX_GEO_CELLS:
+            return []
+        return [(row, column) for row in range(south, north + 1) for column in range(west, east + 1)]
+
+    def index_keys(self) -> List[Tuple]:
+        if self.tokens:
+            return [('t', max(self.tokens, key=lambda token: (len(token), token)))]
+        if self.has_area:
+            cells = self.geo_cells()
+            if cells:
+                return [('g', cell) for cell in cells]
+        if self.category_id:
+            return [('c', self.category_id)]
+        return [_MATCH_ALL]
+
+    def matches(self, listing: 'ListingFacts') -> bool:
+        if self.category_id is not None and listing.category_id != self.category_id:
+            return False
+        if self.min_price is not None or self.max_price is not None:
+            if listing.price is None:
+                return False
+            if self.min_price is not None and listing.price < self.min_price:
+                return False
+            if self.max_price is not None and listing.price > self.max_price:
+                return False
+        if self.has_area:
+            if listing.latitude is None or listing.longitude is None:
+                return False
+            if distance_km(self.latitude, self.longitude, listing.latitude, listing.longitude) > self.radius_km:
+                return False
+        return self.tokens <= listing.tokens
+
+
+@dataclass(frozen=True)
+class ListingFacts:
+    """Champs d'une annonce utiles à la percolation"""
+    id: str
+    user_id: Optional[str]
+    title: str
+    tokens: FrozenSet[str]
+    category_id: Optional[str]
+    price: Optional[float]
+    latitude: Optional[float]
+    longitude: Optional[float]
+
+    @classmethod
+    def from_data(cls, data: Dict) -> 'ListingFacts':
+        return cls(
+            id=str(data['id']),
+            user_id=str(data['user_id']) if data.get('user_id') else None,
+            title=data.get('title') or '',
+            tokens=frozenset(tokenize(join_text(listing_document(data).values()))),
+            category_id=str(data['category_id']) if data.get('category_id') else None,
+            price=data.get('estimated_value'),
+            latitude=data.get('latitude'),
+            longitude=data.get('longitude')
+        )
+
+    def index_keys(self) -> List[Tuple]:
+        keys = [('t', token) for token in self.tokens]
+        if self.latitude is not None and self.longitude is not None:
+            keys.append(('g', geo_cell(self.latitude, self.longitude)))
+        if self.category_id:
+            keys.append(('c', self.category_id))
+        keys.append(_MATCH_ALL)
+        return keys
+
+
+class Percolator:
+    """Recherches sauvegardées indexées par clé obligatoire"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queries: Dict[str, SavedQuery] = {}
+        self._buckets: Dict[Tuple, Set[str]] = {}
+        self._stats = Counter()
+        self.latency = LatencyRecorder()
+
+    def __len__(self) -> int:
+        return len(self._queries)
+
+    def _add_locked(self, query: SavedQuery) -> None:
+        self._remove_locked(query.id)
+        self._queries[query.id] = query
+        for key in query.index_keys():
+            self._buckets.setdefault(key, set()).add(query.id)
+
+    def _remove_locked(self, query_id: str) -> None:
+        query = self._queries.pop(query_id, None)
+        if query is None:
+            return
+        for key in query.index_keys():
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(query_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def add(self, query: SavedQuery) -> None:
+        with self._lock:
+            self._add_locked(query)
+
+    def remove(self, query_id: str) -> None:
+        with self._lock:
+            self._remove_locked(str(query_id))
+
+    def load(self, queries) -> int:
+        fresh = Percolator()
+        for query in queries:
+            fresh._add_locked(query)
+        with self._lock:
+            self._queries = fresh._queries
+            self._buckets = fresh._buckets
+        return len(fresh._queries)
+
+    def match(self, listing: ListingFacts) -> List[SavedQuery]:
+        """Recherches auxquelles l'annonce correspond (celles de son auteur exclues)"""
+        started = time.perf_counter()
+        with self._lock:
+            candidates = set()
+            for key in listing.index_keys():
+                candidates.update(self._buckets.get(key, ()))
+            matched = [
+                query for query in map(self._queries.get, candidates)
+                if query.user_id != listing.user_id and query.matches(listing)
+            ]
+        self.count('percolated')
+        self.count('candidates', len(candidates))
+        self.count('matches', len(matched))
+        self.latency.record(time.perf_counter() - started)
+        return matched
+
+    def count(self, name: str, value: int = 1) -> int:
+        """Incrémente un compteur des statistiques ; renvoie sa nouvelle valeur"""
+        with self._lock:
+            self._stats[name] += value
+            return self._stats[name]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            searches, keys, counters = len(self._queries), len(self._buckets), dict(self._stats)
+        return {**counters, 'saved_searches': searches, 'index_keys': keys,
+                'latency': self.latency.snapshot()}
+
+
+percolator = Percolator()
+_pending: deque = deque()
+_refresh = {'signature': None, 'checked_at': 0.0}
+_worker: Dict[str, Optional[threading.Thread]] = {'thread': None}
+
+
+def saved_query(search) -> SavedQuery:
+    return SavedQuery.from_criteria(search.id, search.user_id, search.name, search.criteria())
+
+
+def sync_saved_search(search) -> None:
+    """Reporte immédiatement une création ou modification dans ce processus"""
+    if search.alerts_enabled:
+        percolator.add(saved_query(search))
+    else:
+        percolator.remove(search.id)
+
+
+def forget_saved_search(search_id: str) -> None:
+    percolator.remove(search_id)
+
+
+def _signature():
+    from app import db
+    from app.models.saved_search import SavedSearch
+
+    return tuple(db.session.query(func.count(SavedSearch.id), func.max(SavedSearch.updated_at)).filter(
+        SavedSearch.alerts_enabled.is_(True)
+    ).one())
+
+
+def load_saved_searches(refresh_interval: float = 0) -> Optional[int]:
+    """
+    Recharge les recherches avec alerte si elles ont changé (autres processus) ;
+    au plus une vérification par refresh_interval secondes
+    """
+    from app.models.saved_search import SavedSearch
+
+    now = time.monotonic()
+    if _refresh['signature'] is not None and now - _refresh['checked_at'] < refresh_interval:
+        return None
+    _refresh['checked_at'] = now
+    signature = _signature()
+    if signature == _refresh['signature']:
+        return None
+    rows = SavedSearch.query.filter(SavedSearch.alerts_enabled.is_(True)).yield_per(1000)
+    count = percolator.load(saved_query(search) for search in rows)
+    _refresh['signature'] = signature
+    logger.info('Saved search percolator loaded: %d searches', count)
+    return count
+
+
+def queue_published_listings(changes: List[ListingChange]) -> None:
+    """
+    Écouteur après commit : un simple ajout en file des annonces publiées.
+    File pleine (thread des alertes en retard ou arrêté) : l'annonce est écartée,
+    comptée dans 'dropped' et signalée dans les journaux.
+    """
+    for change in changes:
+        if not change.is_published:
+            continue
+        if len(_pending) >= MAX_PENDING:
+            dropped = percolator.count('dropped')
+            if dropped % DROP_LOG_EVERY == 1:
+                logger.warning('Saved search alert queue full (%d listings), %d alerts dropped so far',
+                               MAX_PENDING, dropped)
+            continue
+        _pending.append(change.data)
+
+
+def notify_matches(listing: ListingFacts, matches: List[SavedQuery]) -> int:
+    """Une notification par utilisateur concerné (dans la session courante)"""
+    from app import db
+    from app.models.notification import Notification, NotificationType
+    from app.models.saved_search import SavedSearch
+
+    by_user: Dict[str, SavedQuery] = {}
+    for query in sorted(matches, key=lambda query: query.id):
+        by_user.setdefault(query.user_id, query)
+    for user_id, query in by_user.items():
+        db.session.add(Notification(
+            user_id=user_id,
+            notification_type=NotificationType.LISTING.value,
+            title=f"Nouvelle annonce pour « {query.name} »",
+            message=listing.title,
+            action_url=f"/listings/{listing.id}",
+            notification_metadata={'saved_search_id': query.id, 'listing_id': listing.id}
+        ))
+    # updated_at inchangé : la signature des recherches (rechargement) ne bouge pas
+    SavedSearch.query.filter(SavedSearch.id.in_([query.id for query in matches])).update(
+        {SavedSearch.last_notified_at: datetime.utcnow(), SavedSearch.updated_at: SavedSearch.updated_at},
+        synchronize_session=False
+    )
+    return len(by_user)
+
+
+def process_pending(refresh_interval: float = 0) -> int:
+    """Percole les annonces publiées en file et enregistre les notifications"""
+    from app import db
+
+    load_saved_searches(refresh_interval)
+    notified = 0
+    while True:
+        try:
+            data = _pending.popleft()
+        except IndexError:
+            break
+        listing = ListingFacts.from_data(data)
+        matches = percolator.match(listing)
+        if not matches:
+            continue
+        try:
+            notified += notify_matches(listing, matches)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            logger.exception('Saved search alerts failed for listing %s', listing.id)
+    percolator.count('notified', notified)
+    return notified
+
+
+def init_saved_search_alerts(app) -> None:
+    """
+    Branche la percolation sur les publications et démarre le thread des alertes
+    (SEARCH_ALERTS_WORKER, un seul par processus)
+    """
+    register_metrics('saved_search_alerts', percolator.stats)
+    if not app.config.get('SEARCH_ALERTS_ENABLED', True) or not app.config.get('SEARCH_ALERTS_WORKER', True):
+        return
+    if _worker['thread'] is not None and _worker['thread'].is_alive():
+        return
+    install_listing_events()
+    on_listing_change(queue_published_listings)
+    refresh_interval = app.config.get('SEARCH_ALERTS_REFRESH_INTERVAL', 60)
+
+    def run():
+        while True:
+            time.sleep(DRAIN_INTERVAL)
+            with app.app_context():
+                try:
+                    process_pending(refresh_interval)
+                except Exception:
+                    logger.exception('Saved search alerts worker failed')
+                finally:
+                    from app import db
+                    db.session.remove()
+
+    _worker['thread'] = threading.Thread(target=run, name='search-alerts', daemon=True)
+    _worker['thread'].start()
@@ -0,0 +1,69 @@
+"""
+Réindexation complète des annonces dans OpenSearch, sans interruption
+"""
+
+import click
+
+from services.search_reindex import ReindexError, StreamingReindexer, chunked
+
+from .documents import LISTING_INDEX_MAPPING, listing_columns, search_document
+
+
+def _build(row):
+    data = row._asdict()
+    return str(data['id']), search_document(data)
+
+
+def reindex_listings(app, client, chunk_size: int = 1000, workers: int = 4):
+    """
+    Reconstruit l'index des annonces dans un index versionné puis bascule
+    l'alias {SEARCH_INDEX_PREFIX}_listings ; la recherche reste servie par
+    l'index précédent pendant toute la reconstruction.
+    """
+    from app.models.listing import Listing
+
+    alias = f"{app.config.get('SEARCH_INDEX_PREFIX', 'lucky_kangaroo')}_listings"
+    columns = listing_columns(Listing)
+
+    def rows():
+        # Lignes légères en flux : pas d'objets ORM ni de liste complète en mémoire
+        return Listing.query.filter(Listing.status == 'active').with_entities(
+            *columns
+        ).yield_per(chunk_size)
+
+    def catch_up(since):
+        # Annonces modifiées pendant la reconstruction (y compris désactivées)
+        return chunked(Listing.query.filter(Listing.updated_at >= since).with_entities(
+            *columns
+        ).yield_per(chunk_size), chunk_size)
+
+    def missing(listing_ids):
+        # Annonces supprimées pendant la reconstruction : invisibles au rattrapage par updated_at
+        existing = {str(row.id) for row in Listing.query.filter(Listing.id.in_(listing_ids)).with_entities(Listing.id)}
+        return [listing_id for listing_id in listing_ids if listing_id not in existing]
+
+    with app.app_context():
+        reindexer = StreamingReindexer(client, alias, LISTING_INDEX_MAPPING, _build, workers=workers)
+        return reindexer.run(chunked(rows(), chunk_size), catch_up, missing)
+
+
+def register_search_commands(app):
+    @app.cli.command('search-reindex')
+    @click.option('--chunk-size', default=1000, show_default=True, help='Listings per bulk request')
+    @click.option('--workers', default=4, show_default=True, help='Parallel bulk workers')
+    def search_reindex_command(chunk_size, workers):
+        """Rebuild the listings search index and swap the alias (zero downtime)."""
+        from search import SearchClient
+
+        client = SearchClient(app.config.get('SEARCH_URL')).client
+        if client is None:
+            raise click.ClickException('Search engine is not configured (SEARCH_URL)')
+        try:
+            result = reindex_listings(app, client, chunk_size=chunk_size, workers=workers)
+        except ReindexError as e:
+            raise click.ClickException(str(e))
+        click.echo(
+            f"Indexed {result['documents']} listings into {result['index']} "
+            f"({result['deleted']} deleted during the rebuild, {result['seconds']}s); "
+            f"alias {result['alias']} now points to it"
+        )
@@ -0,0 +1,131 @@
+"""
+Cache des pages de résultats de /search
+
+Une page est mise en cache sous la signature canonique de ses filtres, suivie
+des versions des étiquettes dont elle dépend : catégorie filtrée, trigramme de
+la ville filtrée, ou l'ensemble des annonces à défaut. Une écriture validée
+sur une annonce change la version des étiquettes de son ancienne et de sa
+nouvelle valeur ; les pages concernées ne sont plus jamais relues.
+"""
+
+import threading
+import uuid
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set
+
+from .events import ListingChange, install_listing_events, on_listing_change
+from .facets import filter_signature
+from .metrics import register_metrics
+
+GLOBAL_TAG = 'listings'
+# Modifiée par l'administration des catégories (noms, hiérarchie)
+CATEGORIES_TAG = 'categories'
+
+# Colonnes dont la modification seule n'invalide pas les pages (compteurs) ;
+# leur fraîcheur est bornée par la durée de vie des entrées
+COUNTER_COLUMNS = frozenset({'views_count', 'likes_count', 'shares_count', 'updated_at'})
+
+_stats = Counter()
+_saved_seconds = [0.0]
+_stats_lock = threading.Lock()
+
+
+def _trigrams(value: str) -> Set[str]:
+    value = value.lower()
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+def query_tags(filters: Dict) -> List[str]:
+    """Étiquettes dont dépend une page de résultats"""
+    if filters.get('category_id'):
+        return [f"category:{filters['category_id']}"]
+    city = (filters.get('city') or '').strip().lower()
+    if len(city) >= 3:
+        # Toute ville contenant le filtre contient son premier trigramme
+        return [f'city:{city[:3]}']
+    return [GLOBAL_TAG]
+
+
+def change_tags(change: ListingChange) -> Set[str]:
+    """Étiquettes touchées par un changement (valeurs avant et après)"""
+    if change.action == 'upsert' and change.previous and set(change.previous) <= COUNTER_COLUMNS:
+        return set()
+
+    tags = {GLOBAL_TAG}
+    for values in (change.data, {**change.data, **change.previous}):
+        if values.get('category_id'):
+            tags.add(f"category:{values['category_id']}")
+        if values.get('city'):
+            tags.update(f'city:{gram}' for gram in _trigrams(values['city']))
+    return tags
+
+
+def _tag_key(tag: str) -> str:
+    return f'search:tag:{tag}'
+
+
+def tag_versions(cache, tags: Iterable[str]) -> str:
+    """Versions courantes des étiquettes (ETags, clés de cache dérivées)"""
+    values = cache.get_many(*(_tag_key(tag) for tag in tags))
+    return '.'.join(value or '0' for value in values)
+
+
+def invalidate(cache, tags: Iterable[str]) -> None:
+    """Change la version des étiquettes (jamais expirées, pour ne pas ressusciter de pages)"""
+    tags = list(tags)
+    if not tags:
+        return
+    cache.set_many({_tag_key(tag): uuid.uuid4().hex[:12] for tag in tags}, timeout=0)
+    with _stats_lock:
+        _stats['invalidations'] += len(tags)
+
+
+def page_key(cache, filters: Dict, page: int, per_page: int, sort_by: str) -> str:
+    base = filter_signature(filters)
+    # Les cartes embarquent la catégorie : l'administration des catégories change aussi la clé
+    versions = tag_versions(cache, query_tags(filters) + [CATEGORIES_TAG])
+    return f'search:results:{base}:{page}:{per_page}:{sort_by}:{versions}'
+
+
+def cached_page(cache, key: str) -> Optional[Dict]:
+    entry = cache.get(key)
+    with _stats_lock:
+        if entry is None:
+            _stats['misses'] += 1
+            return None
+        _stats['hits'] += 1
+        _saved_seconds[0] += entry['duration']
+    return entry['data']
+
+
+def store_page(cache, key: str, data: Dict, duration: float, timeout: int) -> None:
+    cache.set(key, {'data': data, 'duration': duration}, timeout=timeout)
+
+
+def result_cache_stats() -> Dict:
+    with _stats_lock:
+        hits, misses = _stats['hits'], _stats['misses']
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            'saved_db_ms': round(_saved_seconds[0] * 1000, 1),
+            'invalidated_tags': _stats['invalidations']
+        }
+
+
+def init_result_cache(app, cache) -> None:
+    """Invalide les pages en cache à chaque écriture validée sur une annonce"""
+
+    def invalidate_changes(changes: List[ListingChange]) -> None:
+        tags = set()
+        for change in changes:
+            tags |= change_tags(change)
+        if tags:
+            with app.app_context():
+                invalidate(cache, tags)
+
+    install_listing_events()
+    on_listing_change(invalidate_changes)
+    register_metrics('result_cache', result_cache_stats)
+
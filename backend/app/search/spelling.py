@@ -0,0 +1,247 @@
+"""
+Tolérance aux fautes de frappe (dictionnaire SymSpell)
+
+Le vocabulaire des titres, marques et modèles des annonces actives est indexé
+par voisinage de suppressions : chaque mot est rangé sous toutes les chaînes
+obtenues en lui retirant jusqu'à `max_distance` caractères. Une recherche ne
+génère que les suppressions du terme saisi et vérifie la distance
+d'édition des seuls mots qui partagent l'une d'elles.
+"""
+
+import logging
+import threading
+import time
+from itertools import combinations
+from typing import Dict, List, Optional, Set, Tuple
+
+from .events import ListingChange, install_listing_events, on_listing_change
+from .metrics import LatencyRecorder, register_metrics
+from .text import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Distance d'édition maximale et longueur du préfixe indexé
+MAX_EDIT_DISTANCE = 2
+PREFIX_LENGTH = 7
+
+# Mots plus courts non indexés ni corrigés (trop ambigus)
+MIN_WORD_LENGTH = 3
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Distance de Damerau-Levenshtein restreinte ; limit + 1 si elle dépasse limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous_previous is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous_previous, previous = previous, current
+    return previous[-1] if previous[-1] <= limit else limit + 1
+
+
+def _deletes(word: str, distance: int) -> Set[str]:
+    """Chaînes obtenues en retirant jusqu'à `distance` caractères"""
+    results = {word}
+    for removed in range(1, min(distance, len(word)) + 1):
+        for positions in combinations(range(len(word)), removed):
+            results.add(''.join(c for i, c in enumerate(word) if i not in positions))
+    return results
+
+
+def max_distance_for(word: str) -> int:
+    """Une faute tolérée jusqu'à 5 caractères, deux au-delà"""
+    return 1 if len(word) <= 5 else MAX_EDIT_DISTANCE
+
+
+class SymSpellDictionary:
+    """Mots et fréquences, indexés par voisinage de suppressions"""
+
+    def __init__(self, max_distance: int = MAX_EDIT_DISTANCE, prefix_length: int = PREFIX_LENGTH):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self._words: Dict[str, int] = {}
+        self._deletes: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._words
+
+    def add(self, word: str, count: int = 1) -> None:
+        if word not in self._words:
+            for variant in _deletes(word[:self.prefix_length], self.max_distance):
+                self._deletes.setdefault(variant, set()).add(word)
+            self._words[word] = 0
+        self._words[word] += count
+
+    def remove(self, word: str, count: int = 1) -> None:
+        remaining = self._words.get(word, 0) - count
+        if remaining > 0:
+            self._words[word] = remaining
+            return
+        self._words.pop(word, None)
+        for variant in _deletes(word[:self.prefix_length], self.max_distance):
+            bucket = self._deletes.get(variant)
+            if bucket is not None:
+                bucket.discard(word)
+                if not bucket:
+                    del self._deletes[variant]
+
+    def lookup(self, term: str, max_distance: Optional[int] = None) -> List[Tuple[str, int, int]]:
+        """Mots les plus proches de `term` : [(mot, distance, fréquence)], meilleurs d'abord"""
+        limit = min(self.max_distance if max_distance is None else max_distance, self.max_distance)
+        if term in self._words:
+            return [(term, 0, self._words[term])]
+
+        best = limit
+        found: Dict[str, int] = {}
+        checked: Set[str] = set()
+        level, seen = {term[:self.prefix_length]}, set()
+        # Suppressions par nombre croissant : au-delà de la meilleure distance, inutile
+        for removed in range(limit + 1):
+            if removed > best:
+                break
+            for variant in level:
+                for word in self._deletes.get(variant, ()):
+                    if word in checked:
+                        continue
+                    checked.add(word)
+                    distance = edit_distance(term, word, best)
+                    if distance <= best:
+                        best = distance
+                        found[word] = distance
+            seen |= level
+            level = {v[:i] + v[i + 1:] for v in level for i in range(len(v))} - seen
+        return sorted(
+            ((word, distance, self._words[word]) for word, distance in found.items() if distance <= best),
+            key=lambda item: (item[1], -item[2], item[0])
+        )
+
+
+class SpellingIndex:
+    """Dictionnaire du vocabulaire des annonces, tenu à jour par annonce"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dictionary = SymSpellDictionary()
+        self._contributions: Dict[str, Set[str]] = {}
+        self.latency = LatencyRecorder()
+
+    @staticmethod
+    def vocabulary(data: Dict) -> Set[str]:
+        words = set()
+        for field in ('title', 'brand', 'model'):
+            words.update(
+                word for word in tokenize(data.get(field) or '')
+                if len(word) >= MIN_WORD_LENGTH and not word.isdigit()
+            )
+        return words
+
+    def _apply_locked(self, listing_id: str, data: Optional[Dict]) -> None:
+        for word in self._contributions.pop(listing_id, ()):
+            self._dictionary.remove(word)
+        if data is None:
+            return
+        words = self.vocabulary(data)
+        for word in words:
+            self._dictionary.add(word)
+        if words:
+            self._contributions[listing_id] = words
+
+    def apply(self, listing_id: str, data: Optional[Dict]) -> None:
+        """Remplace la contribution d'une annonce (data=None pour la retirer)"""
+        with self._lock:
+            self._apply_locked(listing_id, data)
+
+    def load(self, rows) -> int:
+        fresh = SpellingIndex()
+        for data in rows:
+            fresh._apply_locked(str(data['id']), data)
+        with self._lock:
+            self._dictionary = fresh._dictionary
+            self._contributions = fresh._contributions
+        return len(fresh._contributions)
+
+    def correct(self, query: str) -> Optional[Dict]:
+        """
+        Correction d'une requête dont des mots sont inconnus du vocabulaire :
+        {'query': requête corrigée, 'corrections': {mot: correction}} ou None
+        """
+        started = time.perf_counter()
+        words = tokenize(query)
+        corrections = {}
+        with self._lock:
+            for word in words:
+                if len(word) < MIN_WORD_LENGTH or word.isdigit() or word in self._dictionary:
+                    continue
+                matches = self._dictionary.lookup(word, max_distance_for(word))
+                if matches:
+                    corrections[word] = matches[0][0]
+        self.latency.record(time.perf_counter() - started)
+        if not corrections:
+            return None
+        return {
+            'query': ' '.join(corrections.get(word, word) for word in words),
+            'corrections': corrections
+        }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            words = len(self._dictionary)
+        return {'words': words, 'latency': self.latency.snapshot()}
+
+
+spelling_index = SpellingIndex()
+_ready = threading.Event()
+
+
+def build_spelling_index() -> int:
+    """Construit le dictionnaire depuis la base"""
+    from app.models.listing import Listing
+
+    started = time.perf_counter()
+    rows = Listing.query.filter(Listing.status == 'active').with_entities(
+        Listing.id, Listing.title, Listing.brand, Listing.model
+    ).yield_per(1000)
+    count = spelling_index.load(row._asdict() for row in rows)
+    _ready.set()
+    logger.info('Spelling dictionary built: %d listings in %.0f ms',
+                count, (time.perf_counter() - started) * 1000)
+    return count
+
+
+def apply_spelling_changes(changes: List[ListingChange]) -> None:
+    for change in changes:
+        spelling_index.apply(str(change.listing_id), change.data if change.is_active else None)
+
+
+def did_you_mean(query: str) -> Optional[Dict]:
+    """Requête corrigée si des mots sont inconnus du vocabulaire des annonces"""
+    if not _ready.is_set():
+        build_spelling_index()
+    return spelling_index.correct(query)
+
+
+def init_spelling(app) -> None:
+    """Branche le dictionnaire sur les écritures et le construit au démarrage"""
+    install_listing_events()
+    on_listing_change(apply_spelling_changes)
+    register_metrics('spelling', spelling_index.stats)
+
+    if not app.config.get('SEARCH_INDEX_WARMUP', True):
+        return
+    with app.app_context():
+        try:
+            build_spelling_index()
+        except Exception as e:
+            logger.warning('Spelling dictionary not built at startup: %s', e)
@@ -0,0 +1,54 @@
+"""
+Normalisation et découpage du texte pour les index de recherche en mémoire
+"""
+
+import json
+import re
+import unicodedata
+from typing import Iterable, List
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+# Mots vides fréquents (fr, de, en, it) qui n'apportent rien au classement
+STOPWORDS = frozenset({
+    'a', 'au', 'aux', 'avec', 'ce', 'ces', 'dans', 'de', 'des', 'du', 'en', 'et', 'la', 'le',
+    'les', 'leur', 'ou', 'par', 'pour', 'sans', 'sur', 'un', 'une',
+    'der', 'die', 'das', 'und', 'mit', 'fur', 'von', 'ein', 'eine',
+    'the', 'and', 'for', 'with', 'of', 'in', 'on', 'to',
+    'il', 'lo', 'di', 'da', 'con', 'per', 'una', 'uno',
+})
+
+
+def normalize(text: str) -> str:
+    """Minuscules et suppression des accents"""
+    if not text:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(text).lower())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text: str, keep_stopwords: bool = False) -> List[str]:
+    """Découpe un texte normalisé en termes"""
+    tokens = _TOKEN_RE.findall(normalize(text))
+    if keep_stopwords:
+        return tokens
+    return [t for t in tokens if t not in STOPWORDS]
+
+
+def parse_tags(tags) -> List[str]:
+    """Les tags sont stockés en texte : liste JSON ou valeurs séparées par des virgules"""
+    if not tags:
+        return []
+    if isinstance(tags, (list, tuple, set)):
+        return [str(t) for t in tags if t]
+    try:
+        parsed = json.loads(tags)
+        if isinstance(parsed, list):
+            return [str(t) for t in parsed if t]
+    except (TypeError, ValueError):
+        pass
+    return [t.strip() for t in str(tags).split(',') if t.strip()]
+
+
+def join_text(values: Iterable) -> str:
+    return ' '.join(str(v) for v in values if v)
@@ -0,0 +1,413 @@
+"""
+Recherches tendances
+
+Les requêtes de /search sont déposées dans une file sans verrou ; un thread de
+fond les normalise et les compte dans des fenêtres glissantes (dernière heure,
+dernier jour). Chaque fenêtre est découpée en tranches ; chaque tranche tient
+un Count-Min Sketch et les compteurs de ses requêtes les plus fréquentes. Le
+même thread recalcule les classements : /search/trending lit une liste prête,
+sans verrou ni calcul.
+
+Chaque processus écrit périodiquement son propre instantané en base. Les
+classements servis additionnent les comptes du processus et les instantanés
+des autres processus (relus à chaque écriture) encore dans leur fenêtre.
+"""
+
+import atexit
+import heapq
+import logging
+import math
+import os
+import socket
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import or_
+
+from .metrics import register_metrics
+from .text import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Fenêtres glissantes : (durée d'une tranche en secondes, nombre de tranches)
+WINDOWS = {
+    'hour': (300, 12),
+    'day': (3600, 24),
+}
+
+# Candidates conservées par tranche, requêtes mises en file au plus
+CANDIDATES_PER_SLICE = 200
+MAX_PENDING = 100_000
+MAX_QUERY_LENGTH = 100
+
+# Erreur du sketch d'une tranche : surestimation d'au plus 0,1 % des requêtes
+# de la tranche, avec 99 % de probabilité (2719 × 5 compteurs)
+SKETCH_EPSILON = 0.001
+SKETCH_DELTA = 0.01
+
+# Intervalle de comptage et de classement par le thread de fond (secondes)
+DRAIN_INTERVAL = 2.0
+
+
+def normalize_query(query: str) -> str:
+    """Clé de comptage : minuscules, sans accents ni ponctuation"""
+    return ' '.join(tokenize(query[:MAX_QUERY_LENGTH], keep_stopwords=True))
+
+
+def window_seconds(window: str) -> int:
+    slice_seconds, slices = WINDOWS[window]
+    return slice_seconds * slices
+
+
+class CountMinSketch:
+    """Compteurs approchés (surestimation bornée) en mémoire constante"""
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self._rows = [[0] * width for _ in range(depth)]
+
+    @classmethod
+    def for_error(cls, epsilon: float, delta: float) -> 'CountMinSketch':
+        """Sketch surestimant d'au plus epsilon × total, avec une probabilité 1 - delta"""
+        return cls(math.ceil(math.e / epsilon), math.ceil(math.log(1 / delta)))
+
+    def cells(self, key: str) -> List[int]:
+        """Colonne de la clé dans chaque ligne (réutilisable entre sketches de même taille)"""
+        return [hash((row, key)) % self.width for row in range(self.depth)]
+
+    def add(self, key: str, count: int = 1) -> int:
+        """Ajoute `count` et retourne la nouvelle estimation"""
+        estimate = None
+        for row, cell in enumerate(self.cells(key)):
+            self._rows[row][cell] += count
+            value = self._rows[row][cell]
+            estimate = value if estimate is None else min(estimate, value)
+        return estimate
+
+    def estimate(self, key: str, cells: Optional[List[int]] = None) -> int:
+        cells = self.cells(key) if cells is None else cells
+        return min(self._rows[row][cell] for row, cell in enumerate(cells))
+
+
+class _Slice:
+    """
+    Tranche d'une fenêtre : sketch et compteurs des requêtes les plus fréquentes.
+    Tant que la tranche n'a écarté aucune requête, ces compteurs sont exacts ;
+    ensuite, une requête admise part de l'estimation du sketch puis est comptée
+    exactement.
+    """
+
+    def __init__(self, start: int, capacity: int):
+        self.start = start
+        self.capacity = capacity
+        self.sketch = CountMinSketch.for_error(SKETCH_EPSILON, SKETCH_DELTA)
+        self.candidates: Dict[str, int] = {}
+        self.complete = True  # Toutes les requêtes de la tranche sont suivies
+        self._heap: List[Tuple[int, str]] = []
+
+    def add(self, key: str, count: int = 1) -> None:
+        estimate = self.sketch.add(key, count)
+        if key in self.candidates:
+            value = self.candidates[key] + count
+        elif len(self.candidates) < self.capacity:
+            value = count if self.complete else estimate
+        else:
+            self.complete = False
+            if estimate <= self._minimum():
+                return
+            _, evicted = heapq.heappop(self._heap)
+            del self.candidates[evicted]
+            value = estimate
+        self.candidates[key] = value
+        heapq.heappush(self._heap, (value, key))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(value, name) for name, value in self.candidates.items()]
+            heapq.heapify(self._heap)
+
+    def count(self, key: str, cells: Optional[List[int]] = None) -> int:
+        """Compte de la requête : exact, ou majorant pour une requête écartée"""
+        value = self.candidates.get(key)
+        if value is not None:
+            return value
+        if self.complete:
+            return 0
+        # Une requête écartée n'a jamais dépassé le plus petit compteur suivi
+        return min(self.sketch.estimate(key, cells), self._minimum())
+
+    def _minimum(self) -> int:
+        # Entrées périmées (compteur remonté depuis) retirées paresseusement
+        while self._heap and self.candidates.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0]
+
+
+class SlidingHeavyHitters:
+    """
+    Requêtes les plus fréquentes sur une fenêtre glissante de tranches.
+    Les tranches closes ne changent plus : leurs totaux par requête sont gardés
+    jusqu'au changement de tranche, seule la tranche courante est relue.
+    """
+
+    def __init__(self, slice_seconds: int, slices: int, capacity: int = CANDIDATES_PER_SLICE):
+        self.slice_seconds = slice_seconds
+        self.slices = slices
+        self.capacity = capacity
+        self._slices: deque = deque()
+        self._closed_starts: Tuple[int, ...] = ()
+        self._closed_totals: Dict[str, int] = {}
+
+    def _current(self, now: float) -> _Slice:
+        start = int(now // self.slice_seconds) * self.slice_seconds
+        oldest = start - (self.slices - 1) * self.slice_seconds
+        while self._slices and self._slices[0].start < oldest:
+            self._slices.popleft()
+        if not self._slices or self._slices[-1].start != start:
+            self._slices.append(_Slice(start, self.capacity))
+        return self._slices[-1]
+
+    def add(self, key: str, count: int = 1, now: Optional[float] = None) -> None:
+        self._current(time.time() if now is None else now).add(key, count)
+
+    def keys(self) -> set:
+        return set().union(*(piece.candidates for piece in self._slices))
+
+    def top(self, k: int, now: Optional[float] = None) -> List[Tuple[str, int]]:
+        current = self._current(time.time() if now is None else now)
+        closed = list(self._slices)[:-1]
+        starts = tuple(piece.start for piece in closed)
+        if starts != self._closed_starts:
+            self._closed_starts, self._closed_totals = starts, {}
+
+        totals = []
+        for key in self.keys():
+            closed_total = self._closed_totals.get(key)
+            if closed_total is None:
+                cells = current.sketch.cells(key)
+                closed_total = self._closed_totals[key] = sum(piece.count(key, cells) for piece in closed)
+                totals.append((closed_total + current.count(key, cells), key))
+            else:
+                totals.append((closed_total + current.count(key), key))
+        return [(key, total) for total, key in heapq.nlargest(k, totals)]
+
+
+class TrendingSearches:
+    """File des requêtes, fenêtres glissantes et classements prêts à servir"""
+
+    def __init__(self, top_k: int = 50):
+        self.top_k = top_k
+        self.windows = {name: SlidingHeavyHitters(*spec) for name, spec in WINDOWS.items()}
+        self._pending: deque = deque(maxlen=MAX_PENDING)
+        self._labels: Dict[str, str] = {}
+        self._others: Dict[str, Counter] = {name: Counter() for name in self.windows}
+        self._rankings: Dict[str, List[Dict]] = {name: [] for name in self.windows}
+        self._lock = threading.Lock()
+        self._stats = Counter()
+        self.ranked_at: Optional[float] = None
+
+    def record(self, query: str) -> None:
+        """Appelé par /search : un simple ajout en file (pas de verrou ni de calcul)"""
+        self._pending.append(query)
+
+    def drain(self, now: Optional[float] = None) -> int:
+        """Compte les requêtes en file"""
+        drained = 0
+        with self._lock:
+            while True:
+                try:
+                    query = self._pending.popleft()
+                except IndexError:
+                    break
+                key = normalize_query(query)
+                if not key:
+                    continue
+                self._labels[key] = ' '.join(query.split()).lower()[:MAX_QUERY_LENGTH]
+                for window in self.windows.values():
+                    window.add(key, now=now)
+                drained += 1
+            self._stats['recorded'] += drained
+        return drained
+
+    def refresh(self, now: Optional[float] = None) -> None:
+        """Compte la file et recalcule les classements servis (thread de fond)"""
+        self.drain(now)
+        with self._lock:
+            rankings = {}
+            for name, window in self.windows.items():
+                totals = Counter(self._others[name])
+                for key, count in window.top(self.top_k, now):
+                    totals[key] += count
+                rankings[name] = [
+                    {'query': self._labels.get(key, key), 'count': count}
+                    for key, count in totals.most_common(self.top_k)
+                ]
+            self._stats['rankings'] += 1
+        self._rankings = rankings
+        self.ranked_at = time.monotonic()
+
+    def top(self, window: str = 'day', limit: int = 10) -> List[Dict]:
+        """Dernier classement calculé (lecture sans verrou)"""
+        return self._rankings[window][:min(limit, self.top_k)]
+
+    def set_others(self, window: str, rows: Iterable[Tuple[str, int]]) -> None:
+        """Remplace les comptes des instantanés des autres processus"""
+        others = Counter()
+        with self._lock:
+            for term, count in rows:
+                key = normalize_query(term)
+                if key and count > 0:
+                    others[key] += count
+                    self._labels.setdefault(key, term)
+            self._others[window] = others
+
+    def _prune_labels(self) -> None:
+        keep = set()
+        for name, window in self.windows.items():
+            keep |= window.keys()
+            keep.update(self._others[name])
+        self._labels = {key: label for key, label in self._labels.items() if key in keep}
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, List[Dict]]:
+        """Classements des seuls comptes de ce processus (instantané en base)"""
+        with self._lock:
+            snapshot = {
+                name: [{'query': self._labels.get(key, key), 'count': count}
+                       for key, count in window.top(self.top_k, now)]
+                for name, window in self.windows.items()
+            }
+            self._prune_labels()
+        return snapshot
+
+    def count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._stats[name] += value
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self._stats,
+                'pending': len(self._pending),
+                'tracked_queries': len(self._labels)
+            }
+
+
+trending_searches = TrendingSearches()
+_worker: Dict[str, Optional[threading.Thread]] = {'thread': None}
+_stop = threading.Event()
+
+
+def _source() -> str:
+    """Processus auteur d'un instantané (calculé à l'appel : les workers sont forkés)"""
+    return f'{socket.gethostname()}:{os.getpid()}'[:100]
+
+
+def _worker_running() -> bool:
+    return _worker['thread'] is not None and _worker['thread'].is_alive()
+
+
+def record_search(query: Optional[str]) -> None:
+    if query and query.strip():
+        trending_searches.record(query)
+
+
+def get_trending(window: str = 'day', limit: int = 10) -> List[Dict]:
+    # Sans thread de fond : classement recalculé à la lecture, au plus un par intervalle
+    ranked_at = trending_searches.ranked_at
+    if not _worker_running() and (ranked_at is None or time.monotonic() - ranked_at >= DRAIN_INTERVAL):
+        trending_searches.refresh()
+    return trending_searches.top(window, limit)
+
+
+def load_other_snapshots(source: str) -> None:
+    """Relit les instantanés des autres processus encore dans leur fenêtre"""
+    from app.models.search_trend import TrendingSearch
+
+    now = datetime.utcnow()
+    for window in trending_searches.windows:
+        rows = TrendingSearch.query.filter(
+            TrendingSearch.window == window,
+            TrendingSearch.source != source,
+            TrendingSearch.computed_at >= now - timedelta(seconds=window_seconds(window))
+        ).with_entities(TrendingSearch.term, TrendingSearch.count)
+        trending_searches.set_others(window, rows)
+
+
+def flush_trending(app) -> None:
+    """
+    Remplace l'instantané de ce processus en base (et ceux sortis de leur
+    fenêtre), puis relit ceux des autres processus
+    """
+    from app import db
+    from app.models.search_trend import TrendingSearch
+
+    snapshot = trending_searches.snapshot()
+    source, computed_at = _source(), datetime.utcnow()
+    with app.app_context():
+        try:
+            for window, entries in snapshot.items():
+                expired = computed_at - timedelta(seconds=window_seconds(window))
+                TrendingSearch.query.filter(
+                    TrendingSearch.window == window,
+                    or_(TrendingSearch.source == source, TrendingSearch.computed_at < expired)
+                ).delete(synchronize_session=False)
+                db.session.add_all(
+                    TrendingSearch(window=window, source=source, term=entry['query'], count=entry['count'],
+                                   rank=rank, computed_at=computed_at)
+                    for rank, entry in enumerate(entries, 1)
+                )
+            db.session.commit()
+            trending_searches.count('flushes')
+            load_other_snapshots(source)
+        except Exception:
+            db.session.rollback()
+            logger.exception('Trending searches flush failed')
+
+
+def stop_trending(timeout: float = 10.0) -> None:
+    """Arrête le thread des tendances après un dernier instantané"""
+    thread = _worker['thread']
+    if thread is None:
+        return
+    _stop.set()
+    thread.join(timeout)
+    _worker['thread'] = None
+
+
+def init_trending(app) -> None:
+    """
+    Relit les instantanés des autres processus et démarre le thread de comptage,
+    de classement et d'écriture (SEARCH_TRENDING_WORKER, un seul par processus)
+    """
+    trending_searches.top_k = app.config.get('SEARCH_TRENDING_TOP_K', 50)
+    flush_interval = app.config.get('SEARCH_TRENDING_FLUSH_INTERVAL', 300)
+    register_metrics('trending', trending_searches.stats)
+    if not app.config.get('SEARCH_TRENDING_WORKER', True) or _worker_running():
+        return
+
+    with app.app_context():
+        try:
+            load_other_snapshots(_source())
+        except Exception:
+            logger.warning('Trending searches snapshot unavailable', exc_info=True)
+
+    def run():
+        last_flush = time.monotonic()
+        while not _stop.wait(DRAIN_INTERVAL):
+            try:
+                trending_searches.refresh()
+                if time.monotonic() - last_flush >= flush_interval:
+                    flush_trending(app)
+                    last_flush = time.monotonic()
+            except Exception:
+                logger.exception('Trending searches worker failed')
+        # Arrêt : les comptes depuis la dernière écriture ne sont pas perdus
+        trending_searches.drain()
+        flush_trending(app)
+
+    _stop.clear()
+    _worker['thread'] = threading.Thread(target=run, name='search-trending', daemon=True)
+    _worker['thread'].start()
+    atexit.register(stop_trending)
@@ -10,7 +10,11 @@ from .categories import (
     EXCHANGE_TYPES,
     SUPPORTED_CURRENCIES,
     SUPPORTED_LANGUAGES,
+    CATEGORY_INDEX,
+    CategoryNode,
     get_category_by_id,
+    get_category_node,
+    get_category_descendants,
     get_categories_by_type,
     search_categories
 )
@@ -23,7 +27,11 @@ __all__ = [
     'EXCHANGE_TYPES',
     'SUPPORTED_CURRENCIES',
     'SUPPORTED_LANGUAGES',
+    'CATEGORY_INDEX',
+    'CategoryNode',
     'get_category_by_id',
+    'get_category_node',
+    'get_category_descendants',
     'get_categories_by_type',
     'search_categories'
 ]
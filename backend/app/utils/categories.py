@@ -1,8 +1,18 @@
 """
 Configuration des catégories pour Lucky Kangaroo
 Basé sur le cahier des charges avec catégories étendues
+
+Un index figé (identifiants, slugs, mots sans accents, ancêtres et
+descendants) est construit une fois à l'import ; les recherches et
+parcours de l'arbre n'itèrent plus sur toutes les catégories.
 """
 
+import re
+import unicodedata
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Mapping, Optional, Tuple
+
 # Catégories principales d'objets
 OBJECT_CATEGORIES = {
     "antiques": {
@@ -580,10 +590,119 @@ SUPPORTED_LANGUAGES = [
     {"code": "zh", "name": "中文", "flag": "🇨🇳"}
 ]
 
+# Index figé de l'arbre des catégories
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+def _fold(text):
+    """Minuscules et suppression des accents"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _slugify(text):
+    return '-'.join(_WORD_RE.findall(_fold(text)))
+
+
+@dataclass(frozen=True)
+class CategoryNode:
+    """Catégorie (parent_id None) ou sous-catégorie de l'index"""
+    id: str
+    slug: str
+    name: str
+    type: str  # objects, services
+    icon: Optional[str] = None
+    parent_id: Optional[str] = None
+    children: Tuple[str, ...] = ()
+
+
+class CategoryIndex:
+    """
+    Index en lecture seule de l'arbre des catégories.
+    Les sous-catégories ont pour identifiant « catégorie/slug » (les noms
+    seuls ne sont pas uniques d'une catégorie à l'autre).
+    """
+
+    def __init__(self, categories_by_type: Mapping[str, Mapping]):
+        nodes: Dict[str, CategoryNode] = {}
+        for category_type, categories in categories_by_type.items():
+            for category_id, data in categories.items():
+                children = []
+                for sub_name in data.get("subcategories", []):
+                    sub_id = f"{category_id}/{_slugify(sub_name)}"
+                    nodes[sub_id] = CategoryNode(sub_id, f"{_slugify(category_id)}/{_slugify(sub_name)}",
+                                                 sub_name, category_type, parent_id=category_id)
+                    children.append(sub_id)
+                nodes[category_id] = CategoryNode(category_id, _slugify(category_id), data["name"],
+                                                  category_type, data.get("icon"), children=tuple(children))
+
+        self.by_id: Mapping[str, CategoryNode] = MappingProxyType(nodes)
+        self.by_slug: Mapping[str, CategoryNode] = MappingProxyType({node.slug: node for node in nodes.values()})
+        self._order = MappingProxyType({category_id: position for position, category_id in enumerate(nodes)})
+
+        ancestors, descendants = {}, {}
+        for node in nodes.values():
+            ancestors[node.id] = (node.parent_id,) if node.parent_id else ()
+            descendants[node.id] = frozenset((node.id,) + node.children)
+        self.ancestors: Mapping[str, Tuple[str, ...]] = MappingProxyType(ancestors)
+        self.descendants: Mapping[str, FrozenSet[str]] = MappingProxyType(descendants)
+
+        # Chaque sous-chaîne de chaque mot → catégories principales concernées
+        fragments: Dict[str, set] = {}
+        names: Dict[str, list] = {}
+        for node in nodes.values():
+            root = node.parent_id or node.id
+            names.setdefault(root, []).append(_fold(node.name))
+            for word in set(_WORD_RE.findall(_fold(node.name))):
+                for start in range(len(word)):
+                    for end in range(start + 1, len(word) + 1):
+                        fragments.setdefault(word[start:end], set()).add(root)
+        self._fragments: Mapping[str, FrozenSet[str]] = MappingProxyType(
+            {fragment: frozenset(roots) for fragment, roots in fragments.items()}
+        )
+        self._names: Mapping[str, Tuple[str, ...]] = MappingProxyType(
+            {root: tuple(folded) for root, folded in names.items()}
+        )
+
+    def get(self, id_or_slug: str) -> Optional[CategoryNode]:
+        return self.by_id.get(id_or_slug) or self.by_slug.get(id_or_slug)
+
+    def search(self, query: str) -> Tuple[str, ...]:
+        """
+        Catégories principales dont le nom ou une sous-catégorie contient la requête
+        (sous-chaîne sans tenir compte des accents ni de la casse ; vide : toutes).
+        Les mots de la requête restreignent d'abord les candidates par l'index.
+        """
+        folded = _fold(query)
+        matches = None
+        for word in sorted(_WORD_RE.findall(folded), key=len, reverse=True):
+            roots = self._fragments.get(word, frozenset())
+            matches = roots if matches is None else matches & roots
+            if not matches:
+                return ()
+        candidates = self._names if matches is None else matches
+        return tuple(sorted(
+            (root for root in candidates if any(folded in name for name in self._names[root])),
+            key=self._order.__getitem__
+        ))
+
+
+CATEGORY_INDEX = CategoryIndex({"objects": OBJECT_CATEGORIES, "services": SERVICE_CATEGORIES})
+
+
 def get_category_by_id(category_id):
     """Récupère une catégorie par son ID"""
     return ALL_CATEGORIES.get(category_id)
 
+def get_category_node(id_or_slug):
+    """Récupère une catégorie ou sous-catégorie de l'index par identifiant ou slug"""
+    return CATEGORY_INDEX.get(id_or_slug)
+
+def get_category_descendants(category_id):
+    """Identifiants de la catégorie et de toutes ses sous-catégories"""
+    return CATEGORY_INDEX.descendants.get(category_id, frozenset())
+
 def get_categories_by_type(category_type="all"):
     """Récupère les catégories par type"""
     if category_type == "objects":
@@ -594,13 +713,5 @@ def get_categories_by_type(category_type="all"):
         return ALL_CATEGORIES
 
 def search_categories(query):
-    """Recherche dans les catégories"""
-    results = {}
-    query_lower = query.lower()
-    
-    for cat_id, cat_data in ALL_CATEGORIES.items():
-        if (query_lower in cat_data["name"].lower() or 
-            any(query_lower in sub.lower() for sub in cat_data.get("subcategories", []))):
-            results[cat_id] = cat_data
-    
-    return results
+    """Recherche dans les catégories (mots sans tenir compte des accents)"""
+    return {cat_id: ALL_CATEGORIES[cat_id] for cat_id in CATEGORY_INDEX.search(query)}
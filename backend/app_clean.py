@@ -30,7 +30,6 @@ from functools import wraps
 from typing import Dict, Any, Optional, List, Union, Tuple, Callable
 
 from flask import Flask, request, jsonify, send_from_directory, redirect, url_for, current_app, g
-from flask.json.provider import DefaultJSONProvider
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 from werkzeug.exceptions import HTTPException, BadRequest, Unauthorized, Forbidden, NotFound, InternalServerError
@@ -110,6 +109,13 @@ from extensions import (
     socketio, celery, search, init_extensions, redis_connection, rate_limited,
     admin_permission, moderator_permission, user_permission
 )
+from services.pagination import InvalidPagination, paginate, sort_keys
+from services.batch import InvalidBatch, init_batch
+from services.compression import init_compression
+from services.conditional import (
+    cache_control_for, conditional, content_etag, etag_matches, make_etag, not_modified, with_validators
+)
+from services.serialization import FastJSONProvider, compile_serializer, iso_datetime, json_list, json_value
 
 # Configure logging
 logging.basicConfig(
@@ -135,28 +141,23 @@ if os.getenv('SENTRY_DSN'):
     )
 
 # Custom JSON encoder to handle datetime and other non-serializable types
-class CustomJSONProvider(DefaultJSONProvider):
+# (orjson when installed, stdlib json otherwise)
+class CustomJSONProvider(FastJSONProvider):
     """Custom JSON provider to handle additional types."""
-    def default(self, o):
-        if isinstance(o, datetime.datetime):
-            return o.isoformat() + 'Z'
-        elif isinstance(o, (datetime.date, datetime.time)):
-            return o.isoformat()
-        elif isinstance(o, datetime.timedelta):
-            return str(o)
-        elif isinstance(o, uuid.UUID):
-            return str(o)
-        elif hasattr(o, 'to_dict'):
-            return o.to_dict()
-        elif hasattr(o, 'to_json'):
+    naive_utc = True  # naive datetimes are UTC: serialized with a 'Z' suffix
+
+    def _default(self, o):
+        try:
+            return super()._default(o)
+        except TypeError:
+            pass
+        if hasattr(o, 'to_json'):
             return o.to_json()
-        elif isinstance(o, bytes):
-            return o.decode('utf-8', errors='replace')
         elif hasattr(o, '__dict__'):
             return vars(o)
         elif hasattr(o, '__table__'):  # SQLAlchemy model
             return {c.name: getattr(o, c.name) for c in o.__table__.columns}
-        return super().default(o)
+        raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
 
 
 def create_app(config_name: Optional[str] = None):
@@ -274,6 +275,12 @@ def create_app(config_name: Optional[str] = None):
     # Configure JSON provider
     app.json = CustomJSONProvider(app)
     
+    # Compress responses (gzip, brotli when installed)
+    init_compression(app)
+    
+    # Batched GET sub-requests (/api/batch)
+    init_batch(app)
+    
     # Initialize extensions
     from extensions import (
         db, migrate, ma, jwt, mail, bcrypt, cors, principal, limiter,
@@ -531,22 +538,16 @@ def create_app(config_name: Optional[str] = None):
         print(f'Admin user {email} created successfully')
     
     @app.cli.command('reindex')
-    def reindex_command():
-        """Reindex all listings in the search engine."""
-        from opensearchpy.helpers import bulk
-        from tqdm import tqdm
-        from models.listing import Listing  # Import the Listing model
+    @click.option('--chunk-size', default=1000, show_default=True, help='Listings per bulk request')
+    @click.option('--workers', default=4, show_default=True, help='Parallel bulk workers')
+    def reindex_command(chunk_size, workers):
+        """Reindex all listings into a new versioned index, then swap the alias (no downtime)."""
+        from services.search_reindex import ReindexError, StreamingReindexer, chunked
+        from models.listing import Listing, ListingStatus  # Import the Listing model
         
-        index_name = f"{app.config['SEARCH_INDEX_PREFIX']}_listings"
-        
-        # Delete existing index
-        try:
-            search.indices.delete(index=index_name)
-            print(f'Deleted existing index: {index_name}')
-        except NotFoundError:
-            print(f'Index {index_name} does not exist, creating new index...')
+        alias = f"{app.config['SEARCH_INDEX_PREFIX']}_listings"
         
-        # Create index with mapping
+        # Index mapping (applied to each new versioned index)
         mapping = {
             'mappings': {
                 'properties': {
@@ -567,44 +568,55 @@ def create_app(config_name: Optional[str] = None):
             }
         }
         
-        search.indices.create(index=index_name, body=mapping)
-        print(f'Created index: {index_name}')
-        
-        # Index all active listings with progress bar
-        listings = Listing.query.filter_by(status='active').all()
-        total = len(listings)
-        print(f'Indexing {total} listings...')
-        
-        def generate_actions():
-            for listing in tqdm(listings, desc='Indexing', unit='listing'):
-                doc = listing.to_dict()
-                doc['_index'] = index_name
-                doc['_id'] = listing.id
-                if hasattr(listing, 'location') and listing.location:
-                    point = to_shape(listing.location)
-                    doc['location'] = {'lat': point.y, 'lon': point.x}
-                yield doc
-        
-        success, errors = bulk(
-            search,
-            generate_actions(),
-            index=index_name,
-            raise_on_error=False,
-            stats_only=False
+        # Only the indexed columns are streamed, never full ORM objects
+        columns = (
+            Listing.id, Listing.title, Listing.description, Listing.estimated_value,
+            Listing.latitude, Listing.longitude, Listing.created_at, Listing.updated_at,
+            Listing.status, Listing.category, Listing.ai_tags
         )
         
-        if errors:
-            print(f'\nEncountered {len(errors)} errors during indexing:')
-            for i, error in enumerate(errors[:5], 1):
-                print(f'Error {i}: {error}')
-            if len(errors) > 5:
-                print(f'... and {len(errors) - 5} more errors')
+        def build_document(row):
+            if row.status != ListingStatus.ACTIVE:
+                return row.id, None
+            doc = {
+                'title': row.title,
+                'description': row.description,
+                'price': row.estimated_value,
+                'created_at': row.created_at.isoformat() if row.created_at else None,
+                'updated_at': row.updated_at.isoformat() if row.updated_at else None,
+                'status': row.status.value,
+                'category': row.category,
+                'tags': json.loads(row.ai_tags) if row.ai_tags else []
+            }
+            if row.latitude is not None and row.longitude is not None:
+                doc['location'] = {'lat': row.latitude, 'lon': row.longitude}
+            return row.id, doc
+        
+        def catch_up(since):
+            # Listings changed while the new index was being built
+            return chunked(
+                Listing.query.filter(Listing.updated_at >= since)
+                .with_entities(*columns).yield_per(chunk_size),
+                chunk_size
+            )
+        
+        def missing(listing_ids):
+            # Listings hard-deleted during the rebuild (not seen by the updated_at catch-up)
+            existing = {str(row.id) for row in Listing.query.filter(Listing.id.in_(listing_ids)).with_entities(Listing.id)}
+            return [listing_id for listing_id in listing_ids if listing_id not in existing]
         
-        print(f'\nSuccessfully indexed {success} out of {total} listings')
+        rows = Listing.query.filter_by(status=ListingStatus.ACTIVE).with_entities(*columns).yield_per(chunk_size)
+        print(f'Reindexing listings into a new index behind alias {alias}...')
         
-        # Refresh the index to make the changes searchable
-        search.indices.refresh(index=index_name)
-        print('Index refresh complete')
+        reindexer = StreamingReindexer(search, alias, mapping, build_document, workers=workers)
+        try:
+            result = reindexer.run(chunked(rows, chunk_size), catch_up, missing)
+        except ReindexError as e:
+            raise click.ClickException(str(e))
+        
+        print(f"Indexed {result['documents']} listings into {result['index']} "
+              f"({result['deleted']} deleted during the rebuild) in {result['seconds']}s")
+        print(f"Alias {alias} now points to {result['index']}")
     
     @app.cli.command('clear-cache')
     def clear_cache_command():
@@ -1265,11 +1277,15 @@ app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 app.config['JSON_AS_ASCII'] = False  # legacy flag (kept), provider below enforces UTF-8
 app.config['JSONIFY_MIMETYPE'] = 'application/json; charset=utf-8'
 
-class UTF8JSONProvider(DefaultJSONProvider):
+class UTF8JSONProvider(FastJSONProvider):
     ensure_ascii = False
 
 # enforce UTF-8 JSON encoding globally
 app.json = UTF8JSONProvider(app)
+init_compression(app)  # gzip/brotli on Accept-Encoding
+app.config['BATCH_CONCURRENT_PREFIXES'] = ('/api/ai', '/api/matching')  # run in parallel inside /api/batch
+app.config['MSGPACK_PREFIXES'] = ('/api/listings',)  # application/msgpack when the client asks for it
+init_batch(app)
 app.config['REDIS_URL'] = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
 app.config['OPENSEARCH_URL'] = os.getenv('OPENSEARCH_URL', 'http://localhost:9200')
 app.config['RATELIMIT_STORAGE_URI'] = app.config['REDIS_URL']
@@ -1292,7 +1308,10 @@ os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 # Serve uploaded files (development only)
 @app.route('/uploads/<path:filename>')
 def serve_upload(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    # send_from_directory already answers If-None-Match; file names are unique, cache them long
+    response = send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    response.headers['Cache-Control'] = cache_control_for('uploads')
+    return response
 
 # Models
 class User(db.Model):
@@ -1344,30 +1363,15 @@ class User(db.Model):
     listings = db.relationship('Listing', backref='owner', lazy=True, cascade='all, delete-orphan')
     
     def to_dict(self):
-        return {
-            'id': self.id,
-            'uuid': self.uuid,
-            'username': self.username,
-            'email': self.email,
-            'first_name': self.first_name,
-            'last_name': self.last_name,
-            'bio': self.bio,
-            'phone': self.phone,
-            'latitude': self.latitude,
-            'longitude': self.longitude,
-            'address': self.address,
-            'city': self.city,
-            'country': self.country,
-            'trust_score': self.trust_score,
-            'reputation_score': self.reputation_score,
-            'successful_exchanges': self.successful_exchanges,
-            'total_exchanges': self.total_exchanges,
-            'preferred_language': self.preferred_language,
-            'preferred_currency': self.preferred_currency,
-            'max_distance': self.max_distance,
-            'is_premium': self.is_premium,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+        return USER_SERIALIZER(self)
+
+# Serializers compiled once from field lists (see services/serialization.py)
+USER_SERIALIZER = compile_serializer((
+    'id', 'uuid', 'username', 'email', 'first_name', 'last_name', 'bio', 'phone',
+    'latitude', 'longitude', 'address', 'city', 'country', 'trust_score',
+    'reputation_score', 'successful_exchanges', 'total_exchanges', 'preferred_language',
+    'preferred_currency', 'max_distance', 'is_premium', ('created_at', iso_datetime)
+))
 
 # ================================
 # Validation Schemas (Marshmallow)
@@ -1402,6 +1406,11 @@ class UpdateProfileSchema(Schema):
     preferred_language = fields.Str(validate=validate.Length(max=5))
     max_distance = fields.Int(validate=validate.Range(min=1, max=1000))
 
+# One shared instance per schema: load() does not mutate it (thread-safe)
+register_schema = RegisterSchema()
+login_schema = LoginSchema()
+update_profile_schema = UpdateProfileSchema()
+
 class Listing(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     uuid = db.Column(db.String(36), unique=True, nullable=False, default=lambda: str(uuid.uuid4()))
@@ -1461,35 +1470,18 @@ class Listing(db.Model):
     images = db.relationship('Image', backref='listing', lazy=True, cascade='all, delete-orphan')
     
     def to_dict(self):
-        return {
-            'id': self.id,
-            'uuid': self.uuid,
-            'user_id': self.user_id,
-            'title': self.title,
-            'description': self.description,
-            'category': self.category,
-            'subcategory': self.subcategory,
-            'brand': self.brand,
-            'model': self.model,
-            'color': self.color,
-            'condition': self.condition,
-            'estimated_value': self.estimated_value,
-            'currency': self.currency,
-            'latitude': self.latitude,
-            'longitude': self.longitude,
-            'address': self.address,
-            'max_distance': self.max_distance,
-            'main_photo': self.main_photo,
-            'photo_count': self.photo_count,
-            'ai_tags': json.loads(self.ai_tags) if self.ai_tags else [],
-            'ai_confidence': self.ai_confidence,
-            'ai_estimated_value': self.ai_estimated_value,
-            'views': self.views,
-            'likes': self.likes,
-            'status': self.status,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'owner': self.owner.to_dict() if self.owner else None
-        }
+        return LISTING_SERIALIZER(self)
+
+LISTING_SERIALIZER = compile_serializer(
+    (
+        'id', 'uuid', 'user_id', 'title', 'description', 'category', 'subcategory',
+        'brand', 'model', 'color', 'condition', 'estimated_value', 'currency',
+        'latitude', 'longitude', 'address', 'max_distance', 'main_photo', 'photo_count',
+        ('ai_tags', json_list), 'ai_confidence', 'ai_estimated_value', 'views', 'likes',
+        'status', ('created_at', iso_datetime)
+    ),
+    owner=lambda listing: USER_SERIALIZER(listing.owner) if listing.owner else None
+)
 
 class Image(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -1523,20 +1515,13 @@ class Image(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
     
     def to_dict(self):
-        return {
-            'id': self.id,
-            'uuid': self.uuid,
-            'filename': self.filename,
-            'original_filename': self.original_filename,
-            'file_size': self.file_size,
-            'mime_type': self.mime_type,
-            'width': self.width,
-            'height': self.height,
-            'ai_analysis': json.loads(self.ai_analysis) if self.ai_analysis else None,
-            'ai_tags': json.loads(self.ai_tags) if self.ai_tags else [],
-            'is_main': self.is_main,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+        return IMAGE_SERIALIZER(self)
+
+IMAGE_SERIALIZER = compile_serializer((
+    'id', 'uuid', 'filename', 'original_filename', 'file_size', 'mime_type', 'width',
+    'height', ('ai_analysis', json_value), ('ai_tags', json_list), 'is_main',
+    ('created_at', iso_datetime)
+))
 
 # JWT Token decorator
 def token_required(f):
@@ -1546,16 +1531,21 @@ def token_required(f):
         if not token:
             return jsonify({'message': 'Token manquant'}), 401
         
+        # Sub-requests of /api/batch share the app context: decode and look up once
+        cached = g.get('token_user')
+        if cached is not None and cached[0] == token:
+            return f(cached[1], *args, **kwargs)
+        
         try:
-            if token.startswith('Bearer '):
-                token = token[7:]
-            data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
+            raw_token = token[7:] if token.startswith('Bearer ') else token
+            data = jwt.decode(raw_token, app.config['SECRET_KEY'], algorithms=['HS256'])
             current_user = User.query.filter_by(uuid=data['uuid']).first()
             if not current_user:
                 return jsonify({'message': 'Token invalide'}), 401
         except:
             return jsonify({'message': 'Token invalide'}), 401
         
+        g.token_user = (token, current_user)
         return f(current_user, *args, **kwargs)
     return decorated
 
@@ -1665,7 +1655,7 @@ def register():
     try:
         data = request.get_json() or {}
         try:
-            data = RegisterSchema().load(data)
+            data = register_schema.load(data)
         except ValidationError as ve:
             return jsonify({'error': 'Validation', 'details': ve.messages}), 400
         
@@ -2001,7 +1991,7 @@ def login():
     try:
         data = request.get_json() or {}
         try:
-            data = LoginSchema().load(data)
+            data = login_schema.load(data)
         except ValidationError as ve:
             return jsonify({'error': 'Validation', 'details': ve.messages}), 400
         
@@ -2055,6 +2045,15 @@ def refresh_token(current_user):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Routes - Batch
+@app.route('/api/batch', methods=['POST'])
+def run_batch():
+    """Run several GET sub-requests (profile, categories, recommendations...) in one round trip"""
+    try:
+        return jsonify(current_app.extensions['batch'].run(request.get_json(silent=True))), 200
+    except InvalidBatch as e:
+        return jsonify({'error': str(e)}), 400
+
 # Routes - User Profile
 @app.route('/api/user/profile', methods=['GET'])
 @token_required
@@ -2067,7 +2066,7 @@ def update_profile(current_user):
     try:
         data = request.get_json() or {}
         try:
-            data = UpdateProfileSchema().load(data, partial=True)
+            data = update_profile_schema.load(data, partial=True)
         except ValidationError as ve:
             return jsonify({'error': 'Validation', 'details': ve.messages}), 400
         
@@ -2108,13 +2107,16 @@ def get_listings():
         if search:
             query = query.filter(Listing.title.contains(search))
         
-        listings = query.paginate(
-            page=page, per_page=per_page, error_out=False
+        # Newest first, tie-broken by id so pages can be walked with a cursor
+        listings, pagination = paginate(
+            query, sort_keys([Listing.created_at], Listing.id, descending=True),
+            page=page, per_page=per_page, cursor=request.args.get('cursor'), sort='created_at:desc',
+            count=request.args.get('count')
         )
         
         # Calculate distances if location provided
         results = []
-        for listing in listings.items:
+        for listing in listings:
             listing_dict = listing.to_dict()
             if lat and lon and listing.latitude and listing.longitude:
                 distance = calculate_distance(lat, lon, listing.latitude, listing.longitude)
@@ -2126,11 +2128,16 @@ def get_listings():
         
         return jsonify({
             'listings': results,
-            'total': listings.total,
-            'pages': listings.pages,
-            'current_page': page
+            'total': pagination.get('total'),
+            'total_is_estimate': pagination.get('total_is_estimate', False),
+            'pages': pagination.get('pages'),
+            'current_page': pagination.get('page'),
+            'has_next': pagination['has_next'],
+            'next_cursor': pagination['next_cursor']
         }), 200
         
+    except InvalidPagination as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -2179,11 +2186,20 @@ def get_listing(listing_uuid):
         if not listing:
             return jsonify({'error': 'Annonce non trouve'}), 404
         
-        # Increment views
-        listing.views += 1
+        # Version of the listing and its embedded owner (views are not part of it)
+        owner_updated_at = listing.owner.updated_at if listing.owner else None
+        etag = make_etag('listing', listing.uuid, listing.updated_at, owner_updated_at)
+        if etag_matches(etag):
+            return not_modified(etag, 'listing')
+        
+        # Increment views (not for a revalidation) without touching updated_at
+        Listing.query.filter_by(id=listing.id).update(
+            {Listing.views: Listing.views + 1, Listing.updated_at: Listing.updated_at},
+            synchronize_session='evaluate'
+        )
         db.session.commit()
         
-        return jsonify({'listing': listing.to_dict()}), 200
+        return with_validators(jsonify({'listing': listing.to_dict()}), etag, 'listing')
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -2265,9 +2281,14 @@ def get_listing_images(listing_uuid):
         if not listing:
             return jsonify({'error': 'Annonce non trouve'}), 404
         
+        # Uploads bump photo_count and updated_at on the listing
+        etag = make_etag('images', listing.uuid, listing.updated_at, listing.photo_count)
+        if etag_matches(etag):
+            return not_modified(etag, 'listing')
+        
         images = [img.to_dict() for img in listing.images]
         
-        return jsonify({'images': images}), 200
+        return with_validators(jsonify({'images': images}), etag, 'listing')
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -2305,22 +2326,24 @@ def get_nearby_listings():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+GEO_CITIES = [
+    {'name': 'Paris', 'lat': 48.8566, 'lon': 2.3522},
+    {'name': 'Lyon', 'lat': 45.7640, 'lon': 4.8357},
+    {'name': 'Marseille', 'lat': 43.2965, 'lon': 5.3698},
+    {'name': 'Toulouse', 'lat': 43.6047, 'lon': 1.4442},
+    {'name': 'Nice', 'lat': 43.7102, 'lon': 7.2620},
+    {'name': 'Nantes', 'lat': 47.2184, 'lon': -1.5536},
+    {'name': 'Strasbourg', 'lat': 48.5734, 'lon': 7.7521},
+    {'name': 'Montpellier', 'lat': 43.6110, 'lon': 3.8767},
+    {'name': 'Bordeaux', 'lat': 44.8378, 'lon': -0.5792},
+    {'name': 'Lille', 'lat': 50.6292, 'lon': 3.0573}
+]
+GEO_CITIES_ETAG = content_etag(GEO_CITIES)
+
 @app.route('/api/geo/cities', methods=['GET'])
+@conditional('static', etag=lambda: GEO_CITIES_ETAG)
 def get_cities():
-    cities = [
-        {'name': 'Paris', 'lat': 48.8566, 'lon': 2.3522},
-        {'name': 'Lyon', 'lat': 45.7640, 'lon': 4.8357},
-        {'name': 'Marseille', 'lat': 43.2965, 'lon': 5.3698},
-        {'name': 'Toulouse', 'lat': 43.6047, 'lon': 1.4442},
-        {'name': 'Nice', 'lat': 43.7102, 'lon': 7.2620},
-        {'name': 'Nantes', 'lat': 47.2184, 'lon': -1.5536},
-        {'name': 'Strasbourg', 'lat': 48.5734, 'lon': 7.7521},
-        {'name': 'Montpellier', 'lat': 43.6110, 'lon': 3.8767},
-        {'name': 'Bordeaux', 'lat': 44.8378, 'lon': -0.5792},
-        {'name': 'Lille', 'lat': 50.6292, 'lon': 3.0573}
-    ]
-    
-    return jsonify({'cities': cities}), 200
+    return jsonify({'cities': GEO_CITIES}), 200
 
 # Routes - Statistics
 @app.route('/api/stats', methods=['GET'])
@@ -2690,7 +2713,10 @@ CATEGORIES = [
     }
 ]
 
+CATEGORIES_ETAG = content_etag(CATEGORIES)
+
 @app.route('/api/categories', methods=['GET'])
+@conditional('static', etag=lambda: CATEGORIES_ETAG)
 def get_categories():
     return jsonify({'categories': CATEGORIES}), 200
 
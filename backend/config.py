@@ -39,6 +39,51 @@ class Config:
     UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', 'uploads')
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
     
+    # Géolocalisation (frontières des cantons/communes pour la recherche par région ; le fichier
+    # livré est un échantillon approximatif, générer le jeu complet avec scripts/build_region_boundaries.py)
+    REGION_BOUNDARIES_PATH = os.environ.get('REGION_BOUNDARIES_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'swiss_regions.geojson'))
+    
+    # Recherche (OpenSearch optionnel, index BM25 en mémoire sinon)
+    SEARCH_URL = os.environ.get('SEARCH_URL')
+    SEARCH_INDEX_PREFIX = os.environ.get('SEARCH_INDEX_PREFIX', 'lucky_kangaroo')
+    SEARCH_INDEX_WARMUP = os.environ.get('SEARCH_INDEX_WARMUP', 'true').lower() == 'true'
+    SEARCH_FACETS_CACHE_TTL = int(os.environ.get('SEARCH_FACETS_CACHE_TTL', 30))
+    SEARCH_INDEXER_ENABLED = os.environ.get('SEARCH_INDEXER_ENABLED', 'true').lower() == 'true'
+    SEARCH_INDEXER_BATCH_SIZE = int(os.environ.get('SEARCH_INDEXER_BATCH_SIZE', 500))
+    SEARCH_INDEXER_FLUSH_INTERVAL = float(os.environ.get('SEARCH_INDEXER_FLUSH_INTERVAL', 1.0))
+    SEARCH_RESULTS_CACHE_TTL = int(os.environ.get('SEARCH_RESULTS_CACHE_TTL', 600))  # Invalidation par écriture, TTL en filet de sécurité
+    SEARCH_TRENDING_TOP_K = int(os.environ.get('SEARCH_TRENDING_TOP_K', 50))
+    SEARCH_TRENDING_WORKER = os.environ.get('SEARCH_TRENDING_WORKER', 'true').lower() == 'true'  # Thread des tendances dans ce processus
+    SEARCH_TRENDING_FLUSH_INTERVAL = int(os.environ.get('SEARCH_TRENDING_FLUSH_INTERVAL', 300))  # Instantané en base (secondes)
+    SEARCH_ALERTS_ENABLED = os.environ.get('SEARCH_ALERTS_ENABLED', 'true').lower() == 'true'
+    SEARCH_ALERTS_WORKER = os.environ.get('SEARCH_ALERTS_WORKER', 'true').lower() == 'true'  # Thread des alertes dans ce processus
+    SEARCH_ALERTS_REFRESH_INTERVAL = int(os.environ.get('SEARCH_ALERTS_REFRESH_INTERVAL', 60))  # Recherches modifiées par d'autres processus
+    
+    # Compression des réponses (gzip, brotli si installé)
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))  # Octets
+    COMPRESSION_LEVELS = {
+        'default': {'gzip': 6, 'br': 4},
+        '/api/v1/search': {'gzip': 5, 'br': 4},  # Réponses fréquentes : compression rapide
+        '/api/v1/chat': {'gzip': 4, 'br': 3},
+    }
+    COMPRESSION_EXCLUDED_PREFIXES = ('/uploads', '/static')
+    
+    # MessagePack (Accept: application/msgpack, msgpack installé) : endpoints qui le proposent
+    MSGPACK_PREFIXES = ('/api/v1/listings', '/api/v1/search', '/api/v1/chat', '/api/listings')
+    
+    # Cache HTTP : Cache-Control par politique ('static', 'catalog', 'listing', 'uploads')
+    # ou par endpoint Flask ('search.get_search_filters'…), qui prime
+    CACHE_CONTROL_POLICIES = {
+        'catalog': 'public, max-age=300, must-revalidate',
+        'listing': 'public, no-cache',
+    }
+    
+    # Requêtes groupées (/batch) : sous-requêtes GET exécutées en un aller-retour
+    BATCH_MAX_REQUESTS = int(os.environ.get('BATCH_MAX_REQUESTS', 10))
+    BATCH_MAX_WORKERS = int(os.environ.get('BATCH_MAX_WORKERS', 4))  # 0 : tout en séquence
+    BATCH_CONCURRENT_PREFIXES = ('/api/v1/search', '/api/v1/ai', '/api/matching')  # I/O externes, en parallèle
+    
     # Rate Limiting
     RATELIMIT_DEFAULT = "200 per day;50 per hour;10 per minute"
     RATELIMIT_STORAGE_URL = REDIS_URL
@@ -106,6 +151,8 @@ class TestingConfig(Config):
     WTF_CSRF_ENABLED = False
     PRESERVE_CONTEXT_ON_EXCEPTION = False
     CACHE_TYPE = "simple"
+    SEARCH_ALERTS_WORKER = False
+    SEARCH_TRENDING_WORKER = False
 
 # Configuration par environnement
 config = {
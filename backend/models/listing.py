@@ -6,6 +6,11 @@ ModÃ¨le pour les annonces d'objets Ã  Ã©changer
 from datetime import datetime
 from enum import Enum
 import uuid
+from sqlalchemy import event
+from backend.services.trigram_index import substring_filter
+from backend.services.spatial_index import (
+    encode_geohash, find_nearest, cover_bbox, cover_segment, geohash_filter, segment_distance_km
+)
 class ListingStatus(Enum):
     """Statuts possibles d'une annonce"""
     DRAFT = "draft"
@@ -61,6 +66,7 @@ class Listing(db.Model):
     # GÃ©olocalisation
     latitude = db.Column(db.Float, nullable=True, index=True)
     longitude = db.Column(db.Float, nullable=True, index=True)
+    geohash = db.Column(db.String(12), nullable=True, index=True)  # Cellule de l'index spatial
     address = db.Column(db.String(200), nullable=True)
     city = db.Column(db.String(100), nullable=True, index=True)
     postal_code = db.Column(db.String(20), nullable=True)
@@ -393,29 +399,93 @@ class Listing(db.Model):
 
     @staticmethod
     def find_nearby_listings(latitude, longitude, max_distance_km=50, category=None, limit=20):
-        """Trouve les annonces Ã  proximitÃ© d'une position"""
+        """Trouve les k annonces les plus proches d'une position via l'index geohash"""
         query = Listing.query.filter(
-            Listing.latitude.isnot(None),
-            Listing.longitude.isnot(None),
+            Listing.geohash.isnot(None),
             Listing.status == ListingStatus.ACTIVE
         )
         
         if category:
             query = query.filter(Listing.category == category)
         
-        listings = query.limit(limit * 3).all()  # RÃ©cupÃ©rer plus pour filtrer ensuite
-        
         nearby_listings = []
-        for listing in listings:
-            if listing.latitude and listing.longitude:
-                distance = listing.get_distance_to(latitude, longitude)
-                if distance is not None and distance <= max_distance_km:
-                    listing.distance = distance
-                    nearby_listings.append(listing)
+        for listing, distance_km in find_nearest(query, Listing, latitude, longitude, max_distance_km, limit):
+            listing.distance = round(distance_km, 2)
+            nearby_listings.append(listing)
+        return nearby_listings
+    
+    @staticmethod
+    def find_listings_in_region(region, category=None, limit=50):
+        """
+        Trouve les annonces actives situées dans une région (polygone GeoJSON ou région nommée).
+        Les candidats sont préfiltrés par l'index geohash sur la bbox de la région, puis testés
+        en bloc (point-dans-polygone vectorisé) sur leurs seules coordonnées.
+        """
+        bbox = region.bbox
+        query = Listing.query.filter(
+            Listing.status == ListingStatus.ACTIVE,
+            geohash_filter(Listing.geohash, cover_bbox(bbox)),
+            Listing.latitude.between(bbox['south'], bbox['north']),
+            Listing.longitude.between(bbox['west'], bbox['east'])
+        )
         
-        # Trier par distance et limiter
-        nearby_listings.sort(key=lambda l: l.distance)
-        return nearby_listings[:limit]
+        if category:
+            query = query.filter(Listing.category == category)
+        
+        candidates = query.order_by(Listing.published_at.desc(), Listing.id.desc()).with_entities(
+            Listing.id, Listing.latitude, Listing.longitude
+        ).all()
+        if not candidates:
+            return []
+        
+        inside = region.contains([c.latitude for c in candidates], [c.longitude for c in candidates])
+        ids = [c.id for c, keep in zip(candidates, inside) if keep][:limit]
+        if not ids:
+            return []
+        
+        listings_by_id = {l.id: l for l in Listing.query.filter(Listing.id.in_(ids)).all()}
+        return [listings_by_id[i] for i in ids if i in listings_by_id]
+    
+    @staticmethod
+    def find_listings_along_route(start_lat, start_lng, end_lat, end_lng, max_distance_km=2,
+                                  category=None, limit=50):
+        """
+        Trouve les annonces actives à moins de max_distance_km du trajet (segment de grand cercle)
+        entre deux points, ordonnées par position le long du trajet.
+        """
+        cells = cover_segment(start_lat, start_lng, end_lat, end_lng, max_distance_km)
+        query = Listing.query.filter(
+            Listing.status == ListingStatus.ACTIVE,
+            geohash_filter(Listing.geohash, cells)
+        )
+        
+        if category:
+            query = query.filter(Listing.category == category)
+        
+        candidates = query.with_entities(Listing.id, Listing.latitude, Listing.longitude).all()
+        if not candidates:
+            return []
+        
+        distances, positions = segment_distance_km(
+            start_lat, start_lng, end_lat, end_lng,
+            [c.latitude for c in candidates], [c.longitude for c in candidates]
+        )
+        matches = sorted(
+            (float(positions[i]), float(distances[i]), candidates[i].id)
+            for i in range(len(candidates)) if distances[i] <= max_distance_km
+        )[:limit]
+        if not matches:
+            return []
+        
+        listings_by_id = {l.id: l for l in Listing.query.filter(Listing.id.in_([m[2] for m in matches])).all()}
+        results = []
+        for position_km, distance_km, listing_id in matches:
+            listing = listings_by_id.get(listing_id)
+            if listing is not None:
+                listing.route_position_km = round(position_km, 2)
+                listing.distance = round(distance_km, 2)
+                results.append(listing)
+        return results
     
     @staticmethod
     def search_listings(query_text=None, category=None, min_value=None, max_value=None, 
@@ -426,13 +496,10 @@ class Listing(db.Model):
         
         # Filtre par texte
         if query_text:
-            search_filter = db.or_(
-                Listing.title.ilike(f'%{query_text}%'),
-                Listing.description.ilike(f'%{query_text}%'),
-                Listing.brand.ilike(f'%{query_text}%'),
-                Listing.model.ilike(f'%{query_text}%'),
-                Listing.desired_items.ilike(f'%{query_text}%')
-            )
+            search_filter = substring_filter(db.engine, [
+                Listing.title, Listing.description, Listing.brand,
+                Listing.model, Listing.desired_items
+            ], query_text)
             query = query.filter(search_filter)
         
         # Filtre par catÃ©gorie
@@ -473,3 +540,12 @@ class Listing(db.Model):
         
         return listings
 
+
+@event.listens_for(Listing, 'before_insert')
+@event.listens_for(Listing, 'before_update')
+def _sync_listing_geohash(mapper, connection, target):
+    """Garde la cellule geohash alignée sur les coordonnées"""
+    if target.latitude is not None and target.longitude is not None:
+        target.geohash = encode_geohash(target.latitude, target.longitude)
+    else:
+        target.geohash = None
@@ -6,6 +6,8 @@ ModÃ¨le utilisateur avec tous les champs requis pour une plateforme fonctionne
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 import uuid
+from sqlalchemy import event
+from backend.services.spatial_index import encode_geohash, find_nearest
 class User(db.Model):
     """ModÃ¨le utilisateur complet pour Lucky Kangaroo"""
     
@@ -32,6 +34,7 @@ class User(db.Model):
     # GÃ©olocalisation
     latitude = db.Column(db.Float, nullable=True, index=True)
     longitude = db.Column(db.Float, nullable=True, index=True)
+    geohash = db.Column(db.String(12), nullable=True, index=True)  # Cellule de l'index spatial
     address = db.Column(db.String(200), nullable=True)
     city = db.Column(db.String(100), nullable=True, index=True)
     postal_code = db.Column(db.String(20), nullable=True)
@@ -198,6 +201,16 @@ class User(db.Model):
                 from datetime import timedelta
                 self.account_locked_until = datetime.utcnow() + timedelta(minutes=30)
     
+    def update_location(self, latitude, longitude, **kwargs):
+        """Met à jour la position et la cellule de l'index spatial"""
+        self.latitude = latitude
+        self.longitude = longitude
+        self.geohash = encode_geohash(latitude, longitude) if latitude is not None and longitude is not None else None
+        
+        for key in ('address', 'city', 'postal_code', 'country'):
+            if key in kwargs:
+                setattr(self, key, kwargs[key])
+    
     def update_activity(self):
         """Met Ã  jour la derniÃ¨re activitÃ©"""
         self.last_activity_at = datetime.utcnow()
@@ -283,34 +296,24 @@ class User(db.Model):
 
     @staticmethod
     def find_nearby_users(latitude, longitude, max_distance_km=50, limit=20):
-        """Trouve les utilisateurs Ã  proximitÃ© d'une position"""
-        # RequÃªte simplifiÃ©e - en production, utiliser une requÃªte gÃ©ospatiale optimisÃ©e
-        users = User.query.filter(
-            User.latitude.isnot(None),
-            User.longitude.isnot(None),
+        """Trouve les k utilisateurs les plus proches d'une position via l'index geohash"""
+        query = User.query.filter(
+            User.geohash.isnot(None),
             User.is_active == True
-        ).limit(limit * 3).all()  # RÃ©cupÃ©rer plus pour filtrer ensuite
+        )
         
         nearby_users = []
-        for user in users:
-            if user.latitude and user.longitude:
-                # Calcul de distance simplifiÃ©
-                import math
-                lat1, lon1 = math.radians(latitude), math.radians(longitude)
-                lat2, lon2 = math.radians(user.latitude), math.radians(user.longitude)
-                
-                dlat = lat2 - lat1
-                dlon = lon2 - lon1
-                
-                a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-                c = 2 * math.asin(math.sqrt(a))
-                distance_km = 6371 * c
-                
-                if distance_km <= max_distance_km:
-                    user.distance = round(distance_km, 2)
-                    nearby_users.append(user)
-        
-        # Trier par distance et limiter
-        nearby_users.sort(key=lambda u: u.distance)
-        return nearby_users[:limit]
+        for user, distance_km in find_nearest(query, User, latitude, longitude, max_distance_km, limit):
+            user.distance = round(distance_km, 2)
+            nearby_users.append(user)
+        return nearby_users
+
 
+@event.listens_for(User, 'before_insert')
+@event.listens_for(User, 'before_update')
+def _sync_user_geohash(mapper, connection, target):
+    """Garde la cellule geohash alignée sur les coordonnées"""
+    if target.latitude is not None and target.longitude is not None:
+        target.geohash = encode_geohash(target.latitude, target.longitude)
+    else:
+        target.geohash = None
@@ -3,7 +3,7 @@ Lucky Kangaroo - Routes API Géolocalisation
 Routes Flask pour les services de géolocalisation
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from services.geolocation_service import (
     geolocation_service,
     calculate_distance_api,
@@ -12,6 +12,13 @@ from services.geolocation_service import (
     reverse_geocode_api,
     suggest_meeting_points_api
 )
+from services.region_service import (
+    DEFAULT_BOUNDARIES_PATH,
+    RegionError,
+    get_region,
+    list_regions,
+    region_from_geojson
+)
 
 # Création du blueprint
 geolocation_bp = Blueprint('geolocation', __name__, url_prefix='/api/geolocation')
@@ -30,7 +37,9 @@ def health_check():
             'reverse_geocoding',
             'meeting_points_suggestion',
             'travel_zones',
-            'area_statistics'
+            'area_statistics',
+            'region_search',
+            'route_corridor_search'
         ]
     })
 
@@ -505,6 +514,187 @@ def demo():
             'error': f'Erreur interne: {str(e)}'
         }), 500
 
+def _boundaries_path():
+    return current_app.config.get('REGION_BOUNDARIES_PATH', DEFAULT_BOUNDARIES_PATH)
+
+def _parse_limit(data, default=50, maximum=200):
+    """Nombre de résultats demandé, borné à [1, maximum] (None si ce n'est pas un entier)"""
+    try:
+        return min(max(int(data.get('limit', default)), 1), maximum)
+    except (TypeError, ValueError):
+        return None
+
+def _invalid_limit():
+    return jsonify({
+        'success': False,
+        'error': 'limit doit être un entier'
+    }), 400
+
+@geolocation_bp.route('/regions', methods=['GET'])
+def get_regions():
+    """
+    Retourne les régions nommées disponibles (cantons, communes)
+    """
+    try:
+        regions = list_regions(_boundaries_path())
+        return jsonify({
+            'success': True,
+            'data': {
+                'regions': regions,
+                'total': len(regions)
+            }
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Erreur interne: {str(e)}'
+        }), 500
+
+@geolocation_bp.route('/listings/within', methods=['POST'])
+def find_listings_within():
+    """
+    Trouve les annonces actives dans un polygone GeoJSON ou une région nommée
+    
+    Body JSON:
+    {
+        "region": "Genève",
+        "polygon": {"type": "Polygon", "coordinates": [[[6.1, 46.2], [6.2, 46.2], [6.2, 46.3], [6.1, 46.2]]]},
+        "category": "electronique",
+        "limit": 50
+    }
+    """
+    try:
+        from backend.models.listing import Listing
+        
+        data = request.get_json()
+        
+        if not data or ('region' not in data and 'polygon' not in data):
+            return jsonify({
+                'success': False,
+                'error': 'Format invalide. Requis: {"region": "nom"} ou {"polygon": {GeoJSON}}'
+            }), 400
+        
+        if 'polygon' in data:
+            try:
+                region = region_from_geojson(data['polygon'])
+            except RegionError as e:
+                return jsonify({
+                    'success': False,
+                    'error': f'Polygone invalide: {str(e)}'
+                }), 400
+        else:
+            region = get_region(str(data['region']), _boundaries_path())
+            if region is None:
+                return jsonify({
+                    'success': False,
+                    'error': f'Région inconnue: {data["region"]}'
+                }), 404
+        
+        limit = _parse_limit(data)
+        if limit is None:
+            return _invalid_limit()
+        listings = Listing.find_listings_in_region(region, data.get('category'), limit)
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'region': region.to_dict(),
+                'listings': [listing.to_search_dict() for listing in listings],
+                'total': len(listings)
+            }
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Erreur interne: {str(e)}'
+        }), 500
+
+@geolocation_bp.route('/listings/along-route', methods=['POST'])
+def find_listings_along_route():
+    """
+    Trouve les annonces actives le long du trajet entre deux points
+    
+    Body JSON:
+    {
+        "from": {"latitude": 46.5197, "longitude": 6.6323},
+        "to": {"latitude": 46.2044, "longitude": 6.1432},
+        "max_distance_km": 2,
+        "category": "electronique",
+        "limit": 50
+    }
+    """
+    try:
+        from backend.models.listing import Listing
+        
+        data = request.get_json()
+        
+        if not data or 'from' not in data or 'to' not in data:
+            return jsonify({
+                'success': False,
+                'error': 'Format invalide. Requis: {"from": {"latitude": X, "longitude": Y}, "to": {"latitude": X, "longitude": Y}}'
+            }), 400
+        
+        for point_name in ('from', 'to'):
+            point = data[point_name]
+            if 'latitude' not in point or 'longitude' not in point:
+                return jsonify({
+                    'success': False,
+                    'error': f'Coordonnées manquantes pour {point_name}'
+                }), 400
+            if not geolocation_service.validate_coordinates(point['latitude'], point['longitude']):
+                return jsonify({
+                    'success': False,
+                    'error': f'Coordonnées invalides pour {point_name}'
+                }), 400
+        
+        try:
+            max_distance_km = float(data.get('max_distance_km', 2))
+        except (TypeError, ValueError):
+            max_distance_km = None
+        if max_distance_km is None or not 0 < max_distance_km <= 50:
+            return jsonify({
+                'success': False,
+                'error': 'max_distance_km doit être compris entre 0 et 50'
+            }), 400
+        
+        start, end = data['from'], data['to']
+        limit = _parse_limit(data)
+        if limit is None:
+            return _invalid_limit()
+        listings = Listing.find_listings_along_route(
+            start['latitude'], start['longitude'],
+            end['latitude'], end['longitude'],
+            max_distance_km, data.get('category'), limit
+        )
+        
+        results = []
+        for listing in listings:
+            listing_data = listing.to_search_dict()
+            listing_data['distance_to_route_km'] = listing.distance
+            listing_data['route_position_km'] = listing.route_position_km
+            results.append(listing_data)
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'route': geolocation_service.get_route_corridor(
+                    start['latitude'], start['longitude'],
+                    end['latitude'], end['longitude'],
+                    max_distance_km
+                ),
+                'listings': results,
+                'total': len(results)
+            }
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Erreur interne: {str(e)}'
+        }), 500
+
 # Gestion des erreurs
 @geolocation_bp.errorhandler(404)
 def not_found(error):
@@ -522,6 +712,9 @@ def not_found(error):
             'POST /api/geolocation/travel-zones',
             'POST /api/geolocation/validate-coordinates',
             'GET /api/geolocation/cities',
+            'GET /api/geolocation/regions',
+            'POST /api/geolocation/listings/within',
+            'POST /api/geolocation/listings/along-route',
             'GET /api/geolocation/demo'
         ]
     }), 404
@@ -3,15 +3,15 @@ Lucky Kangaroo - Schémas de validation
 Schémas Marshmallow pour la validation des données d'entrée
 """
 
-from .user import UserSchema, CreateUserSchema, UpdateUserSchema
-from .listing import ListingSchema, CreateListingSchema, UpdateListingSchema
+from .user import UserSchema, CreateUserSchema, UpdateUserSchema, create_user_schema, update_user_schema
+from .listing import ListingSchema, CreateListingSchema, UpdateListingSchema, create_listing_schema, update_listing_schema
 from .exchange import ExchangeSchema, CreateExchangeSchema, UpdateExchangeSchema
 from .chat import ChatMessageSchema, CreateChatMessageSchema
 from .payment import PaymentSchema, CreatePaymentSchema
 
 __all__ = [
-    'UserSchema', 'CreateUserSchema', 'UpdateUserSchema',
-    'ListingSchema', 'CreateListingSchema', 'UpdateListingSchema',
+    'UserSchema', 'CreateUserSchema', 'UpdateUserSchema', 'create_user_schema', 'update_user_schema',
+    'ListingSchema', 'CreateListingSchema', 'UpdateListingSchema', 'create_listing_schema', 'update_listing_schema',
     'ExchangeSchema', 'CreateExchangeSchema', 'UpdateExchangeSchema',
     'ChatMessageSchema', 'CreateChatMessageSchema',
     'PaymentSchema', 'CreatePaymentSchema'
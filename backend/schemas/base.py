@@ -0,0 +1,38 @@
+"""
+Lucky Kangaroo - Base des schémas partagés
+Un schéma Marshmallow coûte surtout à l'instanciation (copie des champs et de leurs
+validateurs) : les vues utilisent une instance par schéma, créée au chargement du
+module. load() ne modifie pas l'instance ; seul le contexte est propre à chaque appel.
+"""
+
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from marshmallow import Schema
+
+_load_context: ContextVar[Optional[Dict[str, Any]]] = ContextVar('schema_load_context', default=None)
+
+
+class SharedSchema(Schema):
+    """
+    Schéma utilisable par plusieurs threads à la fois :
+    schema.load(data, context={'user_trust_score': 80}) au lieu de schema.context = ...
+    """
+
+    @property
+    def context(self) -> Dict[str, Any]:
+        context = _load_context.get()
+        return self._context if context is None else context
+
+    @context.setter
+    def context(self, value: Dict[str, Any]) -> None:
+        self._context = value
+
+    def load(self, data, *, context: Optional[Dict[str, Any]] = None, **kwargs):
+        if context is None:
+            return super().load(data, **kwargs)
+        token = _load_context.set(context)
+        try:
+            return super().load(data, **kwargs)
+        finally:
+            _load_context.reset(token)
@@ -7,6 +7,40 @@ from marshmallow import Schema, fields, validate, validates, ValidationError
 import re
 from datetime import datetime, timedelta
 
+from .base import SharedSchema
+
+# Contrôles anti-spam compilés une fois (appliqués à chaque création/modification)
+TITLE_SPAM_RE = re.compile(
+    '|'.join(re.escape(word) for word in ('gratuit', 'free', 'urgent', 'vite', 'dernière chance', 'last chance')),
+    re.IGNORECASE
+)
+REPEATED_CHARS_RE = re.compile(r'(.)\1{4,}')
+LINK_RE = re.compile(r'https?://[^\s]+')
+DESCRIPTION_SPAM_RE = re.compile(
+    '|'.join(re.escape(indicator) for indicator in ('$$$', '!!!', '???', 'URGENT', 'GRATUIT', 'FREE')),
+    re.IGNORECASE
+)
+
+
+def check_title(value):
+    # Vérifier qu'il n'y a pas de spam
+    if TITLE_SPAM_RE.search(value):
+        raise ValidationError('Le titre contient des mots interdits')
+
+    # Vérifier qu'il n'y a pas de caractères répétitifs excessifs
+    if REPEATED_CHARS_RE.search(value):
+        raise ValidationError('Le titre contient trop de caractères répétés')
+
+
+def check_description(value):
+    # Vérifier qu'il n'y a pas de liens suspects
+    if LINK_RE.search(value):
+        raise ValidationError('Les liens ne sont pas autorisés dans la description')
+
+    # Vérifier qu'il n'y a pas de spam
+    if DESCRIPTION_SPAM_RE.search(value):
+        raise ValidationError('La description contient des indicateurs de spam')
+
 class ListingSchema(Schema):
     """Schéma de base pour les annonces (lecture seule)"""
     
@@ -78,7 +112,7 @@ class ListingSchema(Schema):
     expires_at = fields.DateTime(dump_only=True, allow_none=True)
     last_activity_at = fields.DateTime(dump_only=True, allow_none=True)
 
-class CreateListingSchema(Schema):
+class CreateListingSchema(SharedSchema):
     """Schéma pour la création d'annonces"""
     
     title = fields.Str(
@@ -299,26 +333,12 @@ class CreateListingSchema(Schema):
     @validates('title')
     def validate_title(self, value):
         """Valide le titre de l'annonce"""
-        # Vérifier qu'il n'y a pas de spam
-        spam_words = ['gratuit', 'free', 'urgent', 'vite', 'dernière chance', 'last chance']
-        if any(word.lower() in value.lower() for word in spam_words):
-            raise ValidationError('Le titre contient des mots interdits')
-        
-        # Vérifier qu'il n'y a pas de caractères répétitifs excessifs
-        if re.search(r'(.)\1{4,}', value):
-            raise ValidationError('Le titre contient trop de caractères répétés')
+        check_title(value)
     
     @validates('description')
     def validate_description(self, value):
         """Valide la description de l'annonce"""
-        # Vérifier qu'il n'y a pas de liens suspects
-        if re.search(r'https?://[^\s]+', value):
-            raise ValidationError('Les liens ne sont pas autorisés dans la description')
-        
-        # Vérifier qu'il n'y a pas de spam
-        spam_indicators = ['$$$', '!!!', '???', 'URGENT', 'GRATUIT', 'FREE']
-        if any(indicator in value.upper() for indicator in spam_indicators):
-            raise ValidationError('La description contient des indicateurs de spam')
+        check_description(value)
     
     @validates('estimated_value')
     def validate_estimated_value(self, value):
@@ -355,7 +375,7 @@ class CreateListingSchema(Schema):
             if not (-5 <= longitude <= 10 and 41 <= value <= 52):
                 raise ValidationError('Coordonnées géographiques invalides pour la France')
 
-class UpdateListingSchema(Schema):
+class UpdateListingSchema(SharedSchema):
     """Schéma pour la mise à jour d'annonces"""
     
     title = fields.Str(
@@ -576,23 +596,13 @@ class UpdateListingSchema(Schema):
     @validates('title')
     def validate_title(self, value):
         """Valide le titre de l'annonce"""
-        # Vérifier qu'il n'y a pas de spam
-        spam_words = ['gratuit', 'free', 'urgent', 'vite', 'dernière chance', 'last chance']
-        if any(word.lower() in value.lower() for word in spam_words):
-            raise ValidationError('Le titre contient des mots interdits')
-        
-        # Vérifier qu'il n'y a pas de caractères répétitifs excessifs
-        if re.search(r'(.)\1{4,}', value):
-            raise ValidationError('Le titre contient trop de caractères répétés')
+        check_title(value)
     
     @validates('description')
     def validate_description(self, value):
         """Valide la description de l'annonce"""
-        # Vérifier qu'il n'y a pas de liens suspects
-        if re.search(r'https?://[^\s]+', value):
-            raise ValidationError('Les liens ne sont pas autorisés dans la description')
-        
-        # Vérifier qu'il n'y a pas de spam
-        spam_indicators = ['$$$', '!!!', '???', 'URGENT', 'GRATUIT', 'FREE']
-        if any(indicator in value.upper() for indicator in spam_indicators):
-            raise ValidationError('La description contient des indicateurs de spam')
+        check_description(value)
+
+# Instances partagées (thread-safe : contexte passé à load)
+create_listing_schema = CreateListingSchema()
+update_listing_schema = UpdateListingSchema()
@@ -7,6 +7,34 @@ from marshmallow import Schema, fields, validate, validates, ValidationError
 import re
 from datetime import date
 
+from .base import SharedSchema
+
+# Expressions compilées une fois (inscription, profil, changement de mot de passe)
+USERNAME_RE = re.compile(r'^[a-zA-Z0-9_-]+$')
+PHONE_SEPARATORS_RE = re.compile(r'[\s\-\(\)\+]')
+PHONE_RE = re.compile(r'^\+?[1-9]\d{7,14}$')
+PASSWORD_RULES = (
+    (re.compile(r'[A-Z]'), 'Le mot de passe doit contenir au moins une majuscule'),
+    (re.compile(r'[a-z]'), 'Le mot de passe doit contenir au moins une minuscule'),
+    (re.compile(r'\d'), 'Le mot de passe doit contenir au moins un chiffre'),
+    (re.compile(r'[!@#$%^&*(),.?":{}|<>]'), 'Le mot de passe doit contenir au moins un caractère spécial'),
+)
+RESERVED_USERNAMES = frozenset({'admin', 'root', 'system', 'test', 'guest'})
+
+
+def check_password_strength(value):
+    if len(value) < 8:
+        raise ValidationError('Le mot de passe doit contenir au moins 8 caractères')
+    for pattern, message in PASSWORD_RULES:
+        if not pattern.search(value):
+            raise ValidationError(message)
+
+
+def check_phone(value):
+    # Supprimer les espaces et caractères spéciaux
+    if value and not PHONE_RE.match(PHONE_SEPARATORS_RE.sub('', value)):
+        raise ValidationError('Format de numéro de téléphone invalide')
+
 class UserSchema(Schema):
     """Schéma de base pour les utilisateurs (lecture seule)"""
     
@@ -50,7 +78,7 @@ class UserSchema(Schema):
     updated_at = fields.DateTime(dump_only=True)
     last_activity_at = fields.DateTime(dump_only=True, allow_none=True)
 
-class CreateUserSchema(Schema):
+class CreateUserSchema(SharedSchema):
     """Schéma pour la création d'utilisateurs"""
     
     username = fields.Str(
@@ -193,29 +221,16 @@ class CreateUserSchema(Schema):
     @validates('username')
     def validate_username(self, value):
         """Valide le format du nom d'utilisateur"""
-        if not re.match(r'^[a-zA-Z0-9_-]+$', value):
+        if not USERNAME_RE.match(value):
             raise ValidationError('Le nom d\'utilisateur ne peut contenir que des lettres, chiffres, tirets et underscores')
         
-        if value.lower() in ['admin', 'root', 'system', 'test', 'guest']:
+        if value.lower() in RESERVED_USERNAMES:
             raise ValidationError('Ce nom d\'utilisateur n\'est pas autorisé')
     
     @validates('password')
     def validate_password_strength(self, value):
         """Valide la force du mot de passe"""
-        if len(value) < 8:
-            raise ValidationError('Le mot de passe doit contenir au moins 8 caractères')
-        
-        if not re.search(r'[A-Z]', value):
-            raise ValidationError('Le mot de passe doit contenir au moins une majuscule')
-        
-        if not re.search(r'[a-z]', value):
-            raise ValidationError('Le mot de passe doit contenir au moins une minuscule')
-        
-        if not re.search(r'\d', value):
-            raise ValidationError('Le mot de passe doit contenir au moins un chiffre')
-        
-        if not re.search(r'[!@#$%^&*(),.?":{}|<>]', value):
-            raise ValidationError('Le mot de passe doit contenir au moins un caractère spécial')
+        check_password_strength(value)
     
     @validates('date_of_birth')
     def validate_date_of_birth(self, value):
@@ -233,14 +248,9 @@ class CreateUserSchema(Schema):
     @validates('phone')
     def validate_phone(self, value):
         """Valide le format du numéro de téléphone"""
-        if value:
-            # Supprimer les espaces et caractères spéciaux
-            clean_phone = re.sub(r'[\s\-\(\)\+]', '', value)
-            
-            if not re.match(r'^\+?[1-9]\d{7,14}$', clean_phone):
-                raise ValidationError('Format de numéro de téléphone invalide')
+        check_phone(value)
 
-class UpdateUserSchema(Schema):
+class UpdateUserSchema(SharedSchema):
     """Schéma pour la mise à jour d'utilisateurs"""
     
     username = fields.Str(
@@ -368,10 +378,10 @@ class UpdateUserSchema(Schema):
     @validates('username')
     def validate_username(self, value):
         """Valide le format du nom d'utilisateur"""
-        if not re.match(r'^[a-zA-Z0-9_-]+$', value):
+        if not USERNAME_RE.match(value):
             raise ValidationError('Le nom d\'utilisateur ne peut contenir que des lettres, chiffres, tirets et underscores')
         
-        if value.lower() in ['admin', 'root', 'system', 'test', 'guest']:
+        if value.lower() in RESERVED_USERNAMES:
             raise ValidationError('Ce nom d\'utilisateur n\'est pas autorisé')
     
     @validates('date_of_birth')
@@ -390,14 +400,9 @@ class UpdateUserSchema(Schema):
     @validates('phone')
     def validate_phone(self, value):
         """Valide le format du numéro de téléphone"""
-        if value:
-            # Supprimer les espaces et caractères spéciaux
-            clean_phone = re.sub(r'[\s\-\(\)\+]', '', value)
-            
-            if not re.match(r'^\+?[1-9]\d{7,14}$', clean_phone):
-                raise ValidationError('Format de numéro de téléphone invalide')
+        check_phone(value)
 
-class ChangePasswordSchema(Schema):
+class ChangePasswordSchema(SharedSchema):
     """Schéma pour le changement de mot de passe"""
     
     current_password = fields.Str(
@@ -426,23 +431,15 @@ class ChangePasswordSchema(Schema):
     @validates('new_password')
     def validate_new_password_strength(self, value):
         """Valide la force du nouveau mot de passe"""
-        if len(value) < 8:
-            raise ValidationError('Le mot de passe doit contenir au moins 8 caractères')
-        
-        if not re.search(r'[A-Z]', value):
-            raise ValidationError('Le mot de passe doit contenir au moins une majuscule')
-        
-        if not re.search(r'[a-z]', value):
-            raise ValidationError('Le mot de passe doit contenir au moins une minuscule')
-        
-        if not re.search(r'\d', value):
-            raise ValidationError('Le mot de passe doit contenir au moins un chiffre')
-        
-        if not re.search(r'[!@#$%^&*(),.?":{}|<>]', value):
-            raise ValidationError('Le mot de passe doit contenir au moins un caractère spécial')
+        check_password_strength(value)
     
     @validates('confirm_password')
     def validate_password_confirmation(self, value, **kwargs):
         """Valide la confirmation du mot de passe"""
         if 'new_password' in kwargs and value != kwargs['new_password']:
             raise ValidationError('Les mots de passe ne correspondent pas')
+
+# Instances partagées
+create_user_schema = CreateUserSchema()
+update_user_schema = UpdateUserSchema()
+change_password_schema = ChangePasswordSchema()
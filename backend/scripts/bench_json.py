@@ -0,0 +1,105 @@
+"""
+Lucky Kangaroo - Benchmark de la sérialisation JSON des listes d'annonces
+Compare le chemin historique (to_dict par compréhension + fournisseur JSON standard)
+au chemin actuel (sérialiseurs compilés + FastJSONProvider, orjson s'il est installé).
+
+Usage : python scripts/bench_json.py [--listings 100] [--repeat 200]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from services.serialization import FastJSONProvider, compile_serializer, iso_datetime, json_list  # noqa: E402
+
+OWNER_FIELDS = (
+    'id', 'uuid', 'username', 'email', 'first_name', 'last_name', 'bio', 'phone', 'latitude',
+    'longitude', 'address', 'city', 'country', 'trust_score', 'reputation_score',
+    'successful_exchanges', 'total_exchanges', 'preferred_language', 'preferred_currency',
+    'max_distance', 'is_premium'
+)
+LISTING_FIELDS = (
+    'id', 'uuid', 'user_id', 'title', 'description', 'category', 'subcategory', 'brand', 'model',
+    'color', 'condition', 'estimated_value', 'currency', 'latitude', 'longitude', 'address',
+    'max_distance', 'main_photo', 'photo_count', 'ai_confidence', 'ai_estimated_value', 'views',
+    'likes', 'status'
+)
+
+OWNER_SERIALIZER = compile_serializer(OWNER_FIELDS + (('created_at', iso_datetime),))
+LISTING_SERIALIZER = compile_serializer(
+    LISTING_FIELDS + (('ai_tags', json_list), ('created_at', iso_datetime)),
+    owner=lambda listing: OWNER_SERIALIZER(listing.owner) if listing.owner else None
+)
+
+
+def legacy_owner(owner):
+    data = {name: getattr(owner, name) for name in OWNER_FIELDS}
+    data['created_at'] = owner.created_at.isoformat() if owner.created_at else None
+    return data
+
+
+def legacy_listing(listing):
+    data = {name: getattr(listing, name) for name in LISTING_FIELDS}
+    data['ai_tags'] = json.loads(listing.ai_tags) if listing.ai_tags else []
+    data['created_at'] = listing.created_at.isoformat() if listing.created_at else None
+    data['owner'] = legacy_owner(listing.owner) if listing.owner else None
+    return data
+
+
+def make_listings(count):
+    now = datetime.datetime(2024, 5, 1, 12, 30, 15, 123456)
+    owner = SimpleNamespace(**{name: f'valeur {name}' for name in OWNER_FIELDS}, created_at=now)
+    owner.latitude, owner.longitude, owner.trust_score = 46.2, 6.14, 87.5
+    return [
+        SimpleNamespace(
+            **{name: f'{name} {i} – données accentuées éàü' for name in LISTING_FIELDS},
+            ai_tags='["vélo", "électrique", "cube"]', created_at=now, owner=owner
+        )
+        for i in range(count)
+    ]
+
+
+def measure(label, serialize, provider, listings, repeat):
+    payload = {'success': True, 'listings': [serialize(listing) for listing in listings]}
+    size = len(provider.response(payload).get_data())
+    started = time.perf_counter()
+    for _ in range(repeat):
+        provider.response({'success': True, 'listings': [serialize(listing) for listing in listings]}).get_data()
+    elapsed = (time.perf_counter() - started) / repeat
+    print(f'{label:<40} {elapsed * 1000:8.3f} ms/réponse {size / 1024:8.1f} Ko')
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--listings', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    listings = make_listings(args.listings)
+    legacy = DefaultJSONProvider(app)
+    legacy.ensure_ascii = False
+    fast = FastJSONProvider(app)
+
+    assert json.loads(legacy.dumps([legacy_listing(x) for x in listings])) == \
+        json.loads(fast.dumps([LISTING_SERIALIZER(x) for x in listings]))
+
+    with app.app_context():
+        before = measure('to_dict + json standard', legacy_listing, legacy, listings, args.repeat)
+        measure('sérialiseur compilé + json standard', LISTING_SERIALIZER, legacy, listings, args.repeat)
+        after = measure('sérialiseur compilé + FastJSONProvider', LISTING_SERIALIZER, fast, listings, args.repeat)
+    print(f'Gain : x{before / after:.1f}')
+
+
+if __name__ == '__main__':
+    main()
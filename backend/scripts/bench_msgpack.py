@@ -0,0 +1,54 @@
+"""
+Lucky Kangaroo - Benchmark MessagePack / JSON des listes d'annonces
+Compare, pour une même liste produite par les sérialiseurs compilés, l'encodage
+JSON (FastJSONProvider) et MessagePack : temps d'encodage, taille brute et gzip.
+
+Usage : python scripts/bench_msgpack.py [--listings 100] [--repeat 200]
+"""
+
+import argparse
+import gzip
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+
+from scripts.bench_json import LISTING_SERIALIZER, make_listings  # noqa: E402
+from services.serialization import FastJSONProvider, msgpack  # noqa: E402
+
+
+def measure(label, encode, payload, repeat):
+    data = encode(payload)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        encode(payload)
+    elapsed = (time.perf_counter() - started) / repeat
+    print(f'{label:<12} {elapsed * 1000:8.3f} ms/réponse {len(data) / 1024:8.1f} Ko '
+          f'{len(gzip.compress(data, 6)) / 1024:8.1f} Ko gzip')
+    return elapsed, len(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--listings', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    if msgpack is None:
+        sys.exit('msgpack non installé (pip install msgpack) : seules les réponses JSON sont servies')
+
+    app = Flask(__name__)
+    provider = FastJSONProvider(app)
+    payload = {'success': True, 'listings': [LISTING_SERIALIZER(x) for x in make_listings(args.listings)]}
+    assert msgpack.unpackb(provider.dump_msgpack(payload)) == provider.loads(provider.dump_bytes(payload))
+
+    json_time, json_size = measure('JSON', provider.dump_bytes, payload, args.repeat)
+    msgpack_time, msgpack_size = measure('MessagePack', provider.dump_msgpack, payload, args.repeat)
+    print(f'Taille : {msgpack_size / json_size:.0%} du JSON, temps : x{json_time / msgpack_time:.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Lucky Kangaroo - Benchmark du chargement des schémas de validation
+Compare, pour les schémas les plus sollicités, le chemin historique (instanciation
+du schéma à chaque requête) aux instances partagées créées au chargement du module.
+
+Usage : python scripts/bench_schemas.py [--repeat 2000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+warnings.filterwarnings('ignore', module='marshmallow')
+
+from schemas.listing import (  # noqa: E402
+    CreateListingSchema, UpdateListingSchema, create_listing_schema, update_listing_schema
+)
+from schemas.user import CreateUserSchema, create_user_schema  # noqa: E402
+
+LISTING = {
+    'title': 'Vélo de route Cube Attain',
+    'description': 'Très bon état, révisé en mars, pneus neufs, freins à disque hydrauliques.',
+    'category': 'velos',
+    'condition': 'very_good',
+    'estimated_value': 850.0,
+    'currency': 'CHF',
+    'latitude': 46.2,
+    'longitude': 6.14,
+    'city': 'Genève'
+}
+USER = {
+    'username': 'marie_dupont',
+    'email': 'marie@example.ch',
+    'password': 'Kangourou2024!',
+    'first_name': 'Marie',
+    'last_name': 'Dupont',
+    'phone': '+41 79 123 45 67'
+}
+
+CASES = (
+    ('CreateListingSchema', CreateListingSchema, create_listing_schema, LISTING, {}),
+    ('UpdateListingSchema', UpdateListingSchema, update_listing_schema,
+     {'title': LISTING['title'], 'estimated_value': 900.0}, {'partial': True}),
+    ('CreateUserSchema (inscription)', CreateUserSchema, create_user_schema, USER, {}),
+)
+
+
+def measure(load, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        load()
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'schéma':<32} {'avant':>12} {'après':>12}")
+    for label, schema_class, shared, data, options in CASES:
+        assert schema_class().load(data, **options) == shared.load(data, **options)
+        before = measure(lambda: schema_class().load(data, **options), args.repeat)
+        after = measure(lambda: shared.load(data, **options), args.repeat)
+        print(f'{label:<32} {before * 1e6:9.1f} µs {after * 1e6:9.1f} µs   x{before / after:.1f}')
+
+
+if __name__ == '__main__':
+    main()
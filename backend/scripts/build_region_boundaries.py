@@ -0,0 +1,196 @@
+"""
+Lucky Kangaroo - Génération du fichier de frontières des régions
+Construit le fichier lu par REGION_BOUNDARIES_PATH à partir des limites officielles
+swissBOUNDARIES3D (swisstopo) : les 26 cantons et les communes des villes desservies,
+simplifiés pour la recherche par région.
+
+Les couches KANTONSGEBIET et HOHEITSGEBIET sont converties en GeoJSON au préalable,
+en LV95 ou déjà en WGS84, par exemple :
+  ogr2ogr -f GeoJSON cantons.geojson swissBOUNDARIES3D_1_5_TLM_KANTONSGEBIET.shp
+  ogr2ogr -f GeoJSON communes.geojson swissBOUNDARIES3D_1_5_TLM_HOHEITSGEBIET.shp
+
+Usage : python scripts/build_region_boundaries.py cantons.geojson communes.geojson
+          [--output data/swiss_regions_full.geojson] [--commune Sion ...] [--all-communes]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.region_service import _fold, lv95_to_wgs84, simplify_ring  # noqa: E402
+
+# Numéro cantonal officiel -> (abréviation, nom, alias dans les autres langues)
+CANTONS = {
+    1: ('ZH', 'Zurich', ['Zürich', 'Zurigo']),
+    2: ('BE', 'Berne', ['Bern', 'Berna']),
+    3: ('LU', 'Lucerne', ['Luzern', 'Lucerna']),
+    4: ('UR', 'Uri', []),
+    5: ('SZ', 'Schwytz', ['Schwyz', 'Svitto']),
+    6: ('OW', 'Obwald', ['Obwalden', 'Obvaldo']),
+    7: ('NW', 'Nidwald', ['Nidwalden', 'Nidvaldo']),
+    8: ('GL', 'Glaris', ['Glarus', 'Glarona']),
+    9: ('ZG', 'Zoug', ['Zug', 'Zugo']),
+    10: ('FR', 'Fribourg', ['Freiburg', 'Friburgo']),
+    11: ('SO', 'Soleure', ['Solothurn', 'Soletta']),
+    12: ('BS', 'Bâle-Ville', ['Basel-Stadt', 'Basilea Città']),
+    13: ('BL', 'Bâle-Campagne', ['Basel-Landschaft', 'Basilea Campagna']),
+    14: ('SH', 'Schaffhouse', ['Schaffhausen', 'Sciaffusa']),
+    15: ('AR', 'Appenzell Rhodes-Extérieures', ['Appenzell Ausserrhoden', 'Appenzello Esterno']),
+    16: ('AI', 'Appenzell Rhodes-Intérieures', ['Appenzell Innerrhoden', 'Appenzello Interno']),
+    17: ('SG', 'Saint-Gall', ['St. Gallen', 'San Gallo']),
+    18: ('GR', 'Grisons', ['Graubünden', 'Grigioni', 'Grischun']),
+    19: ('AG', 'Argovie', ['Aargau', 'Argovia']),
+    20: ('TG', 'Thurgovie', ['Thurgau', 'Turgovia']),
+    21: ('TI', 'Tessin', ['Ticino']),
+    22: ('VD', 'Vaud', ['Waadt']),
+    23: ('VS', 'Valais', ['Wallis', 'Vallese']),
+    24: ('NE', 'Neuchâtel', ['Neuenburg']),
+    25: ('GE', 'Genève', ['Genf', 'Ginevra', 'Geneva']),
+    26: ('JU', 'Jura', ['Giura']),
+}
+
+# Communes des villes desservies (noms officiels de swissBOUNDARIES3D)
+SERVED_COMMUNES = (
+    'Zürich', 'Genève', 'Basel', 'Lausanne', 'Bern', 'Winterthur', 'Luzern',
+    'St. Gallen', 'Lugano', 'Biel/Bienne', 'Thun', 'Fribourg', 'Neuchâtel', 'Sion'
+)
+
+# Tolérance de simplification du fichier généré (degrés, ~20 m ; load_regions
+# resimplifie au chargement)
+OUTPUT_TOLERANCE = 0.0002
+
+
+def _slug(value):
+    return re.sub(r'[^a-z0-9]+', '-', _fold(value)).strip('-')
+
+
+def _polygons(geometry):
+    if geometry is None:
+        return []
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry['type'] == 'MultiPolygon':
+        return geometry['coordinates']
+    return []
+
+
+def _to_wgs84(ring):
+    """Anneau [x, y(, z)] vers [lng, lat] ; les coordonnées suisses sont converties"""
+    xs = [point[0] for point in ring]
+    ys = [point[1] for point in ring]
+    if max(abs(value) for value in xs + ys) > 360:
+        lats, lngs = lv95_to_wgs84(xs, ys)
+        xs, ys = lngs.tolist(), lats.tolist()
+    return [[x, y] for x, y in zip(xs, ys)]
+
+
+def _simplified(polygons, tolerance):
+    result = []
+    for rings in polygons:
+        simplified = [
+            [[round(x, 6), round(y, 6)] for x, y in simplify_ring(_to_wgs84(ring), tolerance)]
+            for ring in rings
+        ]
+        if simplified and len(simplified[0]) >= 4:
+            result.append(simplified)
+    return result
+
+
+def _feature(region_id, name, kind, aliases, polygons):
+    return {
+        'type': 'Feature',
+        'properties': {'id': region_id, 'name': name, 'type': kind, 'aliases': aliases},
+        'geometry': {'type': 'MultiPolygon', 'coordinates': polygons}
+    }
+
+
+def _grouped(collection, key_field):
+    """Polygones regroupés par entité (exclaves et parties d'une même commune ou canton)"""
+    groups = defaultdict(lambda: {'properties': None, 'polygons': []})
+    for feature in collection.get('features', []):
+        properties = feature.get('properties') or {}
+        key = properties.get(key_field)
+        if key is None:
+            continue
+        group = groups[key]
+        group['properties'] = group['properties'] or properties
+        group['polygons'].extend(_polygons(feature.get('geometry')))
+    return groups
+
+
+def build_boundaries(cantons, communes, commune_names=SERVED_COMMUNES, all_communes=False,
+                     tolerance=OUTPUT_TOLERANCE, canton_field='KANTONSNUM',
+                     commune_field='BFS_NUMMER', name_field='NAME'):
+    """Collection GeoJSON des cantons et communes au format de load_regions"""
+    features = []
+    canton_keys = set()
+    for number, group in sorted(_grouped(cantons, canton_field).items()):
+        if int(number) not in CANTONS:
+            continue
+        abbreviation, name, aliases = CANTONS[int(number)]
+        features.append(_feature(abbreviation.lower(), name, 'canton', [abbreviation] + aliases,
+                                 _simplified(group['polygons'], tolerance)))
+        canton_keys.update(_fold(key) for key in [abbreviation, name] + aliases)
+
+    wanted = {_fold(str(name)) for name in commune_names}
+    for number, group in sorted(_grouped(communes, commune_field).items()):
+        name = group['properties'].get(name_field) or str(number)
+        if not all_communes and _fold(name) not in wanted and _fold(str(number)) not in wanted:
+            continue
+        region_id, display_name, aliases = _slug(name), name, []
+        if _fold(name) in canton_keys:
+            # Même nom que le canton (Genève, Zürich, Bern...) : la commune reste distinguable
+            region_id, display_name = f'{region_id}-ville', f'{name} (ville)'
+            aliases.append(f'Ville de {name}')
+        canton = CANTONS.get(int(group['properties'].get(canton_field) or 0))
+        if canton:
+            aliases.append(f'{name} {canton[0]}')
+        features.append(_feature(region_id, display_name, 'commune', aliases,
+                                 _simplified(group['polygons'], tolerance)))
+
+    return {
+        'type': 'FeatureCollection',
+        'name': 'swiss_regions',
+        'description': 'Cantons et communes générés depuis swissBOUNDARIES3D (swisstopo), simplifiés.',
+        'features': features
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('cantons', help='GeoJSON de la couche KANTONSGEBIET')
+    parser.add_argument('communes', help='GeoJSON de la couche HOHEITSGEBIET')
+    parser.add_argument('--output', default='data/swiss_regions_full.geojson')
+    parser.add_argument('--commune', action='append', dest='communes_wanted',
+                        help='Commune à inclure (nom ou numéro OFS), répétable ; villes desservies par défaut')
+    parser.add_argument('--all-communes', action='store_true', help='Inclure toutes les communes')
+    parser.add_argument('--tolerance', type=float, default=OUTPUT_TOLERANCE)
+    args = parser.parse_args()
+
+    with open(args.cantons, encoding='utf-8') as handle:
+        cantons = json.load(handle)
+    with open(args.communes, encoding='utf-8') as handle:
+        communes = json.load(handle)
+
+    collection = build_boundaries(cantons, communes, args.communes_wanted or SERVED_COMMUNES,
+                                  args.all_communes, args.tolerance)
+    kinds = defaultdict(int)
+    for feature in collection['features']:
+        kinds[feature['properties']['type']] += 1
+    missing = 26 - kinds['canton']
+    if missing:
+        print(f'Attention : {missing} canton(s) absent(s) de {args.cantons}')
+
+    with open(args.output, 'w', encoding='utf-8') as handle:
+        json.dump(collection, handle, ensure_ascii=False)
+    print(f"{kinds['canton']} cantons, {kinds['commune']} communes -> {args.output}")
+    print(f'Configurer REGION_BOUNDARIES_PATH={os.path.abspath(args.output)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -21,6 +21,11 @@ class SearchClient:
             return None
         return self.client.index(index=index, id=id, body=body)
 
+    def bulk(self, body: list, **params):
+        if not self.client:
+            raise ConnectionError(f'Search engine unavailable at {self.url}')
+        return self.client.bulk(body=body, **params)
+
     def search(self, index: str, query: dict):
         if not self.client:
             return {"hits": {"total": 0, "hits": []}}
@@ -0,0 +1,181 @@
+"""
+Lucky Kangaroo - Requêtes groupées (batch)
+Plusieurs GET internes en un aller-retour, sans repasser par la pile HTTP ni les
+middlewares (limitation de débit, compression) : les sous-requêtes partagent le
+jeton, le contexte applicatif et la session SQLAlchemy de la requête groupée.
+Celles dont le chemin est déclaré lent (services externes) s'exécutent en parallèle,
+chacune dans son propre contexte (une session SQLAlchemy n'est pas thread-safe).
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from flask import current_app, request
+from werkzeug.exceptions import HTTPException
+from werkzeug.test import EnvironBuilder
+
+# En-têtes de la requête groupée transmis aux sous-requêtes
+FORWARDED_HEADERS = ('Authorization', 'Accept-Language', 'Cookie', 'User-Agent')
+
+# En-têtes des sous-réponses renvoyés au client
+RETURNED_HEADERS = ('ETag', 'Cache-Control', 'Location')
+
+
+class InvalidBatch(ValueError):
+    """Corps de requête groupée invalide"""
+
+
+def parse_batch(payload: Any, max_requests: int) -> List[Dict[str, str]]:
+    """
+    {'requests': [{'id': 'profile', 'path': '/api/v1/users/profile'}, '/api/v1/chat/chats', ...]}
+    Un chemin seul est accepté ; l'identifiant vaut alors la position.
+    """
+    if not isinstance(payload, dict) or not isinstance(payload.get('requests'), list):
+        raise InvalidBatch("Le champ 'requests' (liste) est requis")
+    items = payload['requests']
+    if not items:
+        raise InvalidBatch('Aucune sous-requête')
+    if len(items) > max_requests:
+        raise InvalidBatch(f'Trop de sous-requêtes (maximum {max_requests})')
+
+    parsed, seen = [], set()
+    for index, item in enumerate(items):
+        if isinstance(item, str):
+            item = {'path': item}
+        if not isinstance(item, dict) or not isinstance(item.get('path'), str) or not item['path'].startswith('/'):
+            raise InvalidBatch(f'Sous-requête {index} : chemin absolu requis')
+        if str(item.get('method', 'GET')).upper() != 'GET':
+            raise InvalidBatch(f'Sous-requête {index} : seules les requêtes GET sont groupables')
+        item_id = str(item.get('id', index))
+        if item_id in seen:
+            raise InvalidBatch(f'Identifiant de sous-requête dupliqué : {item_id}')
+        seen.add(item_id)
+        parsed.append({'id': item_id, 'path': item['path']})
+    return parsed
+
+
+def _error_response(app, status: int, message: str):
+    return app.make_response(({'error': message}, status))
+
+
+def dispatch(app, environ):
+    """
+    Exécute une sous-requête : routage, vue et gestionnaires d'erreurs de
+    l'application, sans before_request/after_request
+    """
+    with app.request_context(environ):
+        try:
+            try:
+                rv = app.dispatch_request()
+            except Exception as error:
+                rv = app.handle_user_exception(error)
+            if isinstance(rv, HTTPException):
+                return _error_response(app, rv.code or 500, rv.description)
+            return app.make_response(rv)
+        except Exception:
+            app.logger.exception('Erreur de sous-requête groupée %s', environ.get('PATH_INFO'))
+            return _error_response(app, 500, 'Erreur interne du serveur')
+
+
+def _result(item: Dict[str, str], response, started: float) -> Dict[str, Any]:
+    result = {'id': item['id'], 'status': response.status_code}
+    if response.is_streamed:
+        # Flux (SSE…) : pas de corps fini à renvoyer
+        response.close()
+        result['status'] = 406
+        result['body'] = {'error': 'Réponse en flux non groupable'}
+    elif response.is_json:
+        result['body'] = response.get_json(silent=True)
+    else:
+        result['body'] = response.get_data(as_text=True) or None
+    headers = {name: response.headers[name] for name in RETURNED_HEADERS if name in response.headers}
+    if headers:
+        result['headers'] = headers
+    result['duration_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+def _run(app, item, environ) -> Dict[str, Any]:
+    started = time.perf_counter()
+    return _result(item, dispatch(app, environ), started)
+
+
+def _run_isolated(app, item, environ) -> Dict[str, Any]:
+    # Thread du pool : contexte applicatif propre, donc session SQLAlchemy propre
+    with app.app_context():
+        return _run(app, item, environ)
+
+
+class BatchExecutor:
+    """
+    Exécuteur des requêtes groupées.
+    Configuration :
+      BATCH_MAX_REQUESTS : nombre maximal de sous-requêtes,
+      BATCH_MAX_WORKERS : threads des sous-requêtes parallèles (0 : tout en séquence),
+      BATCH_CONCURRENT_PREFIXES : préfixes des chemins lents (I/O externes) exécutés en parallèle ;
+        les autres s'exécutent à la suite dans le contexte de la requête groupée.
+    """
+
+    def __init__(self, app=None):
+        self._executor = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        app.config.setdefault('BATCH_MAX_REQUESTS', 10)
+        app.config.setdefault('BATCH_MAX_WORKERS', 4)
+        app.config.setdefault('BATCH_CONCURRENT_PREFIXES', ())
+        workers = app.config['BATCH_MAX_WORKERS']
+        if workers > 0:
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch')
+        app.extensions['batch'] = self
+
+    def is_concurrent(self, path: str) -> bool:
+        return (self._executor is not None
+                and path.startswith(tuple(current_app.config['BATCH_CONCURRENT_PREFIXES'])))
+
+    def _environ(self, path: str) -> Dict[str, Any]:
+        path, _, query_string = path.partition('?')
+        headers = {name: request.headers[name] for name in FORWARDED_HEADERS if name in request.headers}
+        headers['Accept'] = 'application/json'
+        builder = EnvironBuilder(
+            path=path, query_string=query_string, method='GET', headers=headers,
+            base_url=request.url_root, environ_base={'REMOTE_ADDR': request.remote_addr}
+        )
+        try:
+            return builder.get_environ()
+        finally:
+            builder.close()
+
+    def run(self, payload: Any) -> Dict[str, Any]:
+        """Exécute les sous-requêtes ; résultats dans l'ordre demandé avec leur durée"""
+        started = time.perf_counter()
+        app = current_app._get_current_object()
+        items = parse_batch(payload, app.config['BATCH_MAX_REQUESTS'])
+        for item in items:
+            if item['path'].partition('?')[0] == request.path:
+                raise InvalidBatch('Une requête groupée ne peut pas se contenir')
+        environs = [self._environ(item['path']) for item in items]
+
+        # Les sous-requêtes lentes partent d'abord dans le pool, les autres
+        # s'exécutent pendant ce temps dans le contexte courant
+        futures = {
+            index: self._executor.submit(_run_isolated, app, item, environs[index])
+            for index, item in enumerate(items) if self.is_concurrent(item['path'])
+        }
+        results = [
+            None if index in futures else _run(app, item, environs[index])
+            for index, item in enumerate(items)
+        ]
+        for index, future in futures.items():
+            results[index] = future.result()
+
+        return {
+            'responses': results,
+            'duration_ms': round((time.perf_counter() - started) * 1000, 2)
+        }
+
+
+def init_batch(app) -> BatchExecutor:
+    return BatchExecutor(app)
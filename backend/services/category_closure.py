@@ -0,0 +1,110 @@
+"""
+Lucky Kangaroo - Fermeture transitive des catégories
+Relation (ancêtre, descendant, profondeur) calculée en mémoire depuis les colonnes
+id/parent_id, mise en cache par modèle et invalidée à chaque modification de catégorie
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, FrozenSet, Hashable, Iterable, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Reconstruction au plus tard après ce délai (modifications faites par un autre processus)
+CLOSURE_TTL = 300
+
+
+class CategoryClosure:
+    """Fermeture d'un arbre de catégories donné par ses couples (id, parent_id)"""
+
+    def __init__(self, rows: Iterable[Tuple[Hashable, Optional[Hashable]]]):
+        parents = {category_id: parent_id for category_id, parent_id in rows}
+        children: Dict[Hashable, list] = {}
+        for category_id, parent_id in parents.items():
+            if parent_id is not None and parent_id in parents:
+                children.setdefault(parent_id, []).append(category_id)
+
+        # Ancêtres du plus proche au plus lointain (un cycle dans les données est coupé)
+        self.ancestors: Dict[Hashable, Tuple] = {}
+        for category_id in parents:
+            chain, seen = [], {category_id}
+            parent_id = parents[category_id]
+            while parent_id is not None and parent_id in parents and parent_id not in seen:
+                chain.append(parent_id)
+                seen.add(parent_id)
+                parent_id = parents[parent_id]
+            self.ancestors[category_id] = tuple(chain)
+
+        descendants: Dict[Hashable, set] = {category_id: {category_id} for category_id in parents}
+        for category_id, chain in self.ancestors.items():
+            for ancestor in chain:
+                descendants[ancestor].add(category_id)
+        self.descendants: Dict[Hashable, FrozenSet] = {
+            category_id: frozenset(ids) for category_id, ids in descendants.items()
+        }
+        self.children: Dict[Hashable, Tuple] = {key: tuple(ids) for key, ids in children.items()}
+
+    def __contains__(self, category_id) -> bool:
+        return category_id in self.descendants
+
+    def __len__(self) -> int:
+        return len(self.descendants)
+
+    def rows(self) -> Iterator[Tuple[Hashable, Hashable, int]]:
+        """Lignes (ancêtre, descendant, profondeur) de la table de fermeture, soi-même compris"""
+        for category_id, chain in self.ancestors.items():
+            yield category_id, category_id, 0
+            for depth, ancestor in enumerate(chain, 1):
+                yield ancestor, category_id, depth
+
+
+class CategoryClosureCache:
+    """Fermetures par modèle de catégorie, reconstruites après invalidation ou expiration"""
+
+    def __init__(self, ttl: float = CLOSURE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._closures: Dict[type, Tuple[float, CategoryClosure]] = {}
+        self._generation = 0
+
+    def get(self, model, parent_attr: str = 'parent_id') -> CategoryClosure:
+        with self._lock:
+            entry = self._closures.get(model)
+            generation = self._generation
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+
+        started = time.monotonic()
+        closure = CategoryClosure(
+            model.query.with_entities(model.id, getattr(model, parent_attr)).all()
+        )
+        with self._lock:
+            # Une invalidation pendant la lecture rend cette fermeture douteuse : pas de mise en cache
+            if generation == self._generation:
+                self._closures[model] = (started, closure)
+        logger.debug('Category closure built for %s: %d categories', model.__name__, len(closure))
+        return closure
+
+    def descendants(self, model, category_id) -> Optional[FrozenSet]:
+        """La catégorie et toutes ses sous-catégories (None si elle n'existe pas)"""
+        return self.get(model).descendants.get(category_id)
+
+    def invalidate(self, model=None) -> None:
+        with self._lock:
+            self._generation += 1
+            if model is None:
+                self._closures.clear()
+            else:
+                self._closures.pop(model, None)
+
+
+category_closures = CategoryClosureCache()
+
+
+def category_descendants(model, category_id) -> Optional[FrozenSet]:
+    return category_closures.descendants(model, category_id)
+
+
+def invalidate_category_closure(model=None) -> None:
+    category_closures.invalidate(model)
@@ -0,0 +1,185 @@
+"""
+Lucky Kangaroo - Compression des réponses HTTP
+gzip (et brotli s'il est installé) négocié sur Accept-Encoding, au-delà d'une taille
+minimale, avec un niveau par groupe de routes ; les réponses en flux sont
+compressées morceau par morceau. Les fichiers servis (uploads) ne sont pas recompressés.
+"""
+
+import zlib
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Types de contenu compressibles (les images, vidéos et archives le sont déjà)
+COMPRESSIBLE_TYPES = frozenset({
+    'application/json', 'application/javascript', 'application/xml', 'application/geo+json',
+    'application/x-ndjson', 'application/msgpack', 'application/x-msgpack',
+    'image/svg+xml'
+})
+
+DEFAULT_LEVELS = {'gzip': 6, 'br': 4}
+
+
+def _is_compressible(mimetype: Optional[str]) -> bool:
+    return bool(mimetype) and (mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES)
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """Encodages acceptés et leur poids q"""
+    accepted = {}
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        accepted[coding] = weight
+    return accepted
+
+
+def choose_encoding(header: Optional[str], available: Iterable[str]) -> Optional[str]:
+    """Encodage préféré du client parmi ceux disponibles (brotli d'abord à poids égal)"""
+    accepted = parse_accept_encoding(header)
+    best, best_weight = None, 0.0
+    for coding in available:
+        weight = accepted.get(coding, accepted.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+class _Compressor:
+    """Compression incrémentale (gzip ou brotli)"""
+
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._brotli = brotli.Compressor(quality=level)
+        else:
+            self._zlib = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, chunk: bytes) -> bytes:
+        """Morceau compressé et vidé (le client le reçoit sans attendre la fin du flux)"""
+        if self.encoding == 'br':
+            return self._brotli.process(chunk) + self._brotli.flush()
+        return self._zlib.compress(chunk) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == 'br':
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+def compress_bytes(data: bytes, encoding: str, level: int) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_stream(chunks: Iterable, encoding: str, level: int) -> Iterator[bytes]:
+    compressor = _Compressor(encoding, level)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if chunk:
+                yield compressor.compress(chunk)
+        yield compressor.finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+class ResponseCompressor:
+    """
+    after_request de compression.
+    Configuration :
+      COMPRESSION_ENABLED, COMPRESSION_MIN_SIZE (octets),
+      COMPRESSION_LEVELS : {préfixe d'URL: niveau ou {'gzip': n, 'br': n}} ;
+        le préfixe le plus long l'emporte, 'default' s'applique sinon, 0 désactive,
+      COMPRESSION_EXCLUDED_PREFIXES : préfixes jamais compressés (fichiers servis).
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        app.config.setdefault('COMPRESSION_ENABLED', True)
+        app.config.setdefault('COMPRESSION_MIN_SIZE', 1024)
+        app.config.setdefault('COMPRESSION_LEVELS', {})
+        app.config.setdefault('COMPRESSION_EXCLUDED_PREFIXES', ('/uploads', '/static'))
+        levels = {'default': dict(DEFAULT_LEVELS)}
+        for prefix, level in app.config['COMPRESSION_LEVELS'].items():
+            if isinstance(level, int):
+                # Un niveau seul vaut pour les deux encodages (gzip 0-9, brotli 0-11)
+                level = {'gzip': min(level, 9), 'br': level}
+            levels[prefix] = {**DEFAULT_LEVELS, **level}
+        self._groups: Tuple[Tuple[str, Dict[str, int]], ...] = tuple(sorted(
+            ((prefix, value) for prefix, value in levels.items() if prefix != 'default'),
+            key=lambda item: len(item[0]), reverse=True
+        ))
+        self._default = levels['default']
+        self._available = ('br', 'gzip') if brotli is not None else ('gzip',)
+        app.extensions['compression'] = self
+        app.after_request(self.after_request)
+
+    def levels_for(self, path: str) -> Dict[str, int]:
+        for prefix, levels in self._groups:
+            if path.startswith(prefix):
+                return levels
+        return self._default
+
+    def after_request(self, response):
+        config = current_app.config
+        if (not config['COMPRESSION_ENABLED']
+                or request.method == 'HEAD'
+                or response.status_code < 200 or response.status_code in (204, 206, 304)
+                or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or not _is_compressible(response.mimetype)
+                or request.path.startswith(tuple(config['COMPRESSION_EXCLUDED_PREFIXES']))):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        levels = self.levels_for(request.path)
+        encoding = choose_encoding(
+            request.headers.get('Accept-Encoding'),
+            [coding for coding in self._available if levels.get(coding)]
+        )
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = compress_stream(response.response, encoding, levels[encoding])
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < config['COMPRESSION_MIN_SIZE']:
+                return response
+            response.set_data(compress_bytes(data, encoding, levels[encoding]))
+
+        response.headers['Content-Encoding'] = encoding
+        # Le contenu encodé n'est plus identique octet pour octet : ETag faible
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+
+def init_compression(app) -> ResponseCompressor:
+    return ResponseCompressor(app)
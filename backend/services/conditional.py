@@ -0,0 +1,102 @@
+"""
+Lucky Kangaroo - Requêtes conditionnelles (ETag / If-None-Match)
+ETags forts calculés depuis une version (updated_at, compteur…) ou un hash du contenu,
+vérifiés avant la sérialisation ; Cache-Control configurable par endpoint.
+"""
+
+import hashlib
+import json
+from functools import wraps
+from typing import Any, Callable, Optional
+
+from flask import current_app, request
+
+from .serialization import wants_msgpack
+
+# Politiques par défaut, surchargées par CACHE_CONTROL_POLICIES (nom de politique ou endpoint)
+DEFAULT_CACHE_POLICIES = {
+    'static': 'public, max-age=86400',
+    'catalog': 'public, max-age=300, must-revalidate',
+    'listing': 'public, no-cache',
+    'private': 'private, no-cache',
+    'uploads': 'public, max-age=31536000, immutable',
+}
+
+
+def make_etag(*parts: Any) -> str:
+    """ETag d'une version : hash des éléments qui la déterminent"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(repr(part).encode('utf-8'))
+        digest.update(b'\x1f')
+    return digest.hexdigest()
+
+
+def content_etag(content: Any) -> str:
+    """ETag d'un contenu (octets, texte ou objet JSON)"""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    elif not isinstance(content, bytes):
+        content = json.dumps(content, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def cache_control_for(policy: str) -> Optional[str]:
+    """En-tête Cache-Control de l'endpoint courant (l'endpoint prime sur la politique)"""
+    policies = current_app.config.get('CACHE_CONTROL_POLICIES') or {}
+    if request.endpoint in policies:
+        return policies[request.endpoint]
+    return policies.get(policy, DEFAULT_CACHE_POLICIES.get(policy))
+
+
+def representation_etag(etag: str) -> str:
+    """Les représentations JSON et MessagePack d'une même version ont des ETags distincts"""
+    return f'{etag}-msgpack' if wants_msgpack() else etag
+
+
+def etag_matches(etag: str) -> bool:
+    """
+    If-None-Match correspond : comparaison faible (RFC 9110), un ETag affaibli
+    par la compression valide la même représentation
+    """
+    return request.if_none_match.contains_weak(representation_etag(etag))
+
+
+def with_validators(response, etag: str, policy: str):
+    response.set_etag(representation_etag(etag))
+    cache_control = cache_control_for(policy)
+    if cache_control:
+        response.headers['Cache-Control'] = cache_control
+    return response
+
+
+def not_modified(etag: str, policy: str):
+    """Réponse 304 sans corps (ETag et Cache-Control répétés)"""
+    return with_validators(current_app.response_class(status=304), etag, policy)
+
+
+def conditional(policy: str, etag: Optional[Callable[..., Optional[str]]] = None):
+    """
+    Décorateur de vue GET : etag(**view_args) calcule la version à bas coût ;
+    s'il correspond à If-None-Match, la vue n'est pas exécutée (304).
+    etag absent ou None : hash du contenu produit (économise seulement le transfert).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(*args, **kwargs)
+            tag = etag(*args, **kwargs) if etag is not None else None
+            if tag is not None and etag_matches(tag):
+                return not_modified(tag, policy)
+
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed:
+                return response
+            if tag is None:
+                tag = content_etag(response.get_data())
+                if etag_matches(tag):
+                    return not_modified(tag, policy)
+            return with_validators(response, tag, policy)
+        return wrapper
+    return decorator
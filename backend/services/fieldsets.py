@@ -0,0 +1,89 @@
+"""
+Lucky Kangaroo - Sélection de champs (?fields=)
+Le client liste les champs voulus ; la vue n'en sérialise pas d'autres et ne
+lit que les colonnes et relations dont ils dépendent.
+"""
+
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import load_only, selectinload
+
+# Nombre maximal de champs demandés (protège le cache des sérialiseurs restreints)
+MAX_FIELDS = 50
+
+
+class InvalidFields(ValueError):
+    """Paramètre fields invalide (champ inconnu)"""
+
+
+class FieldSet:
+    """
+    Champs sélectionnables d'une ressource.
+    columns : colonnes lues par un champ calculé ou imbriqué (par défaut, la colonne du même nom) ;
+    relations : chemins de relations chargés pour un champ ('listing.images') ;
+    always : colonnes toujours lues (identifiant, clés de tri…).
+    """
+
+    def __init__(self, names: Iterable[str], columns: Optional[Dict[str, Sequence[str]]] = None,
+                 relations: Optional[Dict[str, Sequence[str]]] = None, always: Sequence[str] = ('id',)):
+        self.names: Tuple[str, ...] = tuple(dict.fromkeys(names))
+        self._columns = {name: tuple((columns or {}).get(name, (name,))) for name in self.names}
+        self._relations = {name: tuple(paths) for name, paths in (relations or {}).items()}
+        self.always = tuple(always)
+
+    def parse(self, value: Optional[str]) -> Optional[FrozenSet[str]]:
+        """Champs demandés, ou None (paramètre absent ou vide : tous les champs)"""
+        if value is None:
+            return None
+        requested = frozenset(name.strip() for name in value.split(',') if name.strip())
+        if not requested:
+            return None
+        if len(requested) > MAX_FIELDS:
+            raise InvalidFields(f'Trop de champs demandés (maximum {MAX_FIELDS})')
+        unknown = requested.difference(self.names)
+        if unknown:
+            raise InvalidFields(f"Champs inconnus : {', '.join(sorted(unknown))}")
+        return requested
+
+    def selected(self, requested: Optional[FrozenSet[str]]) -> Tuple[str, ...]:
+        return self.names if requested is None else tuple(name for name in self.names if name in requested)
+
+    def column_names(self, requested: Optional[FrozenSet[str]]) -> Tuple[str, ...]:
+        """Colonnes nécessaires, dans l'ordre de déclaration"""
+        names = list(self.always)
+        for name in self.selected(requested):
+            names.extend(self._columns[name])
+        return tuple(dict.fromkeys(names))
+
+    def relation_paths(self, requested: Optional[FrozenSet[str]]) -> Tuple[str, ...]:
+        paths = []
+        for name in self.selected(requested):
+            paths.extend(self._relations.get(name, ()))
+        return tuple(dict.fromkeys(paths))
+
+    def load_options(self, model, requested: Optional[FrozenSet[str]], columns: bool = True) -> List:
+        """
+        Options de requête ORM : load_only des colonnes nécessaires (si des champs
+        sont demandés) et selectinload des seules relations utilisées
+        """
+        options = []
+        if requested is not None and columns:
+            options.append(load_only(*(getattr(model, name) for name in self.column_names(requested))))
+        for path in self.relation_paths(requested):
+            option, entity = None, model
+            for attribute_name in path.split('.'):
+                attribute = getattr(entity, attribute_name)
+                option = selectinload(attribute) if option is None else option.selectinload(attribute)
+                entity = attribute.property.mapper.class_
+            options.append(option)
+        return options
+
+    def project(self, data: Dict, requested: Optional[FrozenSet[str]]) -> Dict:
+        if requested is None:
+            return data
+        return {key: value for key, value in data.items() if key in requested}
+
+
+def fields_key(requested: Optional[FrozenSet[str]]) -> str:
+    """Forme canonique d'une sélection (clés de cache, ETags)"""
+    return '' if requested is None else ','.join(sorted(requested))
@@ -325,6 +325,30 @@ class GeolocationService:
         
         return meeting_points
     
+    def get_route_corridor(self, lat1: float, lng1: float, lat2: float, lng2: float,
+                           width_km: float) -> Dict:
+        """
+        Décrit le corridor de largeur width_km autour du trajet entre deux points
+        """
+        total_distance = self.calculate_distance(lat1, lng1, lat2, lng2)
+        start_box = self.get_bounding_box(lat1, lng1, width_km)
+        end_box = self.get_bounding_box(lat2, lng2, width_km)
+        
+        return {
+            'start': {'latitude': lat1, 'longitude': lng1},
+            'end': {'latitude': lat2, 'longitude': lng2},
+            'width_km': width_km,
+            'length_km': round(total_distance.distance_km, 2),
+            'bearing': round(total_distance.bearing, 2),
+            'direction': self.get_direction_name(total_distance.bearing),
+            'bounding_box': {
+                'north': max(start_box['north'], end_box['north']),
+                'south': min(start_box['south'], end_box['south']),
+                'east': max(start_box['east'], end_box['east']),
+                'west': min(start_box['west'], end_box['west'])
+            }
+        }
+    
     def get_travel_zones(self, center_lat: float, center_lng: float) -> List[Dict]:
         """
         Définit des zones de déplacement avec temps de trajet estimés
@@ -0,0 +1,280 @@
+"""
+Lucky Kangaroo - Pagination par curseur (keyset) et comptage au choix
+La page suivante est lue après la clé de tri de la dernière ligne renvoyée
+(WHERE (clé, id) < (:clé, :id)) au lieu d'un OFFSET : une page profonde coûte
+autant que la première. Le total est exact, estimé (planificateur PostgreSQL,
+comptage borné puis mis en cache ailleurs) ou omis selon `count`
+"""
+
+import base64
+import binascii
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from math import ceil
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, func, literal, or_, tuple_
+
+COUNT_EXACT = 'exact'
+COUNT_ESTIMATE = 'estimate'
+COUNT_NONE = 'none'
+COUNT_MODES = (COUNT_EXACT, COUNT_ESTIMATE, COUNT_NONE)
+
+# En dessous de ce nombre de lignes, l'estimation est un comptage exact borné
+ESTIMATE_EXACT_LIMIT = 1000
+
+# Durée de vie des comptages mis en cache (bases sans estimation du planificateur)
+ESTIMATE_CACHE_TTL = 300
+ESTIMATE_CACHE_SIZE = 512
+
+_estimates: 'OrderedDict[Tuple, Tuple[float, int]]' = OrderedDict()
+_estimates_lock = threading.Lock()
+
+
+class InvalidPagination(ValueError):
+    """Paramètres de pagination invalides"""
+
+
+class InvalidCursor(InvalidPagination):
+    """Curseur illisible ou émis pour un autre tri"""
+
+
+class SortKey(NamedTuple):
+    """
+    Colonne de tri d'une pagination par curseur.
+    value : lecture de la valeur sur une ligne (par défaut l'attribut du même nom)
+    """
+    column: Any
+    descending: bool = False
+    value: Optional[Callable[[Any], Any]] = None
+
+    def read(self, row) -> Any:
+        if self.value is not None:
+            return self.value(row)
+        return getattr(row, self.column.key)
+
+
+def sort_keys(columns: Sequence, id_column, descending: bool = False) -> List[SortKey]:
+    """Clés de tri dans un même sens, départagées par l'identifiant"""
+    return [SortKey(column, descending) for column in columns] + [SortKey(id_column, descending)]
+
+
+def coalesced(column, default, descending: bool = False) -> SortKey:
+    """Clé de tri sur une colonne nullable (les NULL sont comparés comme `default`)"""
+    key = column.key
+
+    def read(row):
+        value = getattr(row, key)
+        return default if value is None else value
+
+    return SortKey(func.coalesce(column, default), descending, read)
+
+
+# Encodage du curseur
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'dec': str(value)}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.fromisoformat(value['dt'])
+        if 'd' in value:
+            return date.fromisoformat(value['d'])
+        if 'dec' in value:
+            return Decimal(value['dec'])
+        raise InvalidCursor('Valeur de curseur inconnue')
+    return value
+
+
+def encode_cursor(values: Sequence, sort: str = '') -> str:
+    payload = json.dumps({'s': sort, 'k': [_encode_value(v) for v in values]}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str, sort: str = '', size: Optional[int] = None) -> List:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        values = [_decode_value(v) for v in payload['k']]
+        cursor_sort = payload.get('s', '')
+    except (binascii.Error, ValueError, TypeError, KeyError) as e:
+        raise InvalidCursor('Curseur invalide') from e
+    if cursor_sort != sort or (size is not None and len(values) != size):
+        raise InvalidCursor('Curseur émis pour un autre tri')
+    return values
+
+
+def cursor_for(row, keys: Sequence[SortKey], sort: str = '') -> str:
+    return encode_cursor([key.read(row) for key in keys], sort)
+
+
+# Requêtes
+
+def order_clauses(keys: Sequence[SortKey]) -> List:
+    return [key.column.desc() if key.descending else key.column.asc() for key in keys]
+
+
+def after(keys: Sequence[SortKey], values: Sequence):
+    """Condition « strictement après la ligne de clé `values` » dans l'ordre des clés"""
+    if len({key.descending for key in keys}) == 1:
+        # Comparaison de tuples : un seul parcours d'index composite
+        columns = tuple_(*(key.column for key in keys))
+        bound = tuple_(*(literal(value, key.column.type) for key, value in zip(keys, values)))
+        return columns < bound if keys[0].descending else columns > bound
+
+    # Sens mélangés : (a > x) OR (a = x AND b < y) OR ...
+    clauses = []
+    for i, key in enumerate(keys):
+        equal = [keys[j].column == values[j] for j in range(i)]
+        beyond = key.column < values[i] if key.descending else key.column > values[i]
+        clauses.append(and_(*equal, beyond))
+    return or_(*clauses)
+
+
+def _statement_key(statement, dialect) -> Tuple:
+    compiled = statement.compile(dialect=dialect)
+    return str(compiled), tuple(sorted((k, repr(v)) for k, v in compiled.params.items()))
+
+
+def explain_statement(statement, dialect) -> Tuple[str, Dict]:
+    """
+    EXPLAIN exécutable tel quel par le pilote : les paramètres « postcompile »
+    (IN de listes, expanding) sont développés, exec_driver_sql ne le fait pas
+    """
+    compiled = statement.compile(dialect=dialect, compile_kwargs={'render_postcompile': True})
+    return f'EXPLAIN (FORMAT JSON) {compiled}', compiled.params
+
+
+def _planner_rows(query) -> Optional[int]:
+    """Nombre de lignes estimé par le planificateur PostgreSQL"""
+    connection = query.session.connection()
+    sql, params = explain_statement(query.statement, connection.dialect)
+    plan = connection.exec_driver_sql(sql, params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def _cached_count(query) -> int:
+    """Comptage exact partagé entre requêtes identiques pendant ESTIMATE_CACHE_TTL"""
+    key = _statement_key(query.statement, query.session.get_bind().dialect)
+    now = time.monotonic()
+    with _estimates_lock:
+        entry = _estimates.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+    total = query.count()
+    with _estimates_lock:
+        _estimates[key] = (now + ESTIMATE_CACHE_TTL, total)
+        _estimates.move_to_end(key)
+        while len(_estimates) > ESTIMATE_CACHE_SIZE:
+            _estimates.popitem(last=False)
+    return total
+
+
+def estimated_count(query) -> Tuple[int, bool]:
+    """
+    Total approché d'une requête : (total, estimé ?).
+    Comptage exact borné à ESTIMATE_EXACT_LIMIT lignes ; au-delà, estimation du
+    planificateur sous PostgreSQL. Les autres bases (SQLite) n'ont pas d'estimation :
+    c'est un COUNT exact mis en cache ESTIMATE_CACHE_TTL secondes, la première
+    requête d'un jeu de filtres paie donc le comptage complet.
+    """
+    query = query.order_by(None)
+    capped = query.limit(ESTIMATE_EXACT_LIMIT + 1).count()
+    if capped <= ESTIMATE_EXACT_LIMIT:
+        return capped, False
+    if query.session.get_bind().dialect.name == 'postgresql':
+        total = _planner_rows(query)
+    else:
+        total = _cached_count(query)
+    return max(total or 0, capped), True
+
+
+def count_totals(query, mode: str, per_page: int) -> Dict:
+    """Champs de total du bloc `pagination` selon le mode de comptage"""
+    if mode == COUNT_NONE:
+        return {'count': mode, 'total': None, 'pages': None, 'total_is_estimate': False}
+    if mode == COUNT_ESTIMATE:
+        total, estimated = estimated_count(query)
+    else:
+        total, estimated = query.order_by(None).count(), False
+    return {
+        'count': mode,
+        'total': total,
+        'pages': ceil(total / per_page) if per_page else 0,
+        'total_is_estimate': estimated
+    }
+
+
+def keyset_page(query, keys: Sequence[SortKey], per_page: int,
+                cursor: Optional[str] = None, sort: str = '') -> Tuple[List, Dict]:
+    """Page après `cursor` (première page si vide) ; une ligne de plus est lue pour has_next"""
+    query = query.order_by(*order_clauses(keys))
+    if cursor:
+        query = query.filter(after(keys, decode_cursor(cursor, sort, len(keys))))
+    items = query.limit(per_page + 1).all()
+    has_next = len(items) > per_page
+    items = items[:per_page]
+    return items, {
+        'per_page': per_page,
+        'has_next': has_next,
+        'next_cursor': cursor_for(items[-1], keys, sort) if has_next else None
+    }
+
+
+def paginate(query, keys: Sequence[SortKey], page: int = 1, per_page: int = 20,
+             cursor: Optional[str] = None, sort: str = '',
+             count: Optional[str] = None) -> Tuple[List, Dict]:
+    """
+    Pagination d'une liste triée par `keys`.
+
+    cursor présent (même vide) : pagination par curseur ; sinon pagination par
+    page (OFFSET), conservée pour les clients existants, qui reçoivent aussi le
+    curseur de la page suivante.
+    count : exact | estimate | none ; par défaut exact par page, none par curseur.
+    """
+    if count is None or count == '':
+        count = COUNT_NONE if cursor is not None else COUNT_EXACT
+    if count not in COUNT_MODES:
+        raise InvalidPagination(f"count doit valoir {', '.join(COUNT_MODES)}")
+
+    if cursor is not None:
+        items, pagination = keyset_page(query, keys, per_page, cursor, sort)
+        if count != COUNT_NONE:
+            pagination.update(count_totals(query, count, per_page))
+        else:
+            pagination['count'] = count
+        return items, pagination
+
+    page = max(page or 1, 1)
+    if count == COUNT_EXACT:
+        result = query.order_by(*order_clauses(keys)).paginate(page=page, per_page=per_page, error_out=False)
+        items, has_next = result.items, result.has_next
+        totals = {'count': count, 'total': result.total, 'pages': result.pages, 'total_is_estimate': False}
+    else:
+        # Sans COUNT(*) exact : une ligne de plus suffit pour has_next
+        items = query.order_by(*order_clauses(keys)).offset((page - 1) * per_page).limit(per_page + 1).all()
+        has_next = len(items) > per_page
+        items = items[:per_page]
+        totals = count_totals(query, count, per_page)
+
+    return items, {
+        'page': page,
+        'per_page': per_page,
+        **totals,
+        'has_next': has_next,
+        'has_prev': page > 1,
+        'next_cursor': cursor_for(items[-1], keys, sort) if has_next and items else None
+    }
@@ -0,0 +1,294 @@
+"""
+Lucky Kangaroo - Service de régions géographiques
+Polygones GeoJSON, régions nommées (cantons, communes) et tests point-dans-polygone vectorisés
+"""
+
+import json
+import logging
+import os
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Échantillon livré avec l'application (contours approximatifs, marqué "sample") ;
+# le jeu complet se génère avec scripts/build_region_boundaries.py et se configure
+# par REGION_BOUNDARIES_PATH
+DEFAULT_BOUNDARIES_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'swiss_regions.geojson'
+)
+
+# Tolérance de simplification des régions nommées (degrés, ~100 m)
+REGION_SIMPLIFY_TOLERANCE = 0.001
+
+# Nombre de points testés à la fois (borne la mémoire du produit points x arêtes)
+POINT_CHUNK_SIZE = 4096
+
+
+class RegionError(ValueError):
+    """Géométrie ou région invalide"""
+
+
+@dataclass(frozen=True)
+class PreparedPolygon:
+    """Polygone prétraité : arêtes sous forme de tableaux et bounding box"""
+    rings: tuple
+    bbox: Dict[str, float]
+    vertex_count: int
+
+    def contains(self, latitudes: Sequence[float], longitudes: Sequence[float]) -> np.ndarray:
+        """Masque booléen des points situés dans le polygone (règle pair-impair)"""
+        lats = np.asarray(latitudes, dtype=np.float64)
+        lngs = np.asarray(longitudes, dtype=np.float64)
+        inside = np.zeros(lats.shape[0], dtype=bool)
+
+        for start in range(0, lats.shape[0], POINT_CHUNK_SIZE):
+            chunk_lat = lats[start:start + POINT_CHUNK_SIZE, None]
+            chunk_lng = lngs[start:start + POINT_CHUNK_SIZE, None]
+            crossings = np.zeros(chunk_lat.shape[0], dtype=np.int64)
+
+            for x1, y1, x2, y2 in self.rings:
+                straddles = (y1 > chunk_lat) != (y2 > chunk_lat)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    x_cross = x1 + (chunk_lat - y1) * (x2 - x1) / (y2 - y1)
+                crossings += np.count_nonzero(straddles & (chunk_lng < x_cross), axis=1)
+
+            inside[start:start + POINT_CHUNK_SIZE] = (crossings % 2) == 1
+
+        return inside
+
+
+@dataclass(frozen=True)
+class Region:
+    """Région composée d'un ou plusieurs polygones"""
+    id: Optional[str]
+    name: Optional[str]
+    kind: Optional[str]
+    polygons: tuple
+    bbox: Dict[str, float]
+
+    def contains(self, latitudes: Sequence[float], longitudes: Sequence[float]) -> np.ndarray:
+        """Masque booléen des points situés dans la région"""
+        lats = np.asarray(latitudes, dtype=np.float64)
+        lngs = np.asarray(longitudes, dtype=np.float64)
+        inside = np.zeros(lats.shape[0], dtype=bool)
+
+        for polygon in self.polygons:
+            bbox = polygon.bbox
+            candidates = np.flatnonzero(
+                ~inside &
+                (lats >= bbox['south']) & (lats <= bbox['north']) &
+                (lngs >= bbox['west']) & (lngs <= bbox['east'])
+            )
+            if candidates.size:
+                inside[candidates] = polygon.contains(lats[candidates], lngs[candidates])
+
+        return inside
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'type': self.kind,
+            'bbox': self.bbox,
+            'vertex_count': sum(p.vertex_count for p in self.polygons)
+        }
+
+
+def simplify_ring(ring: Sequence[Sequence[float]], tolerance: float) -> List[List[float]]:
+    """
+    Simplifie un anneau par l'algorithme de Douglas-Peucker (itératif)
+    """
+    points = np.asarray(ring, dtype=np.float64)[:, :2]
+    if tolerance <= 0 or len(points) <= 4:
+        return points.tolist()
+
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        segment = points[last] - points[first]
+        offsets = points[first + 1:last] - points[first]
+        length = np.hypot(segment[0], segment[1])
+        if length == 0:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            distances = np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / length
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance:
+            split = first + 1 + index
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+
+    simplified = points[keep]
+    # Un anneau doit garder au moins un triangle
+    if len(simplified) < 4:
+        return points.tolist()
+    return simplified.tolist()
+
+
+def _prepare_polygon(rings: Sequence[Sequence[Sequence[float]]], tolerance: float = 0.0) -> PreparedPolygon:
+    """Convertit des anneaux GeoJSON ([lng, lat]) en tableaux d'arêtes"""
+    if not rings:
+        raise RegionError('Polygone vide')
+
+    prepared = []
+    vertex_count = 0
+    all_lngs, all_lats = [], []
+
+    for ring in rings:
+        if len(ring) < 3:
+            raise RegionError('Un anneau doit contenir au moins trois sommets')
+        coords = np.asarray(simplify_ring(ring, tolerance), dtype=np.float64)
+        if not np.array_equal(coords[0], coords[-1]):
+            coords = np.vstack([coords, coords[:1]])
+
+        lngs, lats = coords[:, 0], coords[:, 1]
+        if np.any(np.abs(lats) > 90) or np.any(np.abs(lngs) > 180):
+            raise RegionError('Coordonnées hors limites')
+
+        prepared.append((lngs[:-1], lats[:-1], lngs[1:], lats[1:]))
+        vertex_count += len(coords) - 1
+        all_lngs.append(lngs)
+        all_lats.append(lats)
+
+    # La bbox est calculée sur l'anneau extérieur (les trous sont inclus dedans)
+    return PreparedPolygon(
+        rings=tuple(prepared),
+        bbox={
+            'south': float(all_lats[0].min()),
+            'north': float(all_lats[0].max()),
+            'west': float(all_lngs[0].min()),
+            'east': float(all_lngs[0].max())
+        },
+        vertex_count=vertex_count
+    )
+
+
+def _merge_bboxes(bboxes: Sequence[Dict[str, float]]) -> Dict[str, float]:
+    return {
+        'south': min(b['south'] for b in bboxes),
+        'north': max(b['north'] for b in bboxes),
+        'west': min(b['west'] for b in bboxes),
+        'east': max(b['east'] for b in bboxes)
+    }
+
+
+def region_from_geojson(geometry: Dict, tolerance: float = 0.0,
+                        region_id: Optional[str] = None, name: Optional[str] = None,
+                        kind: Optional[str] = None) -> Region:
+    """
+    Construit une région à partir d'une géométrie GeoJSON (Polygon, MultiPolygon ou Feature)
+    """
+    if not isinstance(geometry, dict):
+        raise RegionError('Géométrie GeoJSON attendue')
+
+    if geometry.get('type') == 'Feature':
+        properties = geometry.get('properties') or {}
+        return region_from_geojson(
+            geometry.get('geometry') or {}, tolerance,
+            region_id or properties.get('id'),
+            name or properties.get('name'),
+            kind or properties.get('type')
+        )
+
+    geometry_type = geometry.get('type')
+    coordinates = geometry.get('coordinates')
+    if geometry_type == 'Polygon':
+        polygons = [coordinates]
+    elif geometry_type == 'MultiPolygon':
+        polygons = coordinates
+    else:
+        raise RegionError(f'Type de géométrie non supporté: {geometry_type}')
+
+    try:
+        prepared = tuple(_prepare_polygon(rings, tolerance) for rings in polygons or [])
+    except (TypeError, IndexError) as e:
+        raise RegionError(f'Coordonnées GeoJSON invalides: {e}')
+
+    if not prepared:
+        raise RegionError('Géométrie vide')
+
+    return Region(
+        id=region_id,
+        name=name,
+        kind=kind,
+        polygons=prepared,
+        bbox=_merge_bboxes([p.bbox for p in prepared])
+    )
+
+
+def lv95_to_wgs84(easting, northing):
+    """
+    Coordonnées suisses LV95 (ou LV03) vers WGS84 (latitude, longitude en degrés),
+    formules approchées de swisstopo (précision de l'ordre du mètre)
+    """
+    easting = np.asarray(easting, dtype=np.float64)
+    northing = np.asarray(northing, dtype=np.float64)
+    # LV03 : mêmes axes sans le préfixe 2 000 000 / 1 000 000
+    easting = np.where(easting < 1e6, easting + 2e6, easting)
+    northing = np.where(northing < 1e6, northing + 1e6, northing)
+
+    y = (easting - 2600000) / 1e6
+    x = (northing - 1200000) / 1e6
+    longitude = (2.6779094 + 4.728982 * y + 0.791484 * y * x
+                 + 0.1306 * y * x ** 2 - 0.0436 * y ** 3)
+    latitude = (16.9023892 + 3.238272 * x - 0.270978 * y ** 2 - 0.002528 * x ** 2
+                - 0.0447 * y ** 2 * x - 0.0140 * x ** 3)
+    return latitude * 100 / 36, longitude * 100 / 36
+
+
+def _fold(value: str) -> str:
+    """Normalise un nom de région (casse et accents)"""
+    decomposed = unicodedata.normalize('NFKD', value.strip().lower())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+@lru_cache(maxsize=8)
+def load_regions(path: str = DEFAULT_BOUNDARIES_PATH) -> Dict[str, Region]:
+    """
+    Charge et prétraite (simplification, arêtes) les régions d'un fichier de frontières.
+    Le résultat est mis en cache : les requêtes par région ne relisent ni ne resimplifient rien.
+    """
+    with open(path, encoding='utf-8') as handle:
+        collection = json.load(handle)
+    if collection.get('sample'):
+        logger.warning('Region boundaries from %s are an approximate sample; '
+                       'set REGION_BOUNDARIES_PATH to a generated swisstopo file', path)
+
+    regions = {}
+    for feature in collection.get('features', []):
+        region = region_from_geojson(feature, REGION_SIMPLIFY_TOLERANCE)
+        keys = {region.id, region.name} | set((feature.get('properties') or {}).get('aliases', []))
+        for key in keys:
+            if key:
+                regions[_fold(str(key))] = region
+    return regions
+
+
+def get_region(name_or_id: str, path: str = DEFAULT_BOUNDARIES_PATH) -> Optional[Region]:
+    """
+    Retourne une région nommée (identifiant, nom ou alias, sans tenir compte des accents)
+    """
+    if not name_or_id:
+        return None
+    return load_regions(path).get(_fold(name_or_id))
+
+
+def list_regions(path: str = DEFAULT_BOUNDARIES_PATH) -> List[Dict]:
+    """
+    Liste des régions disponibles (sans doublons d'alias)
+    """
+    seen = {}
+    for region in load_regions(path).values():
+        seen[id(region)] = region
+    return sorted((r.to_dict() for r in seen.values()), key=lambda r: (r['type'] or '', r['name'] or ''))
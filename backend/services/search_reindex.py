@@ -0,0 +1,219 @@
+"""
+Lucky Kangaroo - Réindexation sans interruption du moteur de recherche
+Construit un nouvel index versionné en flux (lots lus en base, documents construits
+et envoyés par un pool de workers) puis bascule l'alias de lecture de façon atomique
+"""
+
+import copy
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Nombre de tentatives d'envoi d'un lot avant de le compter en erreur
+BULK_ATTEMPTS = 3
+
+# Marge du rattrapage des lignes modifiées pendant la reconstruction (décalage d'horloge)
+CATCH_UP_MARGIN = timedelta(minutes=1)
+
+Document = Tuple[str, Optional[Dict]]
+
+
+class ReindexError(RuntimeError):
+    """Reconstruction abandonnée : l'alias désigne toujours l'index précédent"""
+
+
+def versioned_index_name(alias: str, now: Optional[datetime] = None) -> str:
+    return f"{alias}_v{(now or datetime.utcnow()).strftime('%Y%m%d%H%M%S%f')}"
+
+
+def _bulk_body(index_name: str, documents: Iterable[Document]) -> List[Dict]:
+    """Actions bulk : indexation, ou suppression quand le document est None"""
+    body = []
+    for doc_id, document in documents:
+        if document is None:
+            body.append({'delete': {'_index': index_name, '_id': str(doc_id)}})
+        else:
+            body.append({'index': {'_index': index_name, '_id': str(doc_id)}})
+            body.append(document)
+    return body
+
+
+class StreamingReindexer:
+    """
+    Réindexation en flux vers un index versionné puis bascule d'alias.
+
+    client : client OpenSearch (indices.*, bulk)
+    build_document : ligne -> (id, document, ou None pour le supprimer)
+    max_errors : documents en échec tolérés ; au-delà, le nouvel index est supprimé
+      et l'alias n'est pas basculé
+    """
+
+    def __init__(self, client, alias: str, mapping: Dict,
+                 build_document: Callable[[object], Document],
+                 workers: int = 4, keep_previous: int = 1, max_errors: int = 0):
+        self.client = client
+        self.alias = alias
+        self.mapping = mapping
+        self.build_document = build_document
+        self.workers = workers
+        self.keep_previous = keep_previous
+        self.max_errors = max_errors
+        self.stats = {'documents': 0, 'chunks': 0, 'errors': 0, 'deleted': 0}
+        self._stats_lock = threading.Lock()
+        # Identifiants indexés, pour retrouver ceux supprimés de la base entre-temps
+        self._indexed_ids = set()
+
+    def _create_index(self, index_name: str) -> Dict:
+        body = copy.deepcopy(self.mapping)
+        settings = body.setdefault('settings', {})
+        final = {
+            'refresh_interval': settings.get('refresh_interval', '1s'),
+            'number_of_replicas': settings.get('number_of_replicas', 1)
+        }
+        # Ni rafraîchissement ni réplique pendant le chargement
+        settings['refresh_interval'] = '-1'
+        settings['number_of_replicas'] = 0
+        self.client.indices.create(index=index_name, body=body)
+        return final
+
+    def _index_chunk(self, index_name: str, rows: Sequence) -> None:
+        self._send_documents(index_name, [self.build_document(row) for row in rows])
+
+    def _send_documents(self, index_name: str, documents: List[Document]) -> None:
+        if not documents:
+            return
+        body = _bulk_body(index_name, documents)
+        actions = errors = len(documents)
+        for attempt in range(BULK_ATTEMPTS):
+            try:
+                response = self.client.bulk(body=body)
+            except Exception as e:
+                logger.warning('Reindex bulk failed (attempt %d): %s', attempt + 1, e)
+                time.sleep(0.5 * 2 ** attempt)
+                continue
+            errors = 0
+            if response.get('errors'):
+                for item in response.get('items', []):
+                    operation, result = next(iter(item.items()))
+                    status = result.get('status', 500)
+                    if status >= 300 and not (operation == 'delete' and status == 404):
+                        errors += 1
+            break
+        with self._stats_lock:
+            self.stats['documents'] += actions - errors
+            self.stats['errors'] += errors
+            self.stats['chunks'] += 1
+            self._indexed_ids.update(str(doc_id) for doc_id, document in documents if document is not None)
+
+    def load(self, index_name: str, chunks: Iterable[Sequence]) -> None:
+        """Envoie les lots en parallèle, avec un nombre borné de lots en mémoire"""
+        in_flight = threading.BoundedSemaphore(self.workers * 2)
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='reindex') as pool:
+            for chunk in chunks:
+                in_flight.acquire()
+                future = pool.submit(self._index_chunk, index_name, chunk)
+                future.add_done_callback(lambda _: in_flight.release())
+
+    def _current_indices(self) -> List[str]:
+        try:
+            return list(self.client.indices.get_alias(name=self.alias).keys())
+        except Exception:
+            return []
+
+    def swap_alias(self, index_name: str) -> List[str]:
+        """Bascule atomique de l'alias ; retourne les index qu'il désignait"""
+        previous = self._current_indices()
+        actions = [{'remove': {'index': name, 'alias': self.alias}} for name in previous]
+        if not previous and self.client.indices.exists(index=self.alias):
+            # Ancien index concret portant le nom de l'alias (réindexation historique)
+            actions.append({'remove_index': {'index': self.alias}})
+        actions.append({'add': {'index': index_name, 'alias': self.alias}})
+        self.client.indices.update_aliases(body={'actions': actions})
+        return previous
+
+    def _drop_old_versions(self, keep: Sequence[str]) -> None:
+        try:
+            versions = sorted(self.client.indices.get(index=f'{self.alias}_v*').keys())
+        except Exception:
+            return
+        old = [name for name in versions if name not in keep]
+        for name in old[:max(0, len(old) - self.keep_previous)]:
+            self.client.indices.delete(index=name)
+
+    def _replay_deletes(self, index_name: str, missing: Callable[[List[str]], Iterable[str]],
+                        chunk_size: int = 1000) -> None:
+        """Supprime du nouvel index les documents dont la ligne a disparu pendant la reconstruction"""
+        indexed = sorted(self._indexed_ids)
+        for start in range(0, len(indexed), chunk_size):
+            deleted = [(doc_id, None) for doc_id in missing(indexed[start:start + chunk_size])]
+            self._send_documents(index_name, deleted)
+            self.stats['deleted'] += len(deleted)
+
+    def _drop_index(self, index_name: str) -> None:
+        try:
+            self.client.indices.delete(index=index_name)
+        except Exception as e:
+            logger.warning('Could not delete aborted index %s: %s', index_name, e)
+
+    def _abort(self, index_name: str) -> None:
+        self._drop_index(index_name)
+        raise ReindexError(
+            f"{self.stats['errors']} documents failed to index into {index_name}; "
+            f"alias {self.alias} left unchanged"
+        )
+
+    def run(self, chunks: Iterable[Sequence],
+            catch_up: Optional[Callable[[datetime], Iterable[Sequence]]] = None,
+            missing: Optional[Callable[[List[str]], Iterable[str]]] = None) -> Dict:
+        """
+        Reconstruit l'index complet puis bascule l'alias.
+        catch_up : lots des lignes modifiées depuis le début de la reconstruction
+        missing : ids -> ceux qui n'existent plus en base (suppressions pendant la
+          reconstruction, que le rattrapage par updated_at ne voit pas)
+        Lève ReindexError, sans basculer l'alias, si plus de max_errors documents ont échoué.
+        """
+        started_at = datetime.utcnow()
+        started = time.perf_counter()
+        index_name = versioned_index_name(self.alias, started_at)
+        final_settings = self._create_index(index_name)
+
+        try:
+            self.load(index_name, chunks)
+            if catch_up is not None:
+                self.load(index_name, catch_up(started_at - CATCH_UP_MARGIN))
+            if missing is not None:
+                self._replay_deletes(index_name, missing)
+        except Exception:
+            self._drop_index(index_name)
+            raise
+        if self.stats['errors'] > self.max_errors:
+            self._abort(index_name)
+
+        self.client.indices.put_settings(index=index_name, body={'index': final_settings})
+        self.client.indices.refresh(index=index_name)
+        previous = self.swap_alias(index_name)
+        self._drop_old_versions(keep=[index_name])
+
+        return {
+            **self.stats,
+            'index': index_name,
+            'alias': self.alias,
+            'previous': previous,
+            'seconds': round(time.perf_counter() - started, 1)
+        }
+
+def chunked(rows: Iterable, size: int) -> Iterable[List]:
+    """Découpe un flux de lignes en listes de taille fixe"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
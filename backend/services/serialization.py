@@ -0,0 +1,209 @@
+"""
+Lucky Kangaroo - Sérialisation JSON rapide
+Fournisseur JSON Flask basé sur orjson (repli sur le module json standard) et
+sérialiseurs de modèles compilés une seule fois depuis des listes de champs.
+Les mêmes dictionnaires sont encodés en MessagePack pour les clients qui le
+demandent (Accept: application/msgpack) sur les endpoints de MSGPACK_PREFIXES.
+"""
+
+import dataclasses
+import datetime
+import decimal
+import enum
+import json
+import uuid
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable, Dict, FrozenSet, Optional, Sequence, Tuple, Union
+
+from flask import current_app, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+
+Field = Union[str, Tuple[str, Callable[[Any], Any]]]
+
+
+def iso_datetime(value: Optional[datetime.datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def json_list(value: Optional[str]):
+    """Colonne texte contenant une liste JSON (liste vide si absente)"""
+    return json.loads(value) if value else []
+
+
+def json_value(value: Optional[str]):
+    return json.loads(value) if value else None
+
+
+def compile_serializer(fields: Sequence[Field], **nested: Callable[[Any], Any]) -> Callable[[Any], Dict]:
+    """
+    Sérialiseur d'un modèle pour une vue : les attributs sont lus en un seul
+    appel (attrgetter) puis seuls les champs qui en ont besoin sont convertis.
+    fields : noms d'attributs, ou (nom, conversion) ; nested : clé → fonction(objet).
+    serialize.only(noms) : sérialiseur restreint à ces champs (compilé une fois par jeu).
+    """
+    names = tuple(field if isinstance(field, str) else field[0] for field in fields)
+    if not names:
+        nested_only = tuple(nested.items())
+
+        def serialize_nested(obj) -> Dict:
+            return {key: build(obj) for key, build in nested_only}
+
+        serialize_nested.fields = tuple(key for key, _ in nested_only)
+        serialize_nested.only = _restrict(fields, nested)
+        return serialize_nested
+
+    converters = tuple(
+        (position, field[1]) for position, field in enumerate(fields) if not isinstance(field, str)
+    )
+    nested_items = tuple(nested.items())
+    getter = attrgetter(*names)
+    single = len(names) == 1
+
+    def serialize(obj) -> Dict:
+        values = getter(obj)
+        if single:
+            values = (values,)
+        if converters:
+            values = list(values)
+            for position, convert in converters:
+                values[position] = convert(values[position])
+        data = dict(zip(names, values))
+        for key, build in nested_items:
+            data[key] = build(obj)
+        return data
+
+    serialize.fields = names + tuple(key for key, _ in nested_items)
+    serialize.only = _restrict(fields, nested)
+    return serialize
+
+
+def _restrict(fields: Sequence[Field], nested: Dict[str, Callable[[Any], Any]]):
+    @lru_cache(maxsize=64)
+    def only(requested: FrozenSet[str]) -> Callable[[Any], Dict]:
+        return compile_serializer(
+            [field for field in fields if (field if isinstance(field, str) else field[0]) in requested],
+            **{key: build for key, build in nested.items() if key in requested}
+        )
+    return only
+
+
+def msgpack_endpoint() -> bool:
+    """L'endpoint courant propose MessagePack (bibliothèque installée, préfixe configuré)"""
+    if msgpack is None or not has_request_context():
+        return False
+    return request.path.startswith(tuple(current_app.config.get('MSGPACK_PREFIXES', ())))
+
+
+def wants_msgpack() -> bool:
+    """Le client préfère MessagePack à JSON ; sans msgpack installé, JSON est servi"""
+    if not msgpack_endpoint():
+        return False
+    return request.accept_mimetypes.best_match(('application/json',) + MSGPACK_MIMETYPES) in MSGPACK_MIMETYPES
+
+
+def dump_msgpack(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    return msgpack.packb(obj, default=default, use_bin_type=True, datetime=False)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Fournisseur JSON : orjson lorsqu'il est installé (datetime, date, UUID,
+    dataclasses et Enum natifs), sinon json standard avec les mêmes conversions.
+    La sortie est en UTF-8 ; les clés sont triées comme avec le fournisseur par défaut.
+    """
+
+    ensure_ascii = False
+    # Suffixe 'Z' des datetimes naïves (stockées en UTC)
+    naive_utc = False
+
+    def _default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat() + 'Z' if self.naive_utc and o.tzinfo is None else o.isoformat()
+        if isinstance(o, (datetime.date, datetime.time)):
+            return o.isoformat()
+        if isinstance(o, datetime.timedelta):
+            return str(o)
+        if isinstance(o, decimal.Decimal):
+            return float(o)
+        if isinstance(o, uuid.UUID):
+            return str(o)
+        if isinstance(o, enum.Enum):
+            return o.value
+        if isinstance(o, (set, frozenset)):
+            return list(o)
+        if isinstance(o, bytes):
+            return o.decode('utf-8', errors='replace')
+        if dataclasses.is_dataclass(o) and not isinstance(o, type):
+            return dataclasses.asdict(o)
+        if hasattr(o, 'to_dict'):
+            return o.to_dict()
+        if hasattr(o, '__html__'):
+            return str(o.__html__())
+        raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+    def _orjson_options(self) -> int:
+        options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if self.naive_utc:
+            options |= orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+        return options
+
+    def dump_bytes(self, obj: Any, indent: bool = False) -> bytes:
+        """Encodage direct en octets (pas d'aller-retour par str)"""
+        if orjson is not None:
+            options = self._orjson_options() | (orjson.OPT_INDENT_2 if indent else 0)
+            try:
+                return orjson.dumps(obj, default=self._default, option=options)
+            except TypeError:
+                # Entiers au-delà de 64 bits, clés non triables… : chemin standard
+                pass
+        return json.dumps(
+            obj, default=self._default, ensure_ascii=False, sort_keys=self.sort_keys,
+            indent=2 if indent else None, separators=None if indent else (',', ':')
+        ).encode('utf-8')
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            kwargs.setdefault('default', self._default)
+            kwargs.setdefault('ensure_ascii', False)
+            kwargs.setdefault('sort_keys', self.sort_keys)
+            return json.dumps(obj, **kwargs)
+        return self.dump_bytes(obj).decode('utf-8')
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def dump_msgpack(self, obj: Any) -> bytes:
+        """Encodage MessagePack, avec les mêmes conversions que le JSON"""
+        return dump_msgpack(obj, default=self._default)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        if not msgpack_endpoint():
+            return self._json_response(obj)
+        if wants_msgpack():
+            response = self._app.response_class(self.dump_msgpack(obj), mimetype=MSGPACK_MIMETYPES[0])
+        else:
+            response = self._json_response(obj)
+        response.vary.add('Accept')
+        return response
+
+    def _json_response(self, obj: Any):
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(self.dump_bytes(obj, indent) + b'\n', mimetype=self.mimetype)
@@ -0,0 +1,396 @@
+"""
+Lucky Kangaroo - Index spatial par geohash
+Encodage geohash, couverture d'un rayon par cellules et recherche des k plus proches
+"""
+
+import math
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import and_, inspect, or_, select, text, update
+
+EARTH_RADIUS_KM = 6371.0
+
+# Alphabet base32 du geohash (sans a, i, l, o)
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+_GEOHASH_INDEX = {char: i for i, char in enumerate(GEOHASH_ALPHABET)}
+
+# Précision stockée en base (~5 m) et bornes de la couverture d'une requête
+GEOHASH_PRECISION = 9
+MIN_COVER_PRECISION = 2
+MAX_COVER_CELLS = 36
+
+
+def encode_geohash(latitude: float, longitude: float,
+                   precision: int = GEOHASH_PRECISION) -> str:
+    """
+    Encode une position en geohash de la précision demandée
+    """
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bit = 0
+    value = 0
+    even = True
+
+    while len(chars) < precision:
+        if even:
+            mid = (lng_range[0] + lng_range[1]) / 2
+            if longitude >= mid:
+                value = (value << 1) | 1
+                lng_range[0] = mid
+            else:
+                value <<= 1
+                lng_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                value = (value << 1) | 1
+                lat_range[0] = mid
+            else:
+                value <<= 1
+                lat_range[1] = mid
+        even = not even
+        bit += 1
+        if bit == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bit = 0
+            value = 0
+
+    return ''.join(chars)
+
+
+def decode_geohash_bbox(geohash: str) -> Dict[str, float]:
+    """
+    Retourne la bounding box (south, north, west, east) d'une cellule geohash
+    """
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    even = True
+
+    for char in geohash:
+        value = _GEOHASH_INDEX[char]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            target = lng_range if even else lat_range
+            mid = (target[0] + target[1]) / 2
+            if bit:
+                target[0] = mid
+            else:
+                target[1] = mid
+            even = not even
+
+    return {
+        'south': lat_range[0],
+        'north': lat_range[1],
+        'west': lng_range[0],
+        'east': lng_range[1]
+    }
+
+
+def cell_size_degrees(precision: int) -> Tuple[float, float]:
+    """
+    Taille (hauteur en latitude, largeur en longitude) d'une cellule en degrés
+    """
+    bits = precision * 5
+    lng_bits = (bits + 1) // 2
+    lat_bits = bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float) -> Dict[str, float]:
+    """
+    Bounding box englobant un cercle (mêmes approximations que GeolocationService)
+    """
+    lat_delta = radius_km / 111.0
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    lng_delta = min(radius_km / (111.0 * cos_lat), 180.0)
+
+    return {
+        'south': max(latitude - lat_delta, -90.0),
+        'north': min(latitude + lat_delta, 90.0),
+        'west': max(longitude - lng_delta, -180.0),
+        'east': min(longitude + lng_delta, 180.0)
+    }
+
+
+def _cells_for_bbox_at(bbox: Dict[str, float], precision: int,
+                       max_cells: Optional[int] = None) -> Optional[List[str]]:
+    """Énumère les cellules d'une précision donnée couvrant une bbox (None si trop nombreuses)"""
+    lat_step, lng_step = cell_size_degrees(precision)
+
+    lat_start = math.floor((bbox['south'] + 90.0) / lat_step)
+    lat_end = math.floor((min(bbox['north'], 90.0 - 1e-9) + 90.0) / lat_step)
+    lng_start = math.floor((bbox['west'] + 180.0) / lng_step)
+    lng_end = math.floor((min(bbox['east'], 180.0 - 1e-9) + 180.0) / lng_step)
+
+    count = (lat_end - lat_start + 1) * (lng_end - lng_start + 1)
+    if max_cells is not None and count > max_cells:
+        return None
+
+    cells = set()
+    for lat_i in range(lat_start, lat_end + 1):
+        cell_lat = -90.0 + (lat_i + 0.5) * lat_step
+        for lng_i in range(lng_start, lng_end + 1):
+            cell_lng = -180.0 + (lng_i + 0.5) * lng_step
+            cells.add(encode_geohash(cell_lat, cell_lng, precision))
+    return sorted(cells)
+
+
+def cover_bbox(bbox: Dict[str, float], max_cells: int = MAX_COVER_CELLS) -> List[str]:
+    """
+    Couvre une bounding box avec le plus petit jeu de cellules geohash
+    dont la taille reste bornée par max_cells
+    """
+    for precision in range(GEOHASH_PRECISION, MIN_COVER_PRECISION - 1, -1):
+        cells = _cells_for_bbox_at(bbox, precision, max_cells)
+        if cells is not None:
+            return cells
+    return _cells_for_bbox_at(bbox, MIN_COVER_PRECISION - 1)
+
+
+def cover_radius(latitude: float, longitude: float, radius_km: float,
+                 max_cells: int = MAX_COVER_CELLS) -> List[str]:
+    """
+    Cellules geohash couvrant un cercle de rayon radius_km
+    """
+    return cover_bbox(bounding_box(latitude, longitude, radius_km), max_cells)
+
+
+def interpolate_great_circle(lat1: float, lng1: float, lat2: float, lng2: float,
+                             fractions: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Points intermédiaires sur l'arc de grand cercle entre deux positions
+    """
+    phi1, lam1, phi2, lam2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    f = np.asarray(fractions, dtype=np.float64)
+    delta = 2 * math.asin(math.sqrt(
+        math.sin((phi2 - phi1) / 2) ** 2 +
+        math.cos(phi1) * math.cos(phi2) * math.sin((lam2 - lam1) / 2) ** 2
+    ))
+    if delta == 0:
+        return np.full(f.shape, lat1), np.full(f.shape, lng1)
+
+    a = np.sin((1 - f) * delta) / math.sin(delta)
+    b = np.sin(f * delta) / math.sin(delta)
+    x = a * math.cos(phi1) * math.cos(lam1) + b * math.cos(phi2) * math.cos(lam2)
+    y = a * math.cos(phi1) * math.sin(lam1) + b * math.cos(phi2) * math.sin(lam2)
+    z = a * math.sin(phi1) + b * math.sin(phi2)
+    return np.degrees(np.arctan2(z, np.hypot(x, y))), np.degrees(np.arctan2(y, x))
+
+
+def cover_segment(lat1: float, lng1: float, lat2: float, lng2: float, width_km: float,
+                  max_pieces: int = 16, cells_per_piece: int = 9) -> List[str]:
+    """
+    Cellules geohash couvrant le corridor de largeur width_km autour d'un segment de grand cercle.
+    Le segment est découpé en tronçons dont chacun est couvert par au plus cells_per_piece cellules.
+    """
+    length_km = float(haversine_km(lat1, lng1, [lat2], [lng2])[0])
+    pieces = max(1, min(max_pieces, math.ceil(length_km / max(width_km * 2, 1.0))))
+    lats, lngs = interpolate_great_circle(lat1, lng1, lat2, lng2, np.linspace(0, 1, pieces + 1))
+
+    cells = set()
+    for i in range(pieces):
+        start = bounding_box(lats[i], lngs[i], width_km)
+        end = bounding_box(lats[i + 1], lngs[i + 1], width_km)
+        cells.update(cover_bbox({
+            'south': min(start['south'], end['south']),
+            'north': max(start['north'], end['north']),
+            'west': min(start['west'], end['west']),
+            'east': max(start['east'], end['east'])
+        }, cells_per_piece))
+    return sorted(cells)
+
+
+def segment_distance_km(lat1: float, lng1: float, lat2: float, lng2: float,
+                        latitudes: Sequence[float], longitudes: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Distances vectorisées de points au segment de grand cercle [1, 2].
+    Retourne (distance au segment, position le long du segment) en km ;
+    les points au-delà d'une extrémité sont rapportés à cette extrémité.
+    """
+    phi1, lam1, phi2, lam2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    phi = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lam = np.radians(np.asarray(longitudes, dtype=np.float64))
+
+    d_start = haversine_km(lat1, lng1, latitudes, longitudes)
+    d_end = haversine_km(lat2, lng2, latitudes, longitudes)
+    length = float(haversine_km(lat1, lng1, [lat2], [lng2])[0])
+    if length == 0:
+        return d_start, np.zeros_like(d_start)
+
+    theta12 = math.atan2(
+        math.sin(lam2 - lam1) * math.cos(phi2),
+        math.cos(phi1) * math.sin(phi2) - math.sin(phi1) * math.cos(phi2) * math.cos(lam2 - lam1)
+    )
+    theta13 = np.arctan2(
+        np.sin(lam - lam1) * np.cos(phi),
+        math.cos(phi1) * np.sin(phi) - math.sin(phi1) * np.cos(phi) * np.cos(lam - lam1)
+    )
+    delta13 = d_start / EARTH_RADIUS_KM
+
+    cross = np.arcsin(np.clip(np.sin(delta13) * np.sin(theta13 - theta12), -1.0, 1.0))
+    along = np.arccos(np.clip(np.cos(delta13) / np.cos(cross), -1.0, 1.0)) * EARTH_RADIUS_KM
+    along = np.where(np.cos(theta13 - theta12) < 0, -along, along)
+
+    distance = np.where(along < 0, d_start, np.where(along > length, d_end, np.abs(cross) * EARTH_RADIUS_KM))
+    return distance, np.clip(along, 0.0, length)
+
+
+def _next_prefix(prefix: str) -> Optional[str]:
+    """Plus petit geohash strictement supérieur à tous ceux commençant par prefix"""
+    chars = list(prefix)
+    while chars:
+        index = _GEOHASH_INDEX[chars[-1]]
+        if index + 1 < len(GEOHASH_ALPHABET):
+            chars[-1] = GEOHASH_ALPHABET[index + 1]
+            return ''.join(chars)
+        chars.pop()
+    return None
+
+
+def cells_to_ranges(cells: Iterable[str]) -> List[Tuple[str, Optional[str]]]:
+    """
+    Convertit des préfixes en intervalles [début, fin) fusionnés, exploitables par un index B-tree
+    """
+    ranges: List[Tuple[str, Optional[str]]] = []
+    for cell in sorted(set(cells)):
+        start, end = cell, _next_prefix(cell)
+        if ranges and ranges[-1][1] is not None and ranges[-1][1] >= start:
+            previous_start, previous_end = ranges[-1]
+            if end is None or end > previous_end:
+                ranges[-1] = (previous_start, end)
+            continue
+        ranges.append((start, end))
+    return ranges
+
+
+def geohash_filter(column, cells: Iterable[str]):
+    """
+    Filtre SQLAlchemy sélectionnant les lignes dont le geohash tombe dans les cellules
+    """
+    clauses = []
+    for start, end in cells_to_ranges(cells):
+        if end is None:
+            clauses.append(column >= start)
+        else:
+            clauses.append(and_(column >= start, column < end))
+    return or_(*clauses)
+
+
+def haversine_km(latitude: float, longitude: float,
+                 latitudes: Sequence[float], longitudes: Sequence[float]) -> np.ndarray:
+    """
+    Distances haversine vectorisées entre un point et un tableau de points
+    """
+    lat1 = math.radians(latitude)
+    lng1 = math.radians(longitude)
+    lat2 = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lng2 = np.radians(np.asarray(longitudes, dtype=np.float64))
+
+    a = (np.sin((lat2 - lat1) / 2.0) ** 2 +
+         math.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2.0) ** 2)
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def rank_by_distance(latitude: float, longitude: float, items: Sequence,
+                     max_distance_km: float, limit: Optional[int] = None) -> List[Tuple[object, float]]:
+    """
+    Trie des objets (avec attributs latitude/longitude) par distance et garde les limit plus proches
+    """
+    if not items:
+        return []
+
+    distances = haversine_km(
+        latitude, longitude,
+        [item.latitude for item in items],
+        [item.longitude for item in items]
+    )
+    within = np.flatnonzero(distances <= max_distance_km)
+
+    if limit is not None and len(within) > limit:
+        nearest = np.argpartition(distances[within], limit - 1)[:limit]
+        within = within[nearest]
+
+    ordered = within[np.argsort(distances[within], kind='stable')]
+    return [(items[i], float(distances[i])) for i in ordered]
+
+
+def find_nearest(query, model, latitude: float, longitude: float,
+                 max_distance_km: float, limit: int,
+                 initial_radius_km: float = 2.0) -> List[Tuple[object, float]]:
+    """
+    Retourne les limit objets les plus proches dans un rayon max_distance_km.
+
+    Le rayon de recherche double à chaque tour : dès que limit objets sont
+    trouvés dans le rayon courant, ils sont exactement les plus proches, et
+    chaque tour ne lit que les lignes des cellules geohash couvrant ce rayon.
+    """
+    radius = min(initial_radius_km, max_distance_km)
+
+    while True:
+        bbox = bounding_box(latitude, longitude, radius)
+        candidates = query.filter(
+            geohash_filter(model.geohash, cover_bbox(bbox)),
+            model.latitude.between(bbox['south'], bbox['north']),
+            model.longitude.between(bbox['west'], bbox['east'])
+        ).all()
+
+        ranked = rank_by_distance(latitude, longitude, candidates, radius, limit)
+        if len(ranked) >= limit or radius >= max_distance_km:
+            return ranked
+
+        radius = min(radius * 2, max_distance_km)
+
+
+
+def add_geohash_column(engine, table_name: str) -> bool:
+    """
+    Ajoute la colonne geohash et son index à une table créée avant l'index spatial
+    (create_all ne modifie pas les tables existantes). Retourne True si elle a été ajoutée.
+    """
+    if 'geohash' in {col['name'] for col in inspect(engine).get_columns(table_name)}:
+        return False
+    with engine.begin() as connection:
+        connection.execute(text(f'ALTER TABLE {table_name} ADD COLUMN geohash VARCHAR(12)'))
+        connection.execute(text(
+            f'CREATE INDEX IF NOT EXISTS ix_{table_name}_geohash ON {table_name} (geohash)'
+        ))
+    return True
+
+
+def backfill_geohash(session, model, batch_size: int = 1000) -> int:
+    """
+    Renseigne le geohash des lignes géolocalisées qui n'en ont pas encore, par lots
+    validés un à un ; sans lui, ces lignes n'apparaissent dans aucune recherche de proximité.
+    Retourne le nombre de lignes mises à jour.
+    """
+    pending = select(model.id, model.latitude, model.longitude).where(
+        model.geohash.is_(None),
+        model.latitude.isnot(None),
+        model.longitude.isnot(None)
+    ).order_by(model.id).limit(batch_size)
+
+    updated = 0
+    while True:
+        rows = session.execute(pending).all()
+        if not rows:
+            return updated
+        session.execute(update(model), [
+            {'id': row.id, 'geohash': encode_geohash(row.latitude, row.longitude)}
+            for row in rows
+        ])
+        session.commit()
+        updated += len(rows)
+
+
+def ensure_geohash_index(session, models) -> Dict[str, int]:
+    """
+    Met chaque table à niveau (colonne puis rattrapage) ; retourne {table: lignes renseignées}
+    """
+    engine = session.get_bind()
+    backfilled = {}
+    for model in models:
+        add_geohash_column(engine, model.__tablename__)
+        backfilled[model.__tablename__] = backfill_geohash(session, model)
+    return backfilled
@@ -0,0 +1,214 @@
+"""
+Lucky Kangaroo - Index trigramme pour la recherche de sous-chaînes
+Index pg_trgm (GIN) sous PostgreSQL, table virtuelle FTS5 « trigram » tenue à jour
+par triggers sous SQLite, et filtre ILIKE qui emprunte le chemin indexé disponible
+"""
+
+import logging
+import threading
+from typing import Dict, Iterable, Sequence, Tuple
+
+from sqlalchemy import column, inspect, literal_column, or_, select, table, text
+from sqlalchemy.exc import SQLAlchemyError
+
+logger = logging.getLogger(__name__)
+
+# Colonnes indexées par table ; seules celles présentes dans la table le sont
+# (tags n'existe que dans le modèle d'annonces de l'application)
+TRIGRAM_TABLES = {
+    'listings': ('title', 'description', 'brand', 'model', 'city', 'desired_items', 'tags'),
+}
+
+# Le tokenizer trigram ne sait pas chercher moins de 3 caractères
+MIN_TRIGRAM_LENGTH = 3
+
+MODE_PG_TRGM = 'pg_trgm'
+MODE_FTS5 = 'fts5'
+MODE_LIKE = 'like'
+
+_modes: Dict[str, str] = {}
+_columns: Dict[Tuple[str, str], Tuple[str, ...]] = {}
+_modes_lock = threading.Lock()
+_install_lock = threading.Lock()
+
+
+def fts_table_name(table_name: str) -> str:
+    return f'{table_name}_trgm'
+
+
+def fts_keys_name(table_name: str) -> str:
+    """Table des clés entières stables de la table FTS (id de l'annonce -> rowid FTS)"""
+    return f'{table_name}_trgm_keys'
+
+
+def _postgres_statements(table_name: str, columns: Sequence[str]) -> Iterable[str]:
+    yield 'CREATE EXTENSION IF NOT EXISTS pg_trgm'
+    for name in columns:
+        yield (f'CREATE INDEX IF NOT EXISTS ix_{table_name}_{name}_trgm '
+               f'ON {table_name} USING gin ({name} gin_trgm_ops)')
+
+
+def _sqlite_statements(table_name: str, columns: Sequence[str]) -> Iterable[str]:
+    # La clé primaire des annonces est un UUID texte et le rowid SQLite peut être
+    # renuméroté par VACUUM : la table FTS stocke son propre texte sous une clé entière
+    # attribuée par la table des clés, qui fait le lien avec l'id de l'annonce
+    fts = fts_table_name(table_name)
+    keys = fts_keys_name(table_name)
+    names = ', '.join(columns)
+    new_values = ', '.join(f'new.{name}' for name in columns)
+    delete_old = (f'DELETE FROM {fts} WHERE rowid = (SELECT key FROM {keys} WHERE id = old.id); '
+                  f'DELETE FROM {keys} WHERE id = old.id;')
+    insert_new = (f'INSERT OR IGNORE INTO {keys}(id) VALUES (new.id); '
+                  f'INSERT INTO {fts}(rowid, {names}) '
+                  f'VALUES ((SELECT key FROM {keys} WHERE id = new.id), {new_values});')
+
+    yield f'CREATE TABLE IF NOT EXISTS {keys} (key INTEGER PRIMARY KEY, id NOT NULL UNIQUE)'
+    yield f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, tokenize='trigram')"
+    yield f'CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table_name} BEGIN {insert_new} END'
+    yield f'CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table_name} BEGIN {delete_old} END'
+    # Seules les colonnes indexées déclenchent la mise à jour (pas les compteurs de vues)
+    yield (f'CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF id, {names} ON {table_name} '
+           f'BEGIN {delete_old} {insert_new} END')
+
+
+def _sqlite_populate(table_name: str, columns: Sequence[str]) -> Iterable[str]:
+    fts = fts_table_name(table_name)
+    keys = fts_keys_name(table_name)
+    names = ', '.join(columns)
+    values = ', '.join(f't.{name}' for name in columns)
+    yield f'INSERT OR IGNORE INTO {keys}(id) SELECT id FROM {table_name}'
+    yield (f'INSERT INTO {fts}(rowid, {names}) '
+           f'SELECT k.key, {values} FROM {table_name} t JOIN {keys} k ON k.id = t.id')
+
+
+def _sqlite_installed(connection, table_name: str, columns: Sequence[str]) -> bool:
+    # Le DDL SQLite n'est pas transactionnel avec pysqlite : une installation interrompue
+    # peut laisser des tables sans triggers, l'ancienne table FTS à contenu externe
+    # (indexée sur le rowid) n'a pas de table des clés, et une table FTS créée avant
+    # l'ajout d'une colonne (tags) doit être reconstruite
+    fts = fts_table_name(table_name)
+    if not (_sqlite_has_table(connection, fts_keys_name(table_name))
+            and _sqlite_has_table(connection, f'{fts}_au')):
+        return False
+    indexed = [row[1] for row in connection.execute(text(f'PRAGMA table_info({fts})'))]
+    return indexed == list(columns)
+
+
+def _sqlite_drop(table_name: str) -> Iterable[str]:
+    fts = fts_table_name(table_name)
+    for suffix in ('ai', 'ad', 'au'):
+        yield f'DROP TRIGGER IF EXISTS {fts}_{suffix}'
+    yield f'DROP TABLE IF EXISTS {fts}'
+    yield f'DROP TABLE IF EXISTS {fts_keys_name(table_name)}'
+
+
+def _sqlite_has_table(connection, name: str) -> bool:
+    return connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE name = :name"), {'name': name}
+    ).first() is not None
+
+
+def _present_columns(connection, table_name: str, columns: Sequence[str]) -> Tuple[str, ...]:
+    present = {info['name'] for info in inspect(connection).get_columns(table_name)}
+    return tuple(name for name in columns if name in present)
+
+
+def install_trigram_indexes(engine, tables: Dict[str, Sequence[str]] = TRIGRAM_TABLES) -> str:
+    """
+    Crée les index trigrammes adaptés au moteur (idempotent) et retourne le mode retenu
+    """
+    dialect = engine.dialect.name
+    mode = MODE_LIKE
+    installed = {}
+    try:
+        with _install_lock, engine.begin() as connection:
+            if dialect == 'postgresql':
+                for table_name, columns in tables.items():
+                    columns = installed[table_name] = _present_columns(connection, table_name, columns)
+                    for statement in _postgres_statements(table_name, columns):
+                        connection.execute(text(statement))
+                mode = MODE_PG_TRGM
+            elif dialect == 'sqlite':
+                for table_name, columns in tables.items():
+                    columns = installed[table_name] = _present_columns(connection, table_name, columns)
+                    populate = not _sqlite_installed(connection, table_name, columns)
+                    if populate:
+                        for statement in _sqlite_drop(table_name):
+                            connection.execute(text(statement))
+                    for statement in _sqlite_statements(table_name, columns):
+                        connection.execute(text(statement))
+                    if populate:
+                        for statement in _sqlite_populate(table_name, columns):
+                            connection.execute(text(statement))
+                mode = MODE_FTS5
+    except SQLAlchemyError as e:
+        # Extension non autorisée, SQLite sans tokenizer trigram (< 3.34), table absente...
+        logger.warning('Trigram indexes not installed (%s), substring search uses plain LIKE: %s',
+                       dialect, e)
+        if not _tables_exist(engine, tables):
+            # Schéma pas encore créé : le mode sera redétecté à la première recherche
+            return MODE_LIKE
+
+    with _modes_lock:
+        _modes[str(engine.url)] = mode
+        for table_name, columns in installed.items():
+            _columns[(str(engine.url), table_name)] = columns
+    logger.info('Trigram search mode for %s: %s', dialect, mode)
+    return mode
+
+
+def _tables_exist(engine, tables: Iterable[str]) -> bool:
+    try:
+        inspector = inspect(engine)
+        return all(inspector.has_table(name) for name in tables)
+    except SQLAlchemyError:
+        return False
+
+
+def trigram_mode(engine) -> str:
+    """
+    Mode de recherche de sous-chaînes du moteur. Tant qu'il n'est pas connu (index
+    installés avant la création des tables), les index sont installés à la première recherche.
+    """
+    mode = _modes.get(str(engine.url))
+    if mode is not None:
+        return mode
+    return install_trigram_indexes(engine)
+
+
+def _fts_phrase(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def substring_filter(engine, columns: Sequence, term: str):
+    """
+    Équivalent de or_(col.ilike('%term%') for col in columns) qui passe par l'index
+    trigramme quand il existe.
+
+    PostgreSQL : l'ILIKE est conservé, le planificateur utilise les index GIN pg_trgm.
+    SQLite : les colonnes couvertes par la table FTS5 sont cherchées via MATCH,
+    les autres restent en ILIKE.
+    """
+    pattern = f'%{term}%'
+    if not columns:
+        raise ValueError('substring_filter requires at least one column')
+
+    table_name = columns[0].table.name
+    if trigram_mode(engine) != MODE_FTS5 or len(term) < MIN_TRIGRAM_LENGTH:
+        return or_(*(col.ilike(pattern) for col in columns))
+
+    indexed = _columns.get((str(engine.url), table_name), ())
+
+    matched = [col for col in columns if col.key in indexed]
+    others = [col for col in columns if col.key not in indexed]
+    clauses = [col.ilike(pattern) for col in others]
+    if matched:
+        fts = fts_table_name(table_name)
+        keys = table(fts_keys_name(table_name), column('key'), column('id'))
+        names = ' '.join(col.key for col in matched)
+        rowids = select(column('rowid')).select_from(table(fts)).where(
+            literal_column(fts).op('MATCH')(f'{{{names}}} : {_fts_phrase(term)}')
+        )
+        ids = select(keys.c.id).where(keys.c.key.in_(rowids))
+        clauses.append(columns[0].table.c.id.in_(ids))
+    return or_(*clauses)
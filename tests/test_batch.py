@@ -0,0 +1,84 @@
+"""
+Lucky Kangaroo - Tests des requêtes groupées
+"""
+
+import threading
+import time
+
+import pytest
+from flask import Flask, current_app, g, jsonify, request
+
+from backend.services.batch import InvalidBatch, init_batch, parse_batch
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.config['BATCH_CONCURRENT_PREFIXES'] = ('/lent',)
+    init_batch(app)
+    calls = []
+
+    @app.before_request
+    def compter():
+        calls.append(request.path)
+
+    @app.route('/batch', methods=['POST'])
+    def batch():
+        g.partage = 'contexte de la requête groupée'
+        return jsonify(current_app.extensions['batch'].run(request.get_json(silent=True)))
+
+    @app.route('/profil')
+    def profil():
+        return jsonify(auth=request.headers.get('Authorization'), contexte=g.get('partage'),
+                       q=request.args.get('q'))
+
+    @app.route('/lent/<int:n>')
+    def lent(n):
+        time.sleep(0.2)
+        return jsonify(n=n, thread=threading.current_thread().name)
+
+    @app.route('/erreur')
+    def erreur():
+        raise RuntimeError('boum')
+
+    app.calls = calls
+    return app.test_client()
+
+
+@pytest.mark.unit
+class TestBatch:
+    """Exécution des sous-requêtes"""
+
+    def test_sous_requetes(self, client):
+        """Même jeton et même contexte, ordre et erreurs conservés, sans middlewares"""
+        response = client.post('/batch', headers={'Authorization': 'Bearer abc'}, json={'requests': [
+            {'id': 'profil', 'path': '/profil?q=vélo'}, '/absent', '/erreur'
+        ]})
+        data = response.get_json()
+        assert response.status_code == 200
+        profil, absent, erreur = data['responses']
+        assert profil['id'] == 'profil' and profil['status'] == 200
+        assert profil['body'] == {'auth': 'Bearer abc', 'contexte': 'contexte de la requête groupée', 'q': 'vélo'}
+        assert absent['id'] == '1' and absent['status'] == 404
+        assert erreur['status'] == 500
+        assert all('duration_ms' in item for item in data['responses'])
+        assert client.application.calls == ['/batch']
+
+    def test_parallele(self, client):
+        """Les chemins lents s'exécutent en parallèle, dans le pool"""
+        started = time.perf_counter()
+        data = client.post('/batch', json={'requests': ['/lent/1', '/lent/2', '/lent/3']}).get_json()
+        assert time.perf_counter() - started < 0.5
+        assert [item['body']['n'] for item in data['responses']] == [1, 2, 3]
+        assert all(item['body']['thread'].startswith('batch') for item in data['responses'])
+
+    def test_validation(self):
+        """Seules les requêtes GET vers des chemins absolus, en nombre limité"""
+        assert parse_batch({'requests': ['/a', {'id': 'b', 'path': '/b'}]}, 10) == [
+            {'id': '0', 'path': '/a'}, {'id': 'b', 'path': '/b'}
+        ]
+        for payload in (None, {'requests': []}, {'requests': ['a']}, {'requests': ['/a'] * 3},
+                        {'requests': [{'path': '/a', 'method': 'POST'}]},
+                        {'requests': [{'id': 'x', 'path': '/a'}, {'id': 'x', 'path': '/b'}]}):
+            with pytest.raises(InvalidBatch):
+                parse_batch(payload, 2)
@@ -0,0 +1,71 @@
+"""
+Lucky Kangaroo - Tests de l'index et de la fermeture des catégories
+"""
+
+import pytest
+
+from backend.app.utils.categories import (
+    ALL_CATEGORIES,
+    CATEGORY_INDEX,
+    get_category_descendants,
+    get_category_node,
+    search_categories
+)
+from backend.services.category_closure import CategoryClosure
+
+
+@pytest.mark.unit
+class TestCategoryIndex:
+    """Tests pour l'index figé des catégories"""
+
+    def test_search_matches_names_and_subcategories(self):
+        """Test que la recherche ignore accents et casse et conserve l'ordre des catégories"""
+        expected = [
+            cat_id for cat_id, data in ALL_CATEGORIES.items()
+            if 'menager' in data['name'].lower().replace('é', 'e')
+            or any('menager' in sub.lower().replace('é', 'e') for sub in data.get('subcategories', []))
+        ]
+        assert list(search_categories('Ménager')) == expected
+        assert list(search_categories('MENAGER')) == expected
+        assert search_categories('introuvable') == {}
+
+    def test_search_keeps_substring_contract(self):
+        """Test qu'une requête vide renvoie tout et que la requête entière doit figurer dans un seul nom"""
+        assert list(search_categories('')) == list(ALL_CATEGORIES)
+        assert search_categories('c++') == {}
+        assert search_categories('a b') == {}
+        for cat_id in search_categories('femme vêtements'):
+            data = ALL_CATEGORIES[cat_id]
+            names = [data['name']] + data.get('subcategories', [])
+            assert any('femme vêtements' in name.lower() for name in names)
+
+    def test_tree_lookups(self):
+        """Test des recherches par slug et des sous-catégories"""
+        node = get_category_node('art-crafts')
+        assert node.id == 'art_crafts' and node.parent_id is None
+        assert get_category_descendants('art_crafts') == {'art_crafts', *node.children}
+        child = CATEGORY_INDEX.by_id[node.children[0]]
+        assert CATEGORY_INDEX.ancestors[child.id] == ('art_crafts',)
+        with pytest.raises(TypeError):
+            CATEGORY_INDEX.by_id['x'] = node
+
+
+@pytest.mark.unit
+class TestCategoryClosure:
+    """Tests pour la fermeture transitive des catégories"""
+
+    def test_descendants_and_closure_rows(self):
+        """Test que chaque catégorie couvre toute sa descendance, à la bonne profondeur"""
+        closure = CategoryClosure([(1, None), (2, 1), (3, 2), (4, 1), (5, None), (6, 99)])
+
+        assert closure.descendants[1] == {1, 2, 3, 4}
+        assert closure.descendants[2] == {2, 3}
+        assert closure.descendants[6] == {6}
+        assert closure.ancestors[3] == (2, 1)
+        assert (1, 3, 2) in set(closure.rows())
+        assert len(list(closure.rows())) == 6 + 4
+
+    def test_cycle_is_cut(self):
+        """Test qu'un cycle dans les données ne bloque pas la construction"""
+        closure = CategoryClosure([(1, 2), (2, 1)])
+        assert closure.descendants[1] == {1, 2}
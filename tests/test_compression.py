@@ -0,0 +1,72 @@
+"""
+Lucky Kangaroo - Tests de la compression des réponses
+"""
+
+import gzip
+import json
+
+import pytest
+from flask import Flask, Response, jsonify, stream_with_context
+
+from backend.services.compression import choose_encoding, init_compression
+
+PAYLOAD = {'listings': [f'annonce {i} – vélo électrique' for i in range(200)]}
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.config['COMPRESSION_LEVELS'] = {'/sans': 0}
+    init_compression(app)
+
+    @app.route('/liste')
+    def liste():
+        response = jsonify(PAYLOAD)
+        response.set_etag('v1')
+        return response
+
+    @app.route('/petit')
+    def petit():
+        return jsonify(success=True)
+
+    @app.route('/sans/liste')
+    def sans():
+        return jsonify(PAYLOAD)
+
+    @app.route('/flux')
+    def flux():
+        return Response(stream_with_context(f'ligne {i}\n' for i in range(20)), mimetype='text/plain')
+
+    return app.test_client()
+
+
+@pytest.mark.unit
+class TestCompression:
+    """Négociation et compression gzip"""
+
+    def test_choose_encoding(self):
+        """Poids q respectés, brotli préféré à poids égal"""
+        assert choose_encoding('gzip, br', ('br', 'gzip')) == 'br'
+        assert choose_encoding('gzip;q=1, br;q=0.5', ('br', 'gzip')) == 'gzip'
+        assert choose_encoding('identity', ('gzip',)) is None
+        assert choose_encoding('*', ('gzip',)) == 'gzip'
+
+    def test_gzip_response(self, client):
+        """Réponse compressée, Vary ajouté, ETag affaibli"""
+        response = client.get('/liste', headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert response.headers['ETag'] == 'W/"v1"'
+        assert json.loads(gzip.decompress(response.data)) == PAYLOAD
+
+    def test_skipped(self, client):
+        """Pas de compression sous le seuil, sans Accept-Encoding ou si le groupe la désactive"""
+        assert 'Content-Encoding' not in client.get('/petit', headers={'Accept-Encoding': 'gzip'}).headers
+        assert 'Content-Encoding' not in client.get('/liste').headers
+        assert 'Content-Encoding' not in client.get('/sans/liste', headers={'Accept-Encoding': 'gzip'}).headers
+
+    def test_streamed_response(self, client):
+        """Flux compressé morceau par morceau"""
+        response = client.get('/flux', headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(response.data).decode().count('ligne') == 20
@@ -0,0 +1,60 @@
+"""
+Lucky Kangaroo - Tests des requêtes conditionnelles
+"""
+
+import pytest
+from flask import Flask, jsonify
+
+from backend.services.conditional import conditional, content_etag, make_etag
+
+CITIES = [{'name': 'Genève', 'lat': 46.2044, 'lon': 6.1432}]
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['CACHE_CONTROL_POLICIES'] = {'cities': 'public, max-age=60'}
+    app.calls = 0
+
+    @app.route('/cities')
+    @conditional('static', etag=lambda: content_etag(CITIES))
+    def cities():
+        app.calls += 1
+        return jsonify({'cities': CITIES}), 200
+
+    @app.route('/hashed')
+    @conditional('catalog')
+    def hashed():
+        return jsonify({'cities': CITIES})
+
+    return app
+
+
+@pytest.mark.unit
+class TestConditional:
+    """ETag et If-None-Match"""
+
+    def test_make_etag(self):
+        """Même version, même ETag"""
+        assert make_etag('listing', 1, None) == make_etag('listing', 1, None)
+        assert make_etag('listing', 1) != make_etag('listing', 2)
+
+    def test_not_modified_skips_view(self, app):
+        """304 sans exécuter la vue ; Cache-Control de l'endpoint"""
+        client = app.test_client()
+        response = client.get('/cities')
+        assert response.headers['Cache-Control'] == 'public, max-age=60'
+        etag = response.headers['ETag']
+        response = client.get('/cities', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert app.calls == 1
+        # ETag affaibli par la compression : comparaison faible
+        assert client.get('/cities', headers={'If-None-Match': 'W/' + etag}).status_code == 304
+
+    def test_content_hash(self, app):
+        """Sans version, hash du contenu produit"""
+        client = app.test_client()
+        response = client.get('/hashed')
+        assert response.headers['Cache-Control'] == 'public, max-age=300, must-revalidate'
+        assert client.get('/hashed', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+        assert client.get('/hashed', headers={'If-None-Match': '"autre"'}).status_code == 200
@@ -0,0 +1,40 @@
+"""
+Lucky Kangaroo - Tests de la sélection de champs (?fields=)
+"""
+
+import pytest
+
+from backend.services.fieldsets import FieldSet, InvalidFields, fields_key
+
+LISTING = FieldSet(
+    ('id', 'title', 'price_display', 'user', 'images'),
+    columns={'price_display': ('estimated_value', 'currency'), 'user': ('user_id',), 'images': ()},
+    relations={'user': ('user',), 'images': ('images',)},
+    always=('id', 'created_at')
+)
+
+
+@pytest.mark.unit
+class TestFieldSet:
+    """Champs demandés, colonnes et relations"""
+
+    def test_parse(self):
+        """Absent ou vide : tous les champs ; champ inconnu refusé"""
+        assert LISTING.parse(None) is None
+        assert LISTING.parse(' , ') is None
+        assert LISTING.parse('title, user') == frozenset({'title', 'user'})
+        with pytest.raises(InvalidFields):
+            LISTING.parse('title,password_hash')
+
+    def test_columns_and_relations(self):
+        """Colonnes des champs demandés, colonnes toujours lues comprises"""
+        requested = LISTING.parse('price_display,user')
+        assert LISTING.column_names(requested) == ('id', 'created_at', 'estimated_value', 'currency', 'user_id')
+        assert LISTING.relation_paths(requested) == ('user',)
+        assert LISTING.relation_paths(None) == ('user', 'images')
+
+    def test_project_and_key(self):
+        requested = LISTING.parse('title,id')
+        assert LISTING.project({'id': 1, 'title': 't', 'user': {}}, requested) == {'id': 1, 'title': 't'}
+        assert fields_key(requested) == 'id,title'
+        assert fields_key(None) == ''
@@ -0,0 +1,107 @@
+"""
+Lucky Kangaroo - Tests de la pagination par curseur et des modes de comptage
+"""
+
+import pytest
+from sqlalchemy import Column, Float, Integer, create_engine
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session, declarative_base
+
+from backend.services import pagination
+from backend.services.pagination import (
+    InvalidCursor,
+    SortKey,
+    coalesced,
+    count_totals,
+    decode_cursor,
+    encode_cursor,
+    explain_statement,
+    keyset_page,
+    sort_keys
+)
+
+_Base = declarative_base()
+
+
+class _Item(_Base):
+    __tablename__ = 'items'
+    id = Column(Integer, primary_key=True)
+    views = Column(Integer, nullable=False)
+    price = Column(Float)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine('sqlite://')
+    _Base.metadata.create_all(engine)
+    session = Session(engine)
+    session.add_all([
+        _Item(id=i, views=i % 4, price=None if i % 5 == 0 else float(i % 7))
+        for i in range(1, 48)
+    ])
+    session.commit()
+    return session
+
+
+def _walk(session, keys, per_page=10):
+    ids, cursor = [], ''
+    while cursor is not None:
+        items, pagination = keyset_page(session.query(_Item), keys, per_page, cursor)
+        ids += [item.id for item in items]
+        cursor = pagination['next_cursor']
+    return ids
+
+
+@pytest.mark.unit
+class TestKeysetPagination:
+    """Tests pour la pagination par curseur"""
+
+    @pytest.mark.parametrize('keys', [
+        sort_keys([_Item.views], _Item.id, descending=True),
+        [coalesced(_Item.price, 0), SortKey(_Item.id)],
+        [SortKey(_Item.views), SortKey(_Item.id, True)],
+    ])
+    def test_walk_matches_offset_order(self, session, keys):
+        """Test que le parcours par curseur suit l'ordre complet, sans doublon ni oubli"""
+        expected = [item.id for item in session.query(_Item).order_by(
+            *(key.column.desc() if key.descending else key.column.asc() for key in keys)
+        )]
+        assert _walk(session, keys) == expected
+
+    def test_cursor_is_bound_to_sort(self):
+        """Test qu'un curseur est refusé pour un autre tri ou s'il est altéré"""
+        token = encode_cursor([3, 12], sort='views:desc')
+        assert decode_cursor(token, 'views:desc', 2) == [3, 12]
+        with pytest.raises(InvalidCursor):
+            decode_cursor(token, 'price:asc', 2)
+        with pytest.raises(InvalidCursor):
+            decode_cursor('not-a-cursor', 'views:desc', 2)
+
+
+@pytest.mark.unit
+class TestCountModes:
+    """Tests pour les modes de comptage"""
+
+    def test_estimate_is_flagged_above_exact_limit(self, session, monkeypatch):
+        """Test que le total n'est signalé estimé qu'au-delà du comptage exact borné"""
+        query = session.query(_Item)
+        assert count_totals(query, 'estimate', 10) == {
+            'count': 'estimate', 'total': 47, 'pages': 5, 'total_is_estimate': False
+        }
+
+        monkeypatch.setattr(pagination, 'ESTIMATE_EXACT_LIMIT', 20)
+        totals = count_totals(query.filter(_Item.views > 0), 'estimate', 10)
+        assert totals['total_is_estimate'] is True
+        assert totals['total'] == query.filter(_Item.views > 0).count()
+
+        assert count_totals(query, 'none', 10)['total'] is None
+
+    def test_explain_expands_in_lists(self, session):
+        """Test que l'EXPLAIN PostgreSQL développe les IN (pas de __[POSTCOMPILE_…] pour le pilote)"""
+        query = session.query(_Item).filter(_Item.id.in_([1, 2, 3]), _Item.views > 0)
+        sql, params = explain_statement(query.statement, postgresql.psycopg2.dialect())
+
+        assert sql.startswith('EXPLAIN (FORMAT JSON) SELECT')
+        assert 'POSTCOMPILE' not in sql
+        assert sql.count('%(id_1_') == 3
+        assert sorted(params.values()) == [0, 1, 2, 3]
@@ -4,6 +4,7 @@ Tests unitaires pour les schémas Marshmallow
 """
 
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, timedelta
 from marshmallow import ValidationError
 
@@ -11,7 +12,7 @@ from backend.schemas.user import (
     UserSchema, CreateUserSchema, UpdateUserSchema, ChangePasswordSchema
 )
 from backend.schemas.listing import (
-    ListingSchema, CreateListingSchema, UpdateListingSchema
+    ListingSchema, CreateListingSchema, UpdateListingSchema, create_listing_schema
 )
 from backend.schemas.exchange import (
     ExchangeSchema, CreateExchangeSchema, UpdateExchangeSchema, ExchangeResponseSchema
@@ -597,3 +598,41 @@ class TestSchemaIntegration:
             listing_schema.load(invalid_listing_data)
         
         assert "Le titre est requis" in str(exc_info.value)
+
+
+class TestSharedSchemas:
+    """Tests des instances de schémas partagées"""
+    
+    LISTING = {
+        'title': 'Montre de collection',
+        'description': 'Montre mécanique révisée, boîte et papiers d\'origine',
+        'category': 'bijoux',
+        'condition': 'excellent',
+        'estimated_value': 150000.0
+    }
+    
+    def test_context_per_load(self):
+        """Test que le contexte passé à load ne fuit ni vers l'instance ni vers les autres threads"""
+        def load(trust_score):
+            try:
+                create_listing_schema.load(self.LISTING, context={'user_trust_score': trust_score})
+                return True
+            except ValidationError:
+                return False
+        
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(load, [90, 10] * 50))
+        
+        assert results == [True, False] * 50
+        assert create_listing_schema.context == {}
+        with pytest.raises(ValidationError, match='trust score'):
+            create_listing_schema.load(self.LISTING)
+    
+    def test_precompiled_spam_checks(self):
+        """Test que les contrôles compilés gardent les règles d'origine (casse ignorée)"""
+        with pytest.raises(ValidationError, match='mots interdits'):
+            create_listing_schema.load({**self.LISTING, 'title': 'Dernière Chance montre', 'estimated_value': 50.0})
+        with pytest.raises(ValidationError, match='indicateurs de spam'):
+            create_listing_schema.load({**self.LISTING, 'description': 'Montre en parfait état, Free shipping', 'estimated_value': 50.0})
+        with pytest.raises(ValidationError, match='liens'):
+            create_listing_schema.load({**self.LISTING, 'description': 'Voir https://example.com pour les photos', 'estimated_value': 50.0})
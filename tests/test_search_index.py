@@ -0,0 +1,746 @@
+"""
+Lucky Kangaroo - Tests de l'index de recherche en mémoire
+Tests unitaires pour le découpage du texte, le classement BM25, l'autocomplétion
+et l'index trigramme
+"""
+
+import math
+from datetime import datetime
+
+import pytest
+from cachelib import SimpleCache
+from sqlalchemy import Boolean, Column, DateTime, Float, Integer, String, Text, create_engine, event, or_, text
+from sqlalchemy.orm import Session, declarative_base
+
+from backend.app.search import autocomplete as autocomplete_module
+from backend.app.search.autocomplete import CompletionTrie
+from backend.app.search.bm25 import BM25Index
+from backend.app.search.events import ListingChange
+from backend.app.search.facets import compute_facets, filter_signature, price_bucket
+from backend.app.search import facets as facets_module
+from backend.app.search.indexer import ListingIndexer
+from backend.app.search.list_view import LIST_COLUMNS, list_columns, list_item, load_list_relations
+from backend.app.search.listing_index import opensearch_filters
+from backend.app.search import percolator as percolator_module
+from backend.app.search.percolator import ListingFacts, Percolator, SavedQuery
+from backend.app.search.result_cache import CATEGORIES_TAG, change_tags, invalidate, page_key, query_tags
+from backend.app.search.spelling import SpellingIndex, SymSpellDictionary, edit_distance
+from backend.app.search.text import parse_tags, tokenize
+from backend.app.search.trending import SKETCH_EPSILON, SlidingHeavyHitters, TrendingSearches
+from backend.services import search_reindex
+from backend.services.search_reindex import ReindexError, StreamingReindexer, chunked
+from backend.services.trigram_index import (
+    MODE_FTS5, MODE_LIKE, install_trigram_indexes, substring_filter, trigram_mode
+)
+
+
+@pytest.mark.unit
+class TestText:
+    """Tests pour la normalisation du texte"""
+
+    def test_tokenize_strips_accents_and_stopwords(self):
+        """Test la suppression des accents et des mots vides"""
+        assert tokenize('Vélo de Course électrique') == ['velo', 'course', 'electrique']
+
+    def test_parse_tags_accepts_json_and_csv(self):
+        """Test la lecture des tags stockés en JSON ou séparés par des virgules"""
+        assert parse_tags('["sport", "vélo"]') == ['sport', 'vélo']
+        assert parse_tags('sport, vélo') == ['sport', 'vélo']
+
+
+@pytest.mark.unit
+class TestBM25Index:
+    """Tests pour le classement BM25"""
+
+    def _index(self):
+        index = BM25Index()
+        index.add('1', {'title': 'Vélo de course', 'description': 'Cadre carbone'})
+        index.add('2', {'title': 'Canapé', 'description': 'Idéal pour ranger un vélo'})
+        index.add('3', {'title': 'Table en bois', 'description': 'Chêne massif'})
+        return index
+
+    def test_title_match_ranks_first(self):
+        """Test que la pondération du titre l'emporte sur la description"""
+        assert [doc for doc, _ in self._index().search('velo')] == ['1', '2']
+
+    def test_update_and_remove(self):
+        """Test le remplacement et la suppression à chaud"""
+        index = self._index()
+        index.add('3', {'title': 'Vélo enfant'})
+        index.remove('1')
+        assert [doc for doc, _ in index.search('velo')] == ['3', '2']
+        assert index.search('chene') == []
+        assert len(index) == 2
+
+
+@pytest.mark.unit
+class TestOpenSearchFilters:
+    """Tests pour la transmission des filtres de /search à OpenSearch"""
+
+    def test_structured_filters_are_pushed_down(self):
+        """Test que les filtres sont appliqués avant le plafond de candidats"""
+        clauses = opensearch_filters({
+            'category_id': 'c1', 'condition': ['good'], 'min_price': 10,
+            'listing_type': 'both', 'city': 'Gen*', 'exchange_type': 'chain'
+        })
+        assert {'term': {'status': 'active'}} in clauses
+        assert {'term': {'category_id': 'c1'}} in clauses
+        assert {'terms': {'condition': ['good']}} in clauses
+        assert {'range': {'estimated_value': {'gte': 10}}} in clauses
+        assert {'terms': {'exchange_type': ['chain', 'both']}} in clauses
+        assert {'wildcard': {'city': {'value': '*Gen\\**', 'case_insensitive': True}}} in clauses
+        assert not any('listing_type' in str(clause) for clause in clauses)
+
+
+@pytest.mark.unit
+class TestCompletionTrie:
+    """Tests pour le trie de complétion"""
+
+    def test_prefix_of_any_word_ranked_by_weight(self):
+        """Test la complétion sur chaque mot, classée par popularité"""
+        trie = CompletionTrie()
+        trie.update('Vélo de course', 3)
+        trie.update('Vélo électrique', 5)
+        trie.update('Canapé', 1)
+        assert [text for text, _ in trie.complete('vel')] == ['Vélo électrique', 'Vélo de course']
+        assert [text for text, _ in trie.complete('ELEC')] == ['Vélo électrique']
+
+    def test_incremental_updates(self):
+        """Test la mise à jour des poids et le retrait d'un terme"""
+        trie = CompletionTrie()
+        trie.update('Vélo de course', 3)
+        trie.update('Vélo électrique', 5)
+        trie.complete('v')
+        trie.update('Vélo de course', 4)
+        trie.update('Vélo électrique', -5)
+        assert trie.complete('v') == [('Vélo de course', 7)]
+        assert len(trie) == 1
+
+    def test_category_invalidation_is_noticed(self, monkeypatch):
+        """Test qu'un changement de version des catégories est vu après l'intervalle"""
+        versions = iter(['v2', 'v2'])
+        monkeypatch.setattr(autocomplete_module, '_categories', {'version': 'v1', 'checked_at': 0.0})
+        monkeypatch.setattr(autocomplete_module, '_categories_version', lambda: next(versions))
+
+        assert autocomplete_module.categories_changed(check_interval=0)
+        assert not autocomplete_module.categories_changed(check_interval=3600)
+
+
+@pytest.mark.unit
+class TestFacets:
+    """Tests pour les facettes de recherche"""
+
+    def test_filter_signature_is_canonical(self):
+        """Test que l'ordre, la casse du texte et la pagination ne changent pas la clé"""
+        first = filter_signature({'query': 'Vélo ', 'condition': ['new', 'good'], 'page': 1})
+        second = filter_signature({'condition': ['good', 'new'], 'query': 'vélo', 'page': 3})
+        assert first == second
+        assert filter_signature({'country': 'CH'}) != filter_signature({'country': 'ch'})
+
+    def test_price_buckets(self):
+        """Test les bornes des tranches de prix"""
+        assert price_bucket(0) == {'label': 'Moins de 50 CHF', 'min': 0, 'max': 50}
+        assert price_bucket(7)['max'] is None
+
+    def test_one_row_per_dimension_value(self):
+        """Test les comptages par dimension (UNION ALL) contre un comptage direct"""
+        engine = create_engine('sqlite://')
+        _Base.metadata.create_all(engine)
+        session = Session(engine)
+        rows = [('c1', 'good', 'Lausanne', 'Trek', 75), ('c1', 'new', 'Genève', None, None),
+                ('c2', 'good', 'Lausanne', 'Ikea', 3000), ('c2', None, 'Lausanne', 'Trek', 10)]
+        session.add_all(
+            _Listing(id=str(i), category_id=category, condition=condition, city=city,
+                     brand=brand, estimated_value=value)
+            for i, (category, condition, city, brand, value) in enumerate(rows)
+        )
+        session.commit()
+
+        facets = compute_facets(session.query(_Listing), _Listing)
+
+        assert facets['total'] == 4
+        assert facets['category'] == {'c1': 2, 'c2': 2}
+        assert facets['condition'] == {'good': 2, 'new': 1}
+        assert facets['city'] == [{'value': 'Lausanne', 'count': 3}, {'value': 'Genève', 'count': 1}]
+        assert facets['brand'] == [{'value': 'Trek', 'count': 2}, {'value': 'Ikea', 'count': 1}]
+        assert [(bucket['min'], bucket['count']) for bucket in facets['price']] == [(0, 1), (50, 1), (2000, 1)]
+
+    def test_grouping_sets_rows_are_decoded(self):
+        """Test l'attribution des lignes GROUPING SETS à leur dimension (bit de GROUPING)"""
+        class _Rows:
+            def __getattr__(self, name):
+                return lambda *args: self
+
+            def all(self):
+                return [(0b01111, 'c1', None, None, None, None, 3),
+                        (0b10111, None, 'good', None, None, None, 2),
+                        (0b11110, None, None, None, None, 1, 3)]
+
+        decoded = list(facets_module._grouping_sets_rows(_Rows(), facets_module._facet_expressions(_Listing)))
+        assert decoded == [('category', 'c1', 3), ('condition', 'good', 2), ('price', 1, 3)]
+
+
+@pytest.mark.unit
+class TestResultCacheTags:
+    """Tests pour l'invalidation du cache de résultats"""
+
+    def test_city_change_invalidates_substring_filter(self):
+        """Test qu'une annonce quittant une ville invalide les pages filtrées sur cette ville"""
+        change = ListingChange('1', 'upsert', {'city': 'Genève', 'category_id': 'c1'},
+                               previous={'city': 'Lausanne'})
+        assert set(query_tags({'city': 'lausan'})) <= change_tags(change)
+        assert set(query_tags({'category_id': 'c1'})) <= change_tags(change)
+        assert not set(query_tags({'city': 'Zurich'})) & change_tags(change)
+
+    def test_category_admin_changes_page_keys(self):
+        """Test que l'administration des catégories change la clé des pages (cartes avec catégorie)"""
+        cache = SimpleCache()
+        filters = {'city': 'Lausanne'}
+        key = page_key(cache, filters, 1, 20, 'relevance')
+        assert page_key(cache, filters, 1, 20, 'relevance') == key
+
+        invalidate(cache, [CATEGORIES_TAG])
+        assert page_key(cache, filters, 1, 20, 'relevance') != key
+
+    def test_counter_updates_do_not_invalidate(self):
+        """Test que l'incrément des vues n'invalide rien"""
+        change = ListingChange('1', 'upsert', {'city': 'Bern'}, previous={'views_count': 3})
+        assert change_tags(change) == set()
+
+
+@pytest.mark.unit
+class TestSpelling:
+    """Tests pour la tolérance aux fautes de frappe"""
+
+    def test_lookup_matches_brute_force(self):
+        """Test que le voisinage de suppressions trouve le mot le plus proche"""
+        words = ['samsung', 'galaxy', 'iphone', 'playstation', 'nintendo', 'switch', 'sony']
+        dictionary = SymSpellDictionary()
+        for word in words:
+            dictionary.add(word)
+
+        for typo in ('samsng', 'iphnoe', 'galaxi', 'playstaton', 'nitnendo', 'swicth', 'sny'):
+            expected = min(edit_distance(typo, word, 2) for word in words)
+            assert dictionary.lookup(typo)[0][1] == expected
+
+        dictionary.remove('sony')
+        assert dictionary.lookup('sny') == []
+
+    def test_correction_follows_listing_updates(self):
+        """Test que le vocabulaire suit les annonces"""
+        index = SpellingIndex()
+        index.apply('1', {'title': 'Samsung Galaxy S21'})
+        assert index.correct('samsng galaxy')['query'] == 'samsung galaxy'
+        assert index.correct('galaxy') is None
+
+        index.apply('2', {'title': 'iPhone 12', 'brand': 'Apple'})
+        assert index.correct('iphnoe')['corrections'] == {'iphnoe': 'iphone'}
+        index.apply('2', None)
+        assert index.correct('iphnoe') is None
+
+
+@pytest.mark.unit
+class TestTrending:
+    """Tests pour les recherches tendances"""
+
+    def test_sliding_window_expires_old_slices(self):
+        """Test que les tranches sorties de la fenêtre ne comptent plus"""
+        window = SlidingHeavyHitters(slice_seconds=60, slices=3, capacity=2)
+        for _ in range(5):
+            window.add('velo', now=0)
+        for key in ('table', 'table', 'lampe', 'table'):
+            window.add(key, now=130)
+
+        assert window.top(2, now=130) == [('velo', 5), ('table', 3)]
+        assert window.top(2, now=200) == [('table', 3), ('lampe', 1)]
+
+    def test_queries_are_normalized(self):
+        """Test que les variantes d'une requête sont comptées ensemble"""
+        trending = TrendingSearches()
+        for query in ('Vélo', 'velo ', 'VELO', 'iPhone'):
+            trending.record(query)
+
+        assert trending.top('hour', 2) == []
+        trending.refresh(now=0)
+        assert trending.top('hour', 2) == [
+            {'query': 'velo', 'count': 3},
+            {'query': 'iphone', 'count': 1}
+        ]
+
+    def test_overcount_is_bounded_under_many_distinct_queries(self):
+        """Test que la surestimation reste dans l'erreur visée malgré des milliers de requêtes distinctes"""
+        window = SlidingHeavyHitters(slice_seconds=3600, slices=24, capacity=200)
+        for hour in range(24):
+            for i in range(3000):
+                window.add(f'requete {hour} {i}', now=hour * 3600)
+            for _ in range(14):
+                window.add('velo', now=hour * 3600)
+
+        (key, count), = window.top(1, now=23 * 3600)
+        assert key == 'velo'
+        assert 14 * 24 <= count <= 14 * 24 + 24 * math.ceil(SKETCH_EPSILON * 3014)
+
+    def test_other_processes_snapshots_are_added(self):
+        """Test que les instantanés des autres processus s'ajoutent aux comptes locaux"""
+        trending = TrendingSearches()
+        trending.record('velo')
+        trending.set_others('day', [('Vélo', 4), ('Table', 2)])
+        trending.refresh(now=0)
+
+        assert trending.top('day', 2) == [
+            {'query': 'velo', 'count': 5},
+            {'query': 'Table', 'count': 2}
+        ]
+        assert trending.snapshot(now=0)['day'] == [{'query': 'velo', 'count': 1}]
+
+
+@pytest.mark.unit
+class TestPercolator:
+    """Tests pour les alertes des recherches sauvegardées"""
+
+    @staticmethod
+    def _listing(listing_id, title, **fields):
+        return ListingFacts.from_data({'id': listing_id, 'user_id': 'owner', 'title': title, **fields})
+
+    def test_only_matching_searches_are_returned(self):
+        """Test que texte, catégorie, prix et rayon sont tous vérifiés"""
+        percolator = Percolator()
+        percolator.load([
+            SavedQuery.from_criteria('s1', 'u1', 'vélo', {'query': 'vélo électrique', 'max_price': 800}),
+            SavedQuery.from_criteria('s2', 'u2', 'genève', {'latitude': 46.2, 'longitude': 6.15, 'radius_km': 10}),
+            SavedQuery.from_criteria('s3', 'u3', 'sport', {'category_id': 'c2'}),
+            SavedQuery.from_criteria('s4', 'owner', 'mes vélos', {'query': 'velo'}),
+        ])
+        listing = self._listing('1', 'Vélo électrique Cube', category_id='c1',
+                                estimated_value=700, latitude=46.21, longitude=6.14)
+
+        assert sorted(query.id for query in percolator.match(listing)) == ['s1', 's2']
+        assert percolator.match(self._listing('2', 'Vélo de course', category_id='c2')) == [
+            percolator._queries['s3']
+        ]
+
+    def test_candidates_are_limited_to_shared_keys(self):
+        """Test que seules les recherches partageant un mot, une cellule ou la catégorie sont évaluées"""
+        percolator = Percolator()
+        percolator.load(
+            SavedQuery.from_criteria(str(i), 'u', 'n', {'query': f'mot{i}', 'category_id': 'c1'})
+            for i in range(1000)
+        )
+        percolator.match(self._listing('1', 'mot7 mot8 autre', category_id='c1'))
+
+        assert percolator.stats()['candidates'] == 2
+        assert percolator.stats()['matches'] == 2
+
+    def test_full_queue_counts_dropped_listings(self, monkeypatch):
+        """Test qu'une file pleine écarte les annonces en les comptant"""
+        monkeypatch.setattr(percolator_module, 'MAX_PENDING', 2)
+        monkeypatch.setattr(percolator_module, '_pending', percolator_module.deque())
+        monkeypatch.setattr(percolator_module, 'percolator', Percolator())
+        changes = [ListingChange(str(i), 'upsert', {'id': str(i), 'status': 'active'}, created=True)
+                   for i in range(5)]
+
+        percolator_module.queue_published_listings(changes)
+
+        assert [data['id'] for data in percolator_module._pending] == ['0', '1']
+        assert percolator_module.percolator.stats()['dropped'] == 3
+
+
+class _LocalSearchIndex:
+    """Substitut local de l'API bulk d'OpenSearch"""
+
+    def __init__(self, failures=0):
+        self.documents = {}
+        self.calls = 0
+        self.failures = failures
+
+    def bulk(self, body):
+        self.calls += 1
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError('search engine unavailable')
+        items, lines = [], iter(body)
+        for action in lines:
+            operation, meta = next(iter(action.items()))
+            if operation == 'index':
+                self.documents[meta['_id']] = next(lines)
+                items.append({'index': {'_id': meta['_id'], 'status': 201}})
+            else:
+                found = self.documents.pop(meta['_id'], None) is not None
+                items.append({'delete': {'_id': meta['_id'], 'status': 200 if found else 404}})
+        return {'errors': False, 'items': items}
+
+
+@pytest.mark.unit
+class TestListingIndexer:
+    """Tests pour l'indexation incrémentale"""
+
+    def test_deduplicated_batches_with_deletes(self):
+        """Test le dédoublonnage, le regroupement par lots et la suppression"""
+        state = {'1': {'title': 'Vélo'}, '2': {'title': 'Table'}, '3': None}
+        index = _LocalSearchIndex()
+        indexer = ListingIndexer(index, 'listings', lambda ids: {i: state[i] for i in ids}, batch_size=2)
+
+        indexer.enqueue(['1', '2', '1', '3'])
+        indexer.flush()
+
+        assert index.documents == {'1': {'title': 'Vélo'}, '2': {'title': 'Table'}}
+        assert index.calls == 2
+        assert indexer.stats()['deduplicated'] == 1
+        assert indexer.stats()['pending'] == 0
+
+    def test_retry_with_backoff(self):
+        """Test qu'un lot est renvoyé après une indisponibilité passagère"""
+        index = _LocalSearchIndex(failures=2)
+        indexer = ListingIndexer(index, 'listings', lambda ids: {i: {'title': i} for i in ids},
+                                 backoff=0.001)
+        indexer.enqueue(['1'])
+        indexer.flush()
+
+        assert index.documents == {'1': {'title': '1'}}
+        assert indexer.stats()['bulk_errors'] == 2
+        assert indexer.stats()['lag']['count'] == 1
+
+    def test_background_worker(self):
+        """Test le thread de fond"""
+        index = _LocalSearchIndex()
+        indexer = ListingIndexer(index, 'listings', lambda ids: {i: {'title': i} for i in ids},
+                                 flush_interval=0.01)
+        indexer.start()
+        indexer.enqueue(['1', '2'])
+        indexer.stop()
+        assert set(index.documents) == {'1', '2'}
+
+
+class _LocalIndices:
+    """Substitut local de l'API indices d'OpenSearch"""
+
+    def __init__(self):
+        self.indices = {}
+        self.aliases = {}
+
+    def create(self, index, body):
+        self.indices[index] = dict(body['settings'])
+
+    def put_settings(self, index, body):
+        self.indices[index].update(body['index'])
+
+    def refresh(self, index):
+        pass
+
+    def exists(self, index):
+        return index in self.indices
+
+    def get(self, index):
+        prefix = index.rstrip('*')
+        return {name: {} for name in self.indices if name.startswith(prefix)}
+
+    def get_alias(self, name):
+        return {index: {} for index, alias in self.aliases.items() if alias == name}
+
+    def delete(self, index):
+        self.indices.pop(index)
+
+    def update_aliases(self, body):
+        for action in body['actions']:
+            operation, params = next(iter(action.items()))
+            if operation == 'add':
+                self.aliases[params['index']] = params['alias']
+            elif operation == 'remove':
+                self.aliases.pop(params['index'])
+            else:
+                self.indices.pop(params['index'])
+
+
+@pytest.mark.unit
+class TestStreamingReindexer:
+    """Tests pour la réindexation sans interruption"""
+
+    def test_streams_chunks_and_swaps_alias(self):
+        """Test le chargement par lots, le rattrapage et la bascule d'alias"""
+        client = _LocalSearchIndex()
+        client.indices = _LocalIndices()
+        client.indices.indices['listings'] = {}  # ancien index concret
+
+        def build(row):
+            return row['id'], row if row.get('active', True) else None
+
+        rows = ({'id': str(i)} for i in range(25))
+        reindexer = StreamingReindexer(client, 'listings', {'settings': {}}, build, workers=2)
+        result = reindexer.run(chunked(rows, 10), lambda since: [[{'id': '3', 'active': False}]])
+
+        assert result['documents'] == 26  # 25 lignes + la suppression du rattrapage
+        assert result['chunks'] == 4
+        assert set(client.documents) == {str(i) for i in range(25)} - {'3'}
+        assert 'listings' not in client.indices.indices
+        assert client.indices.aliases == {result['index']: 'listings'}
+        assert client.indices.indices[result['index']]['refresh_interval'] == '1s'
+
+        second = StreamingReindexer(client, 'listings', {'settings': {}}, build).run([[{'id': '1'}]])
+        assert second['previous'] == [result['index']]
+        assert client.indices.aliases == {second['index']: 'listings'}
+
+    def test_replays_deletes_before_swap(self):
+        """Test que les annonces supprimées de la base pendant la reconstruction sont retirées"""
+        client = _LocalSearchIndex()
+        client.indices = _LocalIndices()
+        remaining = {'1', '3'}
+
+        result = StreamingReindexer(client, 'listings', {'settings': {}}, lambda row: (row['id'], row)).run(
+            [[{'id': '1'}, {'id': '2'}, {'id': '3'}]],
+            missing=lambda ids: [doc_id for doc_id in ids if doc_id not in remaining]
+        )
+
+        assert result['deleted'] == 1
+        assert set(client.documents) == {'1', '3'}
+
+    def test_aborts_without_swap_on_errors(self, monkeypatch):
+        """Test qu'un moteur indisponible pendant la reconstruction ne bascule pas l'alias"""
+        monkeypatch.setattr(search_reindex.time, 'sleep', lambda seconds: None)
+        client = _LocalSearchIndex()
+        client.indices = _LocalIndices()
+        client.indices.indices['listings_v1'] = {}
+        client.indices.aliases['listings_v1'] = 'listings'
+        client.failures = 100
+
+        with pytest.raises(ReindexError):
+            StreamingReindexer(client, 'listings', {'settings': {}}, lambda row: (row['id'], row)).run(
+                [[{'id': '1'}]]
+            )
+
+        assert client.indices.aliases == {'listings_v1': 'listings'}
+        assert list(client.indices.indices) == ['listings_v1']
+
+
+_Base = declarative_base()
+
+
+class _Listing(_Base):
+    __tablename__ = 'listings'
+    id = Column(String(36), primary_key=True)
+    title = Column(String(200))
+    description = Column(Text)
+    brand = Column(String(100))
+    model = Column(String(100))
+    city = Column(String(100))
+    desired_items = Column(Text)
+    views_count = Column(Integer, default=0)
+    category_id = Column(String(36))
+    condition = Column(String(20))
+    estimated_value = Column(Float)
+    tags = Column(Text)
+
+
+@pytest.mark.unit
+class TestTrigramIndex:
+    """Tests pour la recherche de sous-chaînes indexée (SQLite FTS5)"""
+
+    def _matches(self, session, engine, term):
+        columns = [_Listing.title, _Listing.description]
+        indexed = session.query(_Listing.id).filter(substring_filter(engine, columns, term))
+        plain = session.query(_Listing.id).filter(or_(*(c.ilike(f'%{term}%') for c in columns)))
+        return sorted(indexed), sorted(plain)
+
+    def test_indexed_filter_matches_ilike(self, tmp_path):
+        """Test que le chemin indexé renvoie les mêmes annonces que ILIKE, triggers compris"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'trigram.db'}")
+        _Base.metadata.create_all(engine)
+        session = Session(engine)
+        session.add_all([
+            _Listing(id='a1', title='Vélo de course', description='Cadre carbone'),
+            _Listing(id='b2', title='Canapé', description='Tissu gris'),
+        ])
+        session.commit()
+
+        assert install_trigram_indexes(engine) == MODE_FTS5
+
+        session.add(_Listing(id='c3', title='VTT', description='Cadre alu'))
+        session.get(_Listing, 'b2').title = 'Canapé cadre bois'
+        session.delete(session.get(_Listing, 'a1'))
+        session.commit()
+
+        for term in ('cadre', 'CAN', 'carbone'):
+            indexed, plain = self._matches(session, engine, term)
+            assert indexed == plain
+        assert 'MATCH' in str(substring_filter(engine, [_Listing.title], 'cadre'))
+
+    def test_results_survive_rowid_changes(self, tmp_path):
+        """Test que l'index ne dépend pas du rowid de la table (renumérotable par VACUUM)"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'rowid.db'}")
+        _Base.metadata.create_all(engine)
+        install_trigram_indexes(engine)
+        session = Session(engine)
+        session.add_all(_Listing(id=f'id-{i}', title=f'Annonce {i}', description='Velo' if i % 3 else 'Table')
+                        for i in range(30))
+        session.commit()
+        for i in range(0, 30, 2):
+            session.delete(session.get(_Listing, f'id-{i}'))
+        session.commit()
+        session.close()
+
+        with engine.begin() as connection:
+            connection.execute(text('UPDATE listings SET rowid = 1000 - rowid'))
+
+        session = Session(engine)
+        indexed, plain = self._matches(session, engine, 'velo')
+        assert indexed == plain
+        assert len(indexed) == 10
+
+    def test_mode_detected_once_tables_exist(self, tmp_path):
+        """Test qu'une installation faite avant la création des tables est reprise plus tard"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'late.db'}")
+        assert install_trigram_indexes(engine) == MODE_LIKE
+        assert trigram_mode(engine) == MODE_LIKE
+
+        _Base.metadata.create_all(engine)
+        session = Session(engine)
+        session.add(_Listing(id='a1', title='Vélo de course'))
+        session.commit()
+
+        assert trigram_mode(engine) == MODE_FTS5
+        assert self._matches(session, engine, 'course')[0] == [('a1',)]
+
+    def test_tags_are_indexed_without_table_scan(self, tmp_path):
+        """Test que les tags passent par l'index, y compris après une installation sans eux"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'tags.db'}")
+        _Base.metadata.create_all(engine)
+        install_trigram_indexes(engine, {'listings': ('title', 'description')})
+        session = Session(engine)
+        session.add_all([_Listing(id='a1', title='Vélo', tags='["carbone", "course"]'),
+                         _Listing(id='b2', title='Table', tags='["chêne"]')])
+        session.commit()
+
+        install_trigram_indexes(engine)
+        columns = [_Listing.title, _Listing.description, _Listing.tags]
+        query = session.query(_Listing.id).filter(substring_filter(engine, columns, 'carbone'))
+
+        assert query.all() == [('a1',)]
+        plan = session.execute(text('EXPLAIN QUERY PLAN ' + str(query.statement.compile(
+            engine, compile_kwargs={'literal_binds': True})))).all()
+        assert 'SCAN listings' not in [row[-1] for row in plan]
+
+
+_ListBase = declarative_base()
+
+
+class _Card(_ListBase):
+    __tablename__ = 'cards'
+    id = Column(String(36), primary_key=True)
+    user_id = Column(String(36))
+    category_id = Column(String(36))
+    title = Column(String(200))
+    description = Column(Text, default='')
+    listing_type = Column(String(20))
+    condition = Column(String(20))
+    brand = Column(String(100))
+    model = Column(String(100))
+    year = Column(Integer)
+    estimated_value = Column(Float)
+    currency = Column(String(3))
+    city = Column(String(100))
+    postal_code = Column(String(10))
+    country = Column(String(2))
+    latitude = Column(Float)
+    longitude = Column(Float)
+    exchange_type = Column(String(20))
+    is_featured = Column(Boolean, default=False)
+    views_count = Column(Integer, default=0)
+    likes_count = Column(Integer, default=0)
+    tags = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class _CardCategory(_ListBase):
+    __tablename__ = 'card_categories'
+    id = Column(String(36), primary_key=True)
+    name = Column(String(100))
+    slug = Column(String(100))
+    icon = Column(String(50))
+
+
+class _CardUser(_ListBase):
+    __tablename__ = 'card_users'
+    id = Column(String(36), primary_key=True)
+    username = Column(String(80))
+    trust_score = Column(Float, default=50.0)
+    city = Column(String(100))
+
+
+class _CardImage(_ListBase):
+    __tablename__ = 'card_images'
+    id = Column(Integer, primary_key=True)
+    listing_id = Column(String(36))
+    file_path = Column(String(500))
+    alt_text = Column(String(200))
+    is_main = Column(Boolean, default=False)
+    sort_order = Column(Integer, default=0)
+
+
+@pytest.mark.unit
+class TestListView:
+    """Tests pour les cartes d'annonces des pages de résultats"""
+
+    # Clés de l'ancienne sérialisation des résultats (entités complètes)
+    SEARCH_DICT_KEYS = {
+        'id', 'title', 'description', 'category', 'user', 'listing_type', 'condition', 'brand',
+        'model', 'year', 'estimated_value', 'currency', 'city', 'postal_code', 'country',
+        'exchange_type', 'views_count', 'likes_count', 'created_at', 'images', 'tags'
+    }
+    MODELS = {'categories': _CardCategory, 'users': _CardUser, 'images': _CardImage}
+
+    @pytest.fixture
+    def page(self):
+        engine = create_engine('sqlite://')
+        _ListBase.metadata.create_all(engine)
+        session = Session(engine)
+        session.add_all([_CardCategory(id='c1', name='Vélos', slug='velos'),
+                         _CardUser(id='u1', username='alice'), _CardUser(id='u2', username='bob')])
+        for i in range(10):
+            session.add(_Card(id=f'l{i}', user_id=f'u{i % 2 + 1}', category_id='c1', title=f'Vélo {i}',
+                              description='x' * 300, tags='["vélo", "sport"]'))
+            session.add_all(_CardImage(listing_id=f'l{i}', file_path=f'/img/{i}/{k}.jpg',
+                                       is_main=(k == 3), sort_order=k) for k in range(5))
+        session.commit()
+        rows = session.query(*list_columns(_Card)).order_by(_Card.id).all()
+        return session, engine, rows
+
+    def test_page_relations_take_one_query_each(self, page):
+        """Test que catégories, vendeurs et images d'une page coûtent une requête chacun"""
+        session, engine, rows = page
+        statements = []
+        event.listen(engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+
+        relations = load_list_relations(
+            rows, session=session, models=self.MODELS
+        )
+
+        assert len(statements) == 3
+        assert relations['users']['u2']['username'] == 'bob'
+        assert relations['categories']['c1']['slug'] == 'velos'
+        assert len(relations['images']) == 10
+
+    def test_images_are_capped_main_first(self, page):
+        """Test que chaque annonce garde ses 3 premières images, la principale en tête"""
+        session, _, rows = page
+        relations = load_list_relations(
+            rows, fields=frozenset({'images'}), session=session, models=self.MODELS
+        )
+
+        assert relations['users'] == {} and relations['categories'] == {}
+        assert [image['url'] for image in relations['images']['l4']] == [
+            '/img/4/3.jpg', '/img/4/0.jpg', '/img/4/1.jpg'
+        ]
+        assert relations['images']['l4'][0]['is_primary'] is True
+
+    def test_item_keys_match_search_dict(self, page):
+        """Test que la carte garde les clés de l'ancienne sérialisation, tags décodés"""
+        session, _, rows = page
+        relations = load_list_relations(
+            rows, session=session, models=self.MODELS
+        )
+        item = list_item(rows[0], relations)
+
+        assert set(item) == self.SEARCH_DICT_KEYS
+        assert set(LIST_COLUMNS) <= {column.name for column in _Card.__table__.columns}
+        assert item['tags'] == ['vélo', 'sport']
+        assert len(item['description']) == 203
+        assert item['user']['id'] == 'u1'
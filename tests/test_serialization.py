@@ -0,0 +1,97 @@
+"""
+Lucky Kangaroo - Tests de la sérialisation JSON
+"""
+
+import datetime
+import decimal
+import enum
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+from backend.services import serialization
+from backend.services.serialization import FastJSONProvider, compile_serializer, iso_datetime, json_list
+
+
+class _Color(enum.Enum):
+    RED = 'red'
+
+
+@pytest.mark.unit
+class TestCompiledSerializer:
+    """Tests pour les sérialiseurs compilés"""
+
+    def test_fields_converters_and_nested(self):
+        """Test que champs, conversions et champs calculés donnent le dictionnaire attendu"""
+        serialize = compile_serializer(
+            ('id', ('tags', json_list), ('created_at', iso_datetime)),
+            owner=lambda obj: obj.owner.name
+        )
+        obj = SimpleNamespace(id=3, tags='["a"]', created_at=None, owner=SimpleNamespace(name='bob'))
+
+        assert serialize(obj) == {'id': 3, 'tags': ['a'], 'created_at': None, 'owner': 'bob'}
+        assert serialize.fields == ('id', 'tags', 'created_at', 'owner')
+
+    def test_only(self):
+        """Test que le sérialiseur restreint ne lit que les champs demandés"""
+        serialize = compile_serializer(('id', ('tags', json_list)), owner=lambda obj: obj.owner.name)
+        obj = SimpleNamespace(id=3, tags='["a"]')
+
+        assert serialize.only(frozenset({'tags'}))(obj) == {'tags': ['a']}
+        assert serialize.only(frozenset({'tags'})) is serialize.only(frozenset({'tags'}))
+        assert serialize.only(frozenset({'owner'}))(SimpleNamespace(owner=SimpleNamespace(name='bob'))) == {'owner': 'bob'}
+
+
+@pytest.mark.unit
+class TestFastJSONProvider:
+    """Tests pour le fournisseur JSON"""
+
+    PAYLOAD = {
+        'when': datetime.datetime(2024, 1, 2, 3, 4, 5, 6),
+        'day': datetime.date(2024, 1, 2),
+        'id': uuid.UUID(int=5),
+        'price': decimal.Decimal('1.5'),
+        'color': _Color.RED,
+        'name': 'Vélo',
+        'nested': {'b': 1, 'a': [1, 2]}
+    }
+
+    def test_same_output_with_and_without_orjson(self, monkeypatch):
+        """Test que le repli sur json standard produit exactement les mêmes octets"""
+        app = Flask(__name__)
+        provider = FastJSONProvider(app)
+        with app.app_context():
+            fast = provider.response(self.PAYLOAD).get_data()
+            monkeypatch.setattr(serialization, 'orjson', None)
+            standard = provider.response(self.PAYLOAD).get_data()
+
+        assert fast == standard
+        assert provider.loads(standard) == {
+            'when': '2024-01-02T03:04:05.000006', 'day': '2024-01-02',
+            'id': '00000000-0000-0000-0000-000000000005', 'price': 1.5, 'color': 'red',
+            'name': 'Vélo', 'nested': {'a': [1, 2], 'b': 1}
+        }
+
+    def test_msgpack_negotiation(self, monkeypatch):
+        """Test que MessagePack n'est servi qu'aux clients qui le demandent, sur les endpoints prévus"""
+        msgpack = pytest.importorskip('msgpack')
+        app = Flask(__name__)
+        app.config['MSGPACK_PREFIXES'] = ('/api/listings',)
+        provider = FastJSONProvider(app)
+        expected = provider.loads(provider.dumps(self.PAYLOAD))
+
+        with app.test_request_context('/api/listings', headers={'Accept': 'application/msgpack'}):
+            response = provider.response(self.PAYLOAD)
+            assert response.mimetype == 'application/msgpack'
+            assert msgpack.unpackb(response.get_data()) == expected
+            assert 'Accept' in response.vary
+        with app.test_request_context('/api/listings', headers={'Accept': 'application/json, */*'}):
+            assert provider.loads(provider.response(self.PAYLOAD).get_data()) == expected
+        with app.test_request_context('/api/users', headers={'Accept': 'application/msgpack'}):
+            assert provider.response(self.PAYLOAD).mimetype == 'application/json'
+
+        monkeypatch.setattr(serialization, 'msgpack', None)
+        with app.test_request_context('/api/listings', headers={'Accept': 'application/msgpack'}):
+            assert provider.response(self.PAYLOAD).mimetype == 'application/json'
@@ -0,0 +1,243 @@
+"""
+Lucky Kangaroo - Tests de l'index spatial
+Tests unitaires pour l'encodage geohash et la recherche des plus proches voisins
+"""
+
+import random
+
+import pytest
+from sqlalchemy import Column, Float, Integer, String, create_engine, text
+from sqlalchemy.orm import Session, declarative_base
+
+from backend.services.spatial_index import (
+    encode_geohash, decode_geohash_bbox, cover_radius, cells_to_ranges,
+    haversine_km, rank_by_distance, segment_distance_km,
+    backfill_geohash, ensure_geohash_index, find_nearest
+)
+from backend.services.region_service import RegionError, get_region, lv95_to_wgs84, region_from_geojson
+
+
+class _Point:
+    def __init__(self, latitude, longitude):
+        self.latitude = latitude
+        self.longitude = longitude
+
+
+_Base = declarative_base()
+
+
+class _Place(_Base):
+    __tablename__ = 'places'
+    id = Column(Integer, primary_key=True)
+    latitude = Column(Float)
+    longitude = Column(Float)
+    geohash = Column(String(12), index=True)
+
+
+class _CountingQuery:
+    """Requête qui compte les tours de la recherche par rayon croissant"""
+
+    def __init__(self, query):
+        self.query = query
+        self.rounds = 0
+
+    def filter(self, *criteria):
+        self.rounds += 1
+        return self.query.filter(*criteria)
+
+
+@pytest.fixture
+def places_session():
+    engine = create_engine('sqlite://')
+    _Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.mark.unit
+class TestGeohash:
+    """Tests pour l'encodage geohash"""
+
+    def test_encode_known_value(self):
+        """Test l'encodage d'une position de référence"""
+        assert encode_geohash(57.64911, 10.40744, 11) == 'u4pruydqqvj'
+
+    def test_decoded_bbox_contains_point(self):
+        """Test que la cellule décodée contient le point encodé"""
+        bbox = decode_geohash_bbox(encode_geohash(46.9481, 7.4474, 7))
+        assert bbox['south'] <= 46.9481 <= bbox['north']
+        assert bbox['west'] <= 7.4474 <= bbox['east']
+
+    def test_cover_contains_points_in_radius(self):
+        """Test que la couverture d'un rayon contient tous les points du cercle"""
+        random.seed(42)
+        cells = cover_radius(46.5197, 6.6323, 10)
+        for _ in range(200):
+            lat = 46.5197 + random.uniform(-0.08, 0.08)
+            lng = 6.6323 + random.uniform(-0.12, 0.12)
+            if haversine_km(46.5197, 6.6323, [lat], [lng])[0] <= 10:
+                assert any(encode_geohash(lat, lng).startswith(cell) for cell in cells)
+
+    def test_adjacent_cells_are_merged(self):
+        """Test la fusion de préfixes contigus en un seul intervalle"""
+        assert cells_to_ranges(['u0k0', 'u0k1', 'u0k3']) == [('u0k0', 'u0k2'), ('u0k3', 'u0k4')]
+
+
+@pytest.mark.unit
+class TestNearest:
+    """Tests pour le classement par distance"""
+
+    def test_rank_by_distance_returns_true_nearest(self):
+        """Test que les k résultats sont exactement les plus proches dans le rayon"""
+        random.seed(7)
+        points = [_Point(46 + random.random(), 7 + random.random()) for _ in range(500)]
+        ranked = rank_by_distance(46.5, 7.5, points, 20, limit=10)
+
+        expected = sorted(
+            (haversine_km(46.5, 7.5, [p.latitude], [p.longitude])[0], i)
+            for i, p in enumerate(points)
+        )
+        expected = [points[i] for d, i in expected if d <= 20][:10]
+
+        assert [p for p, _ in ranked] == expected
+        assert all(d <= 20 for _, d in ranked)
+
+    def test_segment_distance_and_position(self):
+        """Test la distance au trajet et la position le long du trajet"""
+        distances, positions = segment_distance_km(
+            46.0, 6.0, 46.0, 7.0,
+            [46.0, 46.05, 46.0], [6.5, 6.5, 7.5]
+        )
+        length = haversine_km(46.0, 6.0, [46.0], [7.0])[0]
+
+        assert distances[0] < 0.5
+        assert 5.0 < distances[1] < 6.0
+        assert distances[2] == pytest.approx(haversine_km(46.0, 7.0, [46.0], [7.5])[0])
+        assert positions[0] == pytest.approx(length / 2, rel=0.01)
+        assert positions[2] == pytest.approx(length)
+
+
+@pytest.mark.unit
+class TestNearestQuery:
+    """Tests de la recherche des plus proches voisins en base"""
+
+    def test_radius_doubles_until_limit_is_reached(self, places_session):
+        """Test que les k plus proches sont trouvés en élargissant le rayon"""
+        random.seed(3)
+        points = [(46.5 + random.uniform(-0.5, 0.5), 6.6 + random.uniform(-0.5, 0.5)) for _ in range(300)]
+        places_session.add_all(
+            _Place(id=i, latitude=lat, longitude=lng, geohash=encode_geohash(lat, lng))
+            for i, (lat, lng) in enumerate(points)
+        )
+        places_session.commit()
+
+        query = _CountingQuery(places_session.query(_Place))
+        found = find_nearest(query, _Place, 46.5, 6.6, 30, 25, initial_radius_km=1)
+
+        distances = haversine_km(46.5, 6.6, [lat for lat, _ in points], [lng for _, lng in points])
+        expected = sorted(range(len(points)), key=lambda i: distances[i])[:25]
+        assert [place.id for place, _ in found] == expected
+        assert query.rounds > 1
+
+    def test_stops_at_max_distance(self, places_session):
+        """Test que la recherche s'arrête au rayon maximal même sans k résultats"""
+        places_session.add_all([
+            _Place(id=1, latitude=46.52, longitude=6.63, geohash=encode_geohash(46.52, 6.63)),
+            _Place(id=2, latitude=47.37, longitude=8.54, geohash=encode_geohash(47.37, 8.54))
+        ])
+        places_session.commit()
+
+        found = find_nearest(places_session.query(_Place), _Place, 46.5197, 6.6323, 50, 10)
+        assert [place.id for place, _ in found] == [1]
+
+    def test_backfill_indexes_located_rows(self, places_session):
+        """Test que les lignes antérieures à l'index deviennent trouvables"""
+        places_session.add_all([
+            _Place(id=1, latitude=46.52, longitude=6.63),
+            _Place(id=2, latitude=None, longitude=None),
+            _Place(id=3, latitude=46.53, longitude=6.64)
+        ])
+        places_session.commit()
+
+        assert find_nearest(places_session.query(_Place).filter(_Place.geohash.isnot(None)),
+                            _Place, 46.52, 6.63, 10, 5) == []
+        assert backfill_geohash(places_session, _Place, batch_size=1) == 2
+        assert places_session.get(_Place, 1).geohash == encode_geohash(46.52, 6.63)
+        assert places_session.get(_Place, 2).geohash is None
+        assert len(find_nearest(places_session.query(_Place), _Place, 46.52, 6.63, 10, 5)) == 2
+
+    def test_missing_column_is_added(self):
+        """Test la mise à niveau d'une table créée avant la colonne geohash"""
+        engine = create_engine('sqlite://')
+        with engine.begin() as connection:
+            connection.execute(text('CREATE TABLE places (id INTEGER PRIMARY KEY, latitude FLOAT, longitude FLOAT)'))
+            connection.execute(text('INSERT INTO places VALUES (1, 46.52, 6.63)'))
+
+        with Session(engine) as session:
+            assert ensure_geohash_index(session, [_Place]) == {'places': 1}
+            assert session.get(_Place, 1).geohash == encode_geohash(46.52, 6.63)
+
+
+@pytest.mark.unit
+class TestNearbyUsers:
+    """Tests de User.find_nearby_users sur la base de test"""
+
+    def test_nearest_active_users_in_order(self, app):
+        """Test l'ordre par distance, l'exclusion des comptes inactifs et la limite"""
+        from backend.extensions import db
+        from backend.models.user import User
+
+        positions = {'lausanne': (46.5197, 6.6323, True), 'morges': (46.5107, 6.4983, True),
+                     'renens': (46.5399, 6.5881, False), 'geneve': (46.2044, 6.1432, True),
+                     'zurich': (47.3769, 8.5417, True)}
+        with app.app_context():
+            users = [
+                User(username=f'nearby_{name}', email=f'{name}@example.com', password='Secret123!',
+                     latitude=lat, longitude=lng, is_active=active)
+                for name, (lat, lng, active) in positions.items()
+            ]
+            db.session.add_all(users)
+            db.session.commit()
+            try:
+                nearby = User.find_nearby_users(46.52, 6.63, max_distance_km=100, limit=3)
+                assert [user.username for user in nearby] == ['nearby_lausanne', 'nearby_morges', 'nearby_geneve']
+                assert nearby[0].distance < 1
+                assert all(user.geohash for user in nearby)
+            finally:
+                for user in users:
+                    db.session.delete(user)
+                db.session.commit()
+
+
+@pytest.mark.unit
+class TestRegions:
+    """Tests pour la recherche par polygone et région nommée"""
+
+    def test_polygon_with_hole(self):
+        """Test le point-dans-polygone vectorisé avec un trou"""
+        region = region_from_geojson({
+            'type': 'Polygon',
+            'coordinates': [
+                [[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]],
+                [[2, 2], [4, 2], [4, 4], [2, 4], [2, 2]]
+            ]
+        })
+        assert region.contains([5, 3, 11], [5, 3, 5]).tolist() == [True, False, False]
+
+    def test_named_region_lookup_ignores_accents(self):
+        """Test la recherche d'une région par nom ou alias"""
+        region = get_region('geneve')
+        assert region is get_region('Genf')
+        assert region.contains([46.2044], [6.1432])[0]
+        assert not region.contains([47.3769], [8.5417])[0]
+
+    def test_invalid_geometry_raises(self):
+        """Test qu'une géométrie non polygonale est refusée"""
+        with pytest.raises(RegionError):
+            region_from_geojson({'type': 'Point', 'coordinates': [6.1, 46.2]})
+
+    def test_lv95_conversion(self):
+        """Test la conversion des coordonnées suisses (point de référence swisstopo)"""
+        latitude, longitude = lv95_to_wgs84([2700000, 700000], [1100000, 100000])
+        assert latitude.tolist() == pytest.approx([46.04413, 46.04413], abs=1e-5)
+        assert longitude.tolist() == pytest.approx([8.73050, 8.73050], abs=1e-5)